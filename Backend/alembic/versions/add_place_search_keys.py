@@ -0,0 +1,46 @@
+"""Add placesearchkey table (normalized, indexed search keys for place)
+
+Revision ID: add_place_search_keys
+Revises: add_precomputed_recs
+Create Date: 2026-10-19
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_place_search_keys'
+down_revision: Union[str, Sequence[str], None] = 'add_precomputed_recs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'placesearchkey',
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('name_key', sa.String(), nullable=False),
+        sa.Column('province_key', sa.String(), nullable=True),
+        sa.Column('tags_key', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['place_id'], ['place.id'], ),
+        sa.PrimaryKeyConstraint('place_id')
+    )
+    op.create_index(op.f('ix_placesearchkey_name_key'), 'placesearchkey', ['name_key'], unique=False)
+    op.create_index(op.f('ix_placesearchkey_province_key'), 'placesearchkey', ['province_key'], unique=False)
+
+    # Tính khóa cho các place hiện có
+    from app.services.search_keys import upsert_search_keys
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, name, tags FROM place")).all()
+    upsert_search_keys(bind, ({"id": r.id, "name": r.name, "tags": json.loads(r.tags) if r.tags else []}
+                              for r in rows), with_tokens=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_placesearchkey_province_key'), table_name='placesearchkey')
+    op.drop_index(op.f('ix_placesearchkey_name_key'), table_name='placesearchkey')
+    op.drop_table('placesearchkey')
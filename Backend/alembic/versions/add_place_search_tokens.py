@@ -0,0 +1,43 @@
+"""Add placesearchtoken table (word tokens of place name / tags for indexed keyword search)
+
+Revision ID: add_place_search_tokens
+Revises: add_place_search_keys
+Create Date: 2026-10-19
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_place_search_tokens'
+down_revision: Union[str, Sequence[str], None] = 'add_place_search_keys'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'placesearchtoken',
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('field', sa.String(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['place_id'], ['place.id'], ),
+        sa.PrimaryKeyConstraint('token', 'field', 'place_id')
+    )
+    op.create_index(op.f('ix_placesearchtoken_place_id'), 'placesearchtoken', ['place_id'], unique=False)
+
+    # Tính token (và khóa) cho các place hiện có
+    from app.services.search_keys import upsert_search_keys
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, name, tags FROM place")).all()
+    upsert_search_keys(bind, ({"id": r.id, "name": r.name, "tags": json.loads(r.tags) if r.tags else []}
+                              for r in rows))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_placesearchtoken_place_id'), table_name='placesearchtoken')
+    op.drop_table('placesearchtoken')
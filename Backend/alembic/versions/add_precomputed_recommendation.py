@@ -0,0 +1,35 @@
+"""Add precomputedrecommendation table (offline home feed)
+
+Revision ID: add_precomputed_recs
+Revises: add_climate_coords, add_forum_tables
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+# Merge hai head hiện tại (climate/coords và forum) vào một nhánh
+revision: str = 'add_precomputed_recs'
+down_revision: Union[str, Sequence[str], None] = ('add_climate_coords', 'add_forum_tables')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'precomputedrecommendation',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('place_ids', sa.JSON(), nullable=True),
+        sa.Column('scores', sa.JSON(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('precomputedrecommendation')
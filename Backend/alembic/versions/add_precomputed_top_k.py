@@ -0,0 +1,29 @@
+"""Add top_k to precomputedrecommendation (list chỉ phục vụ request cùng top_k)
+
+Revision ID: add_precomputed_top_k
+Revises: add_place_search_tokens
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_precomputed_top_k'
+down_revision: Union[str, Sequence[str], None] = 'add_place_search_tokens'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # List cũ (top_k = 0) không khớp request nào -> fallback online cho tới lần chạy batch kế tiếp
+    op.add_column('precomputedrecommendation',
+                  sa.Column('top_k', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('precomputedrecommendation') as batch_op:
+        batch_op.drop_column('top_k')
@@ -0,0 +1,35 @@
+"""Add uploadedimage table (thumbnail WebP của ảnh upload, tra theo URL gốc)
+
+Revision ID: add_uploaded_image
+Revises: add_precomputed_top_k
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_uploaded_image'
+down_revision: Union[str, Sequence[str], None] = 'add_precomputed_top_k'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'uploadedimage',
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('sha256', sa.String(), nullable=False),
+        sa.Column('thumbnails', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('url')
+    )
+    op.create_index(op.f('ix_uploadedimage_sha256'), 'uploadedimage', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_uploadedimage_sha256'), table_name='uploadedimage')
+    op.drop_table('uploadedimage')
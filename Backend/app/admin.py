@@ -1,4 +1,3 @@
-from app.main import app
 from app.database import engine
 from app.config import settings
 
@@ -7,8 +6,11 @@ from sqladmin import Admin, ModelView
 
 
 from app.schemas import *
+from app.services.user_cache import invalidate_user
+from app.services.search_keys import sync_search_keys, upsert_search_keys
 
 from sqladmin.authentication import AuthenticationBackend
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
@@ -50,10 +52,31 @@ class UserAdmin(ModelView, model=User):
     column_list = [User.id, User.username, User.preferences]         # Add fields you want to see
     icon = "fa-solid fa-user"
 
+    # Sửa user (kể cả hashed_password) hoặc xóa user -> bỏ các token đang cache của user đó
+    async def after_model_change(self, data, model, is_created, request):
+        invalidate_user(model.id)
+
+    async def after_model_delete(self, model, request):
+        invalidate_user(model.id)
+
 class PlaceAdmin(ModelView, model=Place):
     column_list = [Place.id, Place.name, Place.tags] # Add fields you want to see
     icon = "fa-solid fa-map-pin"
 
+    # Sửa tên / tags -> tính lại khóa tìm kiếm; xóa place -> xóa khóa mồ côi
+    # (engine sync: chạy trong threadpool để không chặn event loop)
+    async def after_model_change(self, data, model, is_created, request):
+        place = {"id": model.id, "name": model.name, "tags": model.tags}
+        await run_in_threadpool(self._upsert_keys, place)
+
+    async def after_model_delete(self, model, request):
+        await run_in_threadpool(sync_search_keys, engine)
+
+    @staticmethod
+    def _upsert_keys(place):
+        with engine.begin() as conn:
+            upsert_search_keys(conn, [place])
+
 class RatingAdmin(ModelView, model=Rating):
     column_list = [Rating.id, Rating.user_id, Rating.place_id, Rating.score] # Add fields you want to see
     icon = "fa-solid fa-star"
@@ -70,10 +93,13 @@ class LikeAdmin(ModelView, model=Like):
 
 # Initialize Admin Interface
 # This hooks the admin panel to your App and Database
-admin = Admin(app, engine, authentication_backend=security_guard)
-
-admin.add_view(UserAdmin)
-admin.add_view(PlaceAdmin)
-admin.add_view(RatingAdmin)
-admin.add_view(CommentAdmin)
-admin.add_view(LikeAdmin)
\ No newline at end of file
+# (gọi trong lifespan của app.main: import app.main không phải load sqladmin)
+def setup_admin(app) -> Admin:
+    admin = Admin(app, engine, authentication_backend=security_guard)
+
+    admin.add_view(UserAdmin)
+    admin.add_view(PlaceAdmin)
+    admin.add_view(RatingAdmin)
+    admin.add_view(CommentAdmin)
+    admin.add_view(LikeAdmin)
+    return admin
\ No newline at end of file
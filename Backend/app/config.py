@@ -8,9 +8,8 @@ class Settings:
     GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 
 
+    # Chỉ chatbot cần key này; kiểm tra khi tạo Gemini client (app/routers/chatbot.py)
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        raise ValueError("No GEMINI_API_KEY found in environment variables")
 
 
     PROJECT_NAME = "Smart Tourism API"
@@ -21,8 +20,53 @@ class Settings:
     # Lấy thư mục cha của app/ (tức là thư mục Backend/)
     BACKEND_DIR = os.path.dirname(CURRENT_DIR)
     
-    # Nối với tên file database
-    DATABASE_PATH = os.path.join(BACKEND_DIR, "vietnamtravel.db")
+    # Nối với tên file database (override bằng env, vd: benchmark dùng file SQLite tạm)
+    DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(BACKEND_DIR, "vietnamtravel.db"))
+
+    # --- SQL instrumentation (app/db_instrumentation.py) ---
+    # Trả header X-DB-Query-Count / X-DB-Time-Ms (chỉ bật khi debug)
+    SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "0").lower() in ("1", "true", "yes")
+    # Query chậm hơn ngưỡng này (ms) được log kèm EXPLAIN QUERY PLAN
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+    # --- Upload (app/services/upload_service.py), serve tại /uploads ---
+    UPLOADS_DIR = os.getenv("UPLOADS_DIR", os.path.join(BACKEND_DIR, "uploads"))
+    MAX_AVATAR_BYTES = int(os.getenv("MAX_AVATAR_BYTES", str(5 * 1024 * 1024)))
+    MAX_COVER_BYTES = int(os.getenv("MAX_COVER_BYTES", str(10 * 1024 * 1024)))
+    MAX_POST_IMAGE_BYTES = int(os.getenv("MAX_POST_IMAGE_BYTES", str(10 * 1024 * 1024)))
+    # Cạnh dài nhất (px) của các thumbnail WebP
+    UPLOAD_THUMBNAIL_SIZES = [int(s) for s in os.getenv("UPLOAD_THUMBNAIL_SIZES", "160,480,1080").split(",") if s.strip()]
+    UPLOAD_THUMBNAIL_QUALITY = int(os.getenv("UPLOAD_THUMBNAIL_QUALITY", "80"))
+    THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+    
+    # --- Precomputed home feed (batch job) ---
+    # Sau TTL này, list tính sẵn bị coi là stale và /recommend fallback về online scoring
+    PRECOMPUTED_RECS_TTL_HOURS = float(os.getenv("PRECOMPUTED_RECS_TTL_HOURS", "24"))
+    # Số kết quả của list tính sẵn = top_k mà trang chủ gửi lên (frontend home.js: 12).
+    # Giới hạn đa dạng và số candidate phụ thuộc top_k nên request với top_k khác -> online scoring
+    PRECOMPUTED_RECS_TOP_K = int(os.getenv("PRECOMPUTED_RECS_TOP_K", "12"))
+
+    # --- Recommendation engine mặc định: "content" (TF-IDF + CF), "two_tower" (NumPy) hoặc "theme" (tỉnh + theme) ---
+    RECSYS_ENGINE = os.getenv("RECSYS_ENGINE", "content")
+
+    # --- Weight profiles của content-based engine (app/services/weight_profiles.py) ---
+    WEIGHT_PROFILES_PATH = os.getenv("WEIGHT_PROFILES_PATH", os.path.join(CURRENT_DIR, "weight_profiles.json"))
+    # Khoảng thời gian (s) tối thiểu giữa hai lần kiểm tra file đã đổi chưa
+    WEIGHT_PROFILES_CHECK_SECONDS = float(os.getenv("WEIGHT_PROFILES_CHECK_SECONDS", "2"))
+
+    # Số thread chạy RecSys scoring (CPU-heavy) ngoài event loop
+    RECSYS_EXECUTOR_WORKERS = int(os.getenv("RECSYS_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # Số thread cho sync routes (anyio threadpool) trong mỗi worker; mặc định của anyio là 40
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "40"))
+
+    # --- Matrix-factorization CF (app/routers/cf_model.py) ---
+    CF_MODEL_PATH = os.getenv("CF_MODEL_PATH", os.path.join(CURRENT_DIR, "routers", "cf_factors.npz"))
+    CF_THREADS = int(os.getenv("CF_THREADS", str(os.cpu_count() or 1)))
+    # Vector fold-in của user mới được cache tới lần fit kế tiếp / tương tác mới; TTL chặn
+    # vector cũ ở các worker khác (cache theo từng process)
+    CF_FOLD_IN_TTL_SECONDS = float(os.getenv("CF_FOLD_IN_TTL_SECONDS", "300"))
 
     
     # --- Cấu hình bảo mật ---
@@ -30,4 +74,13 @@ class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY", "super_secret_key_sigma_alpha_123")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days for development
+
+    # --- bcrypt: cost factor + số process hash/verify (app/security.py) ---
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+    # --- Cache token -> user (app/services/user_cache.py) ---
+    # Cache theo từng process: với nhiều worker, snapshot cũ có thể sống tới hết TTL
+    AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
 settings = Settings()
\ No newline at end of file
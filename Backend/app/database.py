@@ -1,4 +1,8 @@
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Dict, Iterable, Optional
+
+from sqlmodel import SQLModel, create_engine, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.config import settings
 
 # 1. Setup the Database URL (SQLite in this case)
@@ -9,6 +13,15 @@ sqlite_url = f"sqlite:///{settings.DATABASE_PATH}"
 # echo=True prints SQL statements to the console (good for debugging)
 engine = create_engine(sqlite_url, echo=False)
 
+# 2b. Async Engine (aiosqlite) cho các router async def
+# Không block event loop khi chờ SQLite -> một uvicorn worker phục vụ được nhiều request song song
+async_sqlite_url = f"sqlite+aiosqlite:///{settings.DATABASE_PATH}"
+async_engine = create_async_engine(async_sqlite_url, echo=False)
+
+# expire_on_commit=False: object vẫn đọc được attribute sau commit
+# (lazy load trong async context sẽ raise MissingGreenlet)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # 3. The Function to Create Tables
 def create_db_and_tables():
     # This looks at all classes with table=True and creates them in the DB
@@ -17,4 +30,17 @@ def create_db_and_tables():
 # 4. The Dependency for FastAPI
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+# 5. Async Dependency (dùng trong các route async def)
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+# 6. Load nhiều row theo id bằng một query IN (thay vì await session.get từng row trong vòng lặp)
+async def load_by_ids(session: AsyncSession, model, ids: Iterable[Optional[int]]) -> Dict[int, SQLModel]:
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return {}
+    rows = (await session.exec(select(model).where(model.id.in_(ids)))).all()
+    return {row.id: row for row in rows}
@@ -0,0 +1,133 @@
+"""
+Đếm SQL query + tổng thời gian DB theo request, log slow query kèm EXPLAIN QUERY PLAN.
+
+Dùng SQLAlchemy event (before/after_cursor_execute) trên engine sync và
+async_engine.sync_engine nên bắt được mọi query, kể cả query trong
+session.run_sync / recsys executor (chạy với copy_context của request).
+
+- track_queries(): gắn QueryStats mới vào contextvar (middleware trong app.main)
+- record_queries(): recorder toàn cục, không phụ thuộc context - cho test
+  (TestClient chạy app trong thread khác) và script đo N+1
+- settings.SQL_DEBUG_HEADERS: middleware trả X-DB-Query-Count / X-DB-Time-Ms
+- settings.SLOW_QUERY_MS: query chậm hơn ngưỡng được in ra cùng query plan
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.metrics import db_queries_total
+
+# Đánh dấu connection đang chạy EXPLAIN (không đếm / không explain đệ quy)
+_EXPLAINING = "_db_instrumentation_explaining"
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+class QueryStats:
+    """Số query + thời gian DB; statements chỉ giữ lại khi record=True"""
+    __slots__ = ("count", "total_seconds", "statements")
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: Optional[List[str]] = [] if record else None
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def add(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_seconds += elapsed
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+current_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "current_query_stats", default=None)
+
+_recorders: List[QueryStats] = []
+_recorders_lock = threading.Lock()
+
+
+@contextmanager
+def track_queries(record: bool = False):
+    """Query stats cho context hiện tại (một request)"""
+    stats = QueryStats(record)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+@contextmanager
+def record_queries():
+    """Ghi MỌI query trong process (kể cả ở thread khác) trong khối with"""
+    stats = QueryStats(record=True)
+    with _recorders_lock:
+        _recorders.append(stats)
+    try:
+        yield stats
+    finally:
+        with _recorders_lock:
+            _recorders.remove(stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if conn.info.get(_EXPLAINING):
+        return
+
+    db_queries_total.inc()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    if _recorders:
+        with _recorders_lock:
+            for recorder in _recorders:
+                recorder.add(statement, elapsed)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS and not executemany:
+        _log_slow_query(conn, statement, parameters, elapsed)
+
+
+def _log_slow_query(conn, statement, parameters, elapsed):
+    plan = []
+    if statement.lstrip().upper().startswith(_EXPLAINABLE):
+        conn.info[_EXPLAINING] = True
+        try:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plan = [row[-1] for row in rows]
+        except Exception as e:
+            plan = [f"(EXPLAIN failed: {e})"]
+        finally:
+            conn.info[_EXPLAINING] = False
+
+    print(f"🐢 Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}")
+    for detail in plan:
+        print(f"     plan: {detail}")
+
+
+def _handle_error(exception_context):
+    # Query lỗi không đi qua after_cursor_execute: bỏ start time đã push
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    """Gắn listener vào một Engine sync (AsyncEngine: truyền async_engine.sync_engine)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
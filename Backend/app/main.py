@@ -1,13 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import time
 
 from app.config import settings
 
 from app.routers import auth
 
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, engine, async_engine
+
+from app import metrics
+from app.db_instrumentation import instrument_engine, track_queries
 
 from app.routers import recommendation, rating, chatbot, comment, like
 
@@ -25,13 +30,30 @@ async def lifespan(app: FastAPI):
     create_db_and_tables()
     print("Startup: Database tables created!")
     
+    # Bù khóa tìm kiếm chuẩn hóa cho place chưa có (DB tạo trước bảng placesearchkey)
+    from app.services.search_keys import sync_search_keys
+    sync_search_keys()
+    
     # Khởi tạo Content-Based RecSys model
+    # (chạy gunicorn.conf.py: đã build trong master trước khi fork -> return ngay)
     from app.routers.recsysmodel import initialize_recsys
     initialize_recsys()
     print("Startup: Content-Based RecSys model initialized!")
     
+    # Admin interface (/admin): import sqladmin lúc startup thay vì lúc import app.main
+    from app.admin import setup_admin
+    setup_admin(app)
+    
+    # Giới hạn thread cho các route sync def trong worker này
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.SERVER_THREADS
+    
     yield
     # This runs when the app stops (optional)
+    from app.security import password_pool
+    password_pool.shutdown()
+    from app.services.upload_service import upload_service
+    upload_service.shutdown()
     print("Shutdown: App is stopping")
 
 # Khởi tạo bảng users khi chạy app
@@ -69,10 +91,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files để serve uploaded avatars
-uploads_dir = os.path.join(settings.BACKEND_DIR, "uploads")
-os.makedirs(uploads_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+# Metrics: latency theo route + số SQL query / thời gian DB mỗi request
+# (app/metrics.py, app/db_instrumentation.py)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    with track_queries() as stats:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            if settings.SQL_DEBUG_HEADERS:
+                response.headers["X-DB-Query-Count"] = str(stats.count)
+                response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.2f}"
+            return response
+        finally:
+            # Label theo route template (/api/v1/place/{place_id}) để không nổ cardinality
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            metrics.http_request_duration.observe(
+                time.perf_counter() - start, method=request.method, route=route, status=status_code)
+            metrics.db_queries_per_request.observe(stats.count, route=route)
+            metrics.db_time_per_request.observe(stats.total_seconds, route=route)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# Mount static files để serve ảnh upload (avatar, cover, post + thumbnails)
+os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
+app.mount("/uploads", StaticFiles(directory=settings.UPLOADS_DIR), name="uploads")
 
 
 @app.get("/")
@@ -102,9 +154,6 @@ app.include_router(place.router, prefix="/api/v1/place", tags=["Place Details"])
 
 app.include_router(forum.router)                                                        # forum/posts
 
-# admin interface
-from app.admin import * 
-
 # Lệnh chạy (nếu chạy trực tiếp python main.py)
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,221 @@
+"""
+Metrics cho /metrics (Prometheus text format 0.0.4), không cần thêm thư viện.
+
+- http_request_duration_seconds{method,route,status}: latency theo route template
+- db_queries_per_request{route}, db_time_per_request_seconds{route}, db_queries_total:
+  số SQL query / thời gian DB mỗi request (đếm trong app/db_instrumentation.py)
+- llm_request_duration_seconds{provider} + llm_errors_total{provider}: Groq / Gemini
+- recsys_stage_duration_seconds{stage}: từng bước của recommend_content_based
+- recsys_weight_profile_requests_total{profile}: số request theo weight profile (A/B test)
+- cache hit/miss (auth cache, precomputed feed) + queue depth của password pool,
+  đọc tại thời điểm scrape
+
+Mỗi process có registry riêng: chạy gunicorn nhiều worker thì Prometheus scrape
+thấy số liệu của worker đang trả lời request đó.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count theo bucket..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return int(state[-2]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    le = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {count}")
+                inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-2]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        # Callback trả về [(name, type, help, {labels}, value)] đọc lúc scrape (cache stats...)
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, dict, float]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, dict, float]]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        seen = set()
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, labels, value in samples:
+                if name not in seen:
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    seen.add(name)
+                names = tuple(labels)
+                lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL queries executed while handling one request", ("route",),
+    buckets=QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Total SQL execution time while handling one request", ("route",)))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "SQL queries executed (kể cả ngoài request)"))
+llm_request_duration = registry.register(Histogram(
+    "llm_request_duration_seconds", "LLM API call latency", ("provider",)))
+llm_errors = registry.register(Counter(
+    "llm_errors_total", "LLM API calls that raised", ("provider",)))
+recsys_stage_duration = registry.register(Histogram(
+    "recsys_stage_duration_seconds", "Time spent in each stage of recommend_content_based", ("stage",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+recsys_profile_requests = registry.register(Counter(
+    "recsys_weight_profile_requests_total", "/recommend requests per weight profile", ("profile",)))
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")))
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+@contextmanager
+def llm_timer(provider: str):
+    """Đo latency + đếm lỗi của một LLM call"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        llm_errors.inc(provider=provider)
+        raise
+    finally:
+        llm_request_duration.observe(time.perf_counter() - start, provider=provider)
+
+
+class StageTimer:
+    """Đo các bước liên tiếp: lap(stage) ghi thời gian từ lần lap trước"""
+
+    def __init__(self, histogram: Histogram = recsys_stage_duration):
+        self.histogram = histogram
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.histogram.observe(now - self._last, stage=stage)
+        self._last = now
+
+
+def _runtime_collector():
+    """Cache hit ratio + password pool queue đọc lúc scrape"""
+    from app.security import password_pool
+    from app.services.user_cache import user_cache
+
+    auth = user_cache.stats()
+    yield ("auth_cache_entries", "gauge", "Token -> user cache entries", {}, auth["entries"])
+    yield ("auth_cache_hit_ratio", "gauge", "Token -> user cache hit ratio", {}, auth["hit_ratio"])
+    for result in ("hit", "miss"):
+        yield ("auth_cache_requests_total", "counter", "Token -> user cache lookups",
+               {"result": result}, auth["hits" if result == "hit" else "misses"])
+
+    pool = password_pool.stats()
+    yield ("password_pool_in_flight", "gauge", "bcrypt jobs submitted and not finished", {}, pool["in_flight"])
+    yield ("password_pool_queue_depth", "gauge", "bcrypt jobs waiting for a worker", {}, pool["queue_depth"])
+    yield ("password_pool_completed_total", "counter", "bcrypt jobs completed", {}, pool["completed"])
+
+    for cache in sorted({key[0] for key in cache_requests._values}):
+        hits = cache_requests.value(cache=cache, result="hit")
+        total = hits + cache_requests.value(cache=cache, result="miss")
+        yield ("cache_hit_ratio", "gauge", "Hit ratio per cache", {"cache": cache},
+               round(hits / total, 4) if total else 0.0)
+
+
+registry.add_collector(_runtime_collector)
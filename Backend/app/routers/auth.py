@@ -1,17 +1,16 @@
 from datetime import timedelta
 from typing import Annotated
 import os
-import shutil
-from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Header, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from jose import JWTError, jwt
 
 # Import your configuration and security utils
 from app.config import settings
-from app.security import verify_password, get_password_hash, create_access_token
+from app.security import verify_password_async, get_password_hash_async, create_access_token, password_pool
 
 # Import your SQLModel classes
 from app.schemas import User, UserCreate, UserResponse, Token, UserProfileUpdate
@@ -19,33 +18,56 @@ from app.schemas import User, UserCreate, UserResponse, Token, UserProfileUpdate
 # --- DATABASE DEPENDENCY ---
 # You likely have this in a separate file (e.g., database.py).
 # If so, import it: from app.database import get_session, engine
-from app.database import get_session
+from app.database import get_async_session
 
 from app.services.db_service import create_user, get_user_by_username
+from app.services.user_cache import user_cache, invalidate_user
+from app.services.upload_service import upload_service, record_upload, load_thumbnails
 
 
 # --- ROUTER SETUP ---
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
+
+async def user_response(user: User, session: AsyncSession) -> UserResponse:
+    """UserResponse kèm thumbnail WebP của avatar / cover (bảng UploadedImage, một query)"""
+    thumbnails = await session.run_sync(
+        lambda sync_session: load_thumbnails(sync_session, [user.avatar_url, user.cover_image_url])
+    )
+    return UserResponse(
+        id=user.id,
+        username=user.username,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url,
+        cover_image_url=user.cover_image_url,
+        bio=user.bio,
+        location=user.location,
+        preferences=user.preferences,
+        avatar_thumbnails=thumbnails.get(user.avatar_url, {}),
+        cover_thumbnails=thumbnails.get(user.cover_image_url, {})
+    )
+
 # ==========================================
 # 1. REGISTER
 # ==========================================
 @router.post("/register", response_model=UserResponse)
-def register(
+async def register(
     user_input: UserCreate, 
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 1. Check if user exists
     # SQLModel: Use select() + session.exec()
     statement = select(User).where(User.username == user_input.username)
-    existing_user = session.exec(statement).first()
+    existing_user = (await session.exec(statement)).first()
     
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    # 2. Hash password
-    hashed_pw = get_password_hash(user_input.password)
+    # 2. Hash password (bcrypt chạy trên process pool riêng)
+    # Trả connection về pool trước khi chờ bcrypt: login storm không được giữ hết connection
+    await session.close()
+    hashed_pw = await get_password_hash_async(user_input.password)
     
     # 3. Create DB Instance (User Table)
     # Note: We map UserCreate fields to User Table fields here
@@ -56,8 +78,8 @@ def register(
     
     # 4. Save to DB
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user) # Important! Gets the generated 'id' back from DB
+    await session.commit()
+    await session.refresh(db_user) # Important! Gets the generated 'id' back from DB
     
     # 5. Return (FastAPI converts db_user object to UserResponse schema)
     return db_user
@@ -66,17 +88,19 @@ def register(
 # 2. LOGIN
 # ==========================================
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 1. Find user by username
     statement = select(User).where(User.username == form_data.username)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
+    # Trả connection về pool trước khi chờ bcrypt (xem register)
+    await session.close()
     
     # 2. Validate User and Password
     # Note: access attributes with dot notation (user.hashed_password), not dict ['key']
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -94,9 +118,36 @@ def login(
 # ==========================================
 # 3. GET CURRENT USER (Dependency)
 # ==========================================
+async def resolve_token_user(token: str, session: AsyncSession) -> User | None:
+    """
+    Token -> User. Token "nóng" được phục vụ từ user_cache (không jwt.decode, không query DB).
+    Cache hit hay miss đều trả về cùng một loại object: bản copy detached từ snapshot
+    (không có hashed_password, không gắn với session). Route nào cần sửa user phải load
+    lại bằng session.get(User, current_user.id) rồi gọi invalidate_user.
+    """
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached.to_user()
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+
+    # We query the DB to make sure the user still exists and to get their ID
+    statement = select(User).where(User.username == username)
+    user = (await session.exec(statement)).first()
+    if user is None:
+        return None
+
+    return user_cache.put(token, payload, user).to_user()
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ) -> User:
     
     credentials_exception = HTTPException(
@@ -109,19 +160,8 @@ async def get_current_user(
     if not token:
         raise credentials_exception
     
-    try:
-        # 1. Decode Token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    # 2. Fetch User from DB
-    # We query the DB to make sure the user still exists and to get their ID
-    statement = select(User).where(User.username == username)
-    user = session.exec(statement).first()
+    # Decode token + fetch user (qua cache)
+    user = await resolve_token_user(token, session)
     
     if user is None:
         raise credentials_exception
@@ -131,7 +171,7 @@ async def get_current_user(
 
 async def get_current_user_optional(
     request: Request,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ) -> User | None:
     """
     Tương tự get_current_user nhưng trả về None thay vì raise exception
@@ -154,15 +194,8 @@ async def get_current_user_optional(
         
         token = parts[1]
         
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            print("❌ No username in token")
-            return None
-        
-        # Fetch User from DB
-        statement = select(User).where(User.username == username)
-        user = session.exec(statement).first()
+        # Decode token + fetch user (qua cache)
+        user = await resolve_token_user(token, session)
         
         print(f"✅ User found: {user.username if user else None}")
         return user  # Return User object hoặc None
@@ -176,10 +209,11 @@ async def get_current_user_optional(
 # ==========================================
 @router.get("/profile", response_model=UserResponse)
 async def get_profile(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Lấy thông tin profile của user hiện tại"""
-    return current_user
+    return await user_response(current_user, session)
 
 
 # ==========================================
@@ -189,10 +223,13 @@ async def get_profile(
 async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Cập nhật profile của user (display_name, avatar_url, cover_image_url, bio, location)"""
     
+    # current_user là bản detached từ user_cache -> load bản gắn với session
+    current_user = await session.get(User, current_user.id)
+    
     # Update fields nếu được cung cấp
     if profile_data.display_name is not None:
         current_user.display_name = profile_data.display_name
@@ -211,10 +248,11 @@ async def update_profile(
     
     # Save to database
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_user(current_user.id)
     
-    return current_user
+    return await user_response(current_user, session)
 
 
 # ==========================================
@@ -224,69 +262,28 @@ async def update_profile(
 async def upload_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    """Upload avatar image và trả về URL"""
-    
-    # Kiểm tra file type
-    allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Allowed types: {', '.join(allowed_types)}"
-        )
-    
-    # Kiểm tra file size (max 5MB)
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-    for chunk in iter(lambda: file.file.read(chunk_size), b''):
-        file_size += len(chunk)
-        if file_size > 5 * 1024 * 1024:  # 5MB
-            raise HTTPException(status_code=400, detail="File size too large. Max 5MB")
+    """Upload avatar image và trả về URL (+ URL thumbnail WebP)"""
     
-    # Reset file pointer
-    file.file.seek(0)
+    # Kiểm tra type + size (max 5MB) trong lúc stream, lưu theo sha256 nội dung
+    stored = await upload_service.save(file, "avatars", settings.MAX_AVATAR_BYTES)
+    avatar_url = stored.url
     
-    # Tạo thư mục uploads nếu chưa có
-    upload_dir = Path(settings.BACKEND_DIR) / "uploads" / "avatars"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Tạo tên file unique: user_id_timestamp.extension
-    import time
-    file_extension = file.filename.split('.')[-1]
-    unique_filename = f"user_{current_user.id}_{int(time.time())}.{file_extension}"
-    file_path = upload_dir / unique_filename
-    
-    # Lưu file
-    try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-    
-    # Tạo URL để truy cập file
-    # Giả sử backend serve static files tại /uploads
-    avatar_url = f"/uploads/avatars/{unique_filename}"
-    
-    # Update user's avatar_url
+    # Update user's avatar_url (load bản gắn với session, bỏ snapshot trong cache)
+    current_user = await session.get(User, current_user.id)
     current_user.avatar_url = avatar_url
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.run_sync(lambda sync_session: record_upload(sync_session, stored))
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_user(current_user.id)
     
     return {
         "message": "Avatar uploaded successfully",
         "avatar_url": avatar_url,
-        "user": UserResponse(
-            id=current_user.id,
-            username=current_user.username,
-            display_name=current_user.display_name,
-            avatar_url=current_user.avatar_url,
-            cover_image_url=current_user.cover_image_url,
-            bio=current_user.bio,
-            location=current_user.location,
-            preferences=current_user.preferences
-        )
+        "thumbnails": stored.thumbnails,
+        "user": await user_response(current_user, session)
     }
 
 
@@ -297,70 +294,35 @@ async def upload_avatar(
 async def upload_cover(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    """Upload cover image và trả về URL"""
+    """Upload cover image và trả về URL (+ URL thumbnail WebP)"""
     
-    # Kiểm tra file type
-    allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Allowed types: {', '.join(allowed_types)}"
-        )
-    
-    # Kiểm tra file size (max 10MB cho cover image)
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-    for chunk in iter(lambda: file.file.read(chunk_size), b''):
-        file_size += len(chunk)
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="File size too large. Max 10MB")
-    
-    # Reset file pointer
-    file.file.seek(0)
-    
-    # Tạo thư mục uploads nếu chưa có
-    upload_dir = Path(settings.BACKEND_DIR) / "uploads" / "covers"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Tạo tên file unique: cover_user_id_timestamp.extension
-    import time
-    file_extension = file.filename.split('.')[-1]
-    unique_filename = f"cover_{current_user.id}_{int(time.time())}.{file_extension}"
-    file_path = upload_dir / unique_filename
-    
-    # Lưu file
-    try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    # Kiểm tra type + size (max 10MB cho cover image) trong lúc stream
+    stored = await upload_service.save(file, "covers", settings.MAX_COVER_BYTES)
+    cover_url = stored.url
     
-    # Tạo URL để truy cập file
-    cover_url = f"/uploads/covers/{unique_filename}"
-    
-    # Update user's cover_image_url
+    # Update user's cover_image_url (load bản gắn với session, bỏ snapshot trong cache)
+    current_user = await session.get(User, current_user.id)
     current_user.cover_image_url = cover_url
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.run_sync(lambda sync_session: record_upload(sync_session, stored))
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_user(current_user.id)
     
     return {
         "message": "Cover image uploaded successfully",
         "cover_image_url": cover_url,
-        "user": UserResponse(
-            id=current_user.id,
-            username=current_user.username,
-            display_name=current_user.display_name,
-            avatar_url=current_user.avatar_url,
-            cover_image_url=current_user.cover_image_url,
-            bio=current_user.bio,
-            location=current_user.location,
-            preferences=current_user.preferences
-        )
+        "thumbnails": stored.thumbnails,
+        "user": await user_response(current_user, session)
     }
 
-    
 
-    
\ No newline at end of file
+# ==========================================
+# 8. DEBUG: PASSWORD HASH POOL
+# ==========================================
+@router.get("/debug/password-pool")
+async def get_password_pool_stats():
+    """Queue depth / latency của process pool chạy bcrypt"""
+    return password_pool.stats()
@@ -0,0 +1,421 @@
+# ==========================================
+# MATRIX FACTORIZATION COLLABORATIVE FILTERING
+# Implicit-feedback ALS (Hu, Koren & Volinsky 2008) trên Rating + Like
+# ==========================================
+#
+# Ma trận R (users x places) lưu "strength" của tương tác:
+#   - Rating.score / 5            (view time, comment, like... đã gộp vào score)
+#   - Like      -> +LIKE_STRENGTH
+#   - Dislike   -> loại bỏ cặp (user, place) khỏi tập positive
+# Confidence c_ui = 1 + ALPHA * r_ui, preference p_ui = 1 nếu r_ui > 0.
+#
+# Mỗi nửa vòng ALS giải (YᵀY + Yᵀ(Cu - I)Y + λI) x_u = Yᵀ Cu p_u cho mọi user u
+# bằng conjugate gradient (warm start, CG_STEPS bước) thay vì nghịch đảo k x k.
+# Thay vì loop Python từng user, các user được gom thành block theo số nonzero
+# và CG chạy vectorized trên cả block (matmul + CSR @ dense). Các block chạy
+# song song trên ThreadPoolExecutor (BLAS/scipy nhả GIL).
+#
+# User chưa có trong bảng factor được fold-in (một lần giải k x k) ở request đầu tiên;
+# vector được cache tới lần fit / reload kế tiếp hoặc khi user có tương tác mới
+# (invalidate_user_vector), tối đa CF_FOLD_IN_TTL_SECONDS vì cache nằm riêng từng process.
+#
+# Train offline:   python -m app.routers.cf_model --save
+# Benchmark:       python -m app.routers.cf_model --benchmark 100000 50000
+#
+# Known gap: fit đầy đủ 100k users x 50k places (1.3M tương tác, 32 factors, 8 vòng)
+# mất ~12s trên 1 core (tỉ lệ gần tuyến tính theo CF_THREADS). Fit chỉ chạy offline /
+# lúc khởi động khi chưa có CF_MODEL_PATH, không chạy theo request; catalogue cỡ đó nên
+# train bằng --save rồi để server load factors.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.schemas import Rating, Like
+
+# --- Hyperparameters ---
+FACTORS = 32
+REGULARIZATION = 0.05
+ALPHA = 20.0
+ITERATIONS = 8
+CG_STEPS = 3  # Số bước conjugate gradient mỗi nửa vòng (warm start nên 3 bước là đủ)
+LIKE_STRENGTH = 1.5
+NNZ_PER_BLOCK = 262144  # Số nonzero mỗi block song song (bộ nhớ ~ NNZ_PER_BLOCK * FACTORS * 4 bytes)
+
+# --- Model state (lazy, giống recsysmodel) ---
+user_factors = None   # float32 (n_users, FACTORS)
+item_factors = None   # float32 (n_items, FACTORS)
+user_index = None     # {user_id: row}
+item_ids = None       # np.ndarray place_id theo thứ tự cột
+item_index = None     # {place_id: col}
+_item_gram = None     # YᵀY cache cho fold-in
+_folded: Dict[int, Tuple[Optional[np.ndarray], float]] = {}  # {user_id: (vector, hết hạn lúc)}
+_folded_lock = threading.Lock()
+
+
+# ==========================================
+# 1. LOAD INTERACTIONS
+# ==========================================
+
+def load_interactions():
+    """
+    Đọc Rating + Like từ DB thành 3 mảng song song (user_ids, place_ids, strengths).
+    Các cặp bị dislike bị loại khỏi tập positive.
+    """
+    from app.database import engine
+
+    strength = {}
+    disliked = set()
+    with Session(engine) as session:
+        for user_id, place_id, score in session.exec(
+            select(Rating.user_id, Rating.place_id, Rating.score)
+        ).all():
+            if score and score > 0:
+                strength[(user_id, place_id)] = strength.get((user_id, place_id), 0.0) + score / 5.0
+
+        for user_id, place_id, is_like in session.exec(
+            select(Like.user_id, Like.place_id, Like.is_like).where(Like.place_id.isnot(None))
+        ).all():
+            if is_like:
+                strength[(user_id, place_id)] = strength.get((user_id, place_id), 0.0) + LIKE_STRENGTH
+            else:
+                disliked.add((user_id, place_id))
+
+    pairs = [(u, p, s) for (u, p), s in strength.items() if (u, p) not in disliked and s > 0]
+    if not pairs:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+    users, places, strengths = zip(*pairs)
+    return (
+        np.asarray(users, dtype=np.int64),
+        np.asarray(places, dtype=np.int64),
+        np.asarray(strengths, dtype=np.float32),
+    )
+
+
+def build_confidence_matrix(users, places, strengths, all_item_ids=None):
+    """
+    Map id -> index và tạo CSR (n_users x n_items) chứa ALPHA * r_ui (= c_ui - 1).
+    all_item_ids: nếu có, giữ đủ cột cho mọi place (kể cả place chưa có tương tác).
+    """
+    uniq_users, user_rows = np.unique(users, return_inverse=True)
+    if all_item_ids is not None:
+        uniq_items = np.unique(np.concatenate([np.asarray(all_item_ids, dtype=np.int64), places]))
+    else:
+        uniq_items = np.unique(places)
+    item_cols = np.searchsorted(uniq_items, places)
+
+    Cui = sp.csr_matrix(
+        (ALPHA * strengths, (user_rows, item_cols)),
+        shape=(len(uniq_users), len(uniq_items)),
+        dtype=np.float32,
+    )
+    Cui.sum_duplicates()
+    return Cui, uniq_users, uniq_items
+
+
+# ==========================================
+# 2. ALS SOLVER (vectorized theo block)
+# ==========================================
+
+def _row_blocks(indptr, nnz_per_block):
+    """Chia rows thành các block liên tiếp có tổng nonzero ~ nnz_per_block"""
+    n_rows = len(indptr) - 1
+    blocks = []
+    start = 0
+    while start < n_rows:
+        target = indptr[start] + nnz_per_block
+        end = int(np.searchsorted(indptr, target, side='right')) - 1
+        end = min(max(end, start + 1), n_rows)
+        blocks.append((start, end))
+        start = end
+    return blocks
+
+
+def _cg_block(Cui, Y, gram, X, start, end, cg_steps):
+    """
+    Conjugate gradient (warm start từ X hiện tại) cho rows [start, end) của Cui.
+    Toán tử A_u x = (YᵀY + λI) x + Σ_i (c_ui - 1) (y_i · x) y_i được áp dụng cho
+    cả block cùng lúc: phần dense là một phép matmul, phần sparse là một phép
+    CSR @ dense, không có vòng lặp Python theo từng user.
+    """
+    indptr = Cui.indptr
+    lo, hi = indptr[start], indptr[end]
+    n_rows = end - start
+
+    local_indptr = indptr[start:end + 1] - lo
+    cols = Cui.indices[lo:hi]
+    conf = Cui.data[lo:hi]                                   # c_ui - 1
+    rows = np.repeat(np.arange(n_rows), np.diff(local_indptr))
+    Yc = Y[cols]                                             # (nnz, k)
+    shape = (n_rows, Y.shape[0])
+
+    def apply_A(P):
+        dots = np.einsum('ij,ij->i', P[rows], Yc)
+        sparse_part = sp.csr_matrix((conf * dots, cols, local_indptr), shape=shape) @ Y
+        return P @ gram + sparse_part
+
+    # b = Σ c_ui y_i  (p_ui = 1)
+    b = sp.csr_matrix((1.0 + conf, cols, local_indptr), shape=shape) @ Y
+
+    x = X[start:end]
+    r = b - apply_A(x)
+    p = r.copy()
+    rs_old = np.einsum('ij,ij->i', r, r)
+
+    for _ in range(cg_steps):
+        active = rs_old > 1e-12
+        if not active.any():
+            break
+        Ap = apply_A(p)
+        pAp = np.einsum('ij,ij->i', p, Ap)
+        alpha = np.where(active, rs_old / np.where(pAp > 0, pAp, 1.0), 0.0).astype(np.float32)
+        x += alpha[:, None] * p
+        r -= alpha[:, None] * Ap
+        rs_new = np.einsum('ij,ij->i', r, r)
+        beta = np.where(active, rs_new / np.where(rs_old > 0, rs_old, 1.0), 0.0).astype(np.float32)
+        p = r + beta[:, None] * p
+        rs_old = rs_new
+
+    X[start:end] = x
+
+
+def _least_squares(Cui, Y, X, regularization, pool, cg_steps=CG_STEPS):
+    """Một nửa vòng ALS: cố định Y, cập nhật X (in-place) cho toàn bộ rows của Cui"""
+    k = Y.shape[1]
+    gram = (Y.T @ Y + regularization * np.eye(k, dtype=np.float32)).astype(np.float32)
+
+    blocks = _row_blocks(Cui.indptr, NNZ_PER_BLOCK)
+    list(pool.map(lambda blk: _cg_block(Cui, Y, gram, X, blk[0], blk[1], cg_steps), blocks))
+    return X
+
+
+def train_als(Cui, factors=FACTORS, regularization=REGULARIZATION, iterations=ITERATIONS,
+              num_threads: Optional[int] = None, random_state=42):
+    """
+    Train implicit ALS trên confidence matrix Cui (CSR, n_users x n_items, data = c_ui - 1).
+
+    Returns:
+        (user_factors, item_factors) dạng float32
+    """
+    rng = np.random.default_rng(random_state)
+    n_users, n_items = Cui.shape
+    X = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+    Y = (rng.standard_normal((n_items, factors)) * 0.01).astype(np.float32)
+
+    Cui = Cui.tocsr().astype(np.float32)
+    Ciu = Cui.T.tocsr()
+    num_threads = num_threads or settings.CF_THREADS
+
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        for _ in range(iterations):
+            _least_squares(Cui, Y, X, regularization, pool)
+            _least_squares(Ciu, X, Y, regularization, pool)
+
+    return X, Y
+
+
+# ==========================================
+# 3. FOLD-IN (incremental cho user mới)
+# ==========================================
+
+def fold_in_user(place_ids, strengths) -> Optional[np.ndarray]:
+    """
+    Tính user vector cho user chưa có trong model mà không cần train lại:
+    giải đúng một phương trình ALS với item_factors cố định.
+    """
+    if item_factors is None:
+        return None
+
+    cols, conf = [], []
+    for pid, s in zip(place_ids, strengths):
+        col = item_index.get(pid)
+        if col is not None and s > 0:
+            cols.append(col)
+            conf.append(ALPHA * s)
+    if not cols:
+        return None
+
+    Yi = item_factors[cols]
+    conf = np.asarray(conf, dtype=np.float32)
+    A = _item_gram + (Yi * conf[:, None]).T @ Yi
+    b = (Yi * (1.0 + conf)[:, None]).sum(axis=0)
+    return np.linalg.solve(A, b).astype(np.float32)
+
+
+def _load_user_interactions(user_id: int):
+    """Strength theo place cho một user (cùng quy tắc với load_interactions)"""
+    from app.database import engine
+
+    strength = {}
+    disliked = set()
+    with Session(engine) as session:
+        for place_id, score in session.exec(
+            select(Rating.place_id, Rating.score).where(Rating.user_id == user_id)
+        ).all():
+            if score and score > 0:
+                strength[place_id] = strength.get(place_id, 0.0) + score / 5.0
+        for place_id, is_like in session.exec(
+            select(Like.place_id, Like.is_like).where(Like.user_id == user_id, Like.place_id.isnot(None))
+        ).all():
+            if is_like:
+                strength[place_id] = strength.get(place_id, 0.0) + LIKE_STRENGTH
+            else:
+                disliked.add(place_id)
+
+    place_ids = [pid for pid in strength if pid not in disliked]
+    return place_ids, [strength[pid] for pid in place_ids]
+
+
+def get_user_vector(user_id: int) -> Optional[np.ndarray]:
+    """
+    User factor từ model đã train; user mới thì fold-in từ tương tác hiện tại.
+    Kết quả fold-in (kể cả None khi user chưa có tương tác) được cache, nên /recommend
+    không query lại Rating/Like mỗi request.
+    """
+    if user_factors is None:
+        return None
+    row = user_index.get(user_id)
+    if row is not None:
+        return user_factors[row]
+
+    now = time.monotonic()
+    cached = _folded.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    factors = item_factors
+    place_ids, strengths = _load_user_interactions(user_id)
+    vector = fold_in_user(place_ids, strengths)
+    with _folded_lock:
+        if factors is item_factors:  # không ghi vector của model cũ nếu vừa fit / reload
+            _folded[user_id] = (vector, now + settings.CF_FOLD_IN_TTL_SECONDS)
+    return vector
+
+
+def invalidate_user_vector(user_id: int):
+    """Bỏ vector fold-in của user (gọi khi user có Rating / Like mới hoặc bị xóa)"""
+    with _folded_lock:
+        _folded.pop(user_id, None)
+
+
+def score_items(user_id: int, place_ids) -> Optional[np.ndarray]:
+    """
+    MF score (0-1) cho từng place trong place_ids (cùng thứ tự).
+    Trả về None nếu model chưa sẵn sàng hoặc user không có tương tác nào.
+    """
+    user_vec = get_user_vector(user_id)
+    if user_vec is None:
+        return None
+
+    place_ids = np.asarray(place_ids, dtype=np.int64)
+    cols = np.searchsorted(item_ids, place_ids)
+    cols = np.clip(cols, 0, len(item_ids) - 1)
+    known = item_ids[cols] == place_ids
+
+    scores = np.zeros(len(place_ids), dtype=np.float32)
+    scores[known] = item_factors[cols[known]] @ user_vec
+
+    scores = np.clip(scores, 0.0, None)
+    max_score = scores.max() if len(scores) else 0.0
+    if max_score <= 0:
+        return None
+    return scores / max_score
+
+
+# ==========================================
+# 4. INITIALIZE / PERSIST
+# ==========================================
+
+def _set_state(uf, itf, u_ids, i_ids):
+    global user_factors, item_factors, user_index, item_ids, item_index, _item_gram
+    user_factors = uf.astype(np.float32)
+    item_factors = itf.astype(np.float32)
+    user_index = {int(uid): row for row, uid in enumerate(u_ids)}
+    item_ids = np.asarray(i_ids, dtype=np.int64)
+    item_index = {int(pid): col for col, pid in enumerate(item_ids)}
+    _item_gram = (item_factors.T @ item_factors
+                  + REGULARIZATION * np.eye(item_factors.shape[1], dtype=np.float32))
+    with _folded_lock:
+        _folded.clear()  # vector fold-in tính theo item_factors cũ
+
+
+def fit_from_db(all_item_ids=None, save: bool = False):
+    """Train ALS từ bảng Rating + Like và nạp vào module state"""
+    users, places, strengths = load_interactions()
+    if len(users) == 0:
+        print("CF model: no interactions, skipping")
+        return False
+
+    start = time.perf_counter()
+    Cui, u_ids, i_ids = build_confidence_matrix(users, places, strengths, all_item_ids)
+    uf, itf = train_als(Cui)
+    _set_state(uf, itf, u_ids, i_ids)
+    print(f"CF model trained: {Cui.shape[0]} users x {Cui.shape[1]} places, "
+          f"{Cui.nnz} interactions in {time.perf_counter() - start:.2f}s")
+
+    if save:
+        np.savez(settings.CF_MODEL_PATH, user_factors=user_factors, item_factors=item_factors,
+                 user_ids=u_ids, item_ids=i_ids)
+        print(f"CF model saved to {settings.CF_MODEL_PATH}")
+    return True
+
+
+def initialize_cf(all_item_ids=None, force: bool = False):
+    """Load factors đã train sẵn (nếu có), ngược lại train nhanh từ DB.
+    force=True: đọc lại file factors (reload model mà không restart server)"""
+    if user_factors is not None and not force:
+        return
+
+    if os.path.exists(settings.CF_MODEL_PATH):
+        try:
+            data = np.load(settings.CF_MODEL_PATH)
+            _set_state(data['user_factors'], data['item_factors'], data['user_ids'], data['item_ids'])
+            print(f"CF model loaded: {len(user_index)} users x {len(item_ids)} places")
+            return
+        except Exception as e:
+            print(f"Failed to load CF model, retraining: {e}")
+
+    try:
+        fit_from_db(all_item_ids)
+    except Exception as e:
+        print(f"Failed to train CF model: {e}")
+
+
+def benchmark_synthetic(n_users=100_000, n_items=50_000, per_user=20, factors=FACTORS, iterations=ITERATIONS):
+    """Đo thời gian train trên dữ liệu giả lập với phân phối item lệch (popularity skew)"""
+    rng = np.random.default_rng(0)
+    nnz = n_users * per_user
+    users = np.repeat(np.arange(n_users), per_user)
+    places = np.minimum(rng.zipf(1.3, nnz) - 1, n_items - 1)
+    strengths = rng.uniform(0.2, 2.5, nnz).astype(np.float32)
+
+    Cui, _, _ = build_confidence_matrix(users, places, strengths, np.arange(n_items))
+    start = time.perf_counter()
+    train_als(Cui, factors=factors, iterations=iterations)
+    elapsed = time.perf_counter() - start
+    print(f"ALS {n_users} users x {n_items} places, nnz={Cui.nnz}, factors={factors}, "
+          f"iterations={iterations}: {elapsed:.2f}s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train implicit ALS collaborative filter")
+    parser.add_argument("--save", action="store_true", help="Train từ DB và lưu factors ra CF_MODEL_PATH")
+    parser.add_argument("--benchmark", nargs=2, type=int, metavar=("USERS", "PLACES"),
+                        help="Benchmark train trên dữ liệu giả lập")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_synthetic(*args.benchmark)
+    else:
+        fit_from_db(save=args.save)
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, HTTPException, Depends
-import google.generativeai as genai
 
 from sqlmodel import Session, select, or_
 from typing import Optional
@@ -7,11 +6,10 @@ from typing import Optional
 from app.config import settings
 from app.schemas import ChatbotRequest, Place
 from app.database import get_session
+from app.metrics import llm_timer
 
 
 # --- Gemini Configuration ---
-genai.configure(api_key=settings.GEMINI_API_KEY)
-
 system_instruction = """
 You are an expert AI Tour Guide specialized exclusively in Vietnam tourism. Your goal is to help users discover destinations, provide travel tips, explain local cultures, and find suitable places to visit within Vietnam.
 
@@ -60,10 +58,21 @@ Assistant: "I specialize only in Vietnam tourism. I cannot provide information a
 """
 
 
-model = genai.GenerativeModel(
-    'gemini-2.5-flash',
-    system_instruction=system_instruction
-)
+# google.generativeai import rất chậm -> chỉ import + tạo model ở request chat đầu tiên
+_model = None
+
+def get_model():
+    global _model
+    if _model is None:
+        if not settings.GEMINI_API_KEY:
+            raise HTTPException(status_code=503, detail="Chatbot unavailable: GEMINI_API_KEY is missing")
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        _model = genai.GenerativeModel(
+            'gemini-2.5-flash',
+            system_instruction=system_instruction
+        )
+    return _model
 
 router = APIRouter()
 
@@ -111,8 +120,10 @@ def get_places_from_db(session: Session, user_query: str) -> Optional[str]:
 
 # --- 4. The Chat Endpoint ---
 
+# def (không async): query DB và generate_content của Gemini đều là call đồng bộ,
+# FastAPI chạy route trong threadpool nên không block event loop
 @router.post("/")
-async def chat_endpoint(
+def chat_endpoint(
     request: ChatbotRequest, 
     session: Session = Depends(get_session) # Inject Session here
 ):
@@ -135,8 +146,12 @@ async def chat_endpoint(
             print("No Context Found - Using Standard Model")
 
         # Step C: Generate Response
-        response = model.generate_content(prompt)
+        model = get_model()
+        with llm_timer("gemini"):
+            response = model.generate_content(prompt)
         return {"reply": response.text}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from typing import List
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, List
 from datetime import datetime
 
 from app.schemas import Comment, User, Place
-from app.database import get_session
+from app.database import get_async_session, load_by_ids
 from app.routers.auth import get_current_user
 from app.services.scoring_service import RatingScorer
+from app.services.upload_service import load_thumbnails
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -21,6 +23,7 @@ class CommentResponse(BaseModel):
     username: str
     user_display_name: str | None = None  # Tên hiển thị của user
     user_avatar_url: str | None = None  # Avatar URL của user
+    user_avatar_thumbnails: Dict[str, str] = {}  # {size: URL WebP} của avatar, rỗng -> dùng ảnh gốc
     place_id: int
     place_name: str | None = None
     place_image: str | None = None
@@ -31,12 +34,12 @@ class CommentResponse(BaseModel):
 async def create_comment(
     comment_data: CommentCreate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Tạo comment mới cho địa điểm và tự động cập nhật rating score (+0.5 cho comment đầu tiên)"""
     
     # Kiểm tra place có tồn tại không
-    place = session.get(Place, comment_data.place_id)
+    place = await session.get(Place, comment_data.place_id)
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
     
@@ -48,15 +51,18 @@ async def create_comment(
     )
     
     session.add(new_comment)
-    session.commit()
-    session.refresh(new_comment)
+    await session.commit()
+    await session.refresh(new_comment)
     
     # Update rating score (only +0.5 for first comment)
-    RatingScorer.update_rating(
-        user_id=current_user.id,
-        place_id=comment_data.place_id,
-        session=session,
-        has_commented=True
+    # RatingScorer dùng Session đồng bộ -> chạy qua run_sync trên cùng connection
+    await session.run_sync(
+        lambda sync_session: RatingScorer.update_rating(
+            user_id=current_user.id,
+            place_id=comment_data.place_id,
+            session=sync_session,
+            has_commented=True
+        )
     )
     
     return CommentResponse(
@@ -73,7 +79,7 @@ async def create_comment(
 @router.get("/comments/place/{place_id}", response_model=List[CommentResponse])
 async def get_comments_by_place(
     place_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Lấy tất cả comments của một địa điểm"""
     
@@ -84,7 +90,10 @@ async def get_comments_by_place(
         .order_by(Comment.created_at.desc())
     )
     
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
+    thumbnails = await session.run_sync(
+        lambda sync_session: load_thumbnails(sync_session, [user.avatar_url for _, user in results])
+    )
     
     comments = []
     for comment, user in results:
@@ -94,6 +103,7 @@ async def get_comments_by_place(
             username=user.username,
             user_display_name=user.display_name,
             user_avatar_url=user.avatar_url,
+            user_avatar_thumbnails=thumbnails.get(user.avatar_url, {}),
             place_id=comment.place_id,
             content=comment.content,
             created_at=comment.created_at
@@ -105,11 +115,11 @@ async def get_comments_by_place(
 async def delete_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Xóa comment (chỉ người tạo mới xóa được)"""
     
-    comment = session.get(Comment, comment_id)
+    comment = await session.get(Comment, comment_id)
     
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -117,15 +127,15 @@ async def delete_comment(
     if comment.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
     
-    session.delete(comment)
-    session.commit()
+    await session.delete(comment)
+    await session.commit()
     
     return {"message": "Comment deleted successfully"}
 
 @router.get("/comments/user", response_model=List[CommentResponse])
 async def get_comments_by_user(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Lấy tất cả comments của user hiện tại"""
     
@@ -135,12 +145,13 @@ async def get_comments_by_user(
         .order_by(Comment.created_at.desc())
     )
     
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
+    places = await load_by_ids(session, Place, (comment.place_id for comment in results))
     
     comments = []
     for comment in results:
         # Fetch place info
-        place = session.get(Place, comment.place_id)
+        place = places.get(comment.place_id)
         place_name = place.name if place else "Unknown Place"
         place_image = place.image[0] if place and place.image and len(place.image) > 0 else None
         
@@ -3,24 +3,32 @@ Forum/Post Router - API cho chức năng đăng bài review địa điểm
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlmodel import Session, select, desc
-from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, List, Optional
 from datetime import datetime
-import os
-import uuid
 
-from app.database import get_session
+from app.config import settings
+from app.database import get_session, get_async_session
 from app.schemas import (
     Post, PostLike, PostComment, User, Place,
     PostCreate, PostCommentCreate,
     PostResponse, PostCommentResponse, PostUserInfo, PostPlaceInfo
 )
 from app.routers.auth import get_current_user, get_current_user_optional
+from app.services.upload_service import upload_service, ALLOWED_IMAGE_TYPES, record_upload, load_thumbnails
 
 router = APIRouter(prefix="/api/v1/forum", tags=["Forum"])
 
-# Thư mục lưu ảnh posts
-UPLOAD_DIR = "uploads/posts"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+def get_user_info(user: User, thumbnails: Dict[str, Dict[str, str]]) -> PostUserInfo:
+    """PostUserInfo kèm thumbnail avatar (thumbnails: kết quả load_thumbnails)"""
+    return PostUserInfo(
+        id=user.id,
+        username=user.username,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url,
+        avatar_thumbnails=thumbnails.get(user.avatar_url, {})
+    )
 
 
 def get_post_response(post: Post, session: Session, current_user_id: Optional[int] = None) -> PostResponse:
@@ -28,12 +36,6 @@ def get_post_response(post: Post, session: Session, current_user_id: Optional[in
     
     # Lấy thông tin user
     user = session.get(User, post.user_id)
-    user_info = PostUserInfo(
-        id=user.id,
-        username=user.username,
-        display_name=user.display_name,
-        avatar_url=user.avatar_url
-    ) if user else None
     
     # Lấy thông tin place nếu có
     place_info = None
@@ -62,30 +64,32 @@ def get_post_response(post: Post, session: Session, current_user_id: Optional[in
         PostComment.post_id == post.id
     ).order_by(desc(PostComment.created_at)).limit(3)
     comments = session.exec(comments_query).all()
+    comment_users = [session.get(User, comment.user_id) for comment in comments]
+    
+    # Thumbnail của ảnh post + avatar: một query cho cả post
+    images = post.images or []
+    thumbnails = load_thumbnails(
+        session, [u.avatar_url for u in [user, *comment_users] if u] + images
+    )
     
     comments_response = []
-    for comment in comments:
-        comment_user = session.get(User, comment.user_id)
+    for comment, comment_user in zip(comments, comment_users):
         comments_response.append(PostCommentResponse(
             id=comment.id,
             content=comment.content,
             created_at=comment.created_at,
-            user=PostUserInfo(
-                id=comment_user.id,
-                username=comment_user.username,
-                display_name=comment_user.display_name,
-                avatar_url=comment_user.avatar_url
-            ) if comment_user else None
+            user=get_user_info(comment_user, thumbnails) if comment_user else None
         ))
     
     return PostResponse(
         id=post.id,
         content=post.content,
-        images=post.images or [],
+        images=images,
+        image_thumbnails=[thumbnails.get(url, {}) for url in images],
         created_at=post.created_at,
         like_count=post.like_count,
         comment_count=post.comment_count,
-        user=user_info,
+        user=get_user_info(user, thumbnails) if user else None,
         place=place_info,
         is_liked=is_liked,
         comments=comments_response
@@ -166,11 +170,11 @@ def create_post(
 async def upload_post_images(
     post_id: int,
     files: List[UploadFile] = File(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """Upload ảnh cho post"""
-    post = session.get(Post, post_id)
+    post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -178,25 +182,20 @@ async def upload_post_images(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     uploaded_urls = []
+    thumbnails = []
     for file in files:
-        # Tạo filename unique
-        ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-        filename = f"{uuid.uuid4()}.{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        
-        # Lưu file
-        content = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(content)
-        
-        uploaded_urls.append(f"/uploads/posts/{filename}")
+        # Stream + giới hạn size, tên file = sha256 (ảnh trùng chỉ lưu một bản)
+        stored = await upload_service.save(file, "posts", settings.MAX_POST_IMAGE_BYTES)
+        uploaded_urls.append(stored.url)
+        thumbnails.append(stored.thumbnails)
+        await session.run_sync(lambda sync_session: record_upload(sync_session, stored))
     
     # Cập nhật post
     post.images = (post.images or []) + uploaded_urls
     session.add(post)
-    session.commit()
+    await session.commit()
     
-    return {"urls": uploaded_urls}
+    return {"urls": uploaded_urls, "thumbnails": thumbnails}
 
 
 @router.delete("/posts/{post_id}")
@@ -285,20 +284,16 @@ def get_comments(
     ).order_by(desc(PostComment.created_at)).offset(skip).limit(limit)
     
     comments = session.exec(query).all()
+    users = [session.get(User, comment.user_id) for comment in comments]
+    thumbnails = load_thumbnails(session, [user.avatar_url for user in users if user])
     
     result = []
-    for comment in comments:
-        user = session.get(User, comment.user_id)
+    for comment, user in zip(comments, users):
         result.append(PostCommentResponse(
             id=comment.id,
             content=comment.content,
             created_at=comment.created_at,
-            user=PostUserInfo(
-                id=user.id,
-                username=user.username,
-                display_name=user.display_name,
-                avatar_url=user.avatar_url
-            ) if user else None
+            user=get_user_info(user, thumbnails) if user else None
         ))
     
     return result
@@ -336,12 +331,7 @@ def create_comment(
         id=comment.id,
         content=comment.content,
         created_at=comment.created_at,
-        user=PostUserInfo(
-            id=current_user.id,
-            username=current_user.username,
-            display_name=current_user.display_name,
-            avatar_url=current_user.avatar_url
-        )
+        user=get_user_info(current_user, load_thumbnails(session, [current_user.avatar_url]))
     )
 
 
@@ -376,31 +366,27 @@ def delete_comment(
 @router.post("/upload")
 async def upload_images(
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    """Upload ảnh trước khi tạo post (pre-upload)"""
+    """Upload ảnh trước khi tạo post (pre-upload). Thumbnail lưu theo URL nên post tạo sau đó trả kèm được"""
     if len(files) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 images allowed")
     
     uploaded_urls = []
+    thumbnails = []
     for file in files:
         # Validate file type
-        if not file.content_type.startswith("image/"):
+        if file.content_type not in ALLOWED_IMAGE_TYPES:
             continue
-            
-        # Tạo filename unique
-        ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-        filename = f"{uuid.uuid4()}.{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        
-        # Lưu file
-        content = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(content)
         
-        uploaded_urls.append(f"/uploads/posts/{filename}")
+        stored = await upload_service.save(file, "posts", settings.MAX_POST_IMAGE_BYTES)
+        uploaded_urls.append(stored.url)
+        thumbnails.append(stored.thumbnails)
+        await session.run_sync(lambda sync_session: record_upload(sync_session, stored))
     
-    return {"urls": uploaded_urls}
+    await session.commit()
+    return {"urls": uploaded_urls, "thumbnails": thumbnails}
 
 
 # ============ FEED ============
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from datetime import datetime
 
 from app.schemas import Like, User, Place, Comment
-from app.database import get_session
+from app.database import get_async_session, load_by_ids
 from app.routers.auth import get_current_user
 from app.services.scoring_service import RatingScorer
+from app.services.batch_recommend import invalidate_precomputed_feed
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -54,14 +56,14 @@ class LikedPlaceResponse(BaseModel):
 async def like_dislike_comment(
     like_data: LikeCommentRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Like hoặc Dislike một comment. 
     Nếu đã like/dislike trước đó với cùng giá trị is_like -> xóa (toggle off)
     Nếu đã like/dislike trước đó với khác is_like -> update (switch giữa like và dislike)"""
     
     # Kiểm tra comment có tồn tại không
-    comment = session.get(Comment, like_data.comment_id)
+    comment = await session.get(Comment, like_data.comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -70,20 +72,20 @@ async def like_dislike_comment(
         Like.user_id == current_user.id,
         Like.comment_id == like_data.comment_id
     )
-    existing_like = session.exec(statement).first()
+    existing_like = (await session.exec(statement)).first()
     
     if existing_like:
         # Nếu đã có và cùng loại (like->like hoặc dislike->dislike) -> xóa (toggle off)
         if existing_like.is_like == like_data.is_like:
-            session.delete(existing_like)
-            session.commit()
+            await session.delete(existing_like)
+            await session.commit()
             return {"action": "removed", "status": "neutral"}
         else:
             # Nếu khác loại (like->dislike hoặc dislike->like) -> update
             existing_like.is_like = like_data.is_like
             session.add(existing_like)
-            session.commit()
-            session.refresh(existing_like)
+            await session.commit()
+            await session.refresh(existing_like)
             
             return {
                 "action": "updated",
@@ -105,8 +107,8 @@ async def like_dislike_comment(
     )
     
     session.add(new_like)
-    session.commit()
-    session.refresh(new_like)
+    await session.commit()
+    await session.refresh(new_like)
     
     return {
         "action": "created",
@@ -127,7 +129,7 @@ async def like_dislike_comment(
 async def unlike_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """[DEPRECATED] Unlike một comment - Sử dụng POST /likes/comment với cùng is_like để toggle"""
     
@@ -135,13 +137,13 @@ async def unlike_comment(
         Like.user_id == current_user.id,
         Like.comment_id == comment_id
     )
-    like = session.exec(statement).first()
+    like = (await session.exec(statement)).first()
     
     if not like:
         raise HTTPException(status_code=404, detail="Like not found")
     
-    session.delete(like)
-    session.commit()
+    await session.delete(like)
+    await session.commit()
     
     return {"message": "Unliked successfully"}
 
@@ -152,7 +154,7 @@ async def unlike_comment(
 async def like_dislike_place(
     like_data: LikePlaceRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Like hoặc Dislike một place.
     Nếu đã like/dislike trước đó với cùng giá trị is_like -> xóa (toggle off)
@@ -164,7 +166,7 @@ async def like_dislike_place(
     """
     
     # Kiểm tra place có tồn tại không
-    place = session.get(Place, like_data.place_id)
+    place = await session.get(Place, like_data.place_id)
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
     
@@ -173,7 +175,7 @@ async def like_dislike_place(
         Like.user_id == current_user.id,
         Like.place_id == like_data.place_id
     )
-    existing_like = session.exec(statement).first()
+    existing_like = (await session.exec(statement)).first()
     
     action = None
     status_str = None
@@ -181,8 +183,13 @@ async def like_dislike_place(
     if existing_like:
         # Nếu đã có và cùng loại (like->like hoặc dislike->dislike) -> xóa (toggle off)
         if existing_like.is_like == like_data.is_like:
-            session.delete(existing_like)
-            session.commit()
+            await session.delete(existing_like)
+            await session.run_sync(
+                lambda sync_session: invalidate_precomputed_feed(current_user.id, sync_session)
+            )
+            await session.commit()
+            from app.routers import cf_model  # lazy: đã load trong lifespan, không kéo scipy lúc import app
+            cf_model.invalidate_user_vector(current_user.id)
             action = "removed"
             status_str = "neutral"
             # Note: We don't update rating when removing like/dislike
@@ -190,15 +197,17 @@ async def like_dislike_place(
             # Nếu khác loại (like->dislike hoặc dislike->like) -> update
             existing_like.is_like = like_data.is_like
             session.add(existing_like)
-            session.commit()
-            session.refresh(existing_like)
+            await session.commit()
+            await session.refresh(existing_like)
             
             # Update rating score
-            RatingScorer.update_rating(
-                user_id=current_user.id,
-                place_id=like_data.place_id,
-                session=session,
-                is_like=like_data.is_like
+            await session.run_sync(
+                lambda sync_session: RatingScorer.update_rating(
+                    user_id=current_user.id,
+                    place_id=like_data.place_id,
+                    session=sync_session,
+                    is_like=like_data.is_like
+                )
             )
             
             action = "updated"
@@ -212,15 +221,17 @@ async def like_dislike_place(
         )
         
         session.add(new_like)
-        session.commit()
-        session.refresh(new_like)
+        await session.commit()
+        await session.refresh(new_like)
         
         # Update rating score
-        RatingScorer.update_rating(
-            user_id=current_user.id,
-            place_id=like_data.place_id,
-            session=session,
-            is_like=like_data.is_like
+        await session.run_sync(
+            lambda sync_session: RatingScorer.update_rating(
+                user_id=current_user.id,
+                place_id=like_data.place_id,
+                session=sync_session,
+                is_like=like_data.is_like
+            )
         )
         
         action = "created"
@@ -249,7 +260,7 @@ async def like_dislike_place(
 async def unlike_place(
     place_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """[DEPRECATED] Unlike một place - Sử dụng POST /likes/place với cùng is_like để toggle"""
     
@@ -257,13 +268,18 @@ async def unlike_place(
         Like.user_id == current_user.id,
         Like.place_id == place_id
     )
-    like = session.exec(statement).first()
+    like = (await session.exec(statement)).first()
     
     if not like:
         raise HTTPException(status_code=404, detail="Like not found")
     
-    session.delete(like)
-    session.commit()
+    await session.delete(like)
+    await session.run_sync(
+        lambda sync_session: invalidate_precomputed_feed(current_user.id, sync_session)
+    )
+    await session.commit()
+    from app.routers import cf_model  # lazy: đã load trong lifespan, không kéo scipy lúc import app
+    cf_model.invalidate_user_vector(current_user.id)
     
     return {"message": "Unliked successfully"}
 
@@ -273,7 +289,7 @@ async def unlike_place(
 @router.get("/likes/comments", response_model=List[LikedCommentResponse])
 async def get_liked_comments(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Lấy danh sách comments mà user đã like"""
     
@@ -285,16 +301,21 @@ async def get_liked_comments(
         .order_by(Like.created_at.desc())
     )
     
-    likes = session.exec(statement).all()
+    likes = (await session.exec(statement)).all()
+    
+    # Comment, user tạo comment và place: mỗi loại một query IN
+    comments = await load_by_ids(session, Comment, (like.comment_id for like in likes))
+    users = await load_by_ids(session, User, (comment.user_id for comment in comments.values()))
+    places = await load_by_ids(session, Place, (comment.place_id for comment in comments.values()))
     
     result = []
     for like in likes:
-        comment = session.get(Comment, like.comment_id)
+        comment = comments.get(like.comment_id)
         if comment:
             # Lấy thông tin user đã tạo comment
-            comment_user = session.get(User, comment.user_id)
+            comment_user = users.get(comment.user_id)
             
-            place = session.get(Place, comment.place_id)
+            place = places.get(comment.place_id)
             place_name = place.name if place else "Unknown Place"
             place_image = place.image[0] if place and place.image and len(place.image) > 0 else None
             
@@ -320,7 +341,7 @@ async def get_liked_comments(
 @router.get("/likes/places", response_model=List[LikedPlaceResponse])
 async def get_liked_places(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Lấy danh sách places mà user đã like"""
     
@@ -332,11 +353,12 @@ async def get_liked_places(
         .order_by(Like.created_at.desc())
     )
     
-    likes = session.exec(statement).all()
+    likes = (await session.exec(statement)).all()
+    places = await load_by_ids(session, Place, (like.place_id for like in likes))
     
     result = []
     for like in likes:
-        place = session.get(Place, like.place_id)
+        place = places.get(like.place_id)
         if place:
             place_image = place.image[0] if place.image and len(place.image) > 0 else None
             # Get province from tags or description
@@ -362,7 +384,7 @@ async def get_liked_places(
 async def check_comment_liked(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Kiểm tra user đã like/dislike comment chưa"""
     
@@ -370,7 +392,7 @@ async def check_comment_liked(
         Like.user_id == current_user.id,
         Like.comment_id == comment_id
     )
-    like = session.exec(statement).first()
+    like = (await session.exec(statement)).first()
     
     if like:
         return {"liked": like.is_like, "disliked": not like.is_like, "status": "liked" if like.is_like else "disliked"}
@@ -381,7 +403,7 @@ async def check_comment_liked(
 async def check_place_liked(
     place_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Kiểm tra user đã like/dislike place chưa"""
     
@@ -389,7 +411,7 @@ async def check_place_liked(
         Like.user_id == current_user.id,
         Like.place_id == place_id
     )
-    like = session.exec(statement).first()
+    like = (await session.exec(statement)).first()
     
     if like:
         return {"liked": like.is_like, "disliked": not like.is_like, "status": "liked" if like.is_like else "disliked"}
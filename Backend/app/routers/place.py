@@ -1,19 +1,39 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select
-from sqlalchemy import or_, String
-from app.database import get_session
-from app.schemas import Place, PlaceDetailResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import or_
+from app.database import get_session, get_async_session
+from app.schemas import Place, PlaceDetailResponse, PlaceSearchKey
 from app.services.llm_service import extract_with_groq
-from typing import List
+from app.services.search_keys import normalize_text, token_match_ids, union_ids
+from typing import List, Tuple
 import re
-import unicodedata
 
 router = APIRouter()
 
-def remove_accents(text: str) -> str:
-    """Bỏ dấu tiếng Việt"""
-    nfkd = unicodedata.normalize('NFD', text)
-    return ''.join(c for c in nfkd if not unicodedata.combining(c))
+def location_keys(locations: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Location từ LLM -> (khóa tỉnh, khóa còn lại) đã chuẩn hóa.
+    Tên tỉnh / thành phố được đưa về tỉnh ("Hội An" -> "quang nam", "Đà Lạt" -> "lam dong").
+    """
+    from app.services.gazetteer import get_gazetteer
+    gazetteer = get_gazetteer()
+    provinces, others = [], []
+    for loc in locations:
+        key = normalize_text(loc)
+        if not key:
+            continue
+        province = gazetteer.canonical_province(key)
+        if province:
+            provinces.append(normalize_text(province))
+        else:
+            others.append(key)
+    return list(dict.fromkeys(provinces)), list(dict.fromkeys(others))
+
+
+def tag_word_conditions(column, key: str) -> list:
+    """key là một hoặc nhiều từ liền nhau trong một tag của tags_key ("|thua thien hue|" chứa "hue")"""
+    return [column.contains(f"{left}{key}{right}", autoescape=True) for left in "| " for right in "| "]
 
 # Stop words - các từ phổ biến không mang ý nghĩa tìm kiếm
 STOP_WORDS = {
@@ -124,7 +144,7 @@ def get_place_detail(place_id: int, session: Session = Depends(get_session)):
 async def search_places_by_name(
     q: str = Query(..., description="Tên địa điểm hoặc câu mô tả cần tìm"),
     limit: int = Query(50, ge=1, le=100, description="Số lượng kết quả tối đa"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     API tìm kiếm địa điểm theo tên hoặc từ khóa (case-insensitive, partial match).
@@ -141,32 +161,40 @@ async def search_places_by_name(
     locations = extraction.location if extraction.location else []
     place_type = extraction.type if extraction.type and extraction.type != "unknown" else None
     
-    # Nếu LLM extract được location, filter theo tags
-    if locations:
-        conditions = []
-        for loc in locations:
-            # Bỏ dấu để match với tags trong DB (không dấu)
-            loc_no_accent = remove_accents(loc)
-            search_term = f"%{loc_no_accent}%"
-            # Tìm trong tags (chứa tên tỉnh) - cast sang String type
-            conditions.append(Place.tags.cast(String).ilike(search_term))
-        
-        statement = select(Place).where(or_(*conditions)).limit(limit)
-        places = session.exec(statement).all()
+    # Khóa tìm kiếm chuẩn hóa sẵn (bảng placesearchkey / placesearchtoken): không cast JSON /
+    # bỏ dấu từng dòng, không LIKE '%...%' quét cả bảng
+    keys_table = PlaceSearchKey.__table__.c
+    province_keys, other_keys = location_keys(locations) if locations else ([], [])
+    
+    # Nếu LLM extract được location: tỉnh -> lookup index province_key; tên khác ("Hue", ...) ->
+    # lookup token của tag, rồi kiểm tra khớp nguyên cụm trong một tag trên các place tìm được
+    if province_keys or other_keys:
+        matches = [select(keys_table.place_id).where(keys_table.province_key.in_(province_keys))] if province_keys else []
+        for key in other_keys:
+            candidates = token_match_ids(key, field="tag")
+            matches.append(select(keys_table.place_id).where(
+                keys_table.place_id.in_(candidates), or_(*tag_word_conditions(keys_table.tags_key, key))))
     else:
-        # Nếu không có location, fallback về tìm kiếm theo keyword
+        # Nếu không có location, fallback về tìm kiếm theo keyword (không phân biệt dấu):
+        # lookup tiền tố các từ của keyword trong token, rồi kiểm tra cả cụm trên các place tìm được
         keywords = extract_keywords(q)
         if not keywords:
             keywords = [q.strip()]
-        
-        conditions = []
+        matches = []
         for keyword in keywords:
-            search_term = f"%{keyword}%"
-            conditions.append(Place.name.ilike(search_term))
-            conditions.append(Place.tags.cast(String).ilike(search_term))
-        
-        statement = select(Place).where(or_(*conditions)).limit(limit)
-        places = session.exec(statement).all()
+            key = normalize_text(keyword)
+            candidates = token_match_ids(key, prefix=True)
+            if candidates is not None:
+                matches.append(select(keys_table.place_id).where(
+                    keys_table.place_id.in_(candidates),
+                    or_(keys_table.name_key.contains(key, autoescape=True),
+                        keys_table.tags_key.contains(key, autoescape=True))))
+    
+    place_ids = union_ids(matches)
+    if place_ids is None:
+        return []
+    statement = select(Place).where(Place.id.in_(place_ids)).order_by(Place.id).limit(limit)
+    places = (await session.exec(statement)).all()
     
     # Convert to PlaceDetailResponse with province and climate
     results = []
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
 from app.schemas import InteractionCreate, InteractionType, Rating, User
 from app.routers.auth import get_current_user
 from app.services.scoring_service import RatingScorer
@@ -33,7 +34,7 @@ class RatingResponse(BaseModel):
 async def track_view_time(
     view_data: ViewTimeRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Track user view time on a place and calculate rating score.
@@ -43,11 +44,14 @@ async def track_view_time(
     print(f"[View Time Tracking] User {current_user.id} -> Place {view_data.place_id}: {view_data.view_time_seconds}s")
     
     # Update rating using the scoring algorithm
-    rating = RatingScorer.update_rating(
-        user_id=current_user.id,
-        place_id=view_data.place_id,
-        session=session,
-        view_time_seconds=view_data.view_time_seconds
+    # RatingScorer dùng Session đồng bộ -> chạy qua run_sync trên cùng connection
+    rating = await session.run_sync(
+        lambda sync_session: RatingScorer.update_rating(
+            user_id=current_user.id,
+            place_id=view_data.place_id,
+            session=sync_session,
+            view_time_seconds=view_data.view_time_seconds
+        )
     )
     
     # Check if it was newly created or updated
@@ -55,7 +59,7 @@ async def track_view_time(
         Rating.user_id == current_user.id,
         Rating.place_id == view_data.place_id
     )
-    existing_count = len(session.exec(statement).all())
+    existing_count = len((await session.exec(statement)).all())
     
     return RatingResponse(
         user_id=rating.user_id,
@@ -68,14 +72,14 @@ async def track_view_time(
 async def get_user_rating(
     place_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get user's rating for a specific place"""
     statement = select(Rating).where(
         Rating.user_id == current_user.id,
         Rating.place_id == place_id
     )
-    rating = session.exec(statement).first()
+    rating = (await session.exec(statement)).first()
     
     if not rating:
         return {"place_id": place_id, "score": None, "message": "No rating found"}
@@ -102,19 +106,20 @@ SCORE_MAP = {
 async def track_interaction(
     interaction: InteractionCreate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     API này được gọi ngầm (background) khi user tương tác với UI.
     Nó cập nhật điểm số (Implicit Feedback) để dùng cho lần gợi ý sau.
     """
+    from app.routers import cf_model  # lazy: đã load trong lifespan, không kéo scipy lúc import app
     
     # 1. Kiểm tra rating cũ
     statement = select(Rating).where(
         Rating.user_id == current_user.id,
         Rating.place_id == interaction.place_id
     )
-    existing_rating = session.exec(statement).first()
+    existing_rating = (await session.exec(statement)).first()
     
     # 2. Lấy điểm số tương ứng hành vi mới
     new_score = SCORE_MAP.get(interaction.interaction_type, 1.0)
@@ -128,7 +133,8 @@ async def track_interaction(
             existing_rating.score = new_score
         
         session.add(existing_rating)
-        session.commit()
+        await session.commit()
+        cf_model.invalidate_user_vector(current_user.id)
         return {"status": "updated", "score": existing_rating.score}
 
     else:
@@ -139,5 +145,6 @@ async def track_interaction(
             score=new_score
         )
         session.add(new_rating)
-        session.commit()
+        await session.commit()
+        cf_model.invalidate_user_vector(current_user.id)
         return {"status": "created", "score": new_score}
\ No newline at end of file
@@ -1,63 +1,103 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 from collections import Counter
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List
+import asyncio
+import contextvars
 import ast
 
 from app.schemas import RecommendRequest, RecommendResponse, User, PlaceOut, Rating, Place, Like
-from app.database import get_session
+from app.config import settings
+from app.metrics import cache_requests, recsys_profile_requests
+from app.database import get_async_session, load_by_ids
 from app.routers.auth import get_current_user_optional
 from app.services.llm_service import extract_with_groq
-from app.routers.recsysmodel import recommend_two_tower 
+from app.routers.recsys_utils import get_home_feed_tags
+from app.services.batch_recommend import get_precomputed_feed
 # from sqlmodel import Session, select
 # from app.database import engine
 # from app.schemas import Place, PlaceDetailResponse # Import thêm Place và Schema mới
 
 router = APIRouter()
 
-def get_history_tags(user_id: int, session: Session, limit=5) -> List[str]:
-    """Lấy tags từ những nơi user đã tương tác tốt (Rating >= 3.0 hoặc Like)"""
-    tags_pool = []
-    
-    # 1. Lấy từ Ratings (score >= 3.0)
-    statement = select(Rating).where(Rating.user_id == user_id, Rating.score >= 3.0)
-    ratings = session.exec(statement).all()
-    
-    for r in ratings:
-        place = session.get(Place, r.place_id)
-        if place and place.tags:
-            tags_pool.extend(place.tags)
-    
-    # 2. Lấy từ Likes (tín hiệu mạnh hơn - ưu tiên cao)
-    like_statement = select(Like).where(
-        Like.user_id == user_id,
-        Like.place_id.isnot(None)  # Chỉ lấy likes cho place
+# RecSys scoring (TF-IDF, CF, diversity) là CPU-bound: chạy trong pool thread có giới hạn
+# để không block event loop, đồng thời không để quá nhiều request chấm điểm cùng lúc
+recsys_executor = ThreadPoolExecutor(
+    max_workers=settings.RECSYS_EXECUTOR_WORKERS, thread_name_prefix="recsys"
+)
+
+async def load_places(session: AsyncSession, place_ids: Iterable[int]) -> Dict[int, Place]:
+    """Load nhiều Place bằng một query IN thay vì session.get từng cái"""
+    return await load_by_ids(session, Place, place_ids)
+
+def place_out_from_db(place: Place, score: float) -> PlaceOut:
+    """Build PlaceOut trực tiếp từ Place trong DB (dùng cho list tính sẵn)"""
+    tags = place.tags if isinstance(place.tags, list) else []
+    return PlaceOut(
+        id=place.id,
+        name=place.name,
+        province=tags[0] if tags else "Vietnam",
+        themes=tags,
+        score=float(score),
+        image=place.image if place.image else None,
+        climate=place.climate if place.climate else None,
+        lat=place.lat,
+        lon=place.lon
     )
-    likes = session.exec(like_statement).all()
-    
-    for like in likes:
-        place = session.get(Place, like.place_id)
-        if place and place.tags:
-            # Like có trọng số cao hơn, thêm 2 lần để tăng tần suất
-            tags_pool.extend(place.tags)
-            tags_pool.extend(place.tags)  # Thêm lần 2 để tăng weight
-            
-    if not tags_pool: return []
-    # Lấy top tags xuất hiện nhiều nhất
-    return [tag for tag, _ in Counter(tags_pool).most_common(limit)]
 
 @router.post("/recommend", response_model=RecommendResponse)
 async def get_recommendations(
     req: RecommendRequest,
+    explain: bool = False,
     current_user: User = Depends(get_current_user_optional),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
+    """explain=true: trả thêm điểm thành phần của từng kết quả (content/CF/popularity,
+    location boost, diversity pass, top TF-IDF terms) - chỉ engine content-based.
+    req.weight_profile chọn bộ trọng số của content-based engine (A/B test)"""
     # ==========================
     # 1. SHORT-TERM INTENT (Từ Input Text + Groq)
     # ==========================
     current_intent_tags = []
     extraction = None
     
+    # Import trễ: recsysmodel kéo theo pandas + scikit-learn (đã load sẵn trong lifespan)
+    from app.routers.recsysmodel import recommend_two_tower, RECSYS_ENGINES
+    from app.services.weight_profiles import weight_profiles
+    
+    if req.engine and req.engine not in RECSYS_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine. Allowed: {', '.join(RECSYS_ENGINES)}")
+    try:
+        profile = weight_profiles.get(req.weight_profile)
+    except KeyError:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown weight profile. Allowed: {', '.join(weight_profiles.names())}")
+    recsys_profile_requests.inc(profile=profile.name)
+    
+    # Home feed (không gõ gì): phục vụ thẳng list đã tính sẵn bởi batch job nếu còn fresh và cùng top_k
+    # (list tính sẵn dùng engine + weight profile mặc định nên bỏ qua khi client chọn
+    # engine / profile khác hoặc cần explain)
+    use_default_profile = profile.name == weight_profiles.default_name
+    if current_user and not (req.user_text and req.user_text.strip()) and not req.engine and not explain \
+            and use_default_profile:
+        user_id = current_user.id
+        precomputed = await session.run_sync(
+            lambda sync_session: get_precomputed_feed(user_id, sync_session, req.top_k)
+        )
+        if precomputed is not None:
+            places = await load_places(session, [place_id for place_id, _ in precomputed])
+            results_list = []
+            for place_id, score in precomputed:
+                place = places.get(place_id)
+                if place:
+                    results_list.append(place_out_from_db(place, score))
+            if len(results_list) == len(precomputed):
+                cache_requests.inc(cache="precomputed_feed", result="hit")
+                return RecommendResponse(extraction=None, results=results_list, weight_profile=profile.name)
+        cache_requests.inc(cache="precomputed_feed", result="miss")
+    
     if req.user_text and len(req.user_text.strip()) > 0:
         # Gọi Groq để hiểu ý định (đây là cái bạn đã tin tưởng)
         extraction = await extract_with_groq(req.user_text)
@@ -86,11 +126,10 @@ async def get_recommendations(
     # ==========================
     history_tags = []
     if current_user:
-        # Lấy từ hành vi (Click, Like)
-        history_tags = get_history_tags(current_user.id, session)
-        # Lấy từ profile tĩnh (nếu có lúc đăng ký)
-        if current_user.preferences:
-            history_tags.extend(current_user.preferences)
+        # Lấy từ hành vi (Click, Like) + profile tĩnh (nếu có lúc đăng ký)
+        history_tags = await session.run_sync(
+            lambda sync_session: get_home_feed_tags(current_user, sync_session)
+        )
 
     # ==========================
     # 3. HYBRID STRATEGY (Kết hợp)
@@ -122,8 +161,16 @@ async def get_recommendations(
     # ==========================
     # Truyền tags và user_id vào Two-Tower model để kết hợp user history
     user_id = current_user.id if current_user else None
-    results_df = recommend_two_tower(final_tags, user_id=user_id, top_k=req.top_k)
+    loop = asyncio.get_running_loop()
+    # copy_context: query DB trong executor vẫn được tính vào metrics của request này
+    results_df = await loop.run_in_executor(
+        recsys_executor,
+        partial(contextvars.copy_context().run, recommend_two_tower,
+                final_tags, user_id=user_id, top_k=req.top_k, engine=req.engine, explain=explain,
+                profile=profile)
+    )
     
+    places = await load_places(session, (int(pid) for pid in results_df['id'])) if len(results_df) else {}
     results_list = []
     for _, row in results_df.iterrows():
         # Parse tags từ string sang list nếu cần
@@ -138,7 +185,7 @@ async def get_recommendations(
         else:
             tags = tags_raw if tags_raw else []
         # Lấy place từ database để có ảnh
-        place = session.get(Place, int(row.get('id')))
+        place = places.get(int(row.get('id')))
         
         # Đảm bảo tags là list
         if not isinstance(tags, list):
@@ -156,17 +203,21 @@ async def get_recommendations(
             lon=place.lon if place else None
         ))
 
-    return RecommendResponse(extraction=extraction, results=results_list)
+    explanation = results_df.attrs.get("explanation") if explain else None
+    return RecommendResponse(extraction=extraction, results=results_list, explanation=explanation,
+                             weight_profile=profile.name)
 
 @router.get("/debug/vocabulary")
 async def get_vocabulary():
     """Debug endpoint để xem vocabulary của model"""
-    from app.routers.recsysmodel import loaded_mlb
+    from app.routers import two_tower_numpy
     
-    if loaded_mlb is None:
-        return {"error": "Model not loaded yet"}
+    try:
+        two_tower_numpy.load_weights()
+    except Exception as e:
+        return {"error": f"Model not loaded: {e}"}
     
-    vocab = list(loaded_mlb.classes_)
+    vocab = [str(tag) for tag in two_tower_numpy.vocab_classes]
     return {
         "total_tags": len(vocab),
         "sample_tags": vocab[:50],  # Hiển thị 50 tags đầu
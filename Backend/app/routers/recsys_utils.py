@@ -1,39 +1,59 @@
 from sqlmodel import Session, select
-from app.schemas import Rating, Place, InteractionType
-from collections import Counter
+from app.schemas import Rating, Place, Like, InteractionType
+from app.services.tag_vocab import TagMatrix
+from typing import List
 
 def build_profile_from_history(user_id: int, session: Session, limit_tags=10):
     """
     Tự động tạo list tags sở thích dựa trên lịch sử tương tác của user.
     """
-    # 1. Lấy các địa điểm user đã tương tác tích cực
+    # 1. Tags của các địa điểm user đã tương tác tích cực (một query JOIN, không get từng place)
     # (Ví dụ: like, click, view hoặc score cao)
-    statement = select(Rating).where(
-        Rating.user_id == user_id,
-        Rating.score >= 3.0  # Chỉ lấy những nơi user đánh giá tốt hoặc quan tâm
-    )
-    ratings = session.exec(statement).all()
+    rated_tags = _rated_place_tags(user_id, session)
     
-    if not ratings:
-        return []
-
-    # 2. Tổng hợp tất cả tags từ các địa điểm đó
-    all_tags = []
-    for rating in ratings:
-        # rating.place có thể chưa được load (lazy loading), nên query place nếu cần
-        # Ở đây giả sử relationship đã hoạt động hoặc query join
-        place = session.get(Place, rating.place_id) 
-        if place and place.tags:
-            # place.tags là list (do schema định nghĩa JSON)
-            all_tags.extend(place.tags)
-            
-    # 3. (Nâng cao) Lấy ra các tags xuất hiện nhiều nhất
+    # 2. Lấy ra các tags xuất hiện nhiều nhất (đếm trên tag id)
     # Ví dụ: User like 5 chỗ "Biển", 1 chỗ "Núi" -> Ưu tiên "Biển"
-    if not all_tags:
-        return []
-        
-    tag_counts = Counter(all_tags)
-    # Lấy top N tags phổ biến nhất trong lịch sử user
-    top_tags = [tag for tag, count in tag_counts.most_common(limit_tags)]
+    return TagMatrix(rated_tags).top_tags(range(len(rated_tags)), limit=limit_tags)
+
+
+def _rated_place_tags(user_id: int, session: Session) -> List[list]:
+    """Tags của các place user chấm >= 3.0, theo thứ tự rating"""
+    statement = (
+        select(Place.tags)
+        .join(Rating, Rating.place_id == Place.id)
+        .where(Rating.user_id == user_id, Rating.score >= 3.0)
+        .order_by(Rating.id)
+    )
+    return session.exec(statement).all()
+
+
+def get_history_tags(user_id: int, session: Session, limit=5) -> List[str]:
+    """Lấy tags từ những nơi user đã tương tác tốt (Rating >= 3.0 hoặc Like)"""
+    # 1. Lấy từ Ratings (score >= 3.0)
+    rated_tags = _rated_place_tags(user_id, session)
     
-    return top_tags
\ No newline at end of file
+    # 2. Lấy từ Likes (tín hiệu mạnh hơn - ưu tiên cao)
+    like_statement = (
+        select(Place.tags)
+        .join(Like, Like.place_id == Place.id)  # Chỉ lấy likes cho place
+        .where(Like.user_id == user_id)
+        .order_by(Like.id)
+    )
+    liked_tags = session.exec(like_statement).all()
+    
+    # Like có trọng số cao hơn (x2); đếm có trọng số trên tag id, một lần bincount
+    tags = TagMatrix(rated_tags + liked_tags)
+    weights = [1.0] * len(rated_tags) + [2.0] * len(liked_tags)
+    # Lấy top tags xuất hiện nhiều nhất
+    return tags.top_tags(range(len(tags)), weights, limit)
+
+
+def get_home_feed_tags(user, session: Session) -> List[str]:
+    """
+    Tags dùng cho home feed (không có user_text): lịch sử tương tác + preferences tĩnh.
+    Dùng chung cho /recommend và batch precompute để hai bên cho cùng một kết quả.
+    """
+    history_tags = get_history_tags(user.id, session)
+    if user.preferences:
+        history_tags.extend(user.preferences)
+    return history_tags
@@ -12,6 +12,12 @@ from typing import Optional
 from collections import Counter
 
 from app.schemas import Place, Rating, Like
+from app.routers import cf_model
+from app.metrics import StageTimer
+from app.services.weight_profiles import WeightProfile, weight_profiles
+from app.services.search_keys import TagTermIndex, normalize_text, tag_keys
+from app.services.rerank import DiversityCaps, rerank
+from app.services.tag_vocab import TagMatrix, tag_vocab
 
 # ==========================================
 # 1. LOAD DỮ LIỆU TỪ DATABASE.DB
@@ -38,12 +44,17 @@ def load_places_from_db():
             tags_text = " ".join(place.tags) if place.tags else ""
             desc_text = " ".join(place.description) if place.description else ""
             
+            # Tag dùng chung object str của tag_vocab (không lặp chuỗi "Ha Noi" ở mỗi place)
+            tags = tag_vocab.canonical(place.tags)
             places_data.append({
                 "id": place.id,
                 "name": place.name,
-                "tags": place.tags,
+                "tags": tags,
+                "province": tags[0] if tags else 'Vietnam',
                 "description": place.description,
                 "images": place.image,
+                # Khóa chuẩn hóa (không dấu, chữ thường) tính một lần lúc load
+                "name_key": normalize_text(place.name or ""),
                 # Tạo soup để vectorize
                 "soup": f"{place.name} {tags_text} {desc_text}"
             })
@@ -62,42 +73,74 @@ count_matrix = None
 vectorizer = None
 item_similarity_matrix = None  # Item-Item similarity for collaborative filtering
 place_popularity = None  # Popularity scores
+place_tags = None  # TagMatrix: tag id (int) của từng place, hàng i = items_df dòng i
+tag_term_index = None  # TagTermIndex: cụm từ của tag -> tag ids (khớp location)
 
-def initialize_recsys():
-    """Khởi tạo RecSys model - gọi hàm này sau khi database đã được tạo"""
-    global items_df, count_matrix, vectorizer, item_similarity_matrix, place_popularity
+# Category xuất hiện quá nhiều: giới hạn riêng (common_category) khi re-rank đa dạng
+COMMON_CATEGORIES = ('Nature', 'Historical', 'Cultural', 'Scenic', 'Sightseeing')
+
+def build_recsys_state():
+    """Tính toàn bộ state của RecSys từ DB (chưa gán vào global).
+    Trả về None nếu DB chưa có place."""
+    df = load_places_from_db()
+    if len(df) == 0:
+        return None
+    
+    # Khởi tạo TF-IDF vectorizer (thay vì Count)
+    tfidf = TfidfVectorizer(
+        stop_words='english',
+        max_features=5000,
+        ngram_range=(1, 2),  # Unigrams + bigrams
+        min_df=1,  # Xuất hiện ít nhất 1 lần
+        max_df=0.8  # Không quá phổ biến (>80%)
+    )
+    matrix = tfidf.fit_transform(df['soup'])
+    
+    # Tính item-item similarity matrix cho collaborative filtering
+    similarity = cosine_similarity(matrix, matrix)
+    
+    # Tính popularity scores từ database
+    popularity = calculate_popularity_scores()
+    
+    # Tag dạng CSR số nguyên; tag_row đi theo từng dòng qua copy / sort / sample
+    tags_csr = TagMatrix(df['tags'].tolist())
+    df['tag_row'] = np.arange(len(df))
+    
+    # Index location trên từ điển tag: "hue" -> id của tag "Thua Thien Hue"
+    term_index = TagTermIndex(range(len(tag_vocab)), [[tag] for tag in tag_vocab.tags])
     
-    if items_df is not None:
+    return df, matrix, tfidf, similarity, popularity, tags_csr, term_index
+
+
+def initialize_recsys(force: bool = False):
+    """Khởi tạo RecSys model - gọi hàm này sau khi database đã được tạo.
+    
+    force=True: build lại từ DB (reload model). State mới được tính xong rồi mới
+    thay vào global cùng lúc, request đang chạy vẫn dùng state cũ; nếu build lỗi
+    thì giữ nguyên state cũ.
+    """
+    global items_df, count_matrix, vectorizer, item_similarity_matrix, place_popularity, place_tags, tag_term_index
+    
+    if items_df is not None and not force:
         return  # Đã khởi tạo rồi
     
     try:
-        # Load data từ database
-        items_df = load_places_from_db()
-        
-        if len(items_df) == 0:
+        state = build_recsys_state()
+        if state is None:
             print("Warning: No places found in database")
             return
         
-        # Khởi tạo TF-IDF vectorizer (thay vì Count)
-        vectorizer = TfidfVectorizer(
-            stop_words='english',
-            max_features=5000,
-            ngram_range=(1, 2),  # Unigrams + bigrams
-            min_df=1,  # Xuất hiện ít nhất 1 lần
-            max_df=0.8  # Không quá phổ biến (>80%)
-        )
-        count_matrix = vectorizer.fit_transform(items_df['soup'])
-        
-        # Tính item-item similarity matrix cho collaborative filtering
-        item_similarity_matrix = cosine_similarity(count_matrix, count_matrix)
+        (items_df, count_matrix, vectorizer, item_similarity_matrix, place_popularity,
+         place_tags, tag_term_index) = state
         
-        # Tính popularity scores từ database
-        place_popularity = calculate_popularity_scores()
+        # Matrix-factorization CF (ALS trên Rating + Like), load từ file hoặc train nhanh
+        cf_model.initialize_cf(items_df['id'].values, force=force)
         
         print(f"RecSys initialized with {len(items_df)} places")
     except Exception as e:
         print(f"Failed to initialize RecSys: {e}")
-        items_df = pd.DataFrame()  # Empty dataframe để tránh lỗi
+        if items_df is None:
+            items_df = pd.DataFrame()  # Empty dataframe để tránh lỗi
 
 # --- HÀM HỖ TRỢ ---
 
@@ -193,7 +236,7 @@ def get_user_dislikes(user_id: int):
         except StopIteration:
             pass
 
-def build_user_profile(user_id: int):
+def build_user_profile(user_id: int, profile: Optional[WeightProfile] = None):
     """
     Tạo vector sở thích người dùng dựa trên:
     1. Rating history: Score cao (4-5) → Positive, Score thấp (1-2) → Negative
@@ -202,10 +245,11 @@ def build_user_profile(user_id: int):
     
     Chiến lược:
     - Rating có weight dựa trên score (1-5), với emphasis trên high ratings
-    - Like được tính như một positive signal rất mạnh (weight = 1.2)
-    - Dislike được tính như negative signal (weight = -1.0)
+    - Like được tính như một positive signal rất mạnh (profile.like_weight, mặc định 1.2)
+    - Dislike được tính như negative signal (profile.dislike_weight, mặc định -1.0)
     - Kết hợp cả ba để tạo user profile toàn diện
     """
+    profile = profile or weight_profiles.get()
     from app.database import get_session
     
     # Lấy ratings từ database
@@ -256,7 +300,7 @@ def build_user_profile(user_id: int):
             total_weight += abs(weight)
     
     # 2. XỬ LÝ LIKES (strong positive signal)
-    LIKE_WEIGHT = 1.2
+    LIKE_WEIGHT = profile.like_weight
     
     for place_id in liked_place_ids:
         item_vec = get_item_vector(place_id)
@@ -266,7 +310,7 @@ def build_user_profile(user_id: int):
             total_weight += LIKE_WEIGHT
     
     # 3. XỬ LÝ DISLIKES (strong negative signal)
-    DISLIKE_WEIGHT = -1.0
+    DISLIKE_WEIGHT = profile.dislike_weight
     
     for place_id in disliked_place_ids:
         item_vec = get_item_vector(place_id)
@@ -284,7 +328,8 @@ def build_user_profile(user_id: int):
     return user_profile, interacted_places, set(disliked_place_ids)
 
 # 4. HÀM RECOMMEND CHÍNH (Content-Based + Item-Based CF + Popularity)
-def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_k: int = 10):
+def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_k: int = 10,
+                            explain: bool = False, profile: Optional[WeightProfile] = None):
     """
     Hàm gợi ý ĐƯỢC CẢI THIỆN với:
     1. TF-IDF thay vì Count Vectorizer
@@ -297,6 +342,10 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
         user_prefs_tags (list): List các tags user quan tâm (từ prompt hoặc preferences)
         user_id (int, optional): ID người dùng để lấy lịch sử ratings
         top_k (int): Số lượng gợi ý trả về
+        explain (bool): Gắn thêm các điểm thành phần vào results.attrs["explanation"]
+            (mảng song song với các dòng kết quả, lấy từ các cột đã tính sẵn)
+        profile (WeightProfile, optional): trọng số blend / boost / diversity
+            (mặc định: profile mặc định trong app/services/weight_profiles.py)
     
     Returns:
         pd.DataFrame: DataFrame chứa các địa điểm được gợi ý với score
@@ -307,6 +356,12 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
     if count_matrix is None or items_df is None or len(items_df) == 0:
         return pd.DataFrame()  # Return empty dataframe
     
+    # Lấy profile một lần: file profile có reload giữa chừng thì request này vẫn nhất quán
+    profile = profile or weight_profiles.get()
+    
+    # Thời gian từng bước -> recsys_stage_duration_seconds{stage} (/metrics)
+    timer = StageTimer()
+    
     # --- BƯỚC 1: XÂY DỰNG QUERY VECTOR TỪ TAGS ---
     search_query = " ".join(user_prefs_tags) if user_prefs_tags else ""
     
@@ -315,6 +370,7 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
         query_vec = vectorizer.transform([search_query]).toarray()[0]
     except:
         query_vec = np.zeros(count_matrix.shape[1])
+    timer.lap("query_vectorize")
 
     # --- BƯỚC 2: KẾT HỢP VỚI LỊCH SỬ USER (NẾU CÓ) ---
     interacted_places = set()
@@ -322,16 +378,17 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
     user_liked_places = []
     
     if user_id:
-        user_profile_vec, interacted_places, disliked_places = build_user_profile(user_id)
+        user_profile_vec, interacted_places, disliked_places = build_user_profile(user_id, profile)
         user_liked_places = get_user_likes(user_id)
         
         if user_profile_vec is not None:
-            # HYBRID: 50% Current Intent + 50% User History (tăng weight history)
-            final_vec = (query_vec * 0.5) + (user_profile_vec * 0.5)
+            # HYBRID: Current Intent + User History (mặc định 50/50)
+            final_vec = (query_vec * profile.query_weight) + (user_profile_vec * (1 - profile.query_weight))
         else:
             final_vec = query_vec
     else:
         final_vec = query_vec
+    timer.lap("profile_build")
 
     # --- BƯỚC 3: TÍNH CONTENT-BASED SCORES ---
     if np.all(final_vec == 0):
@@ -343,15 +400,19 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
             results['score'] = results['id'].apply(lambda x: place_popularity.get(x, 0.1))
         else:
             results['score'] = 0.5
+        if explain:
+            results['popularity_score'] = results['score']
         
         # Add diversity: mix popular with random
         results = results.sample(frac=1, random_state=None).reset_index(drop=True)
         results['score'] = results['score'] * np.random.uniform(0.8, 1.2, len(results))
+        timer.lap("popularity")
     else:
         # Tính Cosine Similarity (Content-Based)
         content_scores = cosine_similarity([final_vec], count_matrix)[0]
         results = items_df.copy()
         results['content_score'] = content_scores
+        timer.lap("cosine")
         
         # --- BƯỚC 4: THÊM ITEM-BASED COLLABORATIVE FILTERING ---
         cf_scores = np.zeros(len(results))
@@ -370,7 +431,16 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
             if np.max(cf_scores) > 0:
                 cf_scores = cf_scores / np.max(cf_scores)
         
+        # Matrix-factorization CF: user factor (hoặc fold-in cho user mới) x item factors
+        mf_scores = cf_model.score_items(user_id, results['id'].values) if user_id else None
+        if mf_scores is not None:
+            if np.max(cf_scores) > 0:
+                cf_scores = (1 - profile.mf_blend) * cf_scores + profile.mf_blend * mf_scores
+            else:
+                cf_scores = mf_scores
+        
         results['cf_score'] = cf_scores
+        timer.lap("cf")
         
         # --- BƯỚC 5: THÊM POPULARITY BOOST ---
         popularity_scores = np.zeros(len(results))
@@ -380,29 +450,25 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
         results['popularity_score'] = popularity_scores
         
         # --- BƯỚC 6: KẾT HỢP CÁC SCORES (HYBRID) ---
-        # Weights dựa trên có user history hay không
-        if user_id and user_liked_places:
-            # User có history: 40% content + 40% CF + 20% popularity
-            results['score'] = (
-                0.40 * results['content_score'] +
-                0.40 * results['cf_score'] +
-                0.20 * results['popularity_score']
-            )
+        # Weights dựa trên có user history hay không (vector [content, cf, popularity] của profile)
+        if user_id and (user_liked_places or mf_scores is not None):
+            # User có history: mặc định 40% content + 40% CF + 20% popularity
+            weights = profile.history_weights
         else:
-            # User mới: 60% content + 40% popularity
-            results['score'] = (
-                0.60 * results['content_score'] +
-                0.40 * results['popularity_score']
-            )
+            # User mới: mặc định 60% content + 40% popularity
+            weights = profile.new_user_weights
+        components = np.column_stack((content_scores, cf_scores, popularity_scores))
+        results['score'] = components @ weights
+        timer.lap("popularity")
     
-    # Thêm cột province (lấy từ tag đầu tiên)
-    results['province'] = results['tags'].apply(lambda x: x[0] if x and len(x) > 0 else 'Vietnam')
+    # Cột province (tag đầu tiên) đã tính sẵn trong items_df
     
     # --- BƯỚC 7: XỬ LÝ PLACES ĐÃ INTERACT (SOFT PENALTY) ---
     # Giảm score cho disliked places nhưng không loại bỏ hoàn toàn
     if disliked_places:
         # Penalty cho disliked places
-        results.loc[results['id'].isin(disliked_places), 'score'] *= 0.1
+        results.loc[results['id'].isin(disliked_places), 'score'] *= profile.dislike_penalty
+    timer.lap("dislike_penalty")
     
     # Không filter interacted places trong evaluation
     # (để có thể recommend lại places user thích)
@@ -417,151 +483,181 @@ def recommend_content_based(user_prefs_tags, user_id: Optional[int] = None, top_
         'quang nam', 'thua thien hue', 'binh dinh', 'phu yen'
     ]
     
+    # Tag của user chuẩn hóa không dấu ("Đà Nẵng" -> "da nang") trước khi so
     location_tags = [
-        tag for tag in user_prefs_tags 
-        if any(loc in tag.lower() for loc in vietnam_locations)
+        key for key in tag_keys(user_prefs_tags)
+        if any(loc in key for loc in vietnam_locations)
     ]
     
-    if location_tags:
-        location_tags_lower = [loc.lower().strip() for loc in location_tags]
-        
-        def matches_location(tags_list):
-            if not tags_list:
-                return False
-            tags_lower = [tag.lower() for tag in tags_list]
-            return any(
-                any(user_loc in tag for user_loc in location_tags_lower)
-                for tag in tags_lower
-            )
+    if location_tags and place_tags is not None:
+        # Tag chứa (nguyên từ) location của user -> tag ids -> mask place trên CSR
+        location_tag_ids = list(tag_term_index.lookup(location_tags))
+        place_mask = place_tags.rows_with_any(location_tag_ids)
         
         # Boost places matching location thay vì filter cứng
-        location_mask = results['tags'].apply(matches_location)
-        results.loc[location_mask, 'score'] *= 1.5  # 50% boost for matching location
+        location_mask = place_mask[results['tag_row'].values]
+        results.loc[location_mask, 'score'] *= profile.location_boost  # mặc định +50% cho location khớp
+        if explain:
+            results['location_boost'] = np.where(location_mask, profile.location_boost, 1.0)
+    timer.lap("location_boost")
     
-    # --- BƯỚC 9: DIVERSITY OPTIMIZATION (MMR-inspired) ---
+    # --- BƯỚC 9: DIVERSITY RE-RANK (MMR / xQuAD, app/services/rerank.py) ---
     # Sắp xếp theo score
     results = results.sort_values(by='score', ascending=False)
     
-    # Lấy top candidates (5x top_k để có đủ options cho diversity)
-    candidates = results.head(top_k * 5)
-    
-    # Multi-dimension diversity với STRICT LIMITS
-    selected = []
-    province_count = Counter()
-    category_count = Counter()
-    
-    # STRICT LIMITS - không cho phép vượt quá
-    # Province: tối đa 30% từ cùng province (ví dụ: top_k=10 → max 3 từ Lam Dong)
-    # Category: tối đa 40% từ cùng category (ví dụ: top_k=10 → max 4 Waterfall)
-    max_per_province = max(2, int(top_k * 0.3))
-    max_per_category = max(3, int(top_k * 0.4))
-    
-    # HARD LIMIT cho category phổ biến như "Nature" (xuất hiện quá nhiều)
-    common_categories = {'Nature', 'Historical', 'Cultural', 'Scenic', 'Sightseeing'}
-    max_common_category = max(5, int(top_k * 0.6))  # 60% cho common categories
-    
-    def can_add_item(province, categories, current_count):
-        """Kiểm tra có thể thêm item không dựa trên diversity constraints"""
-        # Check province limit
-        if province_count[province] >= max_per_province:
-            return False, "province_limit"
-        
-        # Check category limits
-        for cat in categories:
-            if cat in common_categories:
-                if category_count[cat] >= max_common_category:
-                    return False, f"common_cat_{cat}"
-            else:
-                # Specific categories (Waterfall, Beach, Temple, etc.) - stricter
-                if category_count[cat] >= max_per_category:
-                    return False, f"specific_cat_{cat}"
-        
-        return True, "ok"
+    # Lấy top candidates (mặc định 5x top_k để có đủ options cho diversity)
+    candidates = results.head(top_k * profile.candidate_multiplier)
+    timer.lap("sort")
     
-    # Pass 1: Strict selection
-    for _, row in candidates.iterrows():
-        if len(selected) >= top_k:
-            break
-        
-        place_tags = row['tags'] if isinstance(row['tags'], list) else []
-        province = place_tags[0] if len(place_tags) > 0 else 'Unknown'
-        categories = place_tags[1:] if len(place_tags) > 1 else ['Unknown']
-        
-        can_add, reason = can_add_item(province, categories, len(selected))
-        
-        if can_add:
-            selected.append(row)
-            province_count[province] += 1
-            for cat in categories:
-                category_count[cat] += 1
-    
-    # Pass 2: Relaxed selection (chỉ check province OR giới hạn category nới lỏng 50%)
-    if len(selected) < top_k:
-        for _, row in candidates.iterrows():
-            if len(selected) >= top_k:
-                break
-            if row.name in [r.name for r in selected]:
-                continue
-            
-            place_tags = row['tags'] if isinstance(row['tags'], list) else []
-            province = place_tags[0] if len(place_tags) > 0 else 'Unknown'
-            categories = place_tags[1:] if len(place_tags) > 1 else ['Unknown']
-            
-            # Relaxed: province limit x1.5 OR all categories under x1.5 limit
-            province_ok = province_count[province] < max_per_province * 1.5
-            category_ok = all(
-                category_count[cat] < (max_common_category * 1.5 if cat in common_categories else max_per_category * 1.5)
-                for cat in categories
-            )
-            
-            if province_ok and category_ok:
-                selected.append(row)
-                province_count[province] += 1
-                for cat in categories:
-                    category_count[cat] += 1
-    
-    # Pass 3: Fill remaining (nhưng vẫn giữ HARD LIMIT: max 50% từ cùng province)
-    if len(selected) < top_k:
-        hard_max_province = max(3, int(top_k * 0.5))
-        for _, row in candidates.iterrows():
-            if len(selected) >= top_k:
-                break
-            if row.name in [r.name for r in selected]:
-                continue
-            
-            place_tags = row['tags'] if isinstance(row['tags'], list) else []
-            province = place_tags[0] if len(place_tags) > 0 else 'Unknown'
-            
-            # Hard limit: không quá 50% từ cùng province
-            if province_count[province] < hard_max_province:
-                selected.append(row)
-                province_count[province] += 1
-                for cat in place_tags[1:]:
-                    category_count[cat] += 1
+    # Giới hạn tỉnh / category cũ thành ràng buộc của re-ranker (tỉ lệ lấy từ profile)
+    # Province: mặc định tối đa 30% từ cùng province (ví dụ: top_k=10 → max 3 từ Lam Dong)
+    # Category: mặc định tối đa 40% từ cùng category, 60% với category phổ biến như "Nature";
+    # hết candidate hợp lệ thì nới x relax_factor, cuối cùng chỉ giữ hard limit theo province
+    candidate_rows = candidates['tag_row'].values
+    caps = DiversityCaps.from_tag_matrix(place_tags, candidate_rows, profile.diversity_limits(top_k),
+                                         map(tag_vocab.id_of, COMMON_CATEGORIES))
+    
+    # MMR trừ similarity TF-IDF với các place đã chọn; xQuAD thưởng tag (aspect) chưa được phủ
+    selection = rerank(profile.rerank, candidates['score'].values, candidate_rows, top_k,
+                       item_similarity_matrix, place_tags, caps, profile.rerank_lambda)
+    selected_positions, selected_pass = selection.positions, selection.levels.tolist()
+    
+    timer.lap("rerank")
     
     # Convert back to DataFrame
-    results = pd.DataFrame(selected)
+    results = candidates.iloc[selected_positions]
+    selected = [row for _, row in results.iterrows()]
+    
+    explanation = _build_explanation(selected, selected_pass, final_vec, disliked_places,
+                                     profile.dislike_penalty) if explain else None
     
     # Đảm bảo các cột cần thiết tồn tại
     results = results[['id', 'name', 'tags', 'province', 'score']].copy()
     
-    return results.head(top_k)
+    results = results.head(top_k)
+    if explanation is not None:
+        results.attrs["explanation"] = explanation
+    return results
+
+
+# --- EXPLAIN: lý do gợi ý, đọc từ các cột đã tính (không chạy lại scoring) ---
+
+_feature_names = (None, None)  # (vectorizer, feature names) - cache theo vectorizer hiện tại
+
+def get_feature_names():
+    global _feature_names
+    if _feature_names[0] is not vectorizer:
+        _feature_names = (vectorizer, vectorizer.get_feature_names_out())
+    return _feature_names[1]
+
+
+def top_contributing_terms(final_vec, item_positions, n_terms: int = 5):
+    """
+    Các term TF-IDF đóng góp nhiều nhất vào cosine của từng item:
+    giao giữa các term khác 0 của query/profile vector và của hàng TF-IDF của item
+    (tích từng phần tử trên sparse row, không tính lại cả ma trận)
+    """
+    if not item_positions or not np.any(final_vec):
+        return [[] for _ in item_positions]
+    
+    rows = count_matrix[item_positions].multiply(np.asarray(final_vec).reshape(1, -1)).tocsr()
+    names = get_feature_names()
+    terms = []
+    for i in range(rows.shape[0]):
+        start, end = rows.indptr[i], rows.indptr[i + 1]
+        data, indices = rows.data[start:end], rows.indices[start:end]
+        order = np.argsort(-data)[:n_terms]
+        terms.append([str(names[indices[j]]) for j in order if data[j] > 0])
+    return terms
+
+
+def _build_explanation(selected, selected_pass, final_vec, disliked_places, dislike_penalty):
+    """Mảng điểm thành phần song song với các item được chọn"""
+    def column(name, default):
+        return [round(float(row.get(name, default)), 4) for row in selected]
+    
+    positions = [items_df.index.get_loc(row.name) for row in selected] if np.any(final_vec) else []
+    return {
+        "content_score": column('content_score', 0.0),
+        "cf_score": column('cf_score', 0.0),
+        "popularity_score": column('popularity_score', 0.0),
+        "location_boost": column('location_boost', 1.0),
+        "dislike_penalty": [dislike_penalty if row['id'] in disliked_places else 1.0 for row in selected],
+        "diversity_pass": list(selected_pass),
+        "top_terms": top_contributing_terms(final_vec, positions) if positions else [[] for _ in selected],
+    }
+
+_theme_catalogue = (None, None)  # (items_df, ThemeCatalogue) - cache theo items_df hiện tại
+
+def get_theme_catalogue():
+    """ThemeCatalogue (app/services/theme_engine.py) của items_df: themes = tags, tỉnh = tags[0]"""
+    global _theme_catalogue
+    from app.services.theme_engine import ThemeCatalogue
+    
+    df = items_df
+    if _theme_catalogue[0] is not df:
+        catalogue = ThemeCatalogue(df['id'].values, df['name'].tolist(), df['province'].tolist(),
+                                   df['tags'].tolist())
+        _theme_catalogue = (df, catalogue)
+    return _theme_catalogue[1]
+
+def recommend_theme(user_prefs_tags, top_k: int = 10) -> Optional[pd.DataFrame]:
+    """Engine "theme": chấm tỉnh + theme như scoring_service.score_place; None nếu không place nào > 0"""
+    from app.services.theme_engine import ThemeQuery
+    
+    positions, scores = get_theme_catalogue().top_k(ThemeQuery.from_tags(user_prefs_tags), top_k)
+    if len(positions) == 0:
+        return None
+    results = items_df.iloc[positions][['id', 'name', 'tags', 'province']].copy()
+    results['score'] = scores
+    return results
+
+# Các engine có thể chọn qua recommend_two_tower(engine=...) hoặc settings.RECSYS_ENGINE
+RECSYS_ENGINES = ("content", "two_tower", "theme")
 
 # Wrapper function để tương thích với recommendation.py (thay thế two-tower)
-def recommend_two_tower(user_prefs_tags, user_id=None, top_k=10):
+def recommend_two_tower(user_prefs_tags, user_id=None, top_k=10, engine: Optional[str] = None,
+                        explain: bool = False, profile: Optional[WeightProfile] = None):
     """
     Wrapper function tương thích với interface của two-tower model.
-    Sử dụng Content-Based Filtering thay vì Two-Tower.
+    Mặc định dùng Content-Based Filtering; engine="two_tower" chạy two-tower model
+    bằng NumPy (two_tower_numpy.py, không cần TensorFlow); engine="theme" chấm theo
+    tỉnh + theme trên ma trận tính sẵn (theme_engine.py).
     
     Args:
         user_prefs_tags (list): List các tags user thích
         user_id (int, optional): ID người dùng để lấy lịch sử tương tác
         top_k (int): Số lượng gợi ý trả về
+        engine (str, optional): "content", "two_tower" hoặc "theme" (mặc định settings.RECSYS_ENGINE)
+        explain (bool): content-based gắn điểm thành phần vào results.attrs["explanation"]
+        profile (WeightProfile, optional): weight profile của content-based engine
     
     Returns:
         pd.DataFrame: DataFrame chứa các địa điểm được gợi ý
     """
-    return recommend_content_based(user_prefs_tags, user_id=user_id, top_k=top_k)
+    from app.config import settings
+    engine = engine or settings.RECSYS_ENGINE
+    
+    if engine == "two_tower":
+        initialize_recsys()
+        if items_df is not None and len(items_df) > 0:
+            from app.routers import two_tower_numpy
+            two_tower_numpy.initialize_two_tower(items_df)
+            results = two_tower_numpy.recommend_two_tower_numpy(user_prefs_tags, top_k=top_k)
+            if results is not None:
+                return results
+        # Không có tag nào trong vocabulary -> fallback content-based (popularity cho cold start)
+    
+    if engine == "theme":
+        initialize_recsys()
+        if items_df is not None and len(items_df) > 0:
+            results = recommend_theme(user_prefs_tags, top_k=top_k)
+            if results is not None:
+                return results
+        # Không place nào khớp tỉnh / theme -> fallback content-based
+    
+    return recommend_content_based(user_prefs_tags, user_id=user_id, top_k=top_k, explain=explain,
+                                   profile=profile)
 
 # Hàm recommend cũ (giữ lại để backward compatibility)
 def recommend(user_prompt_extraction, user_id: Optional[int] = None):
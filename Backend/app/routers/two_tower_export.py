@@ -0,0 +1,90 @@
+# ==========================================
+# EXPORT TWO-TOWER WEIGHTS -> NUMPY (.npz)
+# ==========================================
+#
+# Đọc trực tiếp two_tower_model.keras (zip gồm config.json + model.weights.h5)
+# bằng h5py, không cần import TensorFlow. Kết quả là một file .npz chứa:
+#   - kernel/bias của từng Dense layer (key: "<layer>/kernel", "<layer>/bias")
+#   - embedding table của province
+#   - vocabulary của MultiLabelBinarizer (mlb_vocab.pkl) và province_map.pkl
+# để two_tower_numpy.py chạy inference chỉ bằng NumPy.
+#
+# Cách chạy (từ thư mục Backend/):
+#     python -m app.routers.two_tower_export
+
+import io
+import json
+import os
+import pickle
+import zipfile
+
+import numpy as np
+
+ROUTERS_DIR = os.path.dirname(os.path.abspath(__file__))
+KERAS_MODEL_PATH = os.path.join(ROUTERS_DIR, "two_tower_model.keras")
+MLB_VOCAB_PATH = os.path.join(ROUTERS_DIR, "mlb_vocab.pkl")
+PROVINCE_MAP_PATH = os.path.join(ROUTERS_DIR, "province_map.pkl")
+NUMPY_WEIGHTS_PATH = os.path.join(ROUTERS_DIR, "two_tower_weights.npz")
+
+
+def read_keras_weights(model_path: str = KERAS_MODEL_PATH) -> dict:
+    """
+    Trả về {layer_name: [var0, var1, ...]} theo tên layer trong config.json.
+    File .keras (Keras 3) đặt tên group theo class (dense, dense_1...), còn tên thật
+    của layer nằm trong attribute "name" của group vars.
+    """
+    import h5py  # Chỉ cần khi export
+
+    with zipfile.ZipFile(model_path) as archive:
+        weights_bytes = archive.read("model.weights.h5")
+
+    weights = {}
+    with h5py.File(io.BytesIO(weights_bytes), "r") as h5:
+        for group in h5["layers"].values():
+            vars_group = group.get("vars")
+            if vars_group is None or len(vars_group) == 0:
+                continue
+            name = vars_group.attrs.get("name")
+            if isinstance(name, bytes):
+                name = name.decode("utf-8")
+            weights[name] = [np.asarray(vars_group[str(i)], dtype=np.float32) for i in range(len(vars_group))]
+    return weights
+
+
+def read_keras_config(model_path: str = KERAS_MODEL_PATH) -> dict:
+    with zipfile.ZipFile(model_path) as archive:
+        return json.loads(archive.read("config.json"))
+
+
+def export_numpy_weights(output_path: str = NUMPY_WEIGHTS_PATH) -> str:
+    """Export toàn bộ tham số cần cho inference ra một file .npz"""
+    weights = read_keras_weights()
+    config = read_keras_config()
+
+    arrays = {}
+    for layer in config["config"]["layers"]:
+        name = layer["name"]
+        if layer["class_name"] == "Dense":
+            kernel, bias = weights[name]
+            arrays[f"{name}/kernel"] = kernel
+            arrays[f"{name}/bias"] = bias
+        elif layer["class_name"] == "Embedding":
+            arrays[f"{name}/embeddings"] = weights[name][0]
+
+    with open(MLB_VOCAB_PATH, "rb") as f:
+        mlb = pickle.load(f)  # Cần scikit-learn để unpickle, chỉ lúc export
+    with open(PROVINCE_MAP_PATH, "rb") as f:
+        province_map = pickle.load(f)
+
+    arrays["vocab"] = np.asarray(list(mlb.classes_), dtype=str)
+    provinces = sorted(province_map.items(), key=lambda kv: kv[1])
+    arrays["province_names"] = np.asarray([name for name, _ in provinces], dtype=str)
+    arrays["province_ids"] = np.asarray([idx for _, idx in provinces], dtype=np.int64)
+
+    np.savez(output_path, **arrays)
+    print(f"Exported {len(arrays)} arrays to {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    export_numpy_weights()
@@ -0,0 +1,147 @@
+# ==========================================
+# TWO-TOWER INFERENCE CHỈ BẰNG NUMPY (CPU, KHÔNG TENSORFLOW)
+# ==========================================
+#
+# Port forward pass của two_tower_model.keras sang NumPy:
+#   user tower: multi-hot tags (224) -> Dense 128 relu -> (Dropout, bỏ qua khi inference)
+#               -> Dense 64 relu -> user_embedding (32, linear)
+#   item tower: multi-hot tags (224) -> Dense 128 relu -> Dense 64 relu
+#               province id -> Embedding (16) ; concat -> Dense 64 relu -> item_embedding (32)
+#   output:     sigmoid(w * cosine(user, item) + b)
+#
+# Item embeddings được tính một lần cho toàn bộ catalogue lúc khởi tạo và lưu
+# dạng đã L2-normalize, nên chấm điểm một user = một phép matrix-vector product.
+# Weights đọc từ two_tower_weights.npz (tạo bằng: python -m app.routers.two_tower_export).
+
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.routers.two_tower_export import NUMPY_WEIGHTS_PATH, KERAS_MODEL_PATH, export_numpy_weights
+
+# --- State (lazy) ---
+weights = None            # {"<layer>/kernel": array, ...}
+vocab_classes = None      # np.ndarray tags theo thứ tự cột multi-hot (giống mlb.classes_)
+vocab_index = None        # {tag: column}
+province_index = None     # {province: embedding row}
+item_embeddings = None    # float32 (n_items, 32), đã L2-normalize
+item_frame = None         # DataFrame id/name/tags/province cùng thứ tự với item_embeddings
+
+
+def _dense(x, layer, activation=None):
+    out = x @ weights[f"{layer}/kernel"] + weights[f"{layer}/bias"]
+    if activation == "relu":
+        np.maximum(out, 0.0, out=out)
+    return out
+
+
+def _l2_normalize(x):
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def load_weights(path: str = NUMPY_WEIGHTS_PATH):
+    """Load weights + vocabulary từ .npz (tự export từ file .keras nếu chưa có)"""
+    global weights, vocab_classes, vocab_index, province_index
+
+    if weights is not None:
+        return
+
+    if not os.path.exists(path) and os.path.exists(KERAS_MODEL_PATH):
+        export_numpy_weights(path)
+
+    data = np.load(path)
+    weights = {key: data[key].astype(np.float32) for key in data.files if "/" in key}
+    vocab_classes = data["vocab"]
+    vocab_index = {tag: i for i, tag in enumerate(vocab_classes)}
+    province_index = {name: int(idx) for name, idx in zip(data["province_names"], data["province_ids"])}
+
+
+def encode_tags(tags_lists) -> np.ndarray:
+    """
+    Tương đương MultiLabelBinarizer.transform: multi-hot float32 (n, n_vocab).
+    Tag không có trong vocabulary bị bỏ qua (giống MLB).
+    """
+    encoded = np.zeros((len(tags_lists), len(vocab_classes)), dtype=np.float32)
+    for row, tags in enumerate(tags_lists):
+        cols = [vocab_index[t] for t in (tags or []) if t in vocab_index]
+        encoded[row, cols] = 1.0
+    return encoded
+
+
+def _province_ids(provinces) -> np.ndarray:
+    # Embedding có input_dim = len(province_map) + 1 nên province lạ dùng slot cuối
+    unknown = len(province_index)
+    return np.asarray([province_index.get(p, unknown) for p in provinces], dtype=np.int64)
+
+
+def item_tower(tags_lists, provinces) -> np.ndarray:
+    tag_branch = _dense(_dense(encode_tags(tags_lists), "dense_2", "relu"), "dense_3", "relu")
+    province_branch = weights["embedding/embeddings"][_province_ids(provinces)]
+    merged = np.concatenate([tag_branch, province_branch], axis=1)
+    return _dense(_dense(merged, "dense_4", "relu"), "item_embedding")
+
+
+def user_tower(tags_lists) -> np.ndarray:
+    return _user_tower_encoded(encode_tags(tags_lists))
+
+
+def _user_tower_encoded(encoded) -> np.ndarray:
+    hidden = _dense(encoded, "dense", "relu")  # Dropout = identity khi inference
+    return _dense(_dense(hidden, "dense_1", "relu"), "user_embedding")
+
+
+def initialize_two_tower(items_df: pd.DataFrame):
+    """Load weights và precompute item embeddings cho toàn bộ catalogue"""
+    global item_embeddings, item_frame
+
+    if item_embeddings is not None:
+        return
+
+    load_weights()
+
+    tags_lists = [tags if isinstance(tags, list) else [] for tags in items_df['tags']]
+    provinces = [tags[0] if tags else "" for tags in tags_lists]
+
+    item_embeddings = _l2_normalize(item_tower(tags_lists, provinces)).astype(np.float32)
+    item_frame = pd.DataFrame({
+        "id": items_df['id'].values,
+        "name": items_df['name'].values,
+        "tags": tags_lists,
+        "province": [p or 'Vietnam' for p in provinces],
+    })
+    print(f"Two-tower (NumPy) initialized with {len(item_frame)} item embeddings")
+
+
+def score_tags(user_prefs_tags: List[str]) -> Optional[np.ndarray]:
+    """Output của model (sigmoid) cho mọi item. None nếu không có tag nào trong vocabulary."""
+    encoded = encode_tags([user_prefs_tags])
+    if not encoded.any():
+        return None
+    user_vec = _user_tower_encoded(encoded)[0]
+    cosine = item_embeddings @ _l2_normalize(user_vec)
+    logits = cosine * weights["dense_5/kernel"][0, 0] + weights["dense_5/bias"][0]
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+def recommend_two_tower_numpy(user_prefs_tags, top_k: int = 10) -> Optional[pd.DataFrame]:
+    """
+    Top-k theo two-tower model. Trả về None khi không có tag hợp lệ để caller
+    fallback về engine content-based (popularity cho cold start).
+    """
+    if item_embeddings is None or not user_prefs_tags:
+        return None
+
+    scores = score_tags(user_prefs_tags)
+    if scores is None:
+        return None
+
+    top_k = min(top_k, len(scores))
+    top_idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    top_idx = top_idx[np.argsort(-scores[top_idx])]
+
+    results = item_frame.iloc[top_idx].copy()
+    results['score'] = scores[top_idx]
+    return results[['id', 'name', 'tags', 'province', 'score']]
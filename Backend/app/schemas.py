@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlmodel import SQLModel, Field, Relationship, JSON, Column
 
 from enum import Enum
@@ -130,6 +130,47 @@ class Like(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class PrecomputedRecommendation(SQLModel, table=True):
+    """Top-N gợi ý home feed được tính sẵn bởi batch job (app/services/batch_recommend.py)"""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    
+    # Hai list song song: place_ids[i] có score là scores[i], đã sắp xếp giảm dần theo score
+    place_ids: List[int] = Field(default=[], sa_column=Column(JSON))
+    scores: List[float] = Field(default=[], sa_column=Column(JSON))
+    # top_k lúc tính: chỉ phục vụ request cùng top_k (re-rank đa dạng phụ thuộc top_k)
+    top_k: int = Field(default=0)
+    
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PlaceSearchKey(SQLModel, table=True):
+    """Khóa tìm kiếm chuẩn hóa (không dấu, chữ thường) của Place (app/services/search_keys.py)"""
+    place_id: int = Field(foreign_key="place.id", primary_key=True)
+
+    name_key: str = Field(default="", index=True)               # "ho hoan kiem"
+    province_key: Optional[str] = Field(default=None, index=True)  # tags[0]: "ha noi"
+    tags_key: str = Field(default="")                           # "|ha noi|lake|"
+
+
+class PlaceSearchToken(SQLModel, table=True):
+    """Từ (token) của name_key / tags_key -> place: tìm keyword bằng lookup / range scan trên khóa chính"""
+    token: str = Field(primary_key=True)                         # "hoan"
+    field: str = Field(primary_key=True)                         # "name" hoặc "tag"
+    place_id: int = Field(foreign_key="place.id", primary_key=True, index=True)
+
+
+class UploadedImage(SQLModel, table=True):
+    """
+    Ảnh upload qua app/services/upload_service.py -> thumbnail WebP đã tạo.
+    User.avatar_url / cover_image_url và Post.images lưu URL gốc; thumbnail tra theo URL đó
+    (ảnh không có dòng ở đây -> client dùng ảnh gốc)
+    """
+    url: str = Field(primary_key=True)                           # "/uploads/posts/<sha256>.jpg"
+    sha256: str = Field(index=True)
+    thumbnails: Dict[str, str] = Field(default={}, sa_column=Column(JSON))  # {"160": "/uploads/posts/thumbs/<sha256>_160.webp"}
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # ==========================================
 # API MODELS (table=False) (not create table in db)
 # Used for Requests, Responses, and LLM parsing.
@@ -140,6 +181,8 @@ class Like(SQLModel, table=True):
 class RecommendRequest(SQLModel):
     user_text: str = Field(..., schema_extra={"example": "i like mountains in Viet Nam"})
     top_k: int = Field(5)
+    engine: Optional[str] = Field(None, description='Recommendation engine: "content", "two_tower" hoặc "theme"')
+    weight_profile: Optional[str] = Field(None, description="Weight profile của content-based engine (A/B test), mặc định: profile mặc định")
 
 class GroqExtraction(SQLModel):
     location: List[str] = Field(default=[], sa_column=Column(JSON))
@@ -168,9 +211,21 @@ class PlaceOut(SQLModel):
 #     none = "none"
 
     
+class RecommendExplanation(SQLModel):
+    """Điểm thành phần của từng kết quả (mảng song song với results), trả về khi explain=true"""
+    content_score: List[float]
+    cf_score: List[float]
+    popularity_score: List[float]
+    location_boost: List[float]
+    dislike_penalty: List[float]
+    diversity_pass: List[int]
+    top_terms: List[List[str]]
+
 class RecommendResponse(SQLModel):
     extraction: Optional[GroqExtraction] = None
     results: List[PlaceOut]
+    explanation: Optional[RecommendExplanation] = None
+    weight_profile: Optional[str] = None  # profile đã dùng để chấm điểm (log A/B test)
 
 # --- Rating Flow ---
 
@@ -201,6 +256,9 @@ class UserResponse(SQLModel):
     bio: Optional[str] = None
     location: Optional[str] = None
     preferences: List[str] # Trả về preferences để frontend hiển thị
+    # {size: URL WebP} của avatar / cover (rỗng -> dùng ảnh gốc)
+    avatar_thumbnails: Dict[str, str] = {}
+    cover_thumbnails: Dict[str, str] = {}
 class Token(SQLModel):
     access_token: str
     token_type: str
@@ -292,6 +350,7 @@ class PostUserInfo(SQLModel):
     username: str
     display_name: Optional[str] = None
     avatar_url: Optional[str] = None
+    avatar_thumbnails: Dict[str, str] = {}
 
 
 class PostPlaceInfo(SQLModel):
@@ -314,6 +373,7 @@ class PostResponse(SQLModel):
     id: int
     content: str
     images: List[str]
+    image_thumbnails: List[Dict[str, str]] = []  # song song với images, {} -> dùng ảnh gốc
     created_at: datetime
     like_count: int
     comment_count: int
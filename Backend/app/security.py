@@ -1,5 +1,10 @@
 # app/security.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from multiprocessing import get_context
 from typing import Optional
 from jose import jwt #, JWTError
 import bcrypt  # <--- Thay đổi: Import bcrypt trực tiếp
@@ -18,7 +23,7 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     # Tạo salt và hash password
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed_bytes = bcrypt.hashpw(pwd_bytes, salt)
     # Trả về string để lưu vào Database (SQLite TEXT)
     return hashed_bytes.decode('utf-8')
@@ -32,4 +37,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+# ==========================================
+# BCRYPT TRÊN PROCESS POOL RIÊNG
+# ==========================================
+# bcrypt tốn ~100-300ms CPU mỗi lần. Chạy inline trong route sync sẽ chiếm thread
+# của threadpool chung (phục vụ mọi endpoint sync khác) -> một đợt login dồn dập
+# làm các endpoint không liên quan bị chờ. Pool riêng, giới hạn số process, giữ
+# phần CPU này tách khỏi event loop lẫn threadpool mặc định.
+
+class PasswordHasherPool:
+    """ProcessPoolExecutor (spawn, tạo lazy) + số liệu queue depth"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0          # đã submit, chưa xong (đang chạy + đang chờ)
+        self.max_in_flight = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0  # tổng thời gian từ submit đến khi có kết quả
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: không fork process đang có event loop + threads
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+            return self._executor
+
+    async def run(self, fn, *args):
+        executor = self._get_executor()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_wait_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.max_workers),
+                "max_in_flight": self.max_in_flight,
+                "completed": self.completed,
+                "avg_latency_ms": round(1000 * self.total_wait_seconds / self.completed, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordHasherPool(settings.PASSWORD_HASH_WORKERS)
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    return await password_pool.run(get_password_hash, password)
@@ -0,0 +1,397 @@
+"""
+Engine chung cho các job làm giàu dữ liệu bằng LLM (translate_dtb.py, tagsGenerate.py).
+
+- asyncio worker pool (concurrency request song song) thay vì gọi tuần tự + sleep
+- Token bucket cho RPM và TPM: request chỉ được gửi khi còn quota, usage thực tế
+  trả về được trừ bù vào bucket TPM
+- Nhiều item trong một prompt ({"items": [{"id": 0, ...}, ...]}), giới hạn theo
+  batch_size và số token ước tính mỗi batch
+- Journal JSONL append-only: mỗi item xong được ghi ngay (flush + fsync mỗi batch).
+  Chạy lại sau crash / hết quota chỉ xử lý phần còn thiếu
+- Dedup theo content hash: item trùng nội dung (trong file hoặc đã có trong journal)
+  chỉ gọi LLM một lần
+- Không ghi file output giữa chừng: caller ghi một lần ở cuối (write_csv_rows)
+
+Client gọi API OpenAI-compatible /chat/completions nên dùng chung cho Groq, Gemini
+(OpenAI endpoint) và stub server local trong test (test_batch_enrichment.py).
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.metrics import llm_timer
+
+GROQ_OPENAI_BASE_URL = "https://api.groq.com/openai/v1"
+GEMINI_OPENAI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai"
+
+# Ước tính thô: ~3 ký tự / token (tiếng Việt có dấu tốn token hơn tiếng Anh)
+CHARS_PER_TOKEN = 3
+
+
+# ==========================================
+# 1. RATE LIMIT
+# ==========================================
+class TokenBucket:
+    """Nạp đều rate_per_minute token mỗi phút, tối đa capacity (mặc định = 1 phút quota)"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # Request lớn hơn cả bucket: chờ bucket đầy thay vì chờ mãi
+        amount = min(amount, self.capacity)
+        # Lock giữ thứ tự FIFO giữa các worker đang chờ
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Trừ thêm (amount > 0) hoặc hoàn lại (amount < 0) khi usage thực tế khác ước tính"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+# ==========================================
+# 2. JOURNAL (resume + dedup)
+# ==========================================
+class ResultJournal:
+    """JSONL append-only, mỗi dòng {"key", "output", "tokens"}; dòng cuối bị cắt dở khi crash được bỏ qua"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.results: Dict[str, dict] = {}
+        self._file = None
+        self._needs_newline = False
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            self._needs_newline = bool(data) and not data.endswith(b"\n")
+            for line in data.decode("utf-8", errors="replace").splitlines():
+                try:
+                    entry = json.loads(line)
+                    self.results[entry["key"]] = entry["output"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.results
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def append_many(self, entries: Sequence[Tuple[str, dict, int]]):
+        if not entries:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._needs_newline:
+                self._file.write("\n")
+        for key, output, tokens in entries:
+            self._file.write(json.dumps({"key": key, "output": output, "tokens": tokens}, ensure_ascii=False) + "\n")
+            self.results[key] = output
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ==========================================
+# 3. LLM CLIENT
+# ==========================================
+class LLMRateLimited(Exception):
+    def __init__(self, retry_after: Optional[float]):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    total_tokens: int
+
+
+class ChatCompletionClient:
+    """Client cho API OpenAI-compatible (POST {base_url}/chat/completions), JSON mode"""
+
+    def __init__(self, base_url: str, api_key: Optional[str], model: str, provider: str = "llm",
+                 temperature: float = 0.3, max_tokens: int = 4000, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.provider = provider
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def complete(self, system: str, user: str) -> LLMResponse:
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=self.timeout)
+
+        with llm_timer(self.provider):
+            response = await self._client.post("/chat/completions", json={
+                "model": self.model,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user},
+                ],
+            })
+            if response.status_code == 429:
+                retry_after = response.headers.get("retry-after")
+                raise LLMRateLimited(float(retry_after) if retry_after else None)
+            response.raise_for_status()
+
+        data = response.json()
+        usage = data.get("usage") or {}
+        return LLMResponse(text=data["choices"][0]["message"]["content"],
+                           total_tokens=int(usage.get("total_tokens", 0)))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# ==========================================
+# 4. TASK + ENGINE
+# ==========================================
+class EnrichmentTask:
+    """
+    Định nghĩa một job: system prompt + các field output bắt buộc.
+    Prompt gửi {"items": [{"id": i, ...payload}]}, model trả {"items": [{"id": i, ...output}]}.
+    Đổi prompt thì tăng version: hash đổi theo, kết quả cũ trong journal không bị dùng lại.
+    """
+    name = "task"
+    version = "1"
+    system_prompt = ""
+    output_fields: Tuple[str, ...] = ()
+
+    def item_key(self, payload: dict) -> str:
+        raw = json.dumps([self.name, self.version, payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def estimate_tokens(self, payload: dict) -> int:
+        # input + output xấp xỉ cùng độ dài (dịch / sinh tags ngắn hơn input)
+        return 2 * len(json.dumps(payload, ensure_ascii=False)) // CHARS_PER_TOKEN + 20
+
+    def build_prompt(self, payloads: List[dict]) -> str:
+        return json.dumps({"items": [{"id": i, **payload} for i, payload in enumerate(payloads)]},
+                          ensure_ascii=False)
+
+    def parse_response(self, text: str) -> Dict[int, dict]:
+        """{id trong batch: output}; item thiếu / sai field bị bỏ (engine tự gửi lại)"""
+        data = json.loads(text)
+        items = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            raise ValueError("response không có 'items'")
+        results = {}
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get("id"), int):
+                continue
+            output = {name: item.get(name) for name in self.output_fields}
+            if self.validate(output):
+                results[item["id"]] = output
+        return results
+
+    def validate(self, output: dict) -> bool:
+        return all(output.get(name) is not None for name in self.output_fields)
+
+
+@dataclass
+class EnrichmentStats:
+    items: int = 0
+    skipped: int = 0            # payload None (không cần gọi LLM)
+    cached: int = 0             # đã có trong journal từ lần chạy trước
+    unique_pending: int = 0     # số item khác nhau cần gọi LLM lần này
+    processed: int = 0
+    failed: int = 0
+    requests: int = 0
+    retries: int = 0
+    tokens_used: int = 0
+    stopped_by_budget: bool = False
+    elapsed_seconds: float = 0.0
+
+
+def make_batches(keys: List[str], payloads: Dict[str, dict], task: EnrichmentTask,
+                 batch_size: int, max_batch_tokens: int) -> List[List[str]]:
+    batches, current, current_tokens = [], [], 0
+    for key in keys:
+        tokens = task.estimate_tokens(payloads[key])
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(key)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def run_enrichment(payloads: Sequence[Optional[dict]], task: EnrichmentTask, client, journal_path: str, *,
+                         concurrency: int = 4, batch_size: int = 5, max_batch_tokens: int = 3000,
+                         rpm: float = 30, tpm: float = 6000, token_budget: Optional[int] = None,
+                         request_budget: Optional[int] = None, max_retries: int = 3,
+                         backoff_base: float = 2.0) -> Tuple[List[Optional[dict]], EnrichmentStats]:
+    """
+    Chạy task cho mọi payload (None = bỏ qua). Trả về (outputs song song với payloads, stats);
+    output None = chưa xử lý được (lỗi hoặc hết budget), lần chạy sau sẽ làm tiếp.
+    """
+    start = time.perf_counter()
+    stats = EnrichmentStats(items=len(payloads))
+    journal = ResultJournal(journal_path)
+
+    keys: List[Optional[str]] = []
+    pending: Dict[str, dict] = {}
+    for payload in payloads:
+        if payload is None:
+            stats.skipped += 1
+            keys.append(None)
+            continue
+        key = task.item_key(payload)
+        keys.append(key)
+        if key in journal:
+            stats.cached += 1
+        else:
+            pending.setdefault(key, payload)
+    stats.unique_pending = len(pending)
+
+    rpm_bucket = TokenBucket(rpm)
+    tpm_bucket = TokenBucket(tpm)
+    system_tokens = len(task.system_prompt) // CHARS_PER_TOKEN
+    queue: asyncio.Queue = asyncio.Queue()
+    for batch in make_batches(list(pending), pending, task, batch_size, max_batch_tokens):
+        queue.put_nowait((batch, 0))
+
+    def out_of_budget() -> bool:
+        return ((token_budget is not None and stats.tokens_used >= token_budget) or
+                (request_budget is not None and stats.requests >= request_budget))
+
+    async def retry_later(batch: List[str], attempt: int, reason: str, delay: Optional[float] = None):
+        if attempt >= max_retries:
+            stats.failed += len(batch)
+            print(f"❌ [{task.name}] Bỏ {len(batch)} item sau {attempt + 1} lần thử: {reason}")
+            return
+        stats.retries += 1
+        await asyncio.sleep(delay if delay is not None else backoff_base * (2 ** attempt) * random.uniform(0.5, 1.0))
+        queue.put_nowait((batch, attempt + 1))
+
+    async def process(batch: List[str], attempt: int):
+        if out_of_budget():
+            stats.stopped_by_budget = True
+            return
+
+        estimate = system_tokens + sum(task.estimate_tokens(pending[key]) for key in batch)
+        await rpm_bucket.acquire(1)
+        await tpm_bucket.acquire(estimate)
+        if out_of_budget():  # worker khác có thể đã dùng hết budget trong lúc chờ
+            stats.stopped_by_budget = True
+            return
+
+        stats.requests += 1
+        try:
+            response = await client.complete(task.system_prompt, task.build_prompt([pending[k] for k in batch]))
+        except LLMRateLimited as e:
+            await retry_later(batch, attempt, str(e), e.retry_after)
+            return
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            await retry_later(batch, attempt, repr(e))
+            return
+
+        stats.tokens_used += response.total_tokens
+        tpm_bucket.adjust(response.total_tokens - estimate)
+        try:
+            results = task.parse_response(response.text)
+        except (ValueError, TypeError) as e:
+            if len(batch) > 1:
+                # JSON hỏng (thường do output bị cắt): chia đôi batch
+                middle = len(batch) // 2
+                queue.put_nowait((batch[:middle], attempt))
+                queue.put_nowait((batch[middle:], attempt))
+            else:
+                await retry_later(batch, attempt, f"invalid JSON: {e}")
+            return
+
+        done = [(key, results[i], response.total_tokens // len(batch)) for i, key in enumerate(batch) if i in results]
+        journal.append_many(done)
+        stats.processed += len(done)
+        missing = [key for i, key in enumerate(batch) if i not in results]
+        if missing:
+            await retry_later(missing, attempt, f"{len(missing)} item thiếu trong response", delay=0)
+
+    async def worker():
+        while True:
+            batch, attempt = await queue.get()
+            try:
+                await process(batch, attempt)
+            except Exception as e:
+                stats.failed += len(batch)
+                print(f"❌ [{task.name}] Lỗi không mong đợi: {e!r}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        journal.close()
+
+    stats.elapsed_seconds = time.perf_counter() - start
+    print(f"[{task.name}] {stats.processed} processed, {stats.cached} from journal, {stats.failed} failed, "
+          f"{stats.requests} requests, {stats.tokens_used:,} tokens in {stats.elapsed_seconds:.1f}s"
+          + (" (dừng vì hết budget)" if stats.stopped_by_budget else ""))
+    outputs = [journal.results.get(key) if key is not None else None for key in keys]
+    return outputs, stats
+
+
+# ==========================================
+# 5. CSV I/O (đọc một lần, ghi một lần)
+# ==========================================
+def read_csv_rows(path: str) -> Tuple[List[str], List[dict]]:
+    csv.field_size_limit(2 ** 31 - 1)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        return list(reader.fieldnames or []), rows
+
+
+def write_csv_rows(path: str, fieldnames: Sequence[str], rows: Sequence[dict], quoting=csv.QUOTE_MINIMAL):
+    """Ghi ra file tạm rồi os.replace: không bao giờ để lại file output ghi dở"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(fieldnames), quoting=quoting, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
@@ -0,0 +1,186 @@
+"""
+Offline batch precomputation cho home feed.
+
+User đã đăng nhập mà không gõ gì (user_text rỗng) sẽ nhận home feed được tính
+hoàn toàn từ lịch sử tương tác. Thay vì chạy recommend_two_tower() mỗi lần load
+trang, job này tính sẵn top-k cho mọi active user (có Rating hoặc Like) và lưu
+vào bảng PrecomputedRecommendation. /recommend đọc thẳng bảng này, chỉ fallback
+về online scoring khi user mới, list đã stale / bị invalidate hoặc request có top_k khác
+(re-rank đa dạng chọn theo top_k nên top_k khác cho list khác, không cắt từ list dài hơn được).
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.batch_recommend --workers 4 --shard-size 200 --top-k 12
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, SQLModel, select, delete
+
+from app.config import settings
+from app.database import engine
+from app.schemas import User, Rating, Like, PrecomputedRecommendation
+
+
+# ==========================================
+# 1. ĐỌC / INVALIDATE (dùng bởi API)
+# ==========================================
+
+def get_precomputed_feed(user_id: int, session: Session, top_k: int) -> Optional[List[Tuple[int, float]]]:
+    """
+    Trả về [(place_id, score), ...] nếu user có list tính sẵn còn fresh và được tính với đúng
+    top_k này (có thể ít hơn top_k phần tử nếu online scoring cũng chỉ trả về ngần ấy).
+    Trả về None khi cần fallback về online scoring.
+    """
+    row = session.get(PrecomputedRecommendation, user_id)
+    if row is None or not row.place_ids:
+        return None
+
+    ttl = timedelta(hours=settings.PRECOMPUTED_RECS_TTL_HOURS)
+    if datetime.utcnow() - row.computed_at > ttl:
+        return None
+
+    if row.top_k != top_k:
+        return None
+
+    return list(zip(row.place_ids, row.scores))
+
+
+def invalidate_precomputed_feed(user_id: int, session: Session):
+    """
+    Xóa list tính sẵn của user (gọi khi user có tương tác mới: view, like, comment).
+    Không commit - caller tự commit cùng transaction của mình.
+    """
+    session.exec(delete(PrecomputedRecommendation).where(PrecomputedRecommendation.user_id == user_id))
+
+
+# ==========================================
+# 2. BATCH JOB
+# ==========================================
+
+def get_active_user_ids(session: Session) -> List[int]:
+    """Active user = có ít nhất một Rating hoặc một Like cho place"""
+    rating_users = session.exec(select(Rating.user_id).distinct()).all()
+    like_users = session.exec(
+        select(Like.user_id).where(Like.place_id.isnot(None)).distinct()
+    ).all()
+    return sorted(set(rating_users) | set(like_users))
+
+
+def _init_worker():
+    """
+    Chạy một lần trong mỗi worker process: bỏ các connection kế thừa từ process cha
+    rồi build RecSys state (TF-IDF + similarity) để dùng lại cho mọi shard.
+    """
+    engine.dispose(close=False)
+
+    from app.routers.recsysmodel import initialize_recsys
+    initialize_recsys()
+
+
+def _score_shard(user_ids: List[int], top_k: int) -> List[Tuple[int, List[int], List[float]]]:
+    """Tính top-k cho một shard users. Trả về list (user_id, place_ids, scores)"""
+    from app.routers.recsysmodel import recommend_two_tower
+    from app.routers.recsys_utils import get_home_feed_tags
+
+    rows = []
+    with Session(engine) as session:
+        for user_id in user_ids:
+            user = session.get(User, user_id)
+            if user is None:
+                continue
+
+            # Giống hệt nhánh "không gõ gì" của /recommend
+            final_tags = list(set(get_home_feed_tags(user, session)))
+            results_df = recommend_two_tower(final_tags, user_id=user_id, top_k=top_k)
+            if results_df.empty:
+                continue
+
+            rows.append((
+                user_id,
+                [int(pid) for pid in results_df['id']],
+                [round(float(s), 6) for s in results_df['score']],
+            ))
+    return rows
+
+
+def _save_rows(rows: List[Tuple[int, List[int], List[float]]], top_k: int, computed_at: datetime):
+    """Upsert theo user_id bằng một câu executemany duy nhất"""
+    if not rows:
+        return
+
+    table = PrecomputedRecommendation.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "place_ids": stmt.excluded.place_ids,
+            "scores": stmt.excluded.scores,
+            "top_k": stmt.excluded.top_k,
+            "computed_at": stmt.excluded.computed_at,
+        },
+    )
+
+    with engine.begin() as conn:
+        conn.execute(stmt, [
+            {"user_id": uid, "place_ids": ids, "scores": scores, "top_k": top_k, "computed_at": computed_at}
+            for uid, ids, scores in rows
+        ])
+
+
+def precompute_all(top_k: int = None, workers: int = None, shard_size: int = 200) -> dict:
+    """
+    Tính top-k cho toàn bộ active users bằng process pool, mỗi task là một shard users.
+
+    Returns:
+        dict thống kê: số users, số list đã lưu, thời gian chạy, users/second
+    """
+    top_k = top_k or settings.PRECOMPUTED_RECS_TOP_K
+    workers = workers or os.cpu_count() or 1
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user_ids = get_active_user_ids(session)
+
+    shards = [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+    print(f"[Batch Recommend] {len(user_ids)} active users, {len(shards)} shards, {workers} workers, top_k={top_k}")
+
+    computed_at = datetime.utcnow()
+    saved = 0
+    start = time.perf_counter()
+
+    if shards:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_worker) as pool:
+            futures = [pool.submit(_score_shard, shard, top_k) for shard in shards]
+            for future in as_completed(futures):
+                rows = future.result()
+                _save_rows(rows, top_k, computed_at)
+                saved += len(rows)
+
+    elapsed = time.perf_counter() - start
+    users_per_second = len(user_ids) / elapsed if elapsed > 0 else 0.0
+
+    stats = {
+        "active_users": len(user_ids),
+        "saved_lists": saved,
+        "elapsed_seconds": round(elapsed, 3),
+        "users_per_second": round(users_per_second, 2),
+    }
+    print(f"[Batch Recommend] Saved {saved} lists in {elapsed:.2f}s ({users_per_second:.1f} users/s)")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute home-feed recommendations for active users")
+    parser.add_argument("--top-k", type=int, default=settings.PRECOMPUTED_RECS_TOP_K,
+                        help="top_k của home feed (list chỉ phục vụ request cùng top_k)")
+    parser.add_argument("--workers", type=int, default=None, help="Số process (mặc định = số CPU)")
+    parser.add_argument("--shard-size", type=int, default=200, help="Số users mỗi task")
+    args = parser.parse_args()
+
+    precompute_all(top_k=args.top_k, workers=args.workers, shard_size=args.shard_size)
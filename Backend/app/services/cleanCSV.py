@@ -1,65 +1,56 @@
-import pandas as pd
-import json
 import os
 
-# 1. Đọc file dữ liệu gốc
-input_file = 'vietnam_tourism_data_en.csv'
-output_file = 'vietnam_tourism_data_cleaned.csv'
-
-# Kiểm tra xem file gốc có tồn tại không
-if not os.path.exists(input_file):
-    print(f"LỖI: Không tìm thấy file '{input_file}'. Hãy đảm bảo file này nằm cùng thư mục với code.")
-else:
-    df = pd.read_csv(input_file)
-
-    # 2. Hàm xử lý: Nối văn bản để train AI (loại bỏ ||| và link ảnh thừa)
-    def clean_description_for_ai(text):
-        if not isinstance(text, str):
-            return ""
-        # Tách các đoạn
-        parts = text.split('|||')
-        # Lọc bỏ link ảnh và khoảng trắng thừa
-        clean_parts = [p.strip() for p in parts if not p.strip().startswith('http') and p.strip()]
-        # Nối lại bằng dấu chấm để thành đoạn văn liền mạch
-        return ". ".join(clean_parts)
-
-    # 3. Hàm xử lý: Chuyển thành JSON List để lưu vào Database (cột description)
-    def to_json_list_desc(text):
-        if not isinstance(text, str):
-            return json.dumps([]) # Trả về mảng rỗng []
-        parts = text.split('|||')
-        # Lọc text sạch
-        clean_parts = [p.strip() for p in parts if not p.strip().startswith('http') and p.strip()]
-        return json.dumps(clean_parts, ensure_ascii=False)
-
-    # 4. Hàm xử lý: Chuyển thành JSON List để lưu vào Database (cột image)
-    def to_json_list_image(text):
-        if not isinstance(text, str):
-            return json.dumps([])
-        parts = text.split('|||')
-        # Lọc lấy link ảnh
-        clean_parts = [p.strip() for p in parts if p.strip()]
-        return json.dumps(clean_parts, ensure_ascii=False)
-
-    # Áp dụng các hàm trên
-    print("Đang xử lý dữ liệu...")
-    # Tạo cột input cho model AI
-    df['ai_input_text'] = df['description'].apply(clean_description_for_ai)
-    
-    # Tạo cột format JSON cho SQLModel
-    df['description_json'] = df['description'].apply(to_json_list_desc)
-    df['image_json'] = df['image'].apply(to_json_list_image)
-    
-    # Đổi tên title -> name cho khớp schema
-    df['name'] = df['title']
-
-    # Chọn các cột cần thiết để xuất file
-    final_df = df[['id', 'name', 'ai_input_text', 'description_json', 'image_json']]
-
-    # Lưu ra file CSV mới
-    final_df.to_csv(output_file, index=False)
-    
-    print("-" * 30)
-    print(f"XONG! Đã tạo file mới: {output_file}")
-    print(f"Tổng số dòng: {len(final_df)}")
-    print("Bạn hãy kiểm tra thư mục chứa file code để thấy file CSV mới này.")
\ No newline at end of file
+from app.services.data_lake import read_stage, stage_paths, write_stage
+
+# 1. Đọc stage bản dịch (Parquet; CSV nếu chưa có Parquet)
+input_file = 'vietnam_tourism_data_en'
+output_file = 'vietnam_tourism_data_cleaned'
+
+
+# 2. Hàm xử lý: Nối văn bản để train AI (loại bỏ link ảnh thừa)
+def clean_description_for_ai(parts):
+    # Lọc bỏ link ảnh và khoảng trắng thừa
+    clean_parts = [p.strip() for p in parts or [] if not p.strip().startswith('http') and p.strip()]
+    # Nối lại bằng dấu chấm để thành đoạn văn liền mạch
+    return ". ".join(clean_parts)
+
+
+# 3. Hàm xử lý: List đoạn văn sạch cho Database (cột description)
+def to_list_desc(parts):
+    return [p.strip() for p in parts or [] if not p.strip().startswith('http') and p.strip()]
+
+
+# 4. Hàm xử lý: List link ảnh cho Database (cột image)
+def to_list_image(parts):
+    return [p.strip() for p in parts or [] if p.strip()]
+
+
+if __name__ == "__main__":
+    # Kiểm tra xem file gốc có tồn tại không
+    if not any(os.path.exists(p) for p in stage_paths(input_file)):
+        print(f"LỖI: Không tìm thấy '{input_file}.parquet' / '.csv'. Hãy đảm bảo file này nằm cùng thư mục với code.")
+    else:
+        # description / image là cột list native: không cần split "|||" hay json.dumps
+        df = read_stage(input_file, columns=['id', 'title', 'description', 'image'])
+
+        # Áp dụng các hàm trên
+        print("Đang xử lý dữ liệu...")
+        # Tạo cột input cho model AI
+        df['ai_input_text'] = df['description'].apply(clean_description_for_ai)
+
+        # Cột list cho SQLModel (CSV export vẫn ghi dạng JSON như trước)
+        df['description_json'] = df['description'].apply(to_list_desc)
+        df['image_json'] = df['image'].apply(to_list_image)
+
+        # Đổi tên title -> name cho khớp schema
+        df['name'] = df['title']
+
+        # Chọn các cột cần thiết để xuất file
+        final_df = df[['id', 'name', 'ai_input_text', 'description_json', 'image_json']]
+
+        # Lưu Parquet cho stage sau + CSV cho người đọc
+        write_stage(final_df, output_file)
+
+        print("-" * 30)
+        print(f"XONG! Đã tạo file mới: {output_file}.parquet (+ .csv)")
+        print(f"Tổng số dòng: {len(final_df)}")
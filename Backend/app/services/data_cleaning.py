@@ -1,38 +1,46 @@
 import pandas as pd
 import re
 
+from app.services.data_lake import PIPE, read_stage, write_stage
+
 def clean_description(text):
     # Check if the cell is empty/NaN
     if pd.isna(text):
         return ""
-    
+
     # Ensure text is a string
     text = str(text)
-    
+
     # Replace one or more empty lines (and surrounding whitespace) with "|||"
     # \n\s*\n matches a newline, optional whitespace, and another newline
     return re.sub(r'(\n\s*\n)+', '|||', text).strip()
 
-# 1. Read the CSV file
-input_file = 'vietnam_tourism_data_copy.csv'
-output_file = 'a_processed.csv'
-
-try:
-    df = pd.read_csv(input_file)
-
-    # 2. Check if 'description' column exists to avoid errors
-    if 'description' in df.columns:
-        # Apply the function specifically to the 'description' column
-        df['description'] = df['description'].apply(clean_description)
-        
-        # 3. Save the result to a new file
-        # index=False prevents pandas from adding a new numbering column
-        df.to_csv(output_file, index=False)
-        print(f"Success! Processed data saved to {output_file}")
-    else:
-        print("Error: Column 'description' not found in the CSV.")
-
-except FileNotFoundError:
-    print(f"Error: The file {input_file} was not found.")
-except Exception as e:
-    print(f"An error occurred: {e}")
\ No newline at end of file
+def clean_description_parts(parts):
+    # description is a native list column (split on "|||"); empty lines inside a part split it further
+    if not parts:
+        return []
+    return clean_description(PIPE.join(parts)).split(PIPE)
+
+# 1. Read the raw stage (Parquet, or the CSV if no Parquet exists yet)
+input_file = 'vietnam_tourism_data_raw'
+output_file = 'vietnam_tourism_data_processed_new'
+
+if __name__ == "__main__":
+    try:
+        df = read_stage(input_file)
+
+        # 2. Check if 'description' column exists to avoid errors
+        if 'description' in df.columns:
+            # Apply the function specifically to the 'description' column
+            df['description'] = df['description'].apply(clean_description_parts)
+
+            # 3. Save the result: Parquet for the next stage + CSV export for humans
+            write_stage(df, output_file)
+            print(f"Success! Processed data saved to {output_file}.parquet (+ .csv)")
+        else:
+            print("Error: Column 'description' not found in the input.")
+
+    except FileNotFoundError:
+        print(f"Error: The file {input_file}.parquet / .csv was not found.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
@@ -406,10 +406,21 @@ async def crawl_all_places_info():
         print(f"Done! Scraped {len(all_place)} items.")
 
 
+async def crawl_all_places_parallel(workers=4):
+    """
+    Bản song song + checkpoint của crawl_all_places_info (app/services/place_crawler.py):
+    pool `workers` browser context, mỗi trang ghi ngay vào journal JSONL, chạy lại sẽ resume.
+    """
+    from app.services.place_crawler import run
+
+    return await run(start=START_PAGE, pages=MAX_PAGES, base_url=BASE_URL, workers=workers)
+
+
 # Run the script
 if __name__ == "__main__":
     
-    asyncio.run(crawl_all_places_info())
+    asyncio.run(crawl_all_places_parallel())
+    # asyncio.run(crawl_all_places_info())
     # asyncio.run(crawl_1place_info_wrapper())
 
     # asyncio.run(crawl_content_info())
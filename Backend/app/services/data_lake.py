@@ -0,0 +1,213 @@
+"""
+Lưu các stage của pipeline dữ liệu (raw -> processed -> en -> cleaned -> with_tags) dạng Parquet.
+
+- Mỗi stage là một file `<stem>.parquet` (zstd) + một bản `<stem>.csv` xuất kèm cho người đọc /
+  script cũ. Stage sau đọc Parquet; CSV chỉ được đọc khi chưa có Parquet hoặc CSV mới hơn
+  (vừa sửa tay)
+- Cột list lưu kiểu list<string> native: không còn JSON string / "|||" phải parse lại ở mỗi stage.
+  Khi xuất CSV, cột list được mã hóa lại đúng format cũ của cột đó ("|||" hoặc JSON)
+- Cột số có kiểu cố định (id int64, lat / lon float64, ...)
+- read_stage(columns=..., filters=...) chỉ đọc các cột cần và bỏ qua row group không khớp
+  điều kiện (predicate pushdown của pyarrow)
+
+So sánh thời gian load CSV vs Parquet: benchmarks/data_lake_benchmark.py
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.data_lake convert app/services/vietnam_tourism_data_en.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.place_importer import parse_list_field
+
+PIPE = "|||"
+
+# Cột list -> format khi xuất CSV ("pipe": nối bằng "|||" như dữ liệu crawl; "json": JSON list)
+LIST_COLUMNS: Dict[str, str] = {
+    "description": "pipe",
+    "image": "pipe",
+    "description_json": "json",
+    "image_json": "json",
+    "tags": "json",
+}
+
+TYPED_COLUMNS: Dict[str, pa.DataType] = {
+    "id": pa.int64(),
+    "lat": pa.float64(),
+    "lon": pa.float64(),
+    "temp": pa.float64(),
+    "wind": pa.float64(),
+}
+
+LIST_TYPE = pa.list_(pa.string())
+ROW_GROUP_SIZE = 256    # ~1k địa điểm / file: vài row group để filter theo id bỏ qua được phần lớn file
+
+
+def stage_paths(path: str) -> Tuple[str, str]:
+    """`x`, `x.csv` hoặc `x.parquet` -> (x.parquet, x.csv)"""
+    stem, ext = os.path.splitext(path)
+    if ext not in (".csv", ".parquet"):
+        stem = path
+    return f"{stem}.parquet", f"{stem}.csv"
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def decode_list(value, fmt: str) -> Optional[List[str]]:
+    """Giá trị trong CSV -> list; ô trống -> None"""
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    if _is_missing(value):
+        return None
+    if fmt == "pipe":
+        return str(value).split(PIPE) if value != "" else []
+    return parse_list_field(str(value))
+
+
+def encode_list(value, fmt: str) -> str:
+    if value is None:
+        return ""
+    if fmt == "pipe":
+        return PIPE.join(value)
+    return json.dumps(list(value), ensure_ascii=False)
+
+
+# ==========================================
+# 1. DATAFRAME <-> ARROW
+# ==========================================
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """DataFrame (cột list dạng list hoặc string CSV) -> Table có kiểu cố định"""
+    arrays, fields = [], []
+    for column in df.columns:
+        values = df[column]
+        if column in LIST_COLUMNS:
+            fmt = LIST_COLUMNS[column]
+            array = pa.array([decode_list(v, fmt) for v in values], type=LIST_TYPE)
+        elif column in TYPED_COLUMNS:
+            array = pa.array(pd.to_numeric(values, errors="coerce"), type=TYPED_COLUMNS[column], from_pandas=True)
+        else:
+            array = pa.array(values, from_pandas=True)
+            if pa.types.is_null(array.type):
+                array = array.cast(pa.string())
+        arrays.append(array)
+        fields.append(pa.field(str(column), array.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Cột list trả về dạng Python list (to_pandas mặc định trả numpy array cho từng ô)"""
+    list_columns = [f.name for f in table.schema if pa.types.is_list(f.type)]
+    df = table.drop_columns(list_columns).to_pandas()
+    for column in list_columns:
+        df[column] = table.column(column).to_pylist()
+    return df[table.column_names]
+
+
+def _csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for column, fmt in LIST_COLUMNS.items():
+        if column in out.columns:
+            out[column] = [encode_list(v, fmt) for v in out[column]]
+    return out
+
+
+def read_csv_frame(csv_path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Đọc CSV cũ, giải mã cột list (dùng khi stage chưa có Parquet)"""
+    df = pd.read_csv(csv_path, usecols=columns, keep_default_na=False, na_values=[""])
+    for column, fmt in LIST_COLUMNS.items():
+        if column in df.columns:
+            df[column] = [decode_list(v, fmt) for v in df[column]]
+    return df
+
+
+# ==========================================
+# 2. READ / WRITE STAGE
+# ==========================================
+def write_stage(df: pd.DataFrame, path: str, csv_export: bool = True, csv_quoting=csv.QUOTE_MINIMAL) -> str:
+    """Ghi Parquet (và CSV cho người đọc), qua file tạm + os.replace; trả về đường dẫn Parquet"""
+    parquet_path, csv_path = stage_paths(path)
+    table = to_table(df)
+    tmp_path = f"{parquet_path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, parquet_path)
+
+    if csv_export:
+        tmp_path = f"{csv_path}.tmp"
+        _csv_frame(table_to_frame(table)).to_csv(tmp_path, index=False, quoting=csv_quoting)
+        os.replace(tmp_path, csv_path)
+        # CSV ghi sau Parquet: giữ mtime bằng nhau để read_stage không coi CSV là "mới sửa tay"
+        stat = os.stat(parquet_path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return parquet_path
+
+
+def _use_parquet(parquet_path: str, csv_path: str) -> bool:
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.stat(parquet_path).st_mtime_ns >= os.stat(csv_path).st_mtime_ns
+
+
+def read_stage(path: str, columns: Optional[Sequence[str]] = None, filters=None) -> pd.DataFrame:
+    """
+    Đọc một stage. filters theo cú pháp pyarrow, vd: [("id", "in", [1, 2, 3])];
+    với Parquet điều kiện được đẩy xuống reader (bỏ qua row group), với CSV lọc sau khi đọc.
+    """
+    parquet_path, csv_path = stage_paths(path)
+    if _use_parquet(parquet_path, csv_path):
+        return table_to_frame(pq.read_table(parquet_path, columns=columns, filters=filters))
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Không tìm thấy {parquet_path} hoặc {csv_path}")
+
+    table = to_table(read_csv_frame(csv_path, columns))
+    if filters is not None:
+        table = table.filter(pq.filters_to_expression(filters))
+    return table_to_frame(table)
+
+
+def read_rows(path: str, columns: Optional[Sequence[str]] = None, filters=None) -> Tuple[List[str], List[dict]]:
+    """(fieldnames, rows) cho các script xử lý theo dòng (translate, tags); ô trống -> ""/[]"""
+    df = read_stage(path, columns, filters)
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    for row in rows:
+        for key, value in row.items():
+            if value is None:
+                row[key] = [] if key in LIST_COLUMNS else ""
+    return list(df.columns), rows
+
+
+def write_rows(path: str, fieldnames: Sequence[str], rows: Sequence[dict], csv_quoting=csv.QUOTE_MINIMAL) -> str:
+    df = pd.DataFrame([{name: row.get(name) for name in fieldnames} for row in rows], columns=list(fieldnames))
+    return write_stage(df, path, csv_quoting=csv_quoting)
+
+
+def convert_csv(csv_path: str) -> str:
+    """CSV cũ -> Parquet cạnh nó (CSV giữ nguyên)"""
+    parquet_path, _ = stage_paths(csv_path)
+    pq.write_table(to_table(read_csv_frame(csv_path)), parquet_path, compression="zstd",
+                   row_group_size=ROW_GROUP_SIZE)
+    return parquet_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tourism data pipeline stages as Parquet")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="Chuyển CSV sang Parquet")
+    convert.add_argument("csv_paths", nargs="+")
+    args = parser.parse_args()
+
+    for source in args.csv_paths:
+        target = convert_csv(source)
+        print(f"✅ {source} ({os.path.getsize(source) / 1e6:.2f} MB) -> {target} "
+              f"({os.path.getsize(target) / 1e6:.2f} MB)")
@@ -0,0 +1,371 @@
+"""
+Gazetteer: tỉnh / thành phố / địa danh Việt Nam + sửa tọa độ và tag tỉnh cho Place
+(thay vòng lặp substring của fix_coordinates.py, fix_coordinates_v2.py, fix_province_tags.py).
+
+- Dữ liệu ở app/gazetteer.json (địa danh, biến thể tên tỉnh, thành phố -> tỉnh, lề bounding box);
+  tâm tỉnh lấy từ geo_enrichment.PROVINCE_COORDS
+- Tên được chuẩn hóa không dấu (search_keys.normalize_text) rồi khớp bằng automaton Aho-Corasick build
+  một lần: mỗi tên / mô tả chỉ quét một lượt, không phụ thuộc số mẫu. Mẫu được bao bởi dấu cách
+  nên chỉ khớp nguyên từ
+- Tag tỉnh: cùng thứ tự ưu tiên như fix_province_tags ("X province" > thành phố > tên tỉnh,
+  500 ký tự đầu của mô tả được ưu tiên); tag chỉ bị đổi khi tỉnh hiện tại không còn được nhắc
+  tới ở phần đầu mô tả
+- Tọa độ: địa danh khớp tên -> tọa độ địa danh; không thì giữ tọa độ hiện có nếu nằm trong
+  bounding box của tỉnh, ngược lại (thiếu / outlier) -> tâm tỉnh. Kiểm tra bbox vectorized (NumPy)
+- Mọi thay đổi ghi bằng MỘT câu UPDATE executemany
+
+Bounding box là xấp xỉ: tâm tỉnh ± lề (mặc định 0.7°, tỉnh rộng / có đảo xa có lề riêng).
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.gazetteer --dry-run
+    python -m app.services.gazetteer --ids-file changed.json     # chỉ các place vừa import
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+
+from app.config import settings
+from app.schemas import Place
+from app.services.geo_enrichment import PROVINCE_COORDS
+from app.services.search_keys import normalize_text, upsert_search_keys
+
+GAZETTEER_PATH = os.path.join(settings.BACKEND_DIR, "app", "gazetteer.json")
+
+# Độ tin cậy khi suy ra tỉnh từ mô tả (giống fix_province_tags)
+CONF_PROVINCE_PHRASE = 10   # "... Quang Nam province"
+CONF_CITY = 8               # "Hoi An", "Nha Trang", ...
+CONF_PROVINCE_NAME = 5      # "Quang Nam"
+FIRST_PART_CHARS = 500
+
+# ==========================================
+# 1. AHO-CORASICK
+# ==========================================
+class AhoCorasick:
+    """Automaton nhiều mẫu; find_all trả về (vị trí bắt đầu, độ dài mẫu, value) cho mọi lần khớp"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, object]]] = [[]]
+        for pattern, value in patterns:
+            node = 0
+            for char in pattern:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append((len(pattern), value))
+
+        # BFS dựng fail link; output của fail node được gộp vào node
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, object]]:
+        goto, fail, out = self.goto, self.fail, self.out
+        matches = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                matches.append((i - length + 1, length, value))
+        return matches
+
+
+def _word_automaton(entries: Iterable[Tuple[str, object]]) -> AhoCorasick:
+    return AhoCorasick((f" {key} ", value) for key, value in entries if key)
+
+
+# ==========================================
+# 2. GAZETTEER
+# ==========================================
+class Gazetteer:
+    def __init__(self, data: dict, province_coords: Dict[str, Tuple[float, float]] = PROVINCE_COORDS):
+        self.provinces: List[str] = list(data["provinces"])
+        self.province_index = {name: i for i, name in enumerate(self.provinces)}
+
+        # Tên chuẩn hóa -> tỉnh chuẩn (tên tỉnh, biến thể, thành phố)
+        self.variations: Dict[str, str] = {normalize_text(p): p for p in self.provinces}
+        for key, province in data["province_variations"].items():
+            self.variations.setdefault(normalize_text(key), province)
+        self.cities = {normalize_text(key): province for key, province in data["cities"].items()}
+
+        self.landmarks: Dict[str, Tuple[float, float]] = {}
+        for key, coords in data["landmarks"].items():
+            self.landmarks.setdefault(normalize_text(key), (float(coords[0]), float(coords[1])))
+
+        # Tâm tỉnh (NaN nếu thiếu) + bbox [lat_min, lat_max, lon_min, lon_max]
+        self.centroids = np.full((len(self.provinces), 2), np.nan)
+        for key, coords in province_coords.items():
+            province = self.variations.get(normalize_text(key))
+            if province is not None and np.isnan(self.centroids[self.province_index[province], 0]):
+                self.centroids[self.province_index[province]] = coords
+        margins = np.array([data.get("bbox_margins", {}).get(p, data["bbox_margin_default"]) for p in self.provinces],
+                           dtype=float)
+        self.bboxes = np.column_stack((self.centroids[:, 0] - margins[:, 0], self.centroids[:, 0] + margins[:, 0],
+                                       self.centroids[:, 1] - margins[:, 1], self.centroids[:, 1] + margins[:, 1]))
+
+        self._landmark_ac = _word_automaton((key, key) for key in self.landmarks)
+        self._province_ac = _word_automaton(
+            [(key, (CONF_PROVINCE_NAME, province)) for key, province in self.variations.items()]
+            + [(key, (CONF_CITY, province)) for key, province in self.cities.items()]
+            + [(f"{key} province", (CONF_PROVINCE_PHRASE, province)) for key, province in self.variations.items()]
+        )
+
+    # ----- tỉnh -----
+    def canonical_province(self, name: Optional[str]) -> Optional[str]:
+        """Tên tỉnh chuẩn (tỉnh / biến thể / thành phố); None nếu không nhận ra"""
+        if not name:
+            return None
+        key = normalize_text(name)
+        return self.variations.get(key) or self.cities.get(key)
+
+    def normalize_tag_province(self, tag: Optional[str]) -> Optional[str]:
+        """Như fix_province_tags.normalize_tag_province: tag không nhận ra được giữ nguyên"""
+        if not tag:
+            return None
+        return self.canonical_province(tag) or tag
+
+    def province_in_text(self, text: str) -> Tuple[Optional[str], int]:
+        """(tỉnh, độ tin cậy) tốt nhất trong text: độ tin cậy cao nhất, xuất hiện sớm nhất, mẫu dài nhất"""
+        best = self._best_province(self._province_ac.find_all(f" {normalize_text(text)} "))
+        return best if best else (None, 0)
+
+    @staticmethod
+    def _best_province(matches) -> Optional[Tuple[str, int]]:
+        if not matches:
+            return None
+        start, length, (confidence, province) = max(matches, key=lambda m: (m[2][0], -m[0], m[1]))
+        return province, confidence
+
+    def province_from_description(self, description) -> Optional[str]:
+        """Cùng logic fix_province_tags.extract_province_from_description, một lượt quét cho cả mô tả"""
+        if not description:
+            return None
+        if isinstance(description, list):
+            description = " ".join(description)
+        matches = self._province_ac.find_all(f" {normalize_text(description)} ")
+        first = self._best_province([m for m in matches if m[0] < FIRST_PART_CHARS])
+        if first and first[1] >= CONF_CITY:
+            return first[0]
+        full = self._best_province(matches)
+        if full:
+            if first and first[1] >= CONF_PROVINCE_NAME:
+                return first[0]
+            return full[0]
+        return first[0] if first else None
+
+    def mentions_province(self, description, province: Optional[str]) -> bool:
+        """province có xuất hiện (tên / biến thể / thành phố) trong 500 ký tự đầu của mô tả không"""
+        if not description or not province:
+            return False
+        if isinstance(description, list):
+            description = " ".join(description)
+        text = f" {normalize_text(description)} "
+        return any(start < FIRST_PART_CHARS and value[1] == province
+                   for start, _, value in self._province_ac.find_all(text))
+
+    def centroid(self, province: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+        index = self.province_index.get(self.canonical_province(province)) if province else None
+        if index is None or np.isnan(self.centroids[index, 0]):
+            return None, None
+        return float(self.centroids[index, 0]), float(self.centroids[index, 1])
+
+    # ----- địa danh -----
+    def match_landmark(self, name: Optional[str]) -> Tuple[Optional[Tuple[float, float]], str]:
+        """(tọa độ, "exact" / "partial" / "not_found"); nhiều địa danh khớp -> lấy tên dài nhất"""
+        if not name:
+            return None, "not_found"
+        key = normalize_text(name)
+        if key in self.landmarks:
+            return self.landmarks[key], "exact"
+        matches = self._landmark_ac.find_all(f" {key} ")
+        if not matches:
+            return None, "not_found"
+        _, _, landmark = max(matches, key=lambda m: (m[1], -m[0]))
+        return self.landmarks[landmark], "partial"
+
+    def find_coords(self, name: Optional[str], province: Optional[str] = None):
+        """Như fix_coordinates_v2.find_coords: địa danh, không thì tâm tỉnh"""
+        coords, match_type = self.match_landmark(name)
+        if coords is not None:
+            return coords, match_type
+        lat, lon = self.centroid(province)
+        if lat is not None:
+            return (lat, lon), "province"
+        return (None, None), "not_found"
+
+    def outside_bbox(self, province_idx: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Mask các điểm nằm ngoài bbox tỉnh của chúng (province_idx = -1 hoặc thiếu tọa độ: False)"""
+        known = (province_idx >= 0) & ~np.isnan(lat) & ~np.isnan(lon)
+        boxes = self.bboxes[np.where(known, province_idx, 0)]
+        outside = (lat < boxes[:, 0]) | (lat > boxes[:, 1]) | (lon < boxes[:, 2]) | (lon > boxes[:, 3])
+        return known & ~np.isnan(boxes[:, 0]) & outside
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    with open(path, encoding="utf-8") as f:
+        return Gazetteer(json.load(f))
+
+
+# ==========================================
+# 3. SỬA PLACE TRONG DB
+# ==========================================
+@dataclass
+class RepairReport:
+    places: int = 0
+    provinces_changed: int = 0
+    province_not_found: int = 0
+    landmark_exact: int = 0
+    landmark_partial: int = 0
+    coords_kept: int = 0
+    province_fallback: int = 0
+    no_coords: int = 0
+    outliers: int = 0
+    updated_rows: int = 0
+    elapsed_seconds: float = 0.0
+    province_changes: List[Tuple[int, str, str, str]] = field(default_factory=list)
+    outlier_ids: List[int] = field(default_factory=list)
+
+
+def _as_list(value) -> list:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+
+def repair_places(engine=None, ids: Optional[Sequence[int]] = None, fix_provinces: bool = True,
+                  fix_coords: bool = True, dry_run: bool = False,
+                  gazetteer: Optional[Gazetteer] = None) -> RepairReport:
+    """
+    Sửa tag tỉnh (tags[0]) theo mô tả rồi sửa tọa độ; ids=None: toàn bộ Place.
+    Tag tỉnh chỉ bị đổi khi tỉnh hiện tại không được nhắc tới trong phần đầu mô tả.
+    Outlier (tọa độ ngoài bbox tỉnh) không khớp địa danh được đưa về tâm tỉnh.
+    """
+    if engine is None:
+        from app.database import engine
+    gazetteer = gazetteer or get_gazetteer()
+    start = time.perf_counter()
+    report = RepairReport()
+    table = Place.__table__
+
+    query = select(table.c.id, table.c.name, table.c.tags, table.c.description, table.c.lat, table.c.lon)
+    if ids is not None:
+        query = query.where(table.c.id.in_(list(ids)))
+    with engine.connect() as conn:
+        rows = conn.execute(query.order_by(table.c.id)).all()
+    report.places = len(rows)
+    places = [{"id": r.id, "name": r.name, "tags": _as_list(r.tags), "description": _as_list(r.description),
+               "lat": r.lat, "lon": r.lon} for r in rows]
+    changed: Dict[int, dict] = {}
+    province_changed = set()
+
+    # Bước 1: tag tỉnh
+    if fix_provinces:
+        for place in places:
+            if not place["tags"]:
+                continue
+            new_province = gazetteer.province_from_description(place["description"])
+            if not new_province:
+                report.province_not_found += 1
+                continue
+            current = place["tags"][0]
+            current_province = gazetteer.normalize_tag_province(current)
+            # Tag hiện tại vẫn được mô tả nhắc tới ở phần đầu (địa danh giáp ranh tỉnh) -> giữ nguyên
+            if current_province != new_province and not gazetteer.mentions_province(place["description"],
+                                                                                    current_province):
+                place["tags"][0] = new_province
+                changed[place["id"]] = place
+                province_changed.add(place["id"])
+                report.provinces_changed += 1
+                report.province_changes.append((place["id"], place["name"], current, new_province))
+
+    # Bước 2: tọa độ (bbox vectorized trên toàn bộ place)
+    if fix_coords and places:
+        province_idx = np.array([gazetteer.province_index.get(gazetteer.canonical_province(p["tags"][0]), -1)
+                                 if p["tags"] else -1 for p in places])
+        lat = np.array([np.nan if p["lat"] is None else p["lat"] for p in places], dtype=float)
+        lon = np.array([np.nan if p["lon"] is None else p["lon"] for p in places], dtype=float)
+        outliers = gazetteer.outside_bbox(province_idx, lat, lon)
+        has_coords = ~np.isnan(lat) & ~np.isnan(lon)
+        report.outliers = int(outliers.sum())
+        report.outlier_ids = [places[i]["id"] for i in np.flatnonzero(outliers)]
+
+        for i, place in enumerate(places):
+            coords, match_type = gazetteer.match_landmark(place["name"])
+            if coords is not None:
+                setattr(report, f"landmark_{match_type}", getattr(report, f"landmark_{match_type}") + 1)
+            elif has_coords[i] and not outliers[i]:
+                report.coords_kept += 1
+                continue
+            else:
+                idx = province_idx[i]
+                if idx < 0 or np.isnan(gazetteer.centroids[idx, 0]):
+                    report.no_coords += 1
+                    continue
+                coords = (float(gazetteer.centroids[idx, 0]), float(gazetteer.centroids[idx, 1]))
+                report.province_fallback += 1
+            if (place["lat"], place["lon"]) != coords:
+                place["lat"], place["lon"] = coords
+                changed[place["id"]] = place
+
+    report.updated_rows = len(changed)
+    if changed and not dry_run:
+        stmt = (update(table).where(table.c.id == bindparam("place_id"))
+                .values(tags=bindparam("new_tags"), lat=bindparam("new_lat"), lon=bindparam("new_lon")))
+        with engine.begin() as conn:
+            conn.execute(stmt, [{"place_id": p["id"], "new_tags": p["tags"], "new_lat": p["lat"], "new_lon": p["lon"]}
+                                for p in changed.values()])
+            # Tag tỉnh đổi -> khóa tìm kiếm (province_key / tags_key) đổi theo, cùng transaction
+            upsert_search_keys(conn, (p for p in changed.values() if p["id"] in province_changed))
+    report.elapsed_seconds = time.perf_counter() - start
+
+    print(f"[Gazetteer] {report.places} places: {report.provinces_changed} province tags changed, "
+          f"{report.landmark_exact + report.landmark_partial} landmark coords, {report.coords_kept} kept, "
+          f"{report.province_fallback} province centroid, {report.outliers} outliers, "
+          f"{report.updated_rows} rows {'would be ' if dry_run else ''}updated in {report.elapsed_seconds:.2f}s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repair Place province tags and coordinates from the gazetteer")
+    parser.add_argument("--ids-file", default=None, help="JSON list id (vd: --changed-ids của place_importer)")
+    parser.add_argument("--skip-provinces", action="store_true")
+    parser.add_argument("--skip-coords", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ báo cáo, không ghi DB")
+    args = parser.parse_args()
+
+    selected = None
+    if args.ids_file:
+        with open(args.ids_file, encoding="utf-8") as f:
+            selected = json.load(f)
+    result = repair_places(ids=selected, fix_provinces=not args.skip_provinces, fix_coords=not args.skip_coords,
+                           dry_run=args.dry_run)
+    for place_id, name, old, new in result.province_changes:
+        print(f"  [{place_id}] '{name}': '{old}' -> '{new}'")
+    if result.outlier_ids:
+        print(f"  Outliers (ngoài bbox tỉnh): {result.outlier_ids}")
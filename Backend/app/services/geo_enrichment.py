@@ -0,0 +1,583 @@
+"""
+Geocoding (Nominatim) + climate (Open-Meteo) cho bảng place, thay cho các script
+gọi API tuần tự với time.sleep (update_place_coordinates.py, update_climate_data.py).
+
+- Cache response trên đĩa (SQLite): key = (endpoint, tham số đã chuẩn hóa). Climate
+  dùng lat/lon làm tròn (CLIMATE_COORD_PRECISION) nên các place gần nhau / cùng
+  tâm tỉnh dùng chung một response; chạy lại không gọi lại API
+- Coalescing: các request trùng key đang chạy chờ chung một lần gọi
+- Concurrency giới hạn theo từng host (Nominatim: 1 req/s, 1 connection theo
+  usage policy; Open-Meteo: 10 req/s)
+- Ghi DB một lần: một câu UPDATE executemany trong một transaction
+- Offline: --record lưu response thành fixture JSON, --offline phục vụ lại các
+  fixture đó bằng FixtureServer local (cũng dùng trong test_geo_enrichment.py)
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.geo_enrichment --geocode --climate
+    python -m app.services.geo_enrichment --climate --record geo_fixtures.json
+    python -m app.services.geo_enrichment --climate --offline geo_fixtures.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+from sqlalchemy import bindparam, select, update
+
+from app.config import settings
+from app.schemas import Place
+from app.services.batch_enrichment import TokenBucket
+
+GEO_CACHE_PATH = os.getenv("GEO_CACHE_PATH", os.path.join(settings.BACKEND_DIR, "geo_cache.sqlite"))
+
+USER_AGENT = "VietnamTravelApp/1.0 (exsighting@example.com)"
+
+# endpoint -> URL thật; offline thì mọi endpoint trỏ về {fixture server}/{endpoint}
+ENDPOINTS = {
+    "nominatim": "https://nominatim.openstreetmap.org/search",
+    "open_meteo": "https://api.open-meteo.com/v1/forecast",
+}
+
+
+@dataclass(frozen=True)
+class HostLimit:
+    requests_per_second: float
+    concurrency: int
+
+
+HOST_LIMITS = {
+    "nominatim": HostLimit(requests_per_second=1.0, concurrency=1),
+    "open_meteo": HostLimit(requests_per_second=10.0, concurrency=4),
+}
+
+# 1 chữ số thập phân ~ 11 km: đủ cho phân loại khí hậu
+CLIMATE_COORD_PRECISION = 1
+# current_weather đổi theo ngày: response climate cũ hơn TTL được gọi lại
+CLIMATE_CACHE_TTL_SECONDS = 24 * 3600
+
+# ────────────────────────────────
+# Tọa độ trung tâm các tỉnh/thành phố Việt Nam (fallback khi geocode không ra)
+# ────────────────────────────────
+PROVINCE_COORDS = {
+    # Miền Bắc
+    "ha noi": (21.0285, 105.8542),
+    "hà nội": (21.0285, 105.8542),
+    "hanoi": (21.0285, 105.8542),
+    "ha giang": (22.8233, 104.9838),
+    "hà giang": (22.8233, 104.9838),
+    "cao bang": (22.6666, 106.2580),
+    "cao bằng": (22.6666, 106.2580),
+    "bac kan": (22.1471, 105.8347),
+    "bắc kạn": (22.1471, 105.8347),
+    "tuyen quang": (21.8230, 105.2140),
+    "tuyên quang": (21.8230, 105.2140),
+    "lao cai": (22.3380, 104.1487),
+    "lào cai": (22.3380, 104.1487),
+    "sapa": (22.3402, 103.8448),
+    "sa pa": (22.3402, 103.8448),
+    "dien bien": (21.3867, 103.0230),
+    "điện biên": (21.3867, 103.0230),
+    "lai chau": (22.3860, 103.4594),
+    "lai châu": (22.3860, 103.4594),
+    "son la": (21.3269, 103.9144),
+    "sơn la": (21.3269, 103.9144),
+    "yen bai": (21.7236, 104.9113),
+    "yên bái": (21.7236, 104.9113),
+    "hoa binh": (20.8169, 105.3381),
+    "hòa bình": (20.8169, 105.3381),
+    "thai nguyen": (21.5928, 105.8442),
+    "thái nguyên": (21.5928, 105.8442),
+    "lang son": (21.8537, 106.7613),
+    "lạng sơn": (21.8537, 106.7613),
+    "quang ninh": (21.0064, 107.2925),
+    "quảng ninh": (21.0064, 107.2925),
+    "ha long": (20.9101, 107.1839),
+    "hạ long": (20.9101, 107.1839),
+    "bac giang": (21.2819, 106.1967),
+    "bắc giang": (21.2819, 106.1967),
+    "phu tho": (21.3229, 105.2016),
+    "phú thọ": (21.3229, 105.2016),
+    "vinh phuc": (21.3609, 105.5474),
+    "vĩnh phúc": (21.3609, 105.5474),
+    "bac ninh": (21.1214, 106.1111),
+    "bắc ninh": (21.1214, 106.1111),
+    "hai duong": (20.9374, 106.3146),
+    "hải dương": (20.9374, 106.3146),
+    "hai phong": (20.8449, 106.6881),
+    "hải phòng": (20.8449, 106.6881),
+    "hung yen": (20.6464, 106.0511),
+    "hưng yên": (20.6464, 106.0511),
+    "thai binh": (20.4463, 106.3422),
+    "thái bình": (20.4463, 106.3422),
+    "ha nam": (20.5835, 105.9230),
+    "hà nam": (20.5835, 105.9230),
+    "nam dinh": (20.4200, 106.1683),
+    "nam định": (20.4200, 106.1683),
+    "ninh binh": (20.2510, 105.9744),
+    "ninh bình": (20.2510, 105.9744),
+    
+    # Miền Trung
+    "thanh hoa": (19.8067, 105.7852),
+    "thanh hóa": (19.8067, 105.7852),
+    "nghe an": (18.6583, 105.6813),
+    "nghệ an": (18.6583, 105.6813),
+    "ha tinh": (18.3559, 105.8877),
+    "hà tĩnh": (18.3559, 105.8877),
+    "quang binh": (17.4694, 106.6222),
+    "quảng bình": (17.4694, 106.6222),
+    "quang tri": (16.7579, 107.1856),
+    "quảng trị": (16.7579, 107.1856),
+    "thua thien hue": (16.4674, 107.5905),
+    "thừa thiên huế": (16.4674, 107.5905),
+    "hue": (16.4637, 107.5909),
+    "huế": (16.4637, 107.5909),
+    "da nang": (16.0544, 108.2022),
+    "đà nẵng": (16.0544, 108.2022),
+    "quang nam": (15.5394, 108.0191),
+    "quảng nam": (15.5394, 108.0191),
+    "hoi an": (15.8801, 108.3380),
+    "hội an": (15.8801, 108.3380),
+    "quang ngai": (15.1205, 108.8042),
+    "quảng ngãi": (15.1205, 108.8042),
+    "binh dinh": (13.7830, 109.2197),
+    "bình định": (13.7830, 109.2197),
+    "phu yen": (13.0882, 109.0929),
+    "phú yên": (13.0882, 109.0929),
+    "khanh hoa": (12.2388, 109.1967),
+    "khánh hòa": (12.2388, 109.1967),
+    "nha trang": (12.2388, 109.1967),
+    "ninh thuan": (11.5752, 108.9890),
+    "ninh thuận": (11.5752, 108.9890),
+    "binh thuan": (10.9282, 108.1021),
+    "bình thuận": (10.9282, 108.1021),
+    "phan thiet": (10.9282, 108.1021),
+    "mui ne": (10.9333, 108.2833),
+    "mũi né": (10.9333, 108.2833),
+    
+    # Tây Nguyên
+    "kon tum": (14.3497, 108.0005),
+    "gia lai": (13.9833, 108.0),
+    "dak lak": (12.6667, 108.05),
+    "đắk lắk": (12.6667, 108.05),
+    "buon ma thuot": (12.6679, 108.0378),
+    "buôn ma thuột": (12.6679, 108.0378),
+    "dak nong": (12.0028, 107.6878),
+    "đắk nông": (12.0028, 107.6878),
+    "lam dong": (11.9404, 108.4583),
+    "lâm đồng": (11.9404, 108.4583),
+    "da lat": (11.9404, 108.4583),
+    "đà lạt": (11.9404, 108.4583),
+    "dalat": (11.9404, 108.4583),
+    
+    # Miền Nam
+    "binh phuoc": (11.7512, 106.7235),
+    "bình phước": (11.7512, 106.7235),
+    "tay ninh": (11.3351, 106.1098),
+    "tây ninh": (11.3351, 106.1098),
+    "binh duong": (11.0063, 106.6528),
+    "bình dương": (11.0063, 106.6528),
+    "dong nai": (10.9645, 106.8561),
+    "đồng nai": (10.9645, 106.8561),
+    "ba ria vung tau": (10.5417, 107.2428),
+    "bà rịa vũng tàu": (10.5417, 107.2428),
+    "vung tau": (10.3460, 107.0843),
+    "vũng tàu": (10.3460, 107.0843),
+    "ho chi minh": (10.8231, 106.6297),
+    "ho chi minh city": (10.8231, 106.6297),
+    "hồ chí minh": (10.8231, 106.6297),
+    "saigon": (10.8231, 106.6297),
+    "sài gòn": (10.8231, 106.6297),
+    "long an": (10.5440, 106.4053),
+    "tiền giang": (10.4493, 106.3420),
+    "tien giang": (10.4493, 106.3420),
+    "ben tre": (10.2433, 106.3756),
+    "bến tre": (10.2433, 106.3756),
+    "tra vinh": (9.9347, 106.3455),
+    "trà vinh": (9.9347, 106.3455),
+    "vinh long": (10.2538, 105.9722),
+    "vĩnh long": (10.2538, 105.9722),
+    "dong thap": (10.5379, 105.6311),
+    "đồng tháp": (10.5379, 105.6311),
+    "an giang": (10.3868, 105.4353),
+    "can tho": (10.0452, 105.7469),
+    "cần thơ": (10.0452, 105.7469),
+    "hau giang": (9.7579, 105.6413),
+    "hậu giang": (9.7579, 105.6413),
+    "soc trang": (9.6038, 105.9800),
+    "sóc trăng": (9.6038, 105.9800),
+    "bac lieu": (9.2911, 105.7247),
+    "bạc liêu": (9.2911, 105.7247),
+    "ca mau": (9.1770, 105.1500),
+    "cà mau": (9.1770, 105.1500),
+    "kien giang": (10.0125, 105.0809),
+    "kiên giang": (10.0125, 105.0809),
+    "phu quoc": (10.2899, 103.9840),
+    "phú quốc": (10.2899, 103.9840),
+    
+    # Default cho Vietnam
+    "vietnam": (16.0583, 108.2772),
+    "việt nam": (16.0583, 108.2772),
+}
+
+
+@lru_cache(maxsize=None)
+def find_coords_for_province(province: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Tìm tọa độ dựa trên tên tỉnh (khớp chính xác rồi khớp một phần)"""
+    if not province:
+        return None, None
+
+    province_lower = province.lower().strip()
+    if province_lower in PROVINCE_COORDS:
+        return PROVINCE_COORDS[province_lower]
+    for key, coords in PROVINCE_COORDS.items():
+        if key in province_lower or province_lower in key:
+            return coords
+    return None, None
+
+
+def climate_label(temp):
+    """Phân loại climate dựa trên nhiệt độ"""
+    if temp is None:
+        return "unknown"
+    if temp >= 32:
+        return "extremely hot"
+    if temp >= 27:
+        return "hot"
+    if temp >= 23:
+        return "warm"
+    if temp >= 17:
+        return "cool"
+    if temp >= 10:
+        return "cold"
+    return "extremely cold"
+
+
+def request_key(endpoint: str, params: dict) -> str:
+    """Key của cache / fixture: endpoint + query string đã sort"""
+    return f"{endpoint}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+
+
+# ==========================================
+# 1. CACHE TRÊN ĐĨA
+# ==========================================
+class ResponseCache:
+    """key -> JSON body, lưu trong SQLite (an toàn khi process bị kill giữa chừng)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS response "
+                           "(key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None):
+        row = self._conn.execute("SELECT body, fetched_at FROM response WHERE key = ?", (key,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, body):
+        self._conn.execute("INSERT OR REPLACE INTO response (key, body, fetched_at) VALUES (?, ?, ?)",
+                           (key, json.dumps(body, ensure_ascii=False), time.time()))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+# ==========================================
+# 2. HTTP CLIENT: cache + coalescing + rate limit theo host
+# ==========================================
+class _HostGate:
+    def __init__(self, limit: HostLimit):
+        self.semaphore = asyncio.Semaphore(limit.concurrency)
+        # capacity 1: không burst, các request cách nhau ít nhất 1 / rate giây
+        self.bucket = TokenBucket(limit.requests_per_second * 60, capacity=1)
+
+
+class GeoHttpClient:
+    def __init__(self, cache: ResponseCache, base_url: Optional[str] = None,
+                 host_limits: Dict[str, HostLimit] = None, max_retries: int = 3,
+                 record: Optional[Dict[str, object]] = None):
+        self.cache = cache
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.host_limits = host_limits or HOST_LIMITS
+        self.max_retries = max_retries
+        self.record = record  # dict key -> body: lưu lại response thật làm fixture
+        self._gates: Dict[str, _HostGate] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {"cache_hits": 0, "coalesced": 0, "requests": 0, "errors": 0}
+
+    def _url(self, endpoint: str) -> str:
+        return f"{self.base_url}/{endpoint}" if self.base_url else ENDPOINTS[endpoint]
+
+    async def get_json(self, endpoint: str, params: dict, max_age: Optional[float] = None):
+        """Response JSON (None nếu lỗi sau max_retries lần thử - không cache lỗi)"""
+        key = request_key(endpoint, params)
+        cached = self.cache.get(key, max_age)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await task
+        task = asyncio.ensure_future(self._fetch(endpoint, params, key))
+        self._in_flight[key] = task
+        try:
+            return await task
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _fetch(self, endpoint: str, params: dict, key: str):
+        if self._client is None:
+            self._client = httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=15.0)
+        gate = self._gates.get(endpoint)
+        if gate is None:
+            gate = self._gates[endpoint] = _HostGate(self.host_limits[endpoint])
+
+        for attempt in range(self.max_retries):
+            async with gate.semaphore:
+                await gate.bucket.acquire(1)
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.get(self._url(endpoint), params=params)
+                except httpx.HTTPError as e:
+                    error, retry_after = repr(e), None
+                else:
+                    if response.status_code == 200:
+                        body = response.json()
+                        self.cache.put(key, body)
+                        if self.record is not None:
+                            self.record[key] = body
+                        return body
+                    error = f"HTTP {response.status_code}"
+                    retry_after = response.headers.get("retry-after")
+                    if response.status_code not in (429, 500, 502, 503, 504):
+                        break
+            await asyncio.sleep(float(retry_after) if retry_after else 2 ** attempt)
+
+        self.stats["errors"] += 1
+        print(f"  ⚠️ {endpoint} {params}: {error}")
+        return None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# ==========================================
+# 3. FIXTURE SERVER (chạy offline / test)
+# ==========================================
+class FixtureServer:
+    """Server HTTP local trả response đã record: GET /{endpoint}?{query} -> fixtures[request_key]"""
+
+    def __init__(self, fixtures: Dict[str, object]):
+        self.fixtures = fixtures
+        self.requests: List[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                key = request_key(url.path.strip("/"), dict(parse_qsl(url.query)))
+                server.requests.append(key)
+                if key not in server.fixtures:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps(server.fixtures[key]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# ==========================================
+# 4. RUNNER
+# ==========================================
+@dataclass
+class GeoReport:
+    places: int = 0
+    geocoded: int = 0
+    geocode_fallback: int = 0
+    geocode_failed: int = 0
+    climate_updated: int = 0
+    climate_failed: int = 0
+    updated_rows: int = 0
+    http_requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def _province(tags) -> Optional[str]:
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except ValueError:
+            tags = []
+    return tags[0] if tags else None
+
+
+async def geocode(client: GeoHttpClient, name: str, province: Optional[str]):
+    """(lat, lon) từ Nominatim, None nếu không tìm thấy"""
+    query = f"{name}, {province}, Vietnam" if province else f"{name}, Vietnam"
+    data = await client.get_json("nominatim", {"q": query, "format": "json", "limit": 1})
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    return None
+
+
+async def fetch_climate(client: GeoHttpClient, lat: float, lon: float):
+    """Nhiệt độ hiện tại tại tọa độ đã làm tròn (None nếu lỗi)"""
+    data = await client.get_json("open_meteo", {
+        "latitude": round(lat, CLIMATE_COORD_PRECISION),
+        "longitude": round(lon, CLIMATE_COORD_PRECISION),
+        "current_weather": "true",
+    }, max_age=CLIMATE_CACHE_TTL_SECONDS)
+    if data is None:
+        return None
+    return (data.get("current_weather") or {}).get("temperature")
+
+
+async def enrich_places(engine=None, client: GeoHttpClient = None, do_geocode: bool = True,
+                        do_climate: bool = True, only_missing: bool = True, limit: Optional[int] = None) -> GeoReport:
+    """
+    Geocode place chưa có tọa độ (fallback: tâm tỉnh) rồi gán climate theo tọa độ.
+    only_missing=False: geocode lại toàn bộ.
+    """
+    if engine is None:
+        from app.database import engine
+    start = time.perf_counter()
+    report = GeoReport()
+    table = Place.__table__
+
+    with engine.connect() as conn:
+        query = select(table.c.id, table.c.name, table.c.tags, table.c.lat, table.c.lon, table.c.climate)
+        rows = conn.execute(query.order_by(table.c.id).limit(limit) if limit else query).all()
+    report.places = len(rows)
+    places = [{"id": r.id, "name": r.name, "province": _province(r.tags),
+               "lat": r.lat, "lon": r.lon, "climate": r.climate} for r in rows]
+    changed: Dict[int, dict] = {}
+
+    if do_geocode:
+        targets = [p for p in places if not only_missing or p["lat"] is None or p["lon"] is None]
+        results = await asyncio.gather(*(geocode(client, p["name"], p["province"]) for p in targets))
+        for place, coords in zip(targets, results):
+            if coords is not None:
+                report.geocoded += 1
+            else:
+                lat, lon = find_coords_for_province(place["province"])
+                if lat is None:
+                    report.geocode_failed += 1
+                    continue
+                coords = (lat, lon)
+                report.geocode_fallback += 1
+            if (place["lat"], place["lon"]) != coords:
+                place["lat"], place["lon"] = coords
+                changed[place["id"]] = place
+
+    if do_climate:
+        targets = []
+        for place in places:
+            lat, lon = place["lat"], place["lon"]
+            if lat is None or lon is None:
+                lat, lon = find_coords_for_province(place["province"])
+            if lat is not None:
+                targets.append((place, lat, lon))
+            else:
+                report.climate_failed += 1
+        temps = await asyncio.gather(*(fetch_climate(client, lat, lon) for _, lat, lon in targets))
+        for (place, _, _), temp in zip(targets, temps):
+            if temp is None:
+                report.climate_failed += 1
+                continue
+            report.climate_updated += 1
+            label = climate_label(temp)
+            if place["climate"] != label:
+                place["climate"] = label
+                changed[place["id"]] = place
+
+    if changed:
+        stmt = (update(table).where(table.c.id == bindparam("place_id"))
+                .values(lat=bindparam("new_lat"), lon=bindparam("new_lon"), climate=bindparam("new_climate")))
+        with engine.begin() as conn:
+            conn.execute(stmt, [{"place_id": p["id"], "new_lat": p["lat"], "new_lon": p["lon"],
+                                 "new_climate": p["climate"]} for p in changed.values()])
+    report.updated_rows = len(changed)
+
+    report.http_requests = client.stats["requests"]
+    report.cache_hits = client.stats["cache_hits"]
+    report.coalesced = client.stats["coalesced"]
+    report.elapsed_seconds = time.perf_counter() - start
+    print(f"[Geo] {report.places} places: {report.geocoded} geocoded, {report.geocode_fallback} fallback, "
+          f"{report.climate_updated} climate, {report.updated_rows} rows updated | "
+          f"{report.http_requests} HTTP requests, {report.cache_hits} cache hits, {report.coalesced} coalesced "
+          f"in {report.elapsed_seconds:.1f}s")
+    return report
+
+
+async def run(do_geocode: bool, do_climate: bool, only_missing: bool = True, limit: Optional[int] = None,
+              offline: Optional[str] = None, record: Optional[str] = None, cache_path: str = GEO_CACHE_PATH):
+    fixture_server = None
+    recorded = {} if record else None
+    if offline:
+        with open(offline, encoding="utf-8") as f:
+            fixture_server = FixtureServer(json.load(f))
+    cache = ResponseCache(cache_path)
+    client = GeoHttpClient(cache, base_url=fixture_server.base_url if fixture_server else None, record=recorded)
+    try:
+        return await enrich_places(client=client, do_geocode=do_geocode, do_climate=do_climate,
+                                   only_missing=only_missing, limit=limit)
+    finally:
+        await client.aclose()
+        cache.close()
+        if fixture_server:
+            fixture_server.close()
+        if record:
+            with open(record, "w", encoding="utf-8") as f:
+                json.dump(recorded, f, ensure_ascii=False, indent=1)
+            print(f"[Geo] {len(recorded)} responses recorded -> {record}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geocoding + climate enrichment for places")
+    parser.add_argument("--geocode", action="store_true", help="Geocode place chưa có tọa độ (Nominatim)")
+    parser.add_argument("--climate", action="store_true", help="Cập nhật climate (Open-Meteo)")
+    parser.add_argument("--all", action="store_true", help="Geocode lại cả place đã có tọa độ")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--offline", metavar="FIXTURES", help="Chạy với fixture đã record, không ra mạng")
+    parser.add_argument("--record", metavar="FIXTURES", help="Lưu response thật thành file fixture")
+    parser.add_argument("--cache", default=GEO_CACHE_PATH)
+    args = parser.parse_args()
+    if not (args.geocode or args.climate):
+        parser.error("chọn ít nhất --geocode hoặc --climate")
+
+    asyncio.run(run(args.geocode, args.climate, only_missing=not args.all, limit=args.limit,
+                    offline=args.offline, record=args.record, cache_path=args.cache))
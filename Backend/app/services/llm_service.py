@@ -1,12 +1,20 @@
 import json
-from groq import Groq
 from fastapi import HTTPException
 from fastapi.concurrency import run_in_threadpool
 from app.config import settings
+from app.metrics import llm_timer
 # from backend.app.old.schemas import GroqExtraction
 from app.schemas import GroqExtraction
 
-client = Groq(api_key=settings.GROQ_API_KEY)
+# Groq client tạo lần đầu gọi (import groq chậm, không cần khi khởi động app)
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from groq import Groq
+        _client = Groq(api_key=settings.GROQ_API_KEY)
+    return _client
 
 SYSTEM_PROMPT = """
 You are an expert text analysis API for Vietnam travel. Your job is to
@@ -67,15 +75,16 @@ def _call_groq(user_text: str):
     if not settings.GROQ_API_KEY:
         raise Exception("GROQ_API_KEY is missing")
         
-    completion = client.chat.completions.create(
-        model=settings.GROQ_MODEL,
-        temperature=0.0,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT}, # Prompt này đã có chữ JSON
-            {"role": "user", "content": user_text},
-        ],
-    )
+    with llm_timer("groq"):
+        completion = get_client().chat.completions.create(
+            model=settings.GROQ_MODEL,
+            temperature=0.0,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT}, # Prompt này đã có chữ JSON
+                {"role": "user", "content": user_text},
+            ],
+        )
     content = completion.choices[0].message.content
     return json.loads(content)
 
@@ -0,0 +1,467 @@
+"""
+Crawler song song + checkpoint cho csdl.vietnamtourism.gov.vn (thay vòng lặp tuần tự
+trong data_crawling.crawl_all_places_info).
+
+- URL frontier: asyncio.Queue + tập URL đã thấy; seed là các trang ?item=N, link trên trang
+  khớp pattern `follow` (vd: trang listing) được thêm vào frontier
+- Pool N worker, mỗi worker một browser context + page riêng (PlaywrightFetcher), dùng lại
+  giữa các URL; ảnh / font / media bị chặn vì chỉ cần HTML
+- Mỗi trang chỉ một round-trip lấy HTML (page.content()), parse bằng html.parser thay vì
+  hàng chục lời gọi locator qua Playwright
+- Kết quả từng trang ghi ngay vào journal JSONL (ResultJournal của batch_enrichment, fsync
+  mỗi trang). Chạy lại bỏ qua URL đã có trong journal; trang lỗi không ghi nên được thử lại
+- Retry với exponential backoff + jitter cho lỗi mạng / timeout / HTTP 429, 5xx;
+  rpm giới hạn tổng số request mỗi phút (TokenBucket)
+- export_csv: journal -> vietnam_tourism_data.csv (id, title, description, image) theo thứ tự seed.
+  id lấy từ số N của ?item=N (cố định giữa các lần chạy / resume, place_importer upsert theo id)
+
+HttpFetcher (httpx) đủ cho trang HTML tĩnh: dùng cho fixture site trong test_place_crawler.py.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urldefrag
+
+import httpx
+
+from app.services.batch_enrichment import ResultJournal, TokenBucket, write_csv_rows
+
+BASE_URL = "https://csdl.vietnamtourism.gov.vn/dest/"
+JOURNAL_PATH = "vietnam_tourism_data.crawl.jsonl"
+OUTPUT_CSV = "vietnam_tourism_data.csv"
+CSV_FIELDS = ("id", "title", "description", "image")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+EMPTY_STATUSES = {404, 410}
+BLOCKED_RESOURCES = ("image", "font", "media")
+
+
+# Trang không có ?item=N (link phát hiện qua `follow`): id = NO_ITEM_ID_BASE + seq
+# (seq được lưu trong journal nên cũng cố định), không trùng số item của site
+NO_ITEM_ID_BASE = 1_000_000
+ITEM_RE = re.compile(r"[?&]item=(\d+)")
+
+
+def item_urls(start: int, count: int, base_url: str = BASE_URL) -> List[str]:
+    return [f"{base_url}?item={n}" for n in range(start, start + count)]
+
+
+def place_id(url: str, seq: int) -> int:
+    match = ITEM_RE.search(url)
+    return int(match.group(1)) if match else NO_ITEM_ID_BASE + seq
+
+
+# ==========================================
+# 1. PARSE HTML
+# ==========================================
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article",
+              "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class PlacePageParser(HTMLParser):
+    """
+    Cùng selector với data_crawling.crawl_1place_info:
+    - title: `.header h4` trong `.cslt-detail` đầu tiên
+    - description: `.content-detail` đầu tiên lấy cả text, các khối sau lấy từng <p>, nối bằng "|||"
+    - image: href của thẻ <a> đầu tiên trong mỗi `.item.text-center`, nối bằng "|||"
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[dict] = []
+        self.detail_count = 0
+        self.title_parts: Optional[List[str]] = None
+        self.blocks: List[dict] = []
+        self.images: List[Optional[str]] = []
+        self.links: List[str] = []
+
+    def _find(self, key):
+        for frame in reversed(self.stack):
+            if key in frame:
+                return frame[key]
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        if tag == "p" and self.stack and self.stack[-1]["tag"] == "p":
+            self.stack.pop()    # <p> không đóng
+
+        frame = {"tag": tag}
+        if "cslt-detail" in classes:
+            frame["detail"] = self.detail_count
+            self.detail_count += 1
+        if "header" in classes:
+            frame["header"] = True
+        if "content-detail" in classes:
+            self.blocks.append({"text": [], "paragraphs": []})
+            frame["block"] = len(self.blocks) - 1
+        if {"item", "text-center"} <= classes:
+            self.images.append(None)
+            frame["image"] = len(self.images) - 1
+
+        block = self._find("block")
+        if block is not None and tag in BLOCK_TAGS:
+            self._newline(block)
+        if tag == "p" and block is not None:
+            self.blocks[block]["paragraphs"].append([])
+            frame["paragraph"] = True
+        if tag == "h4" and self.title_parts is None and self._find("detail") == 0 and self._find("header"):
+            self.title_parts = []
+            frame["title"] = True
+        if tag == "a" and attrs.get("href"):
+            self.links.append(attrs["href"])
+            image = self._find("image")
+            if image is not None and self.images[image] is None:
+                self.images[image] = attrs["href"]
+
+        if tag not in VOID_TAGS:
+            self.stack.append(frame)
+
+    def handle_endtag(self, tag):
+        # HTML lỗi: đóng tới thẻ mở gần nhất cùng tên, bỏ qua thẻ đóng thừa
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i]["tag"] == tag:
+                del self.stack[i:]
+                break
+        block = self._find("block")
+        if block is not None and tag in BLOCK_TAGS:
+            self._newline(block)
+
+    def _newline(self, block):
+        self.blocks[block]["text"].append("\n")
+        if self._find("paragraph"):
+            self.blocks[block]["paragraphs"][-1].append("\n")
+
+    def handle_data(self, data):
+        if self._find("title"):
+            self.title_parts.append(data)
+        block = self._find("block")
+        if block is not None:
+            self.blocks[block]["text"].append(data)
+            if self._find("paragraph"):
+                self.blocks[block]["paragraphs"][-1].append(data)
+
+
+def _inner_text(parts: Iterable[str]) -> str:
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def parse_place_page(html: str) -> Tuple[Optional[dict], List[str]]:
+    """(place, links); place = None khi trang rỗng (không có .cslt-detail hoặc .content-detail)"""
+    parser = PlacePageParser()
+    parser.feed(html)
+    parser.close()
+    if parser.detail_count == 0 or not parser.blocks:
+        return None, parser.links
+
+    description = _inner_text(parser.blocks[0]["text"])
+    for block in parser.blocks[1:]:
+        for paragraph in block["paragraphs"]:
+            description += "|||" + _inner_text(paragraph)
+    place = {
+        "title": _inner_text(parser.title_parts or []),
+        "description": description,
+        "image": "|||".join(href or "" for href in parser.images),
+    }
+    return place, parser.links
+
+
+# ==========================================
+# 2. FETCHER
+# ==========================================
+@dataclass
+class FetchResult:
+    status: int
+    html: str
+
+
+class HttpFetcher:
+    """httpx, không chạy JavaScript: đủ cho trang HTML tĩnh"""
+
+    def __init__(self, concurrency: int = 4, timeout: float = 30.0):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency),
+        )
+
+    async def fetch(self, slot: int, url: str) -> FetchResult:
+        response = await self._client.get(url)
+        return FetchResult(response.status_code, response.text)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class PlaywrightFetcher:
+    """Pool browser context: slot i luôn dùng context / page thứ i (một worker một slot)"""
+
+    def __init__(self, concurrency: int = 4, headless: bool = True, timeout_ms: int = 60000,
+                 blocked_resources: Tuple[str, ...] = BLOCKED_RESOURCES):
+        self.concurrency = concurrency
+        self.headless = headless
+        self.timeout_ms = timeout_ms
+        self.blocked_resources = set(blocked_resources)
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._pages = []
+
+    async def start(self):
+        # Import lazy: chỉ cần playwright khi crawl thật
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.concurrency):
+            context = await self._browser.new_context()
+            if self.blocked_resources:
+                await context.route("**/*", self._route)
+            self._contexts.append(context)
+            self._pages.append(await context.new_page())
+
+    async def _route(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def fetch(self, slot: int, url: str) -> FetchResult:
+        page = self._pages[slot]
+        try:
+            response = await page.goto(url, timeout=self.timeout_ms)
+            return FetchResult(response.status if response else 200, await page.content())
+        except Exception:
+            # Page có thể đã hỏng (crash / navigation treo): tạo page mới cho lần retry
+            try:
+                await page.close()
+            except Exception:
+                pass
+            self._pages[slot] = await self._contexts[slot].new_page()
+            raise
+
+    async def close(self):
+        for context in self._contexts:
+            await context.close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._contexts, self._pages = [], []
+        self._browser = self._playwright = None
+
+
+# ==========================================
+# 3. CRAWL (frontier + worker pool + journal)
+# ==========================================
+@dataclass
+class CrawlStats:
+    seeds: int = 0
+    resumed: int = 0        # URL đã có trong journal, không fetch lại
+    requests: int = 0
+    retries: int = 0
+    scraped: int = 0
+    empty: int = 0
+    failed: int = 0
+    discovered: int = 0
+    stopped_by_limit: bool = False
+    elapsed: float = 0.0
+    failed_urls: List[str] = field(default_factory=list)
+
+
+async def crawl(seeds: Iterable[str], fetcher, journal_path: str = JOURNAL_PATH, *,
+                concurrency: int = 4, rpm: Optional[float] = None, max_retries: int = 3,
+                backoff_base: float = 1.0, follow: Optional[str] = None,
+                max_pages: Optional[int] = None,
+                on_page: Optional[Callable[[str, dict], None]] = None) -> CrawlStats:
+    """
+    Crawl các seed (và link khớp regex `follow`) với `concurrency` worker.
+    fetcher phải có start() / fetch(slot, url) / close(); được start và close ở đây.
+    max_pages: số trang tối đa xử lý trong lần chạy này (phần còn lại để lần sau).
+    """
+    started = time.perf_counter()
+    stats = CrawlStats()
+    journal = ResultJournal(journal_path)
+    follow_re = re.compile(follow) if follow else None
+    bucket = TokenBucket(rpm, capacity=max(1.0, rpm / 60.0)) if rpm else None
+    queue: asyncio.Queue = asyncio.Queue()
+    seen = set()
+    seeds = list(seeds)
+    stats.seeds = len(seeds)
+    # seq giữ thứ tự export: seed theo vị trí, link phát hiện thêm xếp sau
+    next_seq = max([len(seeds)] + [r.get("seq", -1) + 1 for r in journal.results.values()])
+    claimed = 0
+
+    def add(url: str, seq: Optional[int] = None):
+        nonlocal next_seq
+        pending = [(url, seq)]
+        while pending:
+            url, seq = pending.pop()
+            url = urldefrag(url)[0]
+            if url in seen:
+                continue
+            seen.add(url)
+            done = journal.results.get(url)
+            if done is not None:
+                # Resume: không fetch lại, nhưng link của trang vẫn được đưa vào frontier
+                stats.resumed += 1
+                pending.extend((link, None) for link in reversed(_follow_links(url, done.get("links", []))))
+                continue
+            if seq is None:
+                seq = next_seq
+                next_seq += 1
+            queue.put_nowait((url, seq))
+
+    def _follow_links(base: str, links: List[str]) -> List[str]:
+        if follow_re is None:
+            return []
+        return [urljoin(base, link) for link in links if follow_re.search(urljoin(base, link))]
+
+    async def fetch_with_retry(slot: int, url: str) -> Tuple[Optional[FetchResult], str]:
+        error = ""
+        for attempt in range(max_retries + 1):
+            if bucket is not None:
+                await bucket.acquire()
+            stats.requests += 1
+            try:
+                result = await fetcher.fetch(slot, url)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if result.status not in RETRY_STATUSES:
+                    return result, ""
+                error = f"HTTP {result.status}"
+            if attempt < max_retries:
+                stats.retries += 1
+                await asyncio.sleep(backoff_base * (2 ** attempt) * (0.5 + random.random()))
+        return None, error
+
+    async def process(slot: int, url: str, seq: int):
+        result, error = await fetch_with_retry(slot, url)
+        if result is not None and result.status >= 400 and result.status not in EMPTY_STATUSES:
+            result, error = None, f"HTTP {result.status}"
+        if result is None:
+            stats.failed += 1
+            stats.failed_urls.append(url)
+            print(f"❌ {url}: {error}")
+            return
+
+        place, links = (None, []) if result.status in EMPTY_STATUSES else parse_place_page(result.html)
+        links = _follow_links(url, links)
+        record = {"seq": seq, "status": "ok" if place else "empty", "place": place, "links": links}
+        journal.append_many([(url, record, 0)])
+        if place:
+            stats.scraped += 1
+        else:
+            stats.empty += 1
+        if on_page is not None:
+            on_page(url, record)
+
+        before = len(seen)
+        for link in links:
+            add(link)
+        stats.discovered += len(seen) - before
+
+    async def worker(slot: int):
+        nonlocal claimed
+        while True:
+            url, seq = await queue.get()
+            try:
+                if max_pages is not None and claimed >= max_pages:
+                    stats.stopped_by_limit = True
+                    continue
+                claimed += 1
+                await process(slot, url, seq)
+            except Exception as e:
+                stats.failed += 1
+                stats.failed_urls.append(url)
+                print(f"❌ {url}: {type(e).__name__}: {e}")
+            finally:
+                queue.task_done()
+
+    for seq, url in enumerate(seeds):
+        add(url, seq)
+
+    await fetcher.start()
+    workers = [asyncio.create_task(worker(slot)) for slot in range(concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await fetcher.close()
+        journal.close()
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def export_csv(journal_path: str = JOURNAL_PATH, output_csv: str = OUTPUT_CSV) -> int:
+    """
+    Ghi các trang đã scrape (status ok) ra CSV theo thứ tự seed. id = số item của URL, không
+    đánh lại theo vị trí: resume lấp trang lỗi trước đó không làm các place sau đổi id
+    """
+    journal = ResultJournal(journal_path)
+    records = sorted(((url, r) for url, r in journal.results.items() if r.get("status") == "ok"),
+                     key=lambda item: item[1]["seq"])
+    rows = [{"id": place_id(url, record["seq"]), **record["place"]} for url, record in records]
+    write_csv_rows(output_csv, CSV_FIELDS, rows)
+    return len(rows)
+
+
+# ==========================================
+# 4. CLI
+# ==========================================
+async def run(start: int = 1, pages: int = 1171, base_url: str = BASE_URL, workers: int = 4,
+              engine: str = "playwright", journal_path: str = JOURNAL_PATH, output_csv: str = OUTPUT_CSV,
+              rpm: Optional[float] = 120, max_retries: int = 3, follow: Optional[str] = None,
+              max_pages: Optional[int] = None) -> CrawlStats:
+    fetcher = PlaywrightFetcher(workers) if engine == "playwright" else HttpFetcher(workers)
+    stats = await crawl(
+        item_urls(start, pages, base_url), fetcher, journal_path,
+        concurrency=workers, rpm=rpm, max_retries=max_retries, follow=follow, max_pages=max_pages,
+        on_page=lambda url, record: print(f"Crawled {url} ({record['status']})"),
+    )
+    exported = export_csv(journal_path, output_csv)
+    print(f"Done! {stats.scraped} scraped, {stats.empty} empty, {stats.failed} failed, "
+          f"{stats.resumed} resumed, {stats.retries} retries in {stats.elapsed:.1f}s")
+    print(f"💾 {exported} places -> {output_csv}")
+    if stats.failed or stats.stopped_by_limit:
+        print(f"👉 Chạy lại để tiếp tục (resume từ {journal_path})")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl csdl.vietnamtourism.gov.vn song song, có resume")
+    parser.add_argument("--start", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=1171)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=4, help="Số browser context song song")
+    parser.add_argument("--engine", choices=("playwright", "http"), default="playwright")
+    parser.add_argument("--journal", default=JOURNAL_PATH)
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--rpm", type=float, default=120, help="Giới hạn request / phút (0 = không giới hạn)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--follow", default=None, help="Regex URL: link khớp được thêm vào frontier")
+    parser.add_argument("--max-pages", type=int, default=None, help="Số trang tối đa cho lần chạy này")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.start, args.pages, args.base_url, args.workers, args.engine, args.journal,
+                    args.output, args.rpm or None, args.retries, args.follow, args.max_pages))
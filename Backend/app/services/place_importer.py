@@ -0,0 +1,305 @@
+"""
+Import Place từ CSV theo lô, idempotent (thay cho vòng lặp từng dòng của add_placeCSV_to_db.py).
+
+- Đọc CSV dạng stream, xử lý từng chunk (mặc định 500 dòng)
+- Mỗi chunk: một query lấy các Place hiện có theo id (dòng không có id: khớp theo tên,
+  cũng một query), so content hash của dòng CSV với hash của bản ghi trong DB
+- Chỉ dòng mới / đổi nội dung được ghi, bằng MỘT câu
+  INSERT ... ON CONFLICT(id) DO UPDATE chạy executemany
+- Dòng không có id (và không khớp tên) được cấp id sau max(id của DB, id của cả file):
+  file được đọc trước một lượt chỉ để lấy id lớn nhất (max_explicit_id), nên id cấp
+  ở chunk trước không bao giờ trùng id ghi sẵn ở chunk sau
+- Cả file trong một transaction: lỗi giữa chừng thì DB không đổi
+- Chạy lại cùng file: mọi dòng "unchanged", không ghi gì
+
+Khóa tìm kiếm (placesearchkey) của các dòng đã ghi được cập nhật trong cùng transaction.
+
+Chỉ ghi name / description / image / tags; lat / lon / climate (từ các script
+geocode / climate) được giữ nguyên khi update.
+
+Báo cáo inserted / updated / unchanged và tập id đã đổi (changed_ids) để RecSys
+cập nhật phần index tương ứng thay vì build lại từ đầu.
+
+Nhận cả stage Parquet của data_lake (.parquet): cột list đọc native, không parse JSON.
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.place_importer app/services/places.csv --changed-ids changed.json
+    python -m app.services.place_importer app/services/vietnam_tourism_data_with_tags.parquet
+"""
+
+import argparse
+import ast
+import csv
+import hashlib
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.schemas import Place
+from app.services.search_keys import upsert_search_keys
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Các tên cột được chấp nhận cho từng field (CSV từ nhiều nguồn crawl khác nhau)
+ID_COLUMNS = ("id", "Id", "ID")
+NAME_COLUMNS = ("name", "Name", "Title", "title")
+DESCRIPTION_COLUMNS = ("description_json", "Description", "description")
+IMAGE_COLUMNS = ("image_json", "Image", "image")
+TAG_COLUMNS = ("tags", "Tags", "tag")
+
+CONTENT_FIELDS = ("name", "description", "image", "tags")
+
+# description_json rất dài
+csv.field_size_limit(sys.maxsize)
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0            # dòng không có tên
+    missing_tags: int = 0
+    changed_ids: Set[int] = field(default_factory=set)
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "missing_tags": self.missing_tags,
+            "changed_ids": sorted(self.changed_ids),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+def parse_list_field(field_data) -> List[str]:
+    """
+    Field dạng list trong CSV: JSON chuẩn, Python list string, hoặc text phân cách dấu phẩy.
+    Dấu "" chỉ được sửa khi JSON gốc không parse được (CSV bị escape hai lần).
+    List native (cột list của Parquet) được dùng trực tiếp.
+    """
+    if isinstance(field_data, (list, tuple)):
+        return _as_str_list(field_data)
+    if not field_data:
+        return []
+    text = field_data.strip()
+    if text in ("", "[]"):
+        return []
+
+    for candidate in (text, text.replace('""', '"')):
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return _as_str_list(parsed)
+
+    try:
+        return _as_str_list(ast.literal_eval(text))
+    except (ValueError, SyntaxError):
+        pass
+
+    if text.startswith("[") and text.endswith("]"):
+        text = text[1:-1]
+    if "," in text:
+        return [part.strip().strip("'\"") for part in text.split(",") if part.strip().strip("'\"")]
+    return [text]
+
+
+def _as_str_list(value) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def _first(row: dict, columns) -> str:
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return value
+    return ""
+
+
+def content_hash(name: str, description, image, tags) -> str:
+    """Hash nội dung của một Place (giống nhau cho dòng CSV và bản ghi DB)"""
+    payload = json.dumps([name, list(description or []), list(image or []), list(tags or [])],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def iter_chunks(path: str, chunk_size: int) -> Iterator[List[dict]]:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    with open(path, mode="r", encoding="utf-8-sig", newline="") as csvfile:
+        reader = csv.DictReader(csvfile)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def max_explicit_id(path: str) -> int:
+    """Id lớn nhất ghi sẵn trong file (0 nếu không có); Parquet chỉ đọc cột id"""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        columns = [column for column in ID_COLUMNS if column in parquet.schema_arrow.names]
+        if not columns:
+            return 0
+        rows = (row for batch in parquet.iter_batches(columns=columns) for row in batch.to_pylist())
+    else:
+        rows = (row for chunk in iter_chunks(path, DEFAULT_CHUNK_SIZE) for row in chunk)
+
+    largest = 0
+    for row in rows:
+        try:
+            largest = max(largest, int(_first(row, ID_COLUMNS)))
+        except (TypeError, ValueError):
+            pass
+    return largest
+
+
+def _parse_row(row: dict) -> Optional[dict]:
+    name = _first(row, NAME_COLUMNS).strip()
+    if not name:
+        return None
+    try:
+        place_id = int(_first(row, ID_COLUMNS))
+    except (TypeError, ValueError):
+        place_id = None
+    return {
+        "id": place_id,
+        "name": name,
+        "description": parse_list_field(_first(row, DESCRIPTION_COLUMNS)),
+        "image": parse_list_field(_first(row, IMAGE_COLUMNS)),
+        "tags": parse_list_field(_first(row, TAG_COLUMNS)),
+    }
+
+
+class _Importer:
+    def __init__(self, conn, report: ImportReport, max_file_id: int = 0):
+        self.conn = conn
+        self.report = report
+        self.table = Place.__table__
+        # Dòng không có id và không khớp tên: cấp id mới sau max(id) của DB và của cả file
+        db_max_id = conn.execute(select(func.max(self.table.c.id))).scalar() or 0
+        self.next_id = max(db_max_id, max_file_id) + 1
+
+        stmt = sqlite_insert(self.table)
+        self.upsert = stmt.on_conflict_do_update(
+            index_elements=[self.table.c.id],
+            set_={column: stmt.excluded[column] for column in CONTENT_FIELDS},
+        )
+
+    def _existing(self, column, values) -> Dict:
+        """{id hoặc name: (id, content hash)} của các Place có sẵn trong DB"""
+        if not values:
+            return {}
+        t = self.table
+        rows = self.conn.execute(
+            select(t.c.id, t.c.name, t.c.description, t.c.image, t.c.tags).where(column.in_(values))
+        ).all()
+        key = 0 if column is t.c.id else 1
+        return {row[key]: (row[0], content_hash(row[1], row[2], row[3], row[4])) for row in rows}
+
+    def apply_chunk(self, rows: List[dict]):
+        records = []
+        for row in rows:
+            record = _parse_row(row)
+            if record is None:
+                self.report.skipped += 1
+                continue
+            if not record["tags"]:
+                if self.report.missing_tags < 5:
+                    print(f"⚠️  Không có tags cho '{record['name']}'")
+                self.report.missing_tags += 1
+            records.append(record)
+
+        # Dòng không có id: khớp theo tên (một query IN cho cả chunk)
+        by_name = self._existing(self.table.c.name, list({r["name"] for r in records if r["id"] is None}))
+        for record in records:
+            if record["id"] is None and record["name"] in by_name:
+                record["id"] = by_name[record["name"]][0]
+
+        # Trùng id trong cùng chunk: dòng sau thắng
+        latest = {}
+        for record in records:
+            if record["id"] is None:
+                record["id"] = self.next_id
+                self.next_id += 1
+            latest[record["id"]] = record
+
+        existing = self._existing(self.table.c.id, list(latest))
+        changed = []
+        for place_id, record in latest.items():
+            current = existing.get(place_id)
+            if current is None:
+                self.report.inserted += 1
+            elif current[1] != content_hash(record["name"], record["description"], record["image"], record["tags"]):
+                self.report.updated += 1
+            else:
+                self.report.unchanged += 1
+                continue
+            changed.append(record)
+        # Dòng lặp lại trong chunk cũng là "unchanged" (đã gộp vào dòng cuối)
+        self.report.unchanged += len(records) - len(latest)
+
+        if changed:
+            self.conn.execute(self.upsert, changed)
+            upsert_search_keys(self.conn, changed)
+            self.report.changed_ids.update(record["id"] for record in changed)
+
+
+def import_places_csv(path: str, engine=None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """Import / đồng bộ Place từ CSV; trả về ImportReport"""
+    if engine is None:
+        from app.database import engine, create_db_and_tables
+        create_db_and_tables()
+
+    report = ImportReport()
+    start = time.perf_counter()
+    max_file_id = max_explicit_id(path)
+    with engine.begin() as conn:
+        importer = _Importer(conn, report, max_file_id)
+        for chunk in iter_chunks(path, chunk_size):
+            importer.apply_chunk(chunk)
+    report.elapsed_seconds = time.perf_counter() - start
+
+    print(f"[Place Import] {path}: +{report.inserted} inserted, ~{report.updated} updated, "
+          f"={report.unchanged} unchanged, {report.skipped} skipped in {report.elapsed_seconds:.2f}s")
+    if report.missing_tags:
+        print(f"⚠️  {report.missing_tags} địa điểm không có tags")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk, idempotent Place import from CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--changed-ids", default=None,
+                        help="Ghi danh sách id đã thêm / đổi ra file JSON (cho RecSys cập nhật)")
+    args = parser.parse_args()
+
+    result = import_places_csv(args.csv_path, chunk_size=args.chunk_size)
+    if args.changed_ids:
+        with open(args.changed_ids, "w", encoding="utf-8") as f:
+            json.dump(sorted(result.changed_ids), f)
+        print(f"[Place Import] {len(result.changed_ids)} changed ids -> {args.changed_ids}")
@@ -0,0 +1,195 @@
+"""
+Re-rank đa dạng cho top candidates của content-based engine (recommend_content_based).
+
+- mmr: Maximal Marginal Relevance trên ma trận TF-IDF item-item đã tính sẵn
+      gain(d) = λ * rel(d) - (1 - λ) * max_{s đã chọn} sim(d, s)
+- xquad: aspect = tag của place (tỉnh + category)
+      gain(d) = λ * rel(d) + (1 - λ) * Σ_a P(a|q) P(d|a) Π_{s đã chọn} (1 - P(s|a))
+- Cả hai chọn tham lam, cập nhật tăng dần: mỗi bước một cột similarity / một lần
+  bincount trên các mảng cấp phát sẵn -> O(k * C) cho k kết quả trên C candidates
+- DiversityCaps: giới hạn tỉnh / category cũ (WeightProfile.diversity_limits) thành ràng
+  buộc 3 mức: 1 = giới hạn chuẩn, 2 = nới x relax_factor, 3 = chỉ giới hạn cứng theo tỉnh.
+  Hết candidate hợp lệ ở một mức thì sang mức kế tiếp (mức của từng kết quả = diversity_pass)
+
+λ = 1 cho đúng kết quả của 3 pass tham lam cũ (theo score, có giới hạn).
+"""
+
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.services.tag_vocab import TagMatrix
+
+RERANK_METHODS = ("mmr", "xquad")
+LEVELS = (1, 2, 3)
+
+
+class Selection(NamedTuple):
+    positions: np.ndarray  # vị trí trong mảng candidates, theo thứ tự chọn
+    levels: np.ndarray     # mức ràng buộc (1/2/3) lúc chọn từng kết quả
+
+
+class DiversityCaps:
+    """Đếm tỉnh / category (tag id) của các place đã chọn và chặn candidate vượt giới hạn"""
+
+    def __init__(self, provinces: np.ndarray, category_ids: np.ndarray, category_indptr: np.ndarray,
+                 n_ids: int, limits, category_limit: np.ndarray):
+        self.provinces = provinces
+        self.category_ids = category_ids
+        self.category_owner = np.repeat(np.arange(len(provinces)), np.diff(category_indptr))
+        self.category_indptr = category_indptr
+        self.limits = limits
+        self.category_limit = category_limit
+        self.province_count = np.zeros(n_ids, dtype=np.int32)
+        self.category_count = np.zeros(n_ids, dtype=np.int32)
+
+    @classmethod
+    def from_tag_matrix(cls, tags: TagMatrix, rows: Sequence[int], limits,
+                        common_tag_ids: Iterable[int] = ()) -> "DiversityCaps":
+        """
+        rows: hàng của candidates trong TagMatrix. Tỉnh = tag đầu, category = các tag còn lại;
+        place không có tag / chỉ có tỉnh được tính là 'Unknown' (id cuối cùng).
+        common_tag_ids: category phổ biến ("Nature"...) dùng limits.common_category
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        unknown = len(tags.vocab)
+        first = tags.first[rows]
+        provinces = np.where(first >= 0, first, unknown)
+
+        tag_ids, owner = tags.entries(rows)
+        lengths = tags.lengths[rows]
+        is_category = np.ones(len(tag_ids), dtype=bool)
+        is_category[(np.cumsum(lengths) - lengths)[lengths > 0]] = False
+        category_ids, category_owner = tag_ids[is_category], owner[is_category]
+
+        no_category = np.flatnonzero(np.bincount(category_owner, minlength=len(rows)) == 0)
+        category_ids = np.concatenate((category_ids, np.full(len(no_category), unknown, dtype=category_ids.dtype)))
+        category_owner = np.concatenate((category_owner, no_category))
+        order = np.argsort(category_owner, kind="stable")
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(category_owner, minlength=len(rows)), out=indptr[1:])
+
+        n_ids = unknown + 1
+        category_limit = np.full(n_ids, limits.per_category, dtype=np.float64)
+        common = [i for i in common_tag_ids if 0 <= i < n_ids]
+        category_limit[common] = limits.common_category
+        return cls(provinces, category_ids[order], indptr, n_ids, limits, category_limit)
+
+    def blocked(self, level: int) -> np.ndarray:
+        """Mask candidate vi phạm giới hạn ở mức level"""
+        province_count = self.province_count[self.provinces]
+        if level == 3:
+            return province_count >= self.limits.hard_province
+        scale = 1.0 if level == 1 else self.limits.relax_factor
+        over = self.category_count[self.category_ids] >= self.category_limit[self.category_ids] * scale
+        blocked = np.bincount(self.category_owner[over], minlength=len(self.provinces)) > 0
+        blocked |= province_count >= self.limits.per_province * scale
+        return blocked
+
+    def take(self, pos: int):
+        self.province_count[self.provinces[pos]] += 1
+        np.add.at(self.category_count, self.category_ids[self.category_indptr[pos]:self.category_indptr[pos + 1]], 1)
+
+
+def normalize_relevance(scores: np.ndarray) -> np.ndarray:
+    """Đưa về [0, 1] (giữ thứ tự, score không âm chỉ chia cho max) để cộng được với similarity / coverage"""
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return scores
+    low, high = min(scores.min(), 0.0), scores.max()
+    return (scores - low) / (high - low) if high > low else np.zeros(len(scores))
+
+
+def _greedy(relevance: np.ndarray, k: int, caps: Optional[DiversityCaps], diversity, update) -> Selection:
+    """
+    Vòng chọn chung: gain = relevance + diversity(); chọn argmax trong các candidate chưa chọn,
+    không vi phạm caps ở mức hiện tại (bằng gain thì candidate đứng trước thắng)
+    """
+    n = len(relevance)
+    k = min(k, n)
+    positions = np.empty(k, dtype=np.int64)
+    levels = np.empty(k, dtype=np.int8)
+    taken = np.zeros(n, dtype=bool)
+    gain = np.empty(n, dtype=np.float64)
+
+    count, level_index = 0, 0
+    while count < k and level_index < len(LEVELS):
+        level = LEVELS[level_index]
+        np.add(relevance, diversity(), out=gain)
+        gain[taken] = -np.inf
+        if caps is not None:
+            gain[caps.blocked(level)] = -np.inf
+        pos = int(np.argmax(gain))
+        if gain[pos] == -np.inf:
+            level_index += 1  # hết candidate hợp lệ ở mức này -> nới ràng buộc
+            continue
+        positions[count], levels[count] = pos, level
+        count += 1
+        taken[pos] = True
+        if caps is not None:
+            caps.take(pos)
+        update(pos)
+    return Selection(positions[:count], levels[:count])
+
+
+def mmr(scores: np.ndarray, similarity: Optional[np.ndarray], rows: Sequence[int], k: int,
+        caps: Optional[DiversityCaps] = None, lam: float = 0.7) -> Selection:
+    """
+    scores: điểm của C candidates; similarity: ma trận item-item (N x N, đối xứng),
+    rows: hàng của candidates trong similarity. Chỉ đọc k hàng của similarity.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    relevance = lam * normalize_relevance(scores)
+    max_sim = np.zeros(len(rows), dtype=np.float64)
+    penalty = np.zeros(len(rows), dtype=np.float64)
+
+    def diversity():
+        return np.multiply(max_sim, -(1.0 - lam), out=penalty)
+
+    def update(pos):
+        if similarity is not None:
+            np.maximum(max_sim, similarity[rows[pos]][rows], out=max_sim)
+
+    return _greedy(relevance, k, caps, diversity, update)
+
+
+def xquad(scores: np.ndarray, tags: TagMatrix, rows: Sequence[int], k: int,
+          caps: Optional[DiversityCaps] = None, lam: float = 0.7) -> Selection:
+    """
+    Aspect a = tag id. P(a|q) tỉ lệ với tổng relevance của candidates có a,
+    P(d|a) = relevance(d) nếu d có tag a (0 nếu không).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    rel = normalize_relevance(scores)
+    relevance = lam * rel
+    aspect_ids, owner = tags.entries(rows)
+    n_aspects = len(tags.vocab)
+
+    aspect_mass = np.bincount(aspect_ids, weights=rel[owner], minlength=n_aspects)
+    total = aspect_mass.sum()
+    aspect_weight = aspect_mass / total if total > 0 else aspect_mass
+    p_doc = rel[owner]
+    entry_weight = aspect_weight[aspect_ids] * p_doc
+    coverage = np.ones(n_aspects, dtype=np.float64)  # Π (1 - P(s|a)) trên các place đã chọn
+    novelty = np.zeros(len(rows), dtype=np.float64)
+    starts = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(tags.lengths[rows], out=starts[1:])
+
+    def diversity():
+        novelty[:] = np.bincount(owner, weights=entry_weight * coverage[aspect_ids], minlength=len(rows))
+        return np.multiply(novelty, 1.0 - lam, out=novelty)
+
+    def update(pos):
+        entries = slice(starts[pos], starts[pos + 1])
+        coverage[aspect_ids[entries]] *= 1.0 - p_doc[entries]
+
+    return _greedy(relevance, k, caps, diversity, update)
+
+
+def rerank(method: str, scores: np.ndarray, rows: Sequence[int], k: int, similarity: Optional[np.ndarray],
+           tags: TagMatrix, caps: Optional[DiversityCaps] = None, lam: float = 0.7) -> Selection:
+    if method == "mmr":
+        return mmr(scores, similarity, rows, k, caps, lam)
+    if method == "xquad":
+        return xquad(scores, tags, rows, k, caps, lam)
+    raise ValueError(f"Unknown rerank method: {method}")
@@ -17,21 +17,13 @@ Rules:
 from typing import List, Dict, Any, Optional
 from sqlmodel import Session, select
 from app.schemas import GroqExtraction, PlaceOut, Rating, Comment
-from app.services.db_service import get_all_places 
+from app.services.batch_recommend import invalidate_precomputed_feed
+from app.services.theme_engine import TYPE_TO_THEME, ThemeQuery, get_sightseeing_catalogue
 
 # ==========================================
 # RECOMMENDATION SCORING (Original Functions)
 # ==========================================
 
-TYPE_TO_THEME = {
-    "mountain": ["mountain", "peak", "hill", "hiking"],
-    "beach": ["beach", "sea", "island", "coast"],
-    "island": ["island", "snorkeling", "bay"],
-    "forest": ["nature", "forest", "park", "national park"],
-    "city": ["city", "culture", "museum", "hotel", "building"],
-    "unknown": []
-}
-
 def score_place(ex: GroqExtraction, place: Dict[str, Any]) -> float:
     prov_boost = 0.0
     if ex.location:
@@ -57,23 +49,22 @@ def score_place(ex: GroqExtraction, place: Dict[str, Any]) -> float:
     return round(prov_boost + theme_score + weather_bonus, 4)
 
 def rank_places(ex: GroqExtraction, top_k: int) -> List[PlaceOut]:
-    db_places = get_all_places() 
-    
-    scored = []
-    for p in db_places:
-        s = score_place(ex, p)
-        
-        if s > 0: 
-            scored.append(PlaceOut(
-                id=p["id"],
-                name=p["name"],
-                province=p.get("province") or "",
-                themes=p.get("themes", []),
-                score=s
-            ))
-            
-    scored.sort(key=lambda x: x.score, reverse=True)
-    return scored[:top_k]
+    """
+    Cùng kết quả với chấm score_place từng place rồi sort, nhưng chấm cả catalogue
+    bằng ma trận theme tính sẵn (app/services/theme_engine.py)
+    """
+    catalogue = get_sightseeing_catalogue()
+    positions, scores = catalogue.top_k(ThemeQuery.from_extraction(ex), top_k)
+    return [
+        PlaceOut(
+            id=int(catalogue.ids[i]),
+            name=catalogue.names[i],
+            province=catalogue.provinces[i],
+            themes=catalogue.themes[i],
+            score=float(s)
+        )
+        for i, s in zip(positions, scores)
+    ]
 
 
 # ==========================================
@@ -250,7 +241,13 @@ class RatingScorer:
             )
             session.add(rating)
         
+        # Tương tác mới -> list home feed tính sẵn không còn đúng nữa
+        invalidate_precomputed_feed(user_id, session)
+        
         session.commit()
+        # Sau commit: fold-in lại đọc được tương tác mới
+        from app.routers import cf_model  # lazy: đã load trong lifespan, không kéo scipy lúc import app
+        cf_model.invalidate_user_vector(user_id)
         session.refresh(rating)
         
         return rating
\ No newline at end of file
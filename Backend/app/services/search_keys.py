@@ -0,0 +1,192 @@
+"""
+Khóa tìm kiếm chuẩn hóa cho Place (không dấu, chữ thường, tách từ).
+
+- normalize_text: hàm chuẩn hóa dùng chung (search, RecSys, gazetteer), có lru_cache nên
+  chuỗi lặp lại (tên tỉnh, tag) chỉ xử lý một lần
+- Bảng placesearchkey (một dòng / place) lưu sẵn name_key, province_key (tags[0]), tags_key
+  ("|ha noi|lake|") có index: search theo tỉnh là lookup index, không còn cast JSON + ILIKE
+  và bỏ dấu ở mỗi request
+- Bảng placesearchtoken (token, field, place_id): từng từ của tên / tag. Keyword và location
+  không phải tỉnh khớp bằng range scan trên khóa chính (token_match_ids), không LIKE '%...%'
+- Khóa được ghi cùng transaction khi import (place_importer), sửa tag (gazetteer) hoặc sửa
+  qua admin; sync_search_keys bù các place còn thiếu khóa lúc startup (DB cũ)
+- TagTermIndex: index trong bộ nhớ "cụm từ của tag" -> tập place id, cho RecSys khớp location
+  bằng lookup thay vì lowercase + so substring từng dòng
+
+Cách chạy (từ thư mục Backend/):
+    python -m app.services.search_keys          # build lại toàn bộ khóa
+"""
+
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, delete, exists, intersect, select, union
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.schemas import Place, PlaceSearchKey, PlaceSearchToken
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+TAG_SEPARATOR = "|"
+# Ký tự ngay sau "z" (khóa chỉ gồm [a-z0-9 ]): token có tiền tố w nằm trong [w, w + PREFIX_END)
+PREFIX_END = "{"
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text: str) -> str:
+    """Chữ thường, bỏ dấu (kể cả đ), ký tự khác chữ/số -> dấu cách"""
+    text = unicodedata.normalize("NFD", text.lower()).replace("đ", "d")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def tag_keys(tags: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Tag -> khóa chuẩn hóa (giữ thứ tự, bỏ trùng / rỗng)"""
+    keys = (normalize_text(tag) for tag in tags or () if isinstance(tag, str))
+    return tuple(dict.fromkeys(key for key in keys if key))
+
+
+def encode_tags_key(keys: Sequence[str]) -> str:
+    """("ha noi", "lake") -> "|ha noi|lake|": tìm nguyên tag bằng LIKE '%|ha noi|%'"""
+    return f"{TAG_SEPARATOR}{TAG_SEPARATOR.join(keys)}{TAG_SEPARATOR}" if keys else ""
+
+
+def key_row(place_id: int, name: Optional[str], tags) -> dict:
+    keys = tag_keys(tags)
+    return {
+        "place_id": place_id,
+        "name_key": normalize_text(name or ""),
+        "province_key": keys[0] if keys else None,
+        "tags_key": encode_tags_key(keys),
+    }
+
+
+def token_rows(place_id: int, name: Optional[str], tags) -> List[dict]:
+    """Các dòng placesearchtoken của một place (bỏ trùng)"""
+    tokens = {("name", word) for word in normalize_text(name or "").split()}
+    tokens.update(("tag", word) for key in tag_keys(tags) for word in key.split())
+    return [{"token": word, "field": field, "place_id": place_id} for field, word in sorted(tokens)]
+
+
+def term_ngrams(key: str) -> List[str]:
+    """Mọi cụm từ liên tiếp của khóa: "thua thien hue" -> thua, thua thien, ..., hue"""
+    words = key.split()
+    return [" ".join(words[i:j]) for i in range(len(words)) for j in range(i + 1, len(words) + 1)]
+
+
+# ==========================================
+# 1. BẢNG placesearchkey / placesearchtoken
+# ==========================================
+def upsert_search_keys(conn, places: Iterable[dict], with_tokens: bool = True) -> int:
+    """
+    Ghi khóa cho các place ({"id", "name", "tags"}) bằng một INSERT ... ON CONFLICT executemany;
+    token của các place đó được xóa rồi ghi lại (mỗi bước một executemany).
+    with_tokens=False: chỉ ghi placesearchkey (migration tạo bảng khóa, trước bảng token)
+    """
+    places = list(places)
+    if not places:
+        return 0
+    table = PlaceSearchKey.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.place_id],
+        set_={column: stmt.excluded[column] for column in ("name_key", "province_key", "tags_key")},
+    )
+    conn.execute(stmt, [key_row(p["id"], p["name"], p["tags"]) for p in places])
+    if not with_tokens:
+        return len(places)
+
+    tokens = PlaceSearchToken.__table__
+    conn.execute(delete(tokens).where(tokens.c.place_id == bindparam("old_place_id")),
+                 [{"old_place_id": p["id"]} for p in places])
+    rows = [row for p in places for row in token_rows(p["id"], p["name"], p["tags"])]
+    if rows:
+        conn.execute(tokens.insert(), rows)
+    return len(places)
+
+
+def sync_search_keys(engine=None, rebuild: bool = False) -> int:
+    """
+    Bù khóa cho place chưa có (rebuild=True: tính lại toàn bộ) và xóa khóa của place đã bị xóa.
+    Trả về số dòng khóa đã ghi.
+    """
+    if engine is None:
+        from app.database import engine
+    places, keys, tokens = Place.__table__, PlaceSearchKey.__table__, PlaceSearchToken.__table__
+    query = select(places.c.id, places.c.name, places.c.tags)
+    if not rebuild:
+        # Thiếu khóa, hoặc có khóa nhưng chưa có token (DB tạo trước bảng placesearchtoken)
+        has_tokens = exists().where(tokens.c.place_id == places.c.id)
+        query = (query.outerjoin(keys, keys.c.place_id == places.c.id)
+                 .where(keys.c.place_id.is_(None) | ~has_tokens))
+    with engine.begin() as conn:
+        rows = conn.execute(query).all()
+        written = upsert_search_keys(conn, ({"id": r.id, "name": r.name, "tags": r.tags} for r in rows))
+        conn.execute(delete(keys).where(keys.c.place_id.not_in(select(places.c.id))))
+        conn.execute(delete(tokens).where(tokens.c.place_id.not_in(select(places.c.id))))
+    return written
+
+
+def token_match_ids(key: str, field: Optional[str] = None, prefix: bool = False):
+    """
+    SELECT place_id có đủ mọi từ của key (cùng một field: "name" / "tag"; None: name hoặc tag).
+    prefix=True: mỗi từ là tiền tố của token ("hoan" khớp "hoan", "hoang"). Mỗi từ là một
+    range scan trên khóa chính (token, field, place_id); None nếu key rỗng.
+    """
+    words = key.split()
+    if not words:
+        return None
+    tokens = PlaceSearchToken.__table__.c
+
+    def word_ids(word, field):
+        match = and_(tokens.token >= word, tokens.token < word + PREFIX_END) if prefix else tokens.token == word
+        return select(tokens.place_id).where(match, tokens.field == field)
+
+    def field_ids(field):
+        if len(words) == 1:
+            return word_ids(words[0], field)
+        matched = intersect(*(word_ids(word, field) for word in words)).subquery()
+        return select(matched.c.place_id)
+
+    selects = [field_ids(f) for f in ([field] if field else ["name", "tag"])]
+    return union_ids(selects)
+
+
+def union_ids(selects):
+    """UNION các SELECT place_id (SQLite không cho lồng compound select trong ngoặc)"""
+    selects = [query for query in selects if query is not None]
+    if not selects:
+        return None
+    if len(selects) == 1:
+        return selects[0]
+    return select(union(*selects).subquery().c.place_id)
+
+
+# ==========================================
+# 2. INDEX TRONG BỘ NHỚ (RecSys)
+# ==========================================
+class TagTermIndex:
+    """Cụm từ của tag (chuẩn hóa) -> frozenset place id"""
+
+    def __init__(self, place_ids: Sequence[int], tags_lists: Sequence):
+        index: Dict[str, set] = {}
+        for place_id, tags in zip(place_ids, tags_lists):
+            for key in tag_keys(tags if isinstance(tags, (list, tuple)) else ()):
+                for term in term_ngrams(key):
+                    index.setdefault(term, set()).add(place_id)
+        self._index: Dict[str, FrozenSet[int]] = {term: frozenset(ids) for term, ids in index.items()}
+
+    def lookup(self, terms: Iterable[str]) -> FrozenSet[int]:
+        """Place có ít nhất một tag chứa (nguyên từ) một trong các terms"""
+        result: FrozenSet[int] = frozenset()
+        for term in terms:
+            result = result | self._index.get(normalize_text(term), frozenset())
+        return result
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    count = sync_search_keys(rebuild=True)
+    print(f"[Search Keys] {count} places in {time.perf_counter() - start:.2f}s")
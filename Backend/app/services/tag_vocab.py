@@ -0,0 +1,109 @@
+"""
+Từ điển tag dùng chung (tag -> int id) và ma trận tag dạng CSR cho các place.
+
+- tag_vocab: từ điển toàn cục, chỉ thêm (id không đổi trong suốt process) nên các TagMatrix
+  build ở thời điểm khác nhau vẫn dùng chung id. Chuỗi tag được intern: mọi place có tag
+  "Ha Noi" cùng trỏ tới một object str
+- TagMatrix: tag của place i là indices[indptr[i]:indptr[i + 1]] (int32, giữ thứ tự, tags[0]
+  là tỉnh). Đếm tỉnh / category, mask location, tổng hợp tag lịch sử là các phép NumPy trên
+  số nguyên thay vì so chuỗi
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class TagVocab:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.tags: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def intern(self, tag: str) -> int:
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self._ids.get(tag)
+                if tag_id is None:
+                    tag_id = len(self.tags)
+                    self.tags.append(tag)
+                    self._ids[tag] = tag_id
+        return tag_id
+
+    def id_of(self, tag: str) -> int:
+        """-1 nếu tag chưa có trong từ điển"""
+        return self._ids.get(tag, -1)
+
+    def encode(self, tags: Optional[Iterable[str]]) -> np.ndarray:
+        return np.fromiter((self.intern(tag) for tag in tags or () if isinstance(tag, str)), dtype=np.int32)
+
+    def decode(self, tag_ids: Iterable[int]) -> List[str]:
+        return [self.tags[i] for i in tag_ids]
+
+    def canonical(self, tags: Optional[Iterable[str]]) -> List[str]:
+        """List tag dùng chung object str trong từ điển"""
+        return [self.tags[i] for i in self.encode(tags)]
+
+
+tag_vocab = TagVocab()
+
+
+class TagMatrix:
+    """CSR (indptr, indices) tag id của từng place"""
+
+    def __init__(self, tags_lists: Sequence, vocab: TagVocab = tag_vocab):
+        self.vocab = vocab
+        rows = [vocab.encode(tags if isinstance(tags, (list, tuple)) else ()) for tags in tags_lists]
+        self.lengths = np.array([len(row) for row in rows], dtype=np.int64)
+        self.indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=self.indptr[1:])
+        self.indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        # Hàng (place) của từng phần tử trong indices
+        self.owner = np.repeat(np.arange(len(rows)), self.lengths)
+        # Tag đầu tiên (tỉnh) của từng place, -1 nếu không có tag
+        self.first = np.full(len(rows), -1, dtype=np.int32)
+        has_tags = self.lengths > 0
+        self.first[has_tags] = self.indices[self.indptr[:-1][has_tags]]
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.lengths.nbytes + self.owner.nbytes + self.first.nbytes
+
+    def row(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def rows_with_any(self, tag_ids: Sequence[int]) -> np.ndarray:
+        """Mask các place có ít nhất một tag trong tag_ids"""
+        hit = np.isin(self.indices, np.asarray(tag_ids, dtype=np.int32))
+        return np.bincount(self.owner[hit], minlength=len(self)) > 0
+
+    def entries(self, rows: Sequence[int]):
+        """(tag ids, vị trí trong rows) của các hàng được chọn, theo thứ tự rows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+        starts = np.repeat(self.indptr[rows] - np.cumsum(lengths) + lengths, lengths)
+        offsets = starts + np.arange(int(lengths.sum()))
+        return self.indices[offsets], np.repeat(np.arange(len(rows)), lengths)
+
+    def top_tags(self, rows: Sequence[int], weights: Optional[Sequence[float]] = None,
+                 limit: int = 5) -> List[str]:
+        """
+        Tag có tổng trọng số lớn nhất trên các hàng (mỗi hàng nhân weights[i]);
+        bằng nhau thì tag xuất hiện trước đứng trước (như Counter.most_common)
+        """
+        tag_ids, owner = self.entries(rows)
+        if len(tag_ids) == 0:
+            return []
+        weight = None if weights is None else np.asarray(weights, dtype=float)[owner]
+        counts = np.bincount(tag_ids, weights=weight, minlength=len(self.vocab))
+        unique_ids, first_seen = np.unique(tag_ids, return_index=True)
+        order = np.lexsort((first_seen, -counts[unique_ids]))
+        return self.vocab.decode(unique_ids[order[:limit]])
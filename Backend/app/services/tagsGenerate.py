@@ -1,11 +1,16 @@
-import google.generativeai as genai
-import pandas as pd
-import json
-import time
+import asyncio
 import os
 from datetime import datetime
 from dotenv import load_dotenv
 
+from app.services.batch_enrichment import (
+    ChatCompletionClient,
+    EnrichmentTask,
+    GEMINI_OPENAI_BASE_URL,
+    run_enrichment,
+)
+from app.services.data_lake import read_rows, stage_paths, write_rows
+
 # Load biến môi trường từ file .env
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../../.env'))
 
@@ -13,156 +18,139 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../../.env'))
 # 1. CẤU HÌNH API
 # ---------------------------------------------------------
 API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY không tìm thấy trong file .env")
-genai.configure(api_key=API_KEY)
-
-# Sử dụng model Gemini 1.5 Flash để tối ưu tốc độ và chi phí
-# Cấu hình response_mime_type="application/json" để ép model trả về JSON chuẩn
-model = genai.GenerativeModel(
-    'gemini-2.5-flash',
-    generation_config={"response_mime_type": "application/json"}
-)
-
-# CẤU HÌNH AN TOÀN TUYỆT ĐỐI
-DELAY_SECONDS = 7       # 7 giây/request => ~8.5 RPM (Đảm bảo < 10 RPM)
-DAILY_LIMIT = 240       # Dừng sau 240 request (Đảm bảo < 250 RPD)
+MODEL = 'gemini-2.5-flash'
+# Gemini qua OpenAI-compatible endpoint; override để chạy với stub server local
+BASE_URL = os.getenv("TAGS_LLM_BASE_URL", GEMINI_OPENAI_BASE_URL)
+
+# CẤU HÌNH AN TOÀN (free tier: < 10 RPM, < 250 requests/ngày)
+MAX_RPM = 8
+MAX_TPM = 200000
+DAILY_LIMIT = 240       # Dừng sau 240 request, chạy lại hôm sau sẽ tiếp tục từ journal
+CONCURRENCY = 2
+ITEMS_PER_PROMPT = 5    # 5 địa điểm mỗi request => ~1200 địa điểm/ngày
+
+# Stage Parquet (data_lake); file .csv cùng tên được xuất kèm cho người đọc
 INPUT_FILE = 'vietnam_tourism_data_cleaned.csv'
 OUTPUT_FILE = 'vietnam_tourism_data_with_tags.csv'
+JOURNAL_FILE = 'vietnam_tourism_data_with_tags.jsonl'
 
-# ---------------------------------------------------------
-# 2. HÀM GỌI GEMINI ĐỂ SINH TAGS
-# ---------------------------------------------------------
-def generate_tags_with_gemini(description_text):
-    if not isinstance(description_text, str) or len(description_text) < 10:
-        return []
-
-    # Prompt chi tiết
-    prompt = f"""
-    You are a travel recommendation AI. 
-    Analyze the following description of a place in Vietnam and generate a list of 5 to 10 tags.
-    
-    Requirements:
-    1. Tags must be in English.
-    2. Format: A JSON list of strings.
-    3. Include 1-2 Category tags (e.g., "Historical", "Nature", "Religious").
-    4. Include 3-5 Attribute tags (e.g., "Cave", "Pagoda", "Hiking", "Architecture", "Beach").
-    5. Include 1-2 Vibe/Context tags (e.g., "Peaceful", "Sightseeing", "Family-friendly").
-    
-    Description:
-    "{description_text}"
-    
-    Output format example: ["Historical", "Temple", "Hanoi", "Architecture", "Sightseeing"]
-    """
+SYSTEM_PROMPT = """
+You are a travel recommendation AI.
+You receive {"items": [...]}; each item has an "id" and the "description" of a place in Vietnam.
+For EACH item generate a list of 5 to 10 tags.
+
+Requirements:
+1. Tags must be in English.
+2. Include 1-2 Category tags (e.g., "Historical", "Nature", "Religious").
+3. Include 3-5 Attribute tags (e.g., "Cave", "Pagoda", "Hiking", "Architecture", "Beach").
+4. Include 1-2 Vibe/Context tags (e.g., "Peaceful", "Sightseeing", "Family-friendly").
+
+Output ONLY JSON, one output item per input item with the same "id":
+{"items": [{"id": 0, "tags": ["Historical", "Temple", "Hanoi", "Architecture", "Sightseeing"]}]}
+"""
+
+
+class TagsTask(EnrichmentTask):
+    name = "tags"
+    version = "2"
+    system_prompt = SYSTEM_PROMPT
+    output_fields = ("tags",)
+
+    def validate(self, output):
+        tags = output.get("tags")
+        return isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)
 
-    try:
-        # Gọi API
-        response = model.generate_content(prompt)
-        
-        # Parse kết quả từ JSON string sang Python List
-        tags_list = json.loads(response.text)
-        return tags_list
-        
-    except Exception as e:
-        print(f"Lỗi khi sinh tags: {e}")
-        return []
 
 # ---------------------------------------------------------
-# 3. HÀM MAIN - CHẠY VỚI CƠ CHẾ RESUME
+# 2. HÀM MAIN - CHẠY VỚI CƠ CHẾ RESUME (journal)
 # ---------------------------------------------------------
-def main():
+def row_id(row):
+    """id dạng int: stage Parquet trả int64, fallback CSV trả str"""
+    return int(row['id'])
+
+
+def load_existing_tags(path):
+    """Tags đã có trong file output cũ (theo id) - không sinh lại"""
+    if not any(os.path.exists(p) for p in stage_paths(path)):
+        return {}
+    _, rows = read_rows(path, columns=['id', 'tags'])
+    return {row_id(row): row['tags'] for row in rows if row.get('tags')}
+
+
+async def generate_tags(input_file=INPUT_FILE, output_file=OUTPUT_FILE, journal_file=JOURNAL_FILE, client=None):
     # Bước 1: Load dữ liệu
-    if not os.path.exists(INPUT_FILE):
-        print(f"Lỗi: Không tìm thấy file {INPUT_FILE}")
-        return
-
-    df = pd.read_csv(INPUT_FILE)
-    total_rows = len(df)
-    
-    # Bước 2: Kiểm tra file kết quả để resume (chạy tiếp)
-    if os.path.exists(OUTPUT_FILE):
-        print(f"Tìm thấy file kết quả cũ '{OUTPUT_FILE}'. Đang tải để chạy tiếp...")
-        df_result = pd.read_csv(OUTPUT_FILE)
-        # Đảm bảo cột tags tồn tại
-        if 'tags' not in df_result.columns:
-            df_result['tags'] = None
-        # Merge với df gốc để đảm bảo có đầy đủ dữ liệu
-        # Ưu tiên giữ tags từ df_result nếu đã có
-        df_result = df.merge(df_result[['id', 'tags']], on='id', how='left', suffixes=('', '_old'))
-        if 'tags_old' in df_result.columns:
-            df_result['tags'] = df_result['tags_old']
-            df_result = df_result.drop(columns=['tags_old'])
-    else:
-        print("Tạo file kết quả mới...")
-        df_result = df.copy()
-        df_result['tags'] = None # Khởi tạo cột tags rỗng
-
-    # Bước 3: Xác định các dòng chưa có tags
-    # Chỉ lấy các dòng mà cột 'tags' bị null (NaN)
-    rows_to_process = df_result[df_result['tags'].isnull()]
-    count_remaining = len(rows_to_process)
-    
-    print(f"Tổng số dòng: {total_rows}")
-    print(f"Đã xử lý xong: {total_rows - count_remaining}")
-    print(f"Còn lại: {count_remaining}")
-    
-    if count_remaining == 0:
-        print("🎉 Chúc mừng! Bạn đã xử lý xong toàn bộ dữ liệu.")
-        return
+    if not any(os.path.exists(p) for p in stage_paths(input_file)):
+        print(f"Lỗi: Không tìm thấy file {input_file}")
+        return None
+
+    fieldnames, rows = read_rows(input_file)
+    if 'tags' not in fieldnames:
+        fieldnames.append('tags')
+    existing = load_existing_tags(output_file)
+
+    # Bước 2: Dòng đã có tags hoặc mô tả quá ngắn thì không gọi LLM
+    payloads = []
+    for row in rows:
+        text = row.get('ai_input_text')
+        if row_id(row) in existing:
+            row['tags'] = existing[row_id(row)]
+            payloads.append(None)
+        elif not text or len(text) < 10:
+            row['tags'] = []
+            payloads.append(None)
+        else:
+            payloads.append({"description": text})
 
+    print(f"Tổng số dòng: {len(rows)}")
+    print(f"Đã có tags từ file cũ: {len(existing)}")
     print("-" * 40)
-    print(f"🚀 Bắt đầu chạy batch hôm nay (Giới hạn: {DAILY_LIMIT} requests)...")
-    print(f"⏳ Tốc độ: 1 request mỗi {DELAY_SECONDS} giây.")
-    print(f"⏭️  Bắt đầu từ ID: {rows_to_process.iloc[0]['id']}")
+    print(f"🚀 Bắt đầu chạy (giới hạn {DAILY_LIMIT} requests, {MAX_RPM} RPM, "
+          f"{CONCURRENCY} song song, {ITEMS_PER_PROMPT} địa điểm/request)...")
     print("-" * 40)
 
-    request_count = 0
-    
-    # Bước 4: Vòng lặp xử lý
-    for index, row in rows_to_process.iterrows():
-        # Kiểm tra giới hạn ngày
-        if request_count >= DAILY_LIMIT:
-            print(f"\n🛑 ĐÃ ĐẠT GIỚI HẠN {DAILY_LIMIT} REQUESTS HÔM NAY.")
-            print("Hãy dừng lại và chạy tiếp code này vào ngày mai.")
-            break
-
-        print(f"[{request_count + 1}/{DAILY_LIMIT}] Processing ID {row['id']}: {row['name']}...", end=" ")
-        
-        # Gọi API
-        tags = generate_tags_with_gemini(row['ai_input_text'])
-        
-        # Lưu kết quả vào DataFrame (đổi thành chuỗi JSON để lưu CSV)
-        df_result.at[index, 'tags'] = json.dumps(tags)
-        
-        request_count += 1
-        
-        # In kết quả ngắn gọn
-        if tags:
-            print("✅ OK")
+    # Bước 3: Gọi LLM theo batch, kết quả ghi vào journal ngay khi có
+    own_client = client is None
+    if own_client:
+        if not API_KEY:
+            raise ValueError("GEMINI_API_KEY không tìm thấy trong file .env")
+        client = ChatCompletionClient(BASE_URL, API_KEY, MODEL, provider="gemini", temperature=0.2, max_tokens=2000)
+    try:
+        outputs, stats = await run_enrichment(
+            payloads, TagsTask(), client, journal_file,
+            concurrency=CONCURRENCY, batch_size=ITEMS_PER_PROMPT,
+            rpm=MAX_RPM, tpm=MAX_TPM, request_budget=DAILY_LIMIT,
+        )
+    finally:
+        if own_client:
+            await client.aclose()
+
+    # Bước 4: Ghi file output MỘT lần (dòng chưa xử lý để trống tags), tags là cột list native
+    remaining = 0
+    for row, payload, output in zip(rows, payloads, outputs):
+        if payload is None:
+            continue
+        if output is None:
+            row['tags'] = None      # null: chưa xử lý (khác [] = không có tags)
+            remaining += 1
         else:
-            print("⚠️ Empty")
+            row['tags'] = output['tags']
+    write_rows(output_file, fieldnames, rows)
 
-        # Lưu file ngay sau mỗi 5 request để tránh mất điện/lỗi mạng
-        if request_count % 5 == 0:
-            df_result.to_csv(OUTPUT_FILE, index=False)
-        
-        # Sleep để đảm bảo RPM < 10
-        time.sleep(DELAY_SECONDS)
-
-    # Lưu lần cuối trước khi thoát
-    df_result.to_csv(OUTPUT_FILE, index=False)
     print("\n" + "=" * 40)
-    print(f"✅ Đã lưu tiến độ vào '{OUTPUT_FILE}'")
-    print(f"📊 Hôm nay đã chạy: {request_count} dòng.")
-    print(f"📉 Còn lại: {count_remaining - request_count} dòng.")
-    
-    if count_remaining - request_count > 0:
+    print(f"✅ Đã lưu '{output_file}'")
+    print(f"📊 Lần chạy này: {stats.processed} địa điểm, {stats.requests} requests.")
+    print(f"📉 Còn lại: {remaining} dòng.")
+    if remaining > 0:
         print("👉 Hẹn gặp lại vào ngày mai!")
     else:
         print("🎉 Đã hoàn thành toàn bộ dataset!")
+    return stats
+
 
 # ---------------------------------------------------------
-# 4. CHẠY CHƯƠNG TRÌNH
+# 3. CHẠY CHƯƠNG TRÌNH
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    start_time = datetime.now()
+    asyncio.run(generate_tags())
+    print(f"⏱️  {(datetime.now() - start_time).total_seconds():.1f}s")
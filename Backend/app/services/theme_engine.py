@@ -0,0 +1,153 @@
+"""
+Theme engine: chấm điểm theo tỉnh + theme (logic score_place) trên ma trận theme tính sẵn.
+
+- ThemeCatalogue: build một lần từ danh sách place (id, name, province, themes):
+  ma trận bool place x theme (theme viết thường), số theme của từng place, id tỉnh đã chuẩn hóa
+- Chấm điểm một query = vài phép NumPy:
+      score = 0.6 * [tỉnh khớp] + |themes ∩ target| / max(len(themes), 1) + 0.1 * [cool weather]
+  top-k bằng argpartition (bằng điểm giữ thứ tự catalogue như sort ổn định)
+- Hai nguồn catalogue:
+  * bảng sightseeing cũ (scoring_service.rank_places), cache theo mtime file DB
+  * catalogue Place của RecSys (engine "theme" của /recommend: themes = tags, tỉnh = tags[0])
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.search_keys import normalize_text
+
+PROVINCE_BOOST = 0.6
+WEATHER_BONUS = 0.1
+COOL_WEATHERS = {"cool", "cold"}
+COOL_WEATHER_THEME = "cool weather"
+
+# Loại hình (GroqExtraction.type) -> theme; score_place (scoring_service) dùng chung dict này
+TYPE_TO_THEME = {
+    "mountain": ["mountain", "peak", "hill", "hiking"],
+    "beach": ["beach", "sea", "island", "coast"],
+    "island": ["island", "snorkeling", "bay"],
+    "forest": ["nature", "forest", "park", "national park"],
+    "city": ["city", "culture", "museum", "hotel", "building"],
+    "unknown": []
+}
+
+
+def province_key(name: Optional[str]) -> str:
+    """So tỉnh không phân biệt hoa thường / dấu / khoảng trắng ("Da Nang" == "Đà Nẵng" == "danang")"""
+    return normalize_text(name).replace(" ", "") if name else ""
+
+
+@dataclass
+class ThemeQuery:
+    locations: Sequence[str]
+    target_themes: Sequence[str]
+    cool_weather: bool = False
+
+    @classmethod
+    def from_extraction(cls, ex) -> "ThemeQuery":
+        """GroqExtraction -> query (cùng ý nghĩa với score_place)"""
+        return cls(locations=list(ex.location or []), target_themes=TYPE_TO_THEME.get(ex.type, []),
+                   cool_weather=ex.weather in COOL_WEATHERS)
+
+    @classmethod
+    def from_tags(cls, tags: Iterable[str]) -> "ThemeQuery":
+        """Tags đã flatten của /recommend (location, type, budget, weather)"""
+        tags = [tag for tag in tags or [] if isinstance(tag, str)]
+        targets = []
+        for tag in tags:
+            targets.extend(TYPE_TO_THEME.get(tag.lower(), []))
+        return cls(locations=tags, target_themes=targets,
+                   cool_weather=any(tag.lower() in COOL_WEATHERS for tag in tags))
+
+
+class ThemeCatalogue:
+    def __init__(self, ids: Sequence[int], names: Sequence[str], provinces: Sequence[Optional[str]],
+                 themes: Sequence[Sequence[str]]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = list(names)
+        self.provinces = [p or "" for p in provinces]
+        self.themes = [list(t or []) for t in themes]
+
+        self.province_ids: Dict[str, int] = {}
+        self.place_province = np.array([self.province_ids.setdefault(province_key(p), len(self.province_ids))
+                                        for p in self.provinces], dtype=np.int32)
+
+        self.theme_ids: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, place_themes in enumerate(self.themes):
+            for theme in place_themes:
+                rows.append(i)
+                cols.append(self.theme_ids.setdefault(theme.lower(), len(self.theme_ids)))
+        self.matrix = np.zeros((len(self.themes), max(len(self.theme_ids), 1)), dtype=bool)
+        self.matrix[rows, cols] = True
+        # len(themes) kể cả theme trùng (như score_place)
+        self.theme_count = np.maximum(np.array([len(t) for t in self.themes], dtype=np.float64), 1.0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, query: ThemeQuery) -> np.ndarray:
+        scores = np.zeros(len(self))
+        if query.locations:
+            wanted = [self.province_ids[key] for key in {province_key(p) for p in query.locations}
+                      if key in self.province_ids]
+            scores += PROVINCE_BOOST * np.isin(self.place_province, wanted)
+
+        targets = sorted({self.theme_ids[t.lower()] for t in query.target_themes if t.lower() in self.theme_ids})
+        if targets:
+            scores += self.matrix[:, targets].sum(axis=1) / self.theme_count
+
+        cool = self.theme_ids.get(COOL_WEATHER_THEME)
+        if query.cool_weather and cool is not None:
+            scores += WEATHER_BONUS * self.matrix[:, cool]
+        return np.round(scores, 4)
+
+    def top_k(self, query: ThemeQuery, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(vị trí, điểm) của k place điểm > 0 cao nhất; bằng điểm thì theo thứ tự catalogue"""
+        scores = self.score(query)
+        candidates = np.flatnonzero(scores > 0)
+        if k <= 0 or len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if len(candidates) > k:
+            candidate_scores = scores[candidates]
+            kth = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            above = candidates[candidate_scores > kth]
+            tied = candidates[candidate_scores == kth][:k - len(above)]
+            candidates = np.concatenate((above, tied))
+        order = np.lexsort((candidates, -scores[candidates]))
+        positions = candidates[order]
+        return positions, scores[positions]
+
+
+# ==========================================
+# CATALOGUE TỪ BẢNG SIGHTSEEING (legacy)
+# ==========================================
+def catalogue_from_sightseeing(places: Sequence[dict]) -> ThemeCatalogue:
+    """places: các dòng của db_service.get_all_places (đã có "themes")"""
+    return ThemeCatalogue([p["id"] for p in places], [p.get("name") or "" for p in places],
+                          [p.get("province") for p in places], [p.get("themes", []) for p in places])
+
+
+_sightseeing_cache: Tuple[Optional[tuple], Optional[ThemeCatalogue]] = (None, None)
+_sightseeing_lock = threading.Lock()
+
+
+def get_sightseeing_catalogue() -> ThemeCatalogue:
+    """Catalogue bảng sightseeing, build lại khi file DB đổi (mtime / size)"""
+    global _sightseeing_cache
+    from app.config import settings
+    from app.services.db_service import get_all_places
+
+    try:
+        stat = os.stat(settings.DATABASE_PATH)
+        version = (settings.DATABASE_PATH, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    with _sightseeing_lock:
+        if _sightseeing_cache[1] is None or _sightseeing_cache[0] != version or version is None:
+            _sightseeing_cache = (version, catalogue_from_sightseeing(get_all_places()))
+        return _sightseeing_cache[1]
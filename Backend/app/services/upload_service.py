@@ -0,0 +1,223 @@
+"""
+Upload service dùng chung cho avatar, cover và ảnh forum.
+
+- Đọc UploadFile theo chunk, ghi thẳng ra file tạm và kiểm tra giới hạn size
+  ngay trong lúc đọc (không đọc 2 lần, không giữ cả file trong RAM).
+- Tính sha256 trong lúc stream: tên file = hash nội dung, ảnh trùng (cùng user
+  upload lại, nhiều post dùng chung ảnh) chỉ lưu một bản.
+- Thumbnail WebP nhiều kích thước được tạo bằng Pillow trong thread pool riêng.
+  Size nhỏ nhất (dùng cho feed / list) được tạo xong trước khi trả về, các size lớn
+  hơn chạy nền. URL của thumbnail là cố định (/uploads/<category>/thumbs/<hash>_<size>.webp).
+  Pillow không decode được ảnh -> không có thumbnail, client dùng ảnh gốc.
+- Bộ thumbnail được lưu vào bảng UploadedImage theo URL gốc (record_upload) để các
+  response đọc User / Post trả kèm (load_thumbnails).
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.schemas import UploadedImage
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+ALLOWED_IMAGE_TYPES = ("image/jpeg", "image/png", "image/jpg", "image/gif", "image/webp")
+EXTENSION_BY_TYPE = {
+    "image/jpeg": "jpg", "image/jpg": "jpg", "image/png": "png",
+    "image/gif": "gif", "image/webp": "webp",
+}
+
+
+@dataclass
+class StoredUpload:
+    """Kết quả lưu một file upload"""
+    url: str
+    sha256: str
+    size: int
+    deduplicated: bool
+    thumbnails: Dict[int, str] = field(default_factory=dict)
+
+
+def make_thumbnails(source_path: str, targets: Dict[int, str]) -> Dict[int, str]:
+    """Tạo thumbnail WebP (giữ tỉ lệ, cạnh dài nhất = size). Chạy trong worker thread."""
+    from PIL import Image, ImageOps
+
+    created = {}
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)  # ảnh chụp điện thoại có thể bị xoay
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        # Lớn -> nhỏ để mỗi lần resize đi từ ảnh gần kích thước nhất
+        for size in sorted(targets, reverse=True):
+            path = targets[size]
+            if not os.path.exists(path):
+                thumb = image.copy()
+                thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+                tmp_path = f"{path}.tmp"
+                thumb.save(tmp_path, "WEBP", quality=settings.UPLOAD_THUMBNAIL_QUALITY, method=4)
+                os.replace(tmp_path, path)
+            created[size] = path
+    return created
+
+
+class UploadService:
+    def __init__(self, root: str, thumbnail_sizes: Iterable[int], workers: int):
+        self.root = root
+        self.thumbnail_sizes = tuple(sorted(set(thumbnail_sizes)))
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Future] = set()
+
+    # ----- đường dẫn / URL -----
+    def _dir(self, category: str) -> str:
+        return os.path.join(self.root, category)
+
+    def _url(self, category: str, filename: str) -> str:
+        return f"/uploads/{category}/{filename}"
+
+    def thumbnail_urls(self, category: str, digest: str) -> Dict[int, str]:
+        return {size: self._url(category, f"thumbs/{digest}_{size}.webp") for size in self.thumbnail_sizes}
+
+    def _thumbnail_paths(self, category: str, digest: str) -> Dict[int, str]:
+        thumbs_dir = os.path.join(self._dir(category), "thumbs")
+        return {size: os.path.join(thumbs_dir, f"{digest}_{size}.webp") for size in self.thumbnail_sizes}
+
+    # ----- lưu file -----
+    async def save(
+        self,
+        file: UploadFile,
+        category: str,
+        max_bytes: int,
+        allowed_types: Iterable[str] = ALLOWED_IMAGE_TYPES,
+    ) -> StoredUpload:
+        """Stream file vào uploads/<category>/<sha256>.<ext>, tạo thumbnail (size nhỏ nhất trước khi trả về)"""
+        allowed_types = tuple(allowed_types)
+        if file.content_type not in allowed_types:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed. Allowed types: {', '.join(allowed_types)}"
+            )
+
+        directory = self._dir(category)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await file.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"File size too large. Max {max_bytes // (1024 * 1024)}MB"
+                        )
+                    hasher.update(chunk)
+                    await run_in_threadpool(out.write, chunk)
+
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Empty file")
+
+            digest = hasher.hexdigest()
+            filename = f"{digest}.{EXTENSION_BY_TYPE.get(file.content_type, 'bin')}"
+            final_path = os.path.join(directory, filename)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return StoredUpload(
+            url=self._url(category, filename),
+            sha256=digest,
+            size=size,
+            deduplicated=deduplicated,
+            thumbnails=await self._prepare_thumbnails(category, digest, final_path),
+        )
+
+    # ----- thumbnail -----
+    def _submit(self, targets: Dict[int, str], source_path: str) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        return self._executor.submit(make_thumbnails, source_path, targets)
+
+    async def _prepare_thumbnails(self, category: str, digest: str, source_path: str) -> Dict[int, str]:
+        """
+        Tạo size nhỏ nhất (chờ trong thread pool, không block event loop), các size còn lại chạy nền.
+        Trả về URL thumbnail, hoặc {} nếu Pillow không tạo được (client dùng ảnh gốc).
+        """
+        targets = self._thumbnail_paths(category, digest)
+        if not targets:
+            return {}
+        os.makedirs(os.path.dirname(next(iter(targets.values()))), exist_ok=True)
+
+        smallest = min(targets)
+        try:
+            await asyncio.wrap_future(self._submit({smallest: targets[smallest]}, source_path))
+        except Exception as e:
+            print(f"⚠️ Thumbnail generation failed: {e}")
+            return {}
+
+        rest = {size: path for size, path in targets.items() if size != smallest and not os.path.exists(path)}
+        if rest:
+            future = self._submit(rest, source_path)
+            self._pending.add(future)
+            future.add_done_callback(self._on_thumbnail_done)
+        return self.thumbnail_urls(category, digest)
+
+    def _on_thumbnail_done(self, future: Future):
+        self._pending.discard(future)
+        if future.exception() is not None:
+            # Size nhỏ nhất đã tạo được nên hiếm khi xảy ra (hết dung lượng đĩa...)
+            print(f"⚠️ Thumbnail generation failed: {future.exception()}")
+
+    async def wait_for_thumbnails(self):
+        """Chờ các thumbnail đang tạo (dùng trong test / benchmark)"""
+        pending = list(self._pending)
+        if pending:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in pending), return_exceptions=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+upload_service = UploadService(settings.UPLOADS_DIR, settings.UPLOAD_THUMBNAIL_SIZES, settings.THUMBNAIL_WORKERS)
+
+
+# ==========================================
+# THUMBNAIL ĐÃ LƯU (bảng UploadedImage)
+# ==========================================
+
+def record_upload(session: Session, stored: StoredUpload):
+    """Lưu bộ thumbnail của ảnh theo URL gốc. Không commit - caller commit cùng entity dùng ảnh"""
+    if stored.thumbnails:
+        session.merge(UploadedImage(
+            url=stored.url,
+            sha256=stored.sha256,
+            thumbnails={str(size): url for size, url in stored.thumbnails.items()},
+        ))
+
+
+def load_thumbnails(session: Session, urls: Iterable[Optional[str]]) -> Dict[str, Dict[str, str]]:
+    """URL gốc -> {size: URL thumbnail} bằng một query IN (URL không có thumbnail không có trong dict)"""
+    urls = {url for url in urls if url}
+    if not urls:
+        return {}
+    rows = session.exec(select(UploadedImage).where(UploadedImage.url.in_(urls))).all()
+    return {row.url: row.thumbnails or {} for row in rows}
@@ -0,0 +1,138 @@
+"""
+Cache token -> user cho get_current_user / get_current_user_optional.
+
+Mỗi request có token đều phải jwt.decode (verify chữ ký HMAC) rồi query User theo
+username. Với các endpoint gọi liên tục (view-time, like toggle, /recommend) phần
+này chiếm đáng kể thời gian xử lý. Cache giữ:
+  - claims đã decode (không verify lại chữ ký cho token "nóng")
+  - snapshot các field của User (không có hashed_password)
+trong một LRU có giới hạn kích thước, TTL ngắn, key là sha256 của token
+(không giữ token gốc trong bộ nhớ).
+
+Snapshot bị xóa khi user đổi profile, upload avatar/cover (invalidate_user).
+
+Cache nằm trong bộ nhớ của từng process: chạy gunicorn nhiều worker thì invalidate_user
+chỉ xóa entry của worker đã xử lý request sửa user. Worker khác vẫn có thể trả snapshot
+cũ (kể cả user đã bị xóa) tối đa AUTH_CACHE_TTL_SECONDS, nên TTL được giữ ngắn (mặc định 60s).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from app.config import settings
+from app.schemas import User
+
+# Các field của User được cache (đủ cho mọi router, không có hashed_password)
+USER_FIELDS = ("id", "username", "display_name", "avatar_url", "cover_image_url", "bio", "location", "preferences")
+
+
+class CachedUser:
+    """Một entry trong cache: claims của token + snapshot của User"""
+
+    __slots__ = ("key", "claims", "expires_at") + USER_FIELDS
+
+    def __init__(self, key: bytes, claims: dict, user: User, expires_at: float):
+        self.key = key
+        self.claims = claims
+        self.expires_at = expires_at
+        for field in USER_FIELDS:
+            setattr(self, field, getattr(user, field))
+        self.preferences = list(user.preferences or [])
+
+    def to_user(self) -> User:
+        """User mới (detached) cho mỗi request, để route sửa object không làm bẩn cache"""
+        return User(**{field: getattr(self, field) for field in USER_FIELDS[:-1]},
+                    preferences=list(self.preferences))
+
+
+class UserCache:
+    """LRU có TTL, thread-safe (sync routes chạy trong threadpool)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, CachedUser]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def token_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        key = self.token_key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, claims: dict, user: User) -> CachedUser:
+        key = self.token_key(token)
+        expires_at = time.time() + self.ttl_seconds
+        # Không cache quá thời điểm token hết hạn
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+
+        entry = CachedUser(key, claims, user, expires_at)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._keys_by_user.setdefault(entry.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate_user(self, user_id: int):
+        """Xóa mọi token của user (gọi sau khi profile/avatar/cover/password thay đổi)"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _remove(self, key: bytes):
+        # Gọi khi đã giữ lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.id]
+
+
+user_cache = UserCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    user_cache.invalidate_user(user_id)
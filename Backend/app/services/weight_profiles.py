@@ -0,0 +1,279 @@
+"""
+Weight profiles cho hybrid RecSys (recommend_content_based), đổi được không cần restart.
+
+Mọi hằng số tuning của content-based engine nằm trong một profile: blend
+content/CF/popularity, LIKE/DISLIKE weight của user profile, tỉ trọng MF trong
+cf_score, location boost, dislike penalty, các giới hạn diversity và re-rank. Profile
+đọc từ file JSON (settings.WEIGHT_PROFILES_PATH):
+
+    {
+      "default_profile": "default",
+      "profiles": {
+        "default": {},
+        "cf_heavy": {"history_blend": {"content": 0.3, "cf": 0.55, "popularity": 0.15}},
+        "diverse": {"rerank": "mmr", "rerank_lambda": 0.7}
+      }
+    }
+
+Field không khai báo lấy giá trị mặc định (chính là các hằng số cũ), nên
+profile rỗng == hành vi hiện tại: rerank_lambda mặc định 1.0 chọn theo score với
+3 mức giới hạn tỉnh / category như 3 pass cũ. Re-rank đa dạng (MMR / xQuAD, λ < 1)
+là opt-in qua profile có tên (app/weight_profiles.json: "diverse").
+
+- Validate toàn bộ file trước khi dùng: file lỗi bị bỏ qua (giữ profile cũ, log lỗi)
+- Hot reload: get() kiểm tra mtime của file tối đa mỗi WEIGHT_PROFILES_CHECK_SECONDS,
+  file mới được parse + validate rồi thay state bằng MỘT phép gán (request đang
+  chạy vẫn dùng profile nó đã lấy)
+- A/B test: client chọn profile theo request (RecommendRequest.weight_profile),
+  response trả lại tên profile đã dùng
+- Blend được compile sẵn thành vector trọng số NumPy: scoring là một phép
+  components @ weights, đổi profile không tốn thêm gì mỗi request
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.rerank import RERANK_METHODS
+
+DEFAULT_PROFILE_NAME = "default"
+
+HISTORY_BLEND_KEYS = ("content", "cf", "popularity")
+NEW_USER_BLEND_KEYS = ("content", "popularity")
+
+
+class DiversityLimits(NamedTuple):
+    """Giới hạn diversity đã tính cho một top_k"""
+    per_province: int
+    per_category: int
+    common_category: int
+    hard_province: int
+    relax_factor: float
+
+
+@dataclass(frozen=True)
+class WeightProfile:
+    name: str
+    # User có history (like / MF factor): content + CF + popularity
+    history_blend: Tuple[float, float, float] = (0.40, 0.40, 0.20)
+    # User mới / không đăng nhập: content + popularity
+    new_user_blend: Tuple[float, float] = (0.60, 0.40)
+    # Tỉ trọng query (intent hiện tại) so với user profile vector
+    query_weight: float = 0.5
+    # build_user_profile: Like = positive mạnh, Dislike = negative
+    like_weight: float = 1.2
+    dislike_weight: float = -1.0
+    # Tỉ trọng MF (ALS) trong cf_score, phần còn lại là item-item similarity
+    mf_blend: float = 0.5
+    location_boost: float = 1.5
+    dislike_penalty: float = 0.1
+    # Số candidate đưa vào diversity = top_k * candidate_multiplier
+    candidate_multiplier: int = 5
+    # Giới hạn diversity: max(min, int(top_k * ratio))
+    province_ratio: float = 0.3
+    province_min: int = 2
+    category_ratio: float = 0.4
+    category_min: int = 3
+    common_category_ratio: float = 0.6
+    common_category_min: int = 5
+    relax_factor: float = 1.5
+    hard_province_ratio: float = 0.5
+    hard_province_min: int = 3
+    # Re-rank đa dạng (app/services/rerank.py): "mmr" hoặc "xquad";
+    # rerank_lambda = tỉ trọng relevance (1.0 = chỉ theo score, như 3 pass tham lam cũ)
+    rerank: str = "mmr"
+    rerank_lambda: float = 1.0
+    # Compile từ blend: vector [content, cf, popularity]
+    history_weights: np.ndarray = field(init=False, repr=False, compare=False)
+    new_user_weights: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        history = np.array(self.history_blend, dtype=np.float64)
+        new_user = np.array([self.new_user_blend[0], 0.0, self.new_user_blend[1]], dtype=np.float64)
+        history.flags.writeable = False
+        new_user.flags.writeable = False
+        object.__setattr__(self, "history_weights", history)
+        object.__setattr__(self, "new_user_weights", new_user)
+
+    def diversity_limits(self, top_k: int) -> DiversityLimits:
+        return DiversityLimits(
+            per_province=max(self.province_min, int(top_k * self.province_ratio)),
+            per_category=max(self.category_min, int(top_k * self.category_ratio)),
+            common_category=max(self.common_category_min, int(top_k * self.common_category_ratio)),
+            hard_province=max(self.hard_province_min, int(top_k * self.hard_province_ratio)),
+            relax_factor=self.relax_factor,
+        )
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "WeightProfile":
+        """Parse + validate một profile; ValueError liệt kê mọi field sai"""
+        if not isinstance(data, dict):
+            raise ValueError(f"profile '{name}': phải là object")
+
+        errors = []
+        values = {}
+        scalar_fields = {f.name: f for f in fields(cls) if f.init and f.name not in
+                         ("name", "history_blend", "new_user_blend", "rerank")}
+
+        for key, value in data.items():
+            if key == "history_blend":
+                values[key] = _parse_blend(value, HISTORY_BLEND_KEYS, key, errors)
+            elif key == "new_user_blend":
+                values[key] = _parse_blend(value, NEW_USER_BLEND_KEYS, key, errors)
+            elif key == "rerank":
+                if value not in RERANK_METHODS:
+                    errors.append(f"{key}: phải là một trong {', '.join(RERANK_METHODS)}")
+                else:
+                    values[key] = value
+            elif key in scalar_fields:
+                expected = scalar_fields[key].type
+                if not _is_number(value) or (expected is int and not float(value).is_integer()):
+                    errors.append(f"{key}: phải là số{' nguyên' if expected is int else ''}")
+                else:
+                    values[key] = int(value) if expected is int else float(value)
+            else:
+                errors.append(f"{key}: field không tồn tại")
+
+        if not errors:
+            errors.extend(_check_ranges({**{f: getattr(cls, f) for f in scalar_fields}, **values}))
+        if errors:
+            raise ValueError(f"profile '{name}': " + "; ".join(errors))
+        return cls(name=name, **values)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _parse_blend(value, keys, label, errors):
+    if not isinstance(value, dict) or set(value) != set(keys):
+        errors.append(f"{label}: cần đúng các key {', '.join(keys)}")
+        return None
+    if not all(_is_number(value[k]) and value[k] >= 0 for k in keys):
+        errors.append(f"{label}: trọng số phải là số >= 0")
+        return None
+    weights = tuple(float(value[k]) for k in keys)
+    if abs(sum(weights) - 1.0) > 1e-6:
+        errors.append(f"{label}: tổng trọng số phải bằng 1 (đang là {sum(weights):.4f})")
+        return None
+    return weights
+
+
+def _check_ranges(v: dict):
+    checks = [
+        ("query_weight", 0 <= v["query_weight"] <= 1, "trong [0, 1]"),
+        ("mf_blend", 0 <= v["mf_blend"] <= 1, "trong [0, 1]"),
+        ("like_weight", v["like_weight"] > 0, "> 0"),
+        ("dislike_weight", v["dislike_weight"] <= 0, "<= 0"),
+        ("location_boost", v["location_boost"] > 0, "> 0"),
+        ("dislike_penalty", 0 <= v["dislike_penalty"] <= 1, "trong [0, 1]"),
+        ("candidate_multiplier", v["candidate_multiplier"] >= 1, ">= 1"),
+        ("relax_factor", v["relax_factor"] >= 1, ">= 1"),
+        ("rerank_lambda", 0 <= v["rerank_lambda"] <= 1, "trong [0, 1]"),
+    ]
+    for prefix in ("province", "category", "common_category", "hard_province"):
+        checks.append((f"{prefix}_ratio", 0 < v[f"{prefix}_ratio"] <= 1, "trong (0, 1]"))
+        checks.append((f"{prefix}_min", v[f"{prefix}_min"] >= 1, ">= 1"))
+    return [f"{key}: phải {rule}" for key, ok, rule in checks if not ok]
+
+
+def parse_profiles(data: dict) -> Tuple[str, Dict[str, WeightProfile]]:
+    """Parse nội dung file profile -> (tên profile mặc định, {tên: profile})"""
+    if not isinstance(data, dict) or not isinstance(data.get("profiles"), dict):
+        raise ValueError("file profile cần object 'profiles'")
+    unknown = set(data) - {"default_profile", "profiles"}
+    if unknown:
+        raise ValueError(f"key không tồn tại: {', '.join(sorted(unknown))}")
+
+    profiles = {name: WeightProfile.from_dict(name, body) for name, body in data["profiles"].items()}
+    profiles.setdefault(DEFAULT_PROFILE_NAME, WeightProfile(DEFAULT_PROFILE_NAME))
+    default_name = data.get("default_profile", DEFAULT_PROFILE_NAME)
+    if default_name not in profiles:
+        raise ValueError(f"default_profile '{default_name}' không có trong profiles")
+    return default_name, profiles
+
+
+class _RegistryState(NamedTuple):
+    default_name: str
+    profiles: Dict[str, WeightProfile]
+    file_signature: Optional[Tuple[int, int]]  # (mtime_ns, size) của file đã load
+
+
+class WeightProfileRegistry:
+    """Profile hiện hành, reload khi file đổi. Đọc không cần lock (state là tuple bất biến)"""
+
+    def __init__(self, path: str, check_interval: float):
+        self.path = path
+        self.check_interval = check_interval
+        self._state = _RegistryState(DEFAULT_PROFILE_NAME,
+                                     {DEFAULT_PROFILE_NAME: WeightProfile(DEFAULT_PROFILE_NAME)}, None)
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def default_name(self) -> str:
+        self._maybe_reload()
+        return self._state.default_name
+
+    def names(self):
+        self._maybe_reload()
+        return sorted(self._state.profiles)
+
+    def get(self, name: Optional[str] = None) -> WeightProfile:
+        """Profile theo tên (None -> profile mặc định); KeyError nếu không có"""
+        self._maybe_reload()
+        state = self._state
+        return state.profiles[name or state.default_name]
+
+    def reload(self) -> bool:
+        """Đọc lại file ngay; True nếu state mới được áp dụng"""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            return self._load(force=True)
+
+    def _maybe_reload(self):
+        if time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.check_interval
+            self._load(force=False)
+
+    def _load(self, force: bool) -> bool:
+        # Gọi khi đã giữ lock
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if not force and signature == self._state.file_signature:
+            return False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                default_name, profiles = parse_profiles(json.load(f))
+        except (OSError, ValueError) as e:
+            # Giữ profile đang chạy; không thử lại cho tới khi file đổi tiếp
+            self._state = self._state._replace(file_signature=signature)
+            self.last_error = str(e)
+            print(f"⚠️ Weight profiles ({self.path}) không hợp lệ, giữ profile cũ: {e}")
+            return False
+
+        self._state = _RegistryState(default_name, profiles, signature)
+        self.reloads += 1
+        self.last_error = None
+        print(f"✅ Weight profiles loaded: {', '.join(sorted(profiles))} (default: {default_name})")
+        return True
+
+
+weight_profiles = WeightProfileRegistry(settings.WEIGHT_PROFILES_PATH, settings.WEIGHT_PROFILES_CHECK_SECONDS)
@@ -0,0 +1,186 @@
+"""
+CONCURRENCY BENCHMARK (THROUGHPUT THEO SỐ REQUEST ĐỒNG THỜI)
+=====================================================================
+
+Chạy một uvicorn worker trên bản copy của vietnamtravel.db rồi bắn requests bằng
+httpx.AsyncClient với số request in-flight tăng dần (1, 2, 4, ... 32). Với các
+route dùng async session (aiosqlite) và RecSys chạy trong executor, throughput
+phải tăng theo concurrency thay vì đứng yên như khi mọi SQLite call block
+event loop.
+
+Scenarios:
+- comments:  GET  /api/v1/comments/place/{id}   (chỉ DB, không cần đăng nhập)
+- likes:     GET  /api/v1/likes/places          (get_current_user + DB)
+- recommend: POST /api/v1/recommend (home feed)  (DB + RecSys scoring trong executor)
+
+Cách chạy (từ thư mục Backend/):
+    python -m benchmarks.concurrency_benchmark --levels 1 2 4 8 16 32 --requests 200
+    python -m benchmarks.concurrency_benchmark --base-url http://127.0.0.1:8000   # server có sẵn
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SOURCE_DB_PATH = BACKEND_DIR / "vietnamtravel.db"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "concurrency_benchmark_results.json"
+
+BENCH_USERNAME = "bench_concurrency_user"
+BENCH_PASSWORD = "bench_password_123"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: str, port: int) -> subprocess.Popen:
+    """Một uvicorn worker duy nhất, trỏ vào DB tạm"""
+    env = dict(os.environ, DATABASE_PATH=db_path)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+def get_token(base_url: str) -> str:
+    httpx.post(f"{base_url}/api/v1/auth/register",
+               json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}, timeout=30.0)
+    response = httpx.post(f"{base_url}/api/v1/auth/login",
+                          data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}, timeout=30.0)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def build_scenarios(token: str) -> dict:
+    auth = {"Authorization": f"Bearer {token}"}
+    return {
+        "comments": lambda i: ("GET", f"/api/v1/comments/place/{i % 50 + 1}", None, {}),
+        "likes": lambda i: ("GET", "/api/v1/likes/places", None, auth),
+        "recommend": lambda i: ("POST", "/api/v1/recommend", {"user_text": "", "top_k": 10}, auth),
+    }
+
+
+async def run_level(base_url: str, make_request, concurrency: int, total: int) -> dict:
+    """Gửi `total` requests, tối đa `concurrency` requests in-flight cùng lúc"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+
+        async def one(i: int):
+            nonlocal errors
+            method, path, body, headers = make_request(i)
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        # Warm-up (kết nối, cache của SQLite) không tính vào số đo
+        await asyncio.gather(*(one(i) for i in range(min(concurrency, 4))))
+        latencies.clear()
+        errors = 0
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    values = np.asarray(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+    }
+
+
+def run_benchmark(
+    levels: List[int],
+    total: int,
+    scenarios: Optional[List[str]] = None,
+    base_url: Optional[str] = None,
+    output: Path = DEFAULT_OUTPUT,
+) -> dict:
+    server = None
+    scratch_dir = None
+
+    if base_url is None:
+        # Không bao giờ ghi vào DB thật: copy sang thư mục tạm
+        scratch_dir = tempfile.mkdtemp(prefix="concurrency_bench_")
+        db_path = os.path.join(scratch_dir, "bench.db")
+        shutil.copy(SOURCE_DB_PATH, db_path)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, port)
+
+    try:
+        wait_until_ready(base_url)
+        all_scenarios = build_scenarios(get_token(base_url))
+        selected = scenarios or list(all_scenarios)
+
+        report = {"base_url": base_url, "cpu_count": os.cpu_count(), "results": {}}
+        for name in selected:
+            report["results"][name] = []
+            for concurrency in levels:
+                stats = asyncio.run(run_level(base_url, all_scenarios[name], concurrency, total))
+                report["results"][name].append(stats)
+                print(f"[{name:>9}] concurrency={concurrency:>3}: {stats['throughput_rps']:>8.1f} req/s, "
+                      f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, errors {stats['errors']}")
+
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Đã lưu: {output}")
+        return report
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure throughput vs. in-flight requests for one uvicorn worker")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Số requests cho mỗi mức concurrency")
+    parser.add_argument("--scenarios", nargs="+", choices=["comments", "likes", "recommend"], default=None)
+    parser.add_argument("--base-url", default=None, help="Dùng server đang chạy thay vì tự khởi động")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    run_benchmark(args.levels, args.requests, args.scenarios, args.base_url, args.output)
@@ -0,0 +1,97 @@
+"""
+LOAD-TIME BENCHMARK: CSV vs PARQUET (app/services/data_lake.py)
+=====================================================================
+
+Đo thời gian load một stage của pipeline dữ liệu theo 3 cách:
+1. csv            pd.read_csv + giải mã cột list ("|||" / JSON string) như các stage cũ
+2. parquet        read_stage: cột list native, kiểu cột cố định
+3. parquet_pruned read_stage chỉ 2 cột + filter id (projection + predicate pushdown)
+
+Dữ liệu: các CSV stage trong app/services/ (mặc định vietnam_tourism_data_en.csv), nhân bản
+--scale lần (id mới) để thấy xu hướng khi dataset lớn hơn. Mọi file ghi vào thư mục tạm.
+
+Cách chạy (từ thư mục Backend/):
+    python -m benchmarks.data_lake_benchmark
+    python -m benchmarks.data_lake_benchmark --scale 1 10 50 --repeat 5 --output benchmarks/data_lake.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.services.data_lake import read_csv_frame, read_stage, table_to_frame, to_table, write_stage
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_SOURCE = BACKEND_DIR / "app" / "services" / "vietnam_tourism_data_en.csv"
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def _scaled(df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    if scale == 1:
+        return df
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        copy["id"] = copy["id"] + i * (int(df["id"].max()) + 1)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def run_benchmark(source: Path, scales, repeat: int):
+    base = table_to_frame(to_table(read_csv_frame(str(source))))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            df = _scaled(base, scale)
+            stem = os.path.join(tmp, f"stage_x{scale}")
+            parquet_path = write_stage(df, stem)
+            csv_path = f"{stem}.csv"
+            # Lấy ~1% id rải đều: đủ để thấy row group bị bỏ qua
+            sample_ids = df["id"].iloc[:: max(1, len(df) // 10)].tolist()[:10]
+
+            result = {
+                "rows": len(df),
+                "csv_mb": round(os.path.getsize(csv_path) / 1e6, 2),
+                "parquet_mb": round(os.path.getsize(parquet_path) / 1e6, 2),
+                "csv_ms": _median_ms(lambda: read_csv_frame(csv_path), repeat),
+                "parquet_ms": _median_ms(lambda: read_stage(parquet_path), repeat),
+                "parquet_pruned_ms": _median_ms(
+                    lambda: read_stage(parquet_path, columns=["id", "title"], filters=[("id", "in", sample_ids)]),
+                    repeat),
+            }
+            result["speedup"] = round(result["csv_ms"] / max(result["parquet_ms"], 1e-6), 1)
+            results.append(result)
+            print(f"{len(df):>8} rows | CSV {result['csv_mb']:>6} MB {result['csv_ms']:>9} ms | "
+                  f"Parquet {result['parquet_mb']:>6} MB {result['parquet_ms']:>8} ms "
+                  f"(x{result['speedup']}) | pruned {result['parquet_pruned_ms']:>7} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs Parquet load time for the data pipeline stages")
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = {"source": str(args.source), "repeat": args.repeat,
+              "results": run_benchmark(args.source, args.scale, args.repeat)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 {args.output}")
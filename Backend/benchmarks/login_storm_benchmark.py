@@ -0,0 +1,173 @@
+"""
+LOGIN STORM BENCHMARK
+=====================================================================
+
+Đo ảnh hưởng của một đợt login dồn dập (bcrypt verify) lên latency của các
+endpoint KHÔNG liên quan:
+- place:    GET /api/v1/place/{id}            (route sync def -> threadpool mặc định)
+- comments: GET /api/v1/comments/place/{id}   (route async, aiosqlite)
+
+Hai pha, mỗi pha `duration` giây, probe gửi liên tục với `probe_concurrency`
+requests in-flight:
+1. baseline: chỉ có probe
+2. storm:    probe + `storm_concurrency` client login liên tục
+
+So sánh p50/p95/p99 của probe giữa hai pha, kèm throughput login và số liệu
+queue depth của password pool (/api/v1/auth/debug/password-pool).
+
+Cách chạy (từ thư mục Backend/):
+    python -m benchmarks.login_storm_benchmark --duration 15 --storm-concurrency 32
+    BCRYPT_ROUNDS=10 python -m benchmarks.login_storm_benchmark   # cost factor khác
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.concurrency_benchmark import SOURCE_DB_PATH, free_port, start_server, wait_until_ready
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "login_storm_results.json"
+STORM_PASSWORD = "storm_password_123"
+
+PROBES = {
+    "place": lambda i: f"/api/v1/place/{i % 50 + 1}",
+    "comments": lambda i: f"/api/v1/comments/place/{i % 50 + 1}",
+}
+
+
+def _summary(latencies: List[float], elapsed: float) -> dict:
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies)
+    return {
+        "count": int(values.size),
+        "rps": round(values.size / elapsed, 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def _loop(client: httpx.AsyncClient, stop_at: float, send, latencies: List[float]):
+    i = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await send(client, i)
+        if response.status_code < 400:
+            latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def run_phase(base_url: str, duration: float, probe_concurrency: int,
+                    storm_concurrency: int, storm_users: List[str]) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=probe_concurrency * len(PROBES) + storm_concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        stop_at = time.perf_counter() + duration
+        probe_latencies = {name: [] for name in PROBES}
+        login_latencies: List[float] = []
+        tasks = []
+
+        for name, path_for in PROBES.items():
+            async def send_probe(c, i, path_for=path_for):
+                return await c.get(path_for(i))
+            for _ in range(probe_concurrency):
+                tasks.append(_loop(client, stop_at, send_probe, probe_latencies[name]))
+
+        for worker in range(storm_concurrency):
+            username = storm_users[worker % len(storm_users)]
+
+            async def send_login(c, i, username=username):
+                return await c.post("/api/v1/auth/login", data={"username": username, "password": STORM_PASSWORD})
+            tasks.append(_loop(client, stop_at, send_login, login_latencies))
+
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    result = {name: _summary(values, elapsed) for name, values in probe_latencies.items()}
+    if storm_concurrency:
+        result["login"] = _summary(login_latencies, elapsed)
+    return result
+
+
+def run_benchmark(
+    duration: float = 15.0,
+    probe_concurrency: int = 2,
+    storm_concurrency: int = 32,
+    n_users: int = 8,
+    base_url: Optional[str] = None,
+    output: Path = DEFAULT_OUTPUT,
+) -> dict:
+    server = None
+    scratch_dir = None
+
+    if base_url is None:
+        scratch_dir = tempfile.mkdtemp(prefix="login_storm_")
+        db_path = os.path.join(scratch_dir, "bench.db")
+        shutil.copy(SOURCE_DB_PATH, db_path)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, port)
+
+    try:
+        wait_until_ready(base_url)
+        storm_users = [f"storm_user_{i}" for i in range(n_users)]
+        for username in storm_users:
+            httpx.post(f"{base_url}/api/v1/auth/register",
+                       json={"username": username, "password": STORM_PASSWORD}, timeout=60.0)
+
+        report = {
+            "base_url": base_url,
+            "cpu_count": os.cpu_count(),
+            "config": {"duration": duration, "probe_concurrency": probe_concurrency,
+                       "storm_concurrency": storm_concurrency},
+        }
+        report["baseline"] = asyncio.run(run_phase(base_url, duration, probe_concurrency, 0, storm_users))
+        report["storm"] = asyncio.run(run_phase(base_url, duration, probe_concurrency, storm_concurrency, storm_users))
+
+        pool_stats = httpx.get(f"{base_url}/api/v1/auth/debug/password-pool", timeout=10.0)
+        report["password_pool"] = pool_stats.json() if pool_stats.status_code == 200 else None
+
+        for name in PROBES:
+            base, storm = report["baseline"][name], report["storm"][name]
+            print(f"[{name:>8}] p99 baseline {base.get('p99_ms', 0):.1f} ms -> storm {storm.get('p99_ms', 0):.1f} ms "
+                  f"(p50 {base.get('p50_ms', 0):.1f} -> {storm.get('p50_ms', 0):.1f} ms)")
+        login = report["storm"].get("login", {})
+        print(f"[   login] {login.get('rps', 0)} logins/s, p99 {login.get('p99_ms', 0):.1f} ms")
+        if report["password_pool"]:
+            print(f"[    pool] {report['password_pool']}")
+
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Đã lưu: {output}")
+        return report
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of unrelated endpoints during a login storm")
+    parser.add_argument("--duration", type=float, default=15.0, help="Số giây mỗi pha")
+    parser.add_argument("--probe-concurrency", type=int, default=2)
+    parser.add_argument("--storm-concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=8, help="Số tài khoản dùng cho storm")
+    parser.add_argument("--base-url", default=None, help="Dùng server đang chạy thay vì tự khởi động")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    run_benchmark(args.duration, args.probe_concurrency, args.storm_concurrency, args.users,
+                  args.base_url, args.output)
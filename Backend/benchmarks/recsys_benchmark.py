@@ -0,0 +1,393 @@
+"""
+RECOMMENDATION LATENCY BENCHMARK
+=====================================================================
+
+Đo hiệu năng RecSys trên catalogue lớn hơn nhiều so với DB hiện tại (928 places):
+1. Sinh catalogue giả lập (mặc định 1k -> 100k places) từ các place thật làm template
+2. Sinh users theo profiles của create_improved_test_data.py, số interactions lệch
+   (heavy-tail: đa số user ít tương tác, số ít user tương tác rất nhiều), score/like
+   theo cùng quy tắc với create_test_data.py
+3. Ghi tất cả vào một file SQLite tạm (không đụng vào vietnamtravel.db)
+4. Đo thời gian + bộ nhớ của initialize_recsys()
+5. Đo p50/p95/p99 latency của recommend_content_based() cho 3 nhóm user:
+   cold (không đăng nhập), warm (ít history), heavy (history dài nhất)
+
+Mỗi kích thước chạy trong một process riêng (spawn) để state của RecSys và số đo
+bộ nhớ không lẫn giữa các lần. Kết quả ghi ra JSON để so sánh regressions.
+
+Cách chạy (từ thư mục Backend/):
+    python -m benchmarks.recsys_benchmark --sizes 1000 5000 10000 --users 2000
+    python -m benchmarks.recsys_benchmark --output benchmarks/recsys_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SOURCE_DB_PATH = BACKEND_DIR / "vietnamtravel.db"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "recsys_benchmark_results.json"
+
+DEFAULT_SIZES = [1_000, 5_000, 10_000, 25_000, 50_000, 100_000]
+COHORTS = ("cold", "warm", "heavy")
+
+# ==========================================
+# 1. MEMORY HELPERS
+# ==========================================
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6  # ru_maxrss tính bằng KiB trên Linux
+
+
+def _available_mb() -> float:
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) / 1e3
+    return float("inf")
+
+
+def estimate_init_memory_mb(n_places: int) -> float:
+    """
+    initialize_recsys giữ item_similarity_matrix dạng dense float64 (N x N);
+    cosine_similarity cần thêm một bản tạm cỡ tương đương lúc tính.
+    """
+    return 2 * 8 * n_places * n_places / 1e6
+
+
+# ==========================================
+# 2. SINH DỮ LIỆU GIẢ LẬP
+# ==========================================
+
+def load_template_places(source_db: Path = SOURCE_DB_PATH) -> List[dict]:
+    """Đọc places thật (read-only) để làm template cho catalogue giả lập"""
+    conn = sqlite3.connect(f"file:{source_db}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT name, description, image, tags, lat, lon, climate FROM place").fetchall()
+    finally:
+        conn.close()
+
+    templates = []
+    for name, description, image, tags, lat, lon, climate in rows:
+        templates.append({
+            "name": name,
+            "description": json.loads(description) if description else [],
+            "image": json.loads(image) if image else [],
+            "tags": json.loads(tags) if tags else [],
+            "lat": lat, "lon": lon, "climate": climate,
+        })
+    return templates
+
+
+def generate_places(n_places: int, templates: List[dict], rng: random.Random) -> List[dict]:
+    """
+    Mỗi place = một template ngẫu nhiên với province (tags[0]) có thể bị đổi,
+    một tag bị bỏ và một tag khác được thêm, để catalogue lớn không chỉ là bản sao.
+    """
+    provinces = sorted({t["tags"][0] for t in templates if t["tags"]})
+    vocabulary = sorted({tag for t in templates for tag in t["tags"][1:]})
+
+    places = []
+    for i in range(n_places):
+        template = templates[i % len(templates)] if i < len(templates) else rng.choice(templates)
+        tags = list(template["tags"])
+        if i >= len(templates) and tags:
+            if rng.random() < 0.5:
+                tags[0] = rng.choice(provinces)
+            if len(tags) > 2:
+                tags.pop(rng.randrange(1, len(tags)))
+            tags.append(rng.choice(vocabulary))
+        places.append({
+            "name": template["name"] if i < len(templates) else f"{template['name']} #{i}",
+            "description": template["description"],
+            "image": template["image"],
+            "tags": tags,
+            "lat": template["lat"], "lon": template["lon"], "climate": template["climate"],
+        })
+    return places
+
+
+def populate_scratch_db(n_places: int, n_users: int, seed: int) -> Dict[str, int]:
+    """Tạo schema + places + users + ratings + likes trong DB hiện tại (settings.DATABASE_PATH)"""
+    from app.database import engine, create_db_and_tables
+    from app.schemas import Place, User, Rating, Like
+    from create_improved_test_data import ImprovedTestDataGenerator
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    create_db_and_tables()
+
+    places = generate_places(n_places, load_template_places(), rng)
+    with engine.begin() as conn:
+        conn.execute(Place.__table__.insert(), places)
+
+    # Dùng lại profiles + cách match places theo tags của ImprovedTestDataGenerator
+    generator = ImprovedTestDataGenerator()
+    try:
+        profiles = generator.user_profiles
+        matching = [
+            [p.id for p in generator._find_matching_places(profile["preferences"])]
+            for profile in profiles
+        ]
+        all_place_ids = [p.id for p in generator.all_places]
+    finally:
+        generator.close()
+
+    users, ratings, likes = [], [], []
+    # Heavy-tail: Pareto -> đa số user 1-5 interactions, vài user vài trăm
+    interaction_counts = np.minimum((np_rng.pareto(1.2, n_users) * 4).astype(int) + 1, 500)
+
+    for user_id in range(1, n_users + 1):
+        profile_idx = (user_id - 1) % len(profiles)
+        profile = profiles[profile_idx]
+        users.append({
+            "id": user_id,
+            "username": f"bench_{profile['name_prefix']}_{user_id:06d}",
+            "hashed_password": "dummy_hash_for_benchmark",
+            "preferences": profile["preferences"],
+            "display_name": f"{profile['description']} #{user_id}",
+        })
+
+        candidates = matching[profile_idx] or all_place_ids
+        n_total = int(interaction_counts[user_id - 1])
+        n_positive = int(round(n_total * profile["positive_ratio"]))
+        seen = set()
+
+        # Popularity skew trong các places phù hợp: Zipf theo thứ hạng match
+        for rank in np_rng.zipf(1.5, n_positive):
+            place_id = candidates[min(int(rank) - 1, len(candidates) - 1)]
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            ratings.append({"user_id": user_id, "place_id": place_id, "score": round(rng.uniform(3.5, 5.0), 2)})
+            if rng.random() > 0.5:
+                likes.append({"user_id": user_id, "place_id": place_id, "is_like": True,
+                              "created_at": datetime.utcnow()})
+
+        for _ in range(n_total - n_positive):
+            place_id = rng.choice(all_place_ids)
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            ratings.append({"user_id": user_id, "place_id": place_id, "score": round(rng.uniform(1.0, 2.5), 2)})
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), users)
+        conn.execute(Rating.__table__.insert(), ratings)
+        if likes:
+            conn.execute(Like.__table__.insert(), likes)
+
+    return {"places": n_places, "users": n_users, "ratings": len(ratings), "likes": len(likes)}
+
+
+# ==========================================
+# 3. ĐO LATENCY
+# ==========================================
+
+def _percentiles(latencies_ms: List[float]) -> dict:
+    values = np.asarray(latencies_ms)
+    return {
+        "count": int(values.size),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def select_cohorts(queries: int, seed: int) -> Dict[str, List[tuple]]:
+    """
+    Trả về Dict[cohort] = [(user_id, tags), ...]:
+    - cold: không có user_id, tags lấy từ preferences của một profile
+    - warm: users có 3-15 ratings
+    - heavy: users có nhiều ratings nhất
+    """
+    from sqlmodel import Session, select, func
+    from app.database import engine
+    from app.schemas import User, Rating
+
+    rng = random.Random(seed)
+    with Session(engine) as session:
+        counts = session.exec(
+            select(Rating.user_id, func.count(Rating.id)).group_by(Rating.user_id)
+        ).all()
+        preferences = dict(session.exec(select(User.id, User.preferences)).all())
+
+    counts = sorted(counts, key=lambda row: row[1])
+    warm = [uid for uid, n in counts if 3 <= n <= 15]
+    heavy = [uid for uid, _ in counts[-max(queries // 5, 1):]]
+
+    def pick(user_ids):
+        if not user_ids:
+            return []
+        return [(uid, preferences.get(uid) or []) for uid in (rng.choice(user_ids) for _ in range(queries))]
+
+    all_prefs = [p for p in preferences.values() if p]
+    cold = [(None, rng.sample(prefs, min(2, len(prefs)))) for prefs in (rng.choice(all_prefs) for _ in range(queries))]
+
+    return {"cold": cold, "warm": pick(warm), "heavy": pick(heavy)}
+
+
+def measure_latency(requests: List[tuple], top_k: int, warmup: int = 3) -> dict:
+    from app.routers.recsysmodel import recommend_content_based
+
+    for user_id, tags in requests[:warmup]:
+        recommend_content_based(tags, user_id=user_id, top_k=top_k)
+
+    latencies = []
+    for user_id, tags in requests:
+        start = time.perf_counter()
+        recommend_content_based(tags, user_id=user_id, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _percentiles(latencies)
+
+
+# ==========================================
+# 4. MỘT KÍCH THƯỚC CATALOGUE (CHẠY TRONG PROCESS RIÊNG)
+# ==========================================
+
+def run_size(n_places: int, n_users: int, queries: int, top_k: int, scratch_dir: str, seed: int) -> dict:
+    db_path = os.path.join(scratch_dir, f"bench_{n_places}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    # Phải set trước khi import app.* để engine trỏ vào file tạm
+    os.environ["DATABASE_PATH"] = db_path
+    os.environ["CF_MODEL_PATH"] = os.path.join(scratch_dir, f"cf_{n_places}.npz")
+
+    result = {"places": n_places}
+    estimate = estimate_init_memory_mb(n_places)
+    available = _available_mb()
+    result["estimated_init_memory_mb"] = round(estimate, 1)
+    if estimate > 0.8 * available:
+        result["skipped"] = (
+            f"dense item-item similarity needs ~{estimate:.0f} MB, only {available:.0f} MB available"
+        )
+        print(f"[{n_places}] skipped: {result['skipped']}")
+        return result
+
+    start = time.perf_counter()
+    result["dataset"] = populate_scratch_db(n_places, n_users, seed)
+    result["generate_seconds"] = round(time.perf_counter() - start, 3)
+
+    from app.routers import recsysmodel
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    recsysmodel.initialize_recsys()
+    init_seconds = time.perf_counter() - start
+
+    if recsysmodel.items_df is None or len(recsysmodel.items_df) == 0:
+        result["error"] = "initialize_recsys failed"
+        return result
+
+    # Bộ đếm RSS của kernel là per-CPU, gần đúng: ru_maxrss có thể thấp hơn statm vài trang,
+    # nhưng peak không thể nhỏ hơn RSS hiện tại
+    rss_after = _rss_mb()
+    result["initialize"] = {
+        "seconds": round(init_seconds, 3),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(rss_after, 1),
+        "peak_rss_mb": round(max(_peak_rss_mb(), rss_after), 1),
+    }
+    print(f"[{n_places}] initialize_recsys: {init_seconds:.2f}s, RSS {result['initialize']['rss_after_mb']} MB")
+
+    result["latency"] = {}
+    for cohort, requests in select_cohorts(queries, seed).items():
+        if not requests:
+            continue
+        result["latency"][cohort] = measure_latency(requests, top_k)
+        stats = result["latency"][cohort]
+        print(f"[{n_places}] {cohort:>5}: p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+    return result
+
+
+# ==========================================
+# 5. MAIN
+# ==========================================
+
+def run_benchmark(
+    sizes: List[int] = DEFAULT_SIZES,
+    n_users: int = 2000,
+    queries: int = 100,
+    top_k: int = 10,
+    output: Path = DEFAULT_OUTPUT,
+    scratch_dir: str = None,
+    keep: bool = False,
+    seed: int = 42,
+) -> dict:
+    own_scratch = scratch_dir is None
+    scratch_dir = scratch_dir or tempfile.mkdtemp(prefix="recsys_bench_")
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+        },
+        "config": {"users": n_users, "queries_per_cohort": queries, "top_k": top_k, "seed": seed},
+        "results": [],
+    }
+
+    try:
+        for n_places in sizes:
+            # Một process mới cho mỗi kích thước: module state + peak RSS sạch
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                result = pool.submit(run_size, n_places, n_users, queries, top_k, scratch_dir, seed).result()
+            report["results"].append(result)
+
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+    finally:
+        if own_scratch and not keep:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    print(f"✓ Đã lưu: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark initialize_recsys and recommend_content_based on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Số places cho mỗi lần chạy")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100, help="Số requests đo cho mỗi nhóm user")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--scratch-dir", default=None, help="Thư mục chứa SQLite tạm (mặc định: temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Giữ lại file SQLite tạm sau khi chạy")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_benchmark(
+        sizes=args.sizes,
+        n_users=args.users,
+        queries=args.queries,
+        top_k=args.top_k,
+        output=args.output,
+        scratch_dir=args.scratch_dir,
+        keep=args.keep,
+        seed=args.seed,
+    )
@@ -0,0 +1,31 @@
+"""
+Fixture dùng chung cho test ở thư mục Backend/
+
+assert_max_queries: chặn N+1 regression bằng giới hạn số SQL query, ví dụ
+
+    def test_feed(assert_max_queries):
+        with assert_max_queries(3):
+            client.get("/api/v1/forum/posts")
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from app.database import engine, async_engine
+from app.db_instrumentation import instrument_engine, record_queries
+
+
+@pytest.fixture
+def assert_max_queries():
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with record_queries() as stats:
+            yield stats
+        queries = "\n".join(f"  {i + 1}. {' '.join(sql.split())[:200]}" for i, sql in enumerate(stats.statements))
+        assert stats.count <= limit, f"❌ {stats.count} SQL queries (max {limit}):\n{queries}"
+
+    return _assert_max_queries
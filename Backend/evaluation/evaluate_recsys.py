@@ -15,7 +15,7 @@ Date: December 16, 2025
 
 import pandas as pd
 import numpy as np
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func
 from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 import json
@@ -273,6 +273,7 @@ class RecommendationEvaluator:
     def __init__(self, session: Session):
         self.session = session
         self.metrics = RecommendationMetrics()
+        self.last_recommended_ids: List[int] = []
         
     def evaluate_user(
         self, 
@@ -297,14 +298,16 @@ class RecommendationEvaluator:
             return None
         
         # Lấy tags từ ratings history (score >= 3.0)
-        statement = select(Rating).where(Rating.user_id == user_id, Rating.score >= 3.0)
-        ratings = self.session.exec(statement).all()
-        
+        # Một query join thay vì session.get(Place) cho từng rating
+        statement = (
+            select(Place.tags)
+            .join(Rating, Rating.place_id == Place.id)
+            .where(Rating.user_id == user_id, Rating.score >= 3.0)
+        )
         user_tags = []
-        for rating in ratings:
-            place = self.session.get(Place, rating.place_id)
-            if place and place.tags:
-                user_tags.extend(place.tags)
+        for tags in self.session.exec(statement).all():
+            if tags:
+                user_tags.extend(tags)
         
         # KHÔNG dùng preferences trong evaluation (realistic test)
         # Chỉ dùng actual behavior (ratings/likes)
@@ -325,6 +328,7 @@ class RecommendationEvaluator:
             )
             
             recommended_ids = recommendations_df['id'].tolist()
+            self.last_recommended_ids = recommended_ids
         except Exception as e:
             print(f"✗ Error recommending for user {user_id}: {e}")
             return None
@@ -373,27 +377,8 @@ class RecommendationEvaluator:
             
             if result:
                 all_results.append(result)
-                
-                # Lưu recommendations để tính coverage/diversity
-                user = self.session.get(User, user_id)
-                if user:
-                    user_tags = []
-                    statement = select(Rating).where(Rating.user_id == user_id, Rating.score >= 3.0)
-                    ratings = self.session.exec(statement).all()
-                    for rating in ratings:
-                        place = self.session.get(Place, rating.place_id)
-                        if place and place.tags:
-                            user_tags.extend(place.tags)
-                    
-                    # KHÔNG dùng preferences - chỉ actual behavior
-                    
-                    user_tags = list(set(user_tags))
-                    
-                    try:
-                        recs_df = recommend_two_tower(user_tags, user_id, max(k_values))
-                        all_recommended.append(recs_df['id'].tolist())
-                    except:
-                        pass
+                # Dùng lại recommendations vừa tính trong evaluate_user cho coverage/diversity
+                all_recommended.append(self.last_recommended_ids)
         
         if not all_results:
             print("✗ Không có kết quả đánh giá nào!")
@@ -417,8 +402,8 @@ class RecommendationEvaluator:
         aggregate['avg_map'] = df_results['map'].mean()
         
         # Coverage & Diversity
-        total_places = self.session.exec(select(Place)).all()
-        aggregate['coverage'] = self.metrics.coverage(all_recommended, len(total_places))
+        total_places = self.session.exec(select(func.count(Place.id))).one()
+        aggregate['coverage'] = self.metrics.coverage(all_recommended, total_places)
         aggregate['diversity'] = self.metrics.diversity(all_recommended)
         
         return aggregate, df_results
@@ -0,0 +1,384 @@
+"""
+PARALLEL / STREAMING EVALUATION HARNESS
+=====================================================================
+
+Phiên bản nhanh của evaluate_recsys.RecommendationEvaluator.evaluate_all:
+1. Ground truth (train/test split) được cache ra JSON theo seed + fingerprint của
+   Rating/Like, nên các lần chạy sau dùng đúng cùng một split và không phải quét lại
+   Rating/Like; DB đổi (thêm/xóa/sửa interaction) thì split được tạo lại
+2. History tags của mọi test user được load bằng một query join duy nhất
+3. Mỗi user chỉ gọi recommend_two_tower đúng một lần; list này dùng cho cả
+   precision/recall/NDCG lẫn coverage/diversity
+4. Users được chia shard và chạy trên process pool; mỗi worker build RecSys
+   state một lần trong initializer rồi dùng lại cho mọi shard
+5. Metrics tính vectorized (NumPy) theo từng shard và ghi stream ra CSV/JSONL,
+   bộ nhớ không tăng theo số users
+
+Cách chạy (từ thư mục Backend/):
+    python evaluation/parallel_evaluate.py --workers 4 --output evaluation/evaluation_stream.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import Session, select, func
+
+# Add parent directory to path to import from app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import engine
+from app.schemas import Like, Place, Rating
+from evaluate_recsys import TestSetGenerator
+
+EVALUATION_DIR = Path(__file__).parent
+DEFAULT_CACHE_PATH = EVALUATION_DIR / "ground_truth_cache.json"
+
+# ==========================================
+# 1. GROUND TRUTH (CACHED)
+# ==========================================
+
+def db_fingerprint() -> dict:
+    """
+    Tóm tắt các interaction mà TestSetGenerator đọc: số dòng, id lớn nhất và tổng điểm
+    (rating) / số like dương. Thêm, xóa hay sửa score/is_like đều làm fingerprint đổi.
+    """
+    with Session(engine) as session:
+        ratings, max_rating_id, score_sum = session.exec(
+            select(func.count(Rating.id), func.max(Rating.id), func.sum(Rating.score))
+        ).one()
+        likes, max_like_id, positive_likes = session.exec(
+            select(func.count(Like.id), func.max(Like.id), func.sum(Like.is_like))
+            .where(Like.place_id.isnot(None))
+        ).one()
+    return {
+        "ratings": ratings, "max_rating_id": max_rating_id, "rating_score_sum": round(score_sum or 0.0, 6),
+        "likes": likes, "max_like_id": max_like_id, "positive_likes": int(positive_likes or 0),
+    }
+
+
+def load_ground_truth(
+    test_ratio: float = 0.2,
+    min_interactions: int = 5,
+    seed: int = 42,
+    cache_path: Path = DEFAULT_CACHE_PATH,
+    refresh: bool = False,
+) -> Dict[int, List[int]]:
+    """
+    Trả về Dict[user_id] = [relevant_place_ids]. Dùng lại file cache nếu tham số
+    split và db_fingerprint() khớp, ngược lại tạo split mới bằng TestSetGenerator và ghi cache.
+    """
+    params = {"test_ratio": test_ratio, "min_interactions": min_interactions, "seed": seed,
+              "db": db_fingerprint()}
+    cache_path = Path(cache_path)
+
+    if cache_path.exists() and not refresh:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("params") == params:
+            print(f"✓ Dùng ground truth cache: {cache_path} ({len(cached['ground_truth'])} users)")
+            return {int(uid): places for uid, places in cached["ground_truth"].items()}
+
+    np.random.seed(seed)
+    with Session(engine) as session:
+        generator = TestSetGenerator(session)
+        generator.create_train_test_split(test_ratio=test_ratio, min_interactions=min_interactions)
+        ground_truth = generator.get_ground_truth()
+
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({"params": params, "ground_truth": ground_truth}, f)
+    print(f"✓ Đã lưu ground truth cache: {cache_path}")
+    return ground_truth
+
+
+def load_history_tags(user_ids: Sequence[int]) -> Dict[int, List[str]]:
+    """Tags từ ratings >= 3.0 của từng user (giống evaluate_user) bằng một query join"""
+    wanted = set(user_ids)
+    history = defaultdict(set)
+
+    statement = (
+        select(Rating.user_id, Place.tags)
+        .join(Place, Place.id == Rating.place_id)
+        .where(Rating.score >= 3.0)
+    )
+    with Session(engine) as session:
+        for user_id, tags in session.exec(statement):
+            if user_id in wanted and tags:
+                history[user_id].update(tags)
+
+    return {uid: list(history.get(uid, ())) for uid in user_ids}
+
+
+# ==========================================
+# 2. VECTORIZED METRICS
+# ==========================================
+
+def compute_metrics(
+    recommended: np.ndarray,
+    relevant_lists: Sequence[Sequence[int]],
+    k_values: Sequence[int],
+) -> Dict[str, np.ndarray]:
+    """
+    Tính metrics cho cả một batch users cùng lúc.
+
+    Args:
+        recommended: int64 (n_users, max_k), padding bằng -1 khi list ngắn hơn max_k
+        relevant_lists: relevant place_ids của từng user (cùng thứ tự với recommended)
+        k_values: Các giá trị K
+
+    Returns:
+        Dict[metric] = array (n_users,), cùng công thức với RecommendationMetrics
+    """
+    n_users, max_k = recommended.shape
+    n_relevant = np.array([len(r) for r in relevant_lists], dtype=np.float64)
+
+    # Encode (user_row, place_id) thành một key int64 để tìm hits bằng một lần np.isin
+    stride = int(max(recommended.max(initial=0), max((max(r) for r in relevant_lists if r), default=0))) + 1
+    rows = np.arange(n_users, dtype=np.int64)
+    rec_keys = rows[:, None] * stride + recommended
+    rel_keys = np.concatenate([
+        np.full(len(r), i, dtype=np.int64) * stride + np.asarray(r, dtype=np.int64)
+        for i, r in enumerate(relevant_lists)
+    ]) if n_users else np.empty(0, dtype=np.int64)
+    hits = np.isin(rec_keys, rel_keys) & (recommended >= 0)
+
+    cum_hits = np.cumsum(hits, axis=1)
+    discounts = 1.0 / np.log2(np.arange(2, max_k + 2))
+    ideal_dcg = np.concatenate([[0.0], np.cumsum(discounts)])
+    safe_relevant = np.maximum(n_relevant, 1.0)
+
+    metrics = {}
+    for k in k_values:
+        kk = min(k, max_k)
+        hits_k = cum_hits[:, kk - 1] if kk > 0 else np.zeros(n_users)
+        precision = hits_k / k
+        recall = np.where(n_relevant > 0, hits_k / safe_relevant, 0.0)
+        denom = precision + recall
+        f1 = np.divide(2 * precision * recall, denom, out=np.zeros(n_users), where=denom > 0)
+
+        dcg = (hits[:, :kk] * discounts[:kk]).sum(axis=1)
+        idcg = ideal_dcg[np.minimum(n_relevant, kk).astype(np.int64)]
+        ndcg = np.divide(dcg, idcg, out=np.zeros(n_users), where=idcg > 0)
+
+        metrics[f'precision@{k}'] = precision
+        metrics[f'recall@{k}'] = recall
+        metrics[f'f1@{k}'] = f1
+        metrics[f'ndcg@{k}'] = ndcg
+
+    precision_at_hit = cum_hits / np.arange(1, max_k + 1)
+    metrics['map'] = np.where(
+        n_relevant > 0, (precision_at_hit * hits).sum(axis=1) / safe_relevant, 0.0
+    )
+    metrics['num_relevant'] = n_relevant.astype(np.int64)
+    metrics['num_recommended'] = (recommended >= 0).sum(axis=1)
+    return metrics
+
+
+# ==========================================
+# 3. WORKER
+# ==========================================
+
+def _init_worker():
+    """Bỏ connection kế thừa từ process cha, build RecSys state một lần cho worker"""
+    engine.dispose(close=False)
+
+    from app.routers import recsysmodel
+    if recsysmodel.items_df is None:
+        recsysmodel.initialize_recsys()
+
+
+def _evaluate_shard(
+    shard: List[Tuple[int, List[str], List[int]]],
+    k_values: List[int],
+) -> Tuple[List[dict], List[List[int]]]:
+    """
+    Recommend một lần cho mỗi user trong shard rồi tính metrics vectorized.
+
+    Returns:
+        (rows metrics từng user, recommended ids từng user)
+    """
+    from app.routers.recsysmodel import recommend_two_tower
+
+    max_k = max(k_values)
+    user_ids, relevant_lists, recommended_lists = [], [], []
+
+    for user_id, user_tags, relevant in shard:
+        try:
+            recommendations_df = recommend_two_tower(user_prefs_tags=user_tags, user_id=user_id, top_k=max_k)
+        except Exception as e:
+            print(f"✗ Error recommending for user {user_id}: {e}")
+            continue
+        user_ids.append(user_id)
+        relevant_lists.append(relevant)
+        recommended_lists.append([int(pid) for pid in recommendations_df['id'].tolist()[:max_k]])
+
+    if not user_ids:
+        return [], []
+
+    recommended = np.full((len(user_ids), max_k), -1, dtype=np.int64)
+    for i, ids in enumerate(recommended_lists):
+        recommended[i, :len(ids)] = ids
+
+    metrics = compute_metrics(recommended, relevant_lists, k_values)
+    names = list(metrics)
+    rows = [
+        {'user_id': uid, **{name: metrics[name][i].item() for name in names}}
+        for i, uid in enumerate(user_ids)
+    ]
+    return rows, recommended_lists
+
+
+# ==========================================
+# 4. STREAMING OUTPUT + AGGREGATE
+# ==========================================
+
+class MetricsStream:
+    """Ghi metrics từng user ra CSV hoặc JSONL (theo đuôi file) và giữ tổng để tính trung bình"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.format = 'jsonl' if self.path.suffix in ('.jsonl', '.json') else 'csv'
+        self._file = open(self.path, 'w', encoding='utf-8', newline='')
+        self._csv = None
+        self.sums = defaultdict(float)
+        self.count = 0
+        self.unique_items = set()
+        self.total_recommended = 0
+
+    def write(self, rows: List[dict], recommended_lists: List[List[int]]):
+        for row in rows:
+            if self.format == 'jsonl':
+                self._file.write(json.dumps(row) + '\n')
+            else:
+                if self._csv is None:
+                    self._csv = csv.DictWriter(self._file, fieldnames=list(row))
+                    self._csv.writeheader()
+                self._csv.writerow(row)
+            for name, value in row.items():
+                if name != 'user_id':
+                    self.sums[name] += value
+        self._file.flush()
+
+        self.count += len(rows)
+        for ids in recommended_lists:
+            self.unique_items.update(ids)
+            self.total_recommended += len(ids)
+
+    def close(self):
+        self._file.close()
+
+    def aggregate(self, k_values: Sequence[int], total_places: int) -> dict:
+        """Cùng key với evaluate_all để generate_report.py đọc được"""
+        if self.count == 0:
+            return {}
+        mean = {name: total / self.count for name, total in self.sums.items()}
+        aggregate = {
+            'num_users_evaluated': self.count,
+            'avg_relevant_per_user': mean['num_relevant'],
+        }
+        for k in k_values:
+            for metric in ('precision', 'recall', 'f1', 'ndcg'):
+                aggregate[f'avg_{metric}@{k}'] = mean[f'{metric}@{k}']
+        aggregate['avg_map'] = mean['map']
+        aggregate['coverage'] = len(self.unique_items) / total_places if total_places > 0 else 0.0
+        aggregate['diversity'] = (
+            len(self.unique_items) / self.total_recommended if self.total_recommended > 0 else 0.0
+        )
+        return aggregate
+
+
+# ==========================================
+# 5. MAIN
+# ==========================================
+
+def run_parallel_evaluation(
+    test_ratio: float = 0.2,
+    min_interactions: int = 5,
+    k_values: List[int] = [5, 10, 20],
+    workers: int = None,
+    shard_size: int = 100,
+    output: Path = EVALUATION_DIR / "evaluation_stream.csv",
+    seed: int = 42,
+    refresh_cache: bool = False,
+) -> dict:
+    workers = workers or os.cpu_count() or 1
+
+    ground_truth = load_ground_truth(test_ratio, min_interactions, seed, refresh=refresh_cache)
+    if not ground_truth:
+        print("✗ Không đủ dữ liệu để tạo test set!")
+        return {}
+
+    user_ids = sorted(ground_truth)
+    history = load_history_tags(user_ids)
+    with Session(engine) as session:
+        total_places = session.exec(select(func.count(Place.id))).one()
+
+    tasks = [(uid, history[uid], ground_truth[uid]) for uid in user_ids]
+    shards = [tasks[i:i + shard_size] for i in range(0, len(tasks), shard_size)]
+    print(f"⏳ Đánh giá {len(user_ids)} users, {len(shards)} shards, {workers} workers, K = {k_values}")
+
+    stream = MetricsStream(output)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_worker) as pool:
+            futures = [pool.submit(_evaluate_shard, shard, list(k_values)) for shard in shards]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows, recommended_lists = future.result()
+                stream.write(rows, recommended_lists)
+                print(f"[{done}/{len(shards)}] {stream.count} users evaluated")
+    finally:
+        stream.close()
+    elapsed = time.perf_counter() - start
+
+    aggregate = stream.aggregate(k_values, total_places)
+    aggregate['elapsed_seconds'] = round(elapsed, 3)
+    aggregate['users_per_second'] = round(stream.count / elapsed, 2) if elapsed > 0 else 0.0
+
+    print(f"\n{'='*60}")
+    print("KẾT QUẢ ĐÁNH GIÁ (PARALLEL)")
+    print(f"{'='*60}\n")
+    for k in k_values:
+        print(f"   • Precision@{k}: {aggregate.get(f'avg_precision@{k}', 0) * 100:.2f}%"
+              f" | Recall@{k}: {aggregate.get(f'avg_recall@{k}', 0) * 100:.2f}%"
+              f" | NDCG@{k}: {aggregate.get(f'avg_ndcg@{k}', 0) * 100:.2f}%")
+    print(f"   • MAP: {aggregate.get('avg_map', 0) * 100:.2f}%")
+    print(f"\n⏱  {elapsed:.2f}s wall-clock, {aggregate['users_per_second']} users/s")
+    print(f"✓ Per-user metrics: {output}")
+
+    with open(Path(output).with_name('evaluation_results_parallel.json'), 'w', encoding='utf-8') as f:
+        json.dump(aggregate, f, indent=2, ensure_ascii=False)
+
+    return aggregate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel streaming evaluation of the recommender")
+    parser.add_argument("--workers", type=int, default=None, help="Số process (mặc định = số CPU)")
+    parser.add_argument("--shard-size", type=int, default=100, help="Số users mỗi task")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--test-ratio", type=float, default=0.2)
+    parser.add_argument("--min-interactions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=EVALUATION_DIR / "evaluation_stream.csv",
+                        help="File .csv hoặc .jsonl cho metrics từng user")
+    parser.add_argument("--refresh-cache", action="store_true", help="Tạo lại train/test split")
+    args = parser.parse_args()
+
+    run_parallel_evaluation(
+        test_ratio=args.test_ratio,
+        min_interactions=args.min_interactions,
+        k_values=args.k,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        output=args.output,
+        seed=args.seed,
+        refresh_cache=args.refresh_cache,
+    )
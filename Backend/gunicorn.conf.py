@@ -0,0 +1,88 @@
+"""
+Gunicorn config cho production: N uvicorn workers, RecSys build MỘT lần trong master.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- preload_app: master import app.main rồi build TF-IDF / similarity matrix / CF
+  factors trước khi fork. Worker nhận state qua fork (copy-on-write): các mảng
+  NumPy lớn chỉ đọc nên được share giữa các worker thay vì mỗi worker tự build.
+- Reload model không rớt request: `kill -HUP <master pid>`. Master build lại
+  RecSys (đọc lại DB + file CF factors), fork worker mới với state mới, worker cũ
+  xử lý nốt request đang chạy (graceful_timeout) rồi mới thoát.
+- Mỗi worker in thời gian khởi động và RSS / PSS / shared memory.
+
+Env:
+    WEB_CONCURRENCY           số worker (mặc định 2 * CPU + 1, tối đa 8)
+    SERVER_THREADS            số thread cho sync routes mỗi worker (app/config.py)
+    RECSYS_EXECUTOR_WORKERS   số thread scoring RecSys mỗi worker (app/config.py)
+    PORT, GRACEFUL_TIMEOUT, TIMEOUT
+"""
+
+import gc
+import os
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(8, 2 * (os.cpu_count() or 1) + 1))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+accesslog = "-"
+
+_master_started = time.perf_counter()
+
+
+def memory_report() -> str:
+    """RSS / PSS / shared (MB) của process hiện tại, đọc từ /proc (Linux)"""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        return f"maxrss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB"
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return f"rss={fields.get('Rss', 0):.1f}MB pss={fields.get('Pss', 0):.1f}MB shared={shared:.1f}MB"
+
+
+def _build_recsys(server, force: bool = False):
+    from app.database import engine
+    from app.routers.recsysmodel import initialize_recsys
+
+    start = time.perf_counter()
+    initialize_recsys(force=force)
+    # Connection SQLite mở trong master không được dùng lại sau fork
+    engine.dispose()
+    # Đưa object hiện có ra khỏi GC: GC của worker không ghi vào header của
+    # chúng nữa -> trang nhớ không bị copy khi worker chạy
+    gc.freeze()
+    server.log.info(f"RecSys built in master in {time.perf_counter() - start:.2f}s ({memory_report()})")
+
+
+def when_ready(server):
+    # preload_app đã import app; build state trước khi spawn worker đầu tiên
+    _build_recsys(server)
+    server.log.info(f"Master ready in {time.perf_counter() - _master_started:.2f}s")
+
+
+def on_reload(server):
+    # SIGHUP: worker mới được fork sau hook này nên sẽ thấy state mới
+    gc.unfreeze()
+    _build_recsys(server, force=True)
+
+
+def post_fork(server, worker):
+    worker.started_at = time.perf_counter()
+
+    from app.database import engine
+    engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    elapsed = time.perf_counter() - worker.started_at
+    worker.log.info(f"Worker {worker.pid} ready in {elapsed:.2f}s ({memory_report()})")
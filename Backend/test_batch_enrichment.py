@@ -0,0 +1,165 @@
+"""
+Test batch LLM engine (app/services/batch_enrichment.py) với stub LLM server local
+
+Stub server nói API OpenAI-compatible /chat/completions: dịch = viết hoa title/description,
+lỗi 500 ở request đầu tiên và 429 ở request thứ hai để kiểm tra retry.
+
+Kiểm tra:
+1. Nhiều item mỗi prompt, dedup theo content hash, retry sau 500 / 429, journal đủ dòng
+2. Resume: hết request budget giữa chừng -> chạy lại chỉ xử lý phần còn thiếu;
+   journal có dòng cuối ghi dở (crash) vẫn đọc được
+3. translate_csv end-to-end với stub: description dài được tách theo "|||" rồi ghép lại
+"""
+
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.batch_enrichment import ChatCompletionClient, EnrichmentTask, ResultJournal, run_enrichment
+
+
+class StubLLM:
+    """Server OpenAI-compatible chạy trong thread; fail_statuses: status trả về cho các request đầu"""
+
+    def __init__(self, fail_statuses=()):
+        self.fail_statuses = list(fail_statuses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(body)
+                if stub.fail_statuses:
+                    self.send_response(stub.fail_statuses.pop(0))
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                items = json.loads(body["messages"][-1]["content"])["items"]
+                content = json.dumps({"items": [
+                    {"id": item["id"], **{k: v.upper() for k, v in item.items() if k != "id"}} for item in items
+                ]})
+                payload = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                    "usage": {"total_tokens": len(content) // 4},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def client(self):
+        return ChatCompletionClient(self.base_url, "test-key", "stub-model", provider="stub")
+
+    def close(self):
+        self.server.shutdown()
+
+
+class UpperTask(EnrichmentTask):
+    name = "upper"
+    system_prompt = "Uppercase every field."
+    output_fields = ("text",)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def enrich(stub, payloads, journal_path, **kwargs):
+    client = stub.client()
+    try:
+        return await run_enrichment(payloads, UpperTask(), client, journal_path, rpm=6000, tpm=10 ** 6,
+                                    backoff_base=0.01, **kwargs)
+    finally:
+        await client.aclose()
+
+
+def test_batching_dedup_and_retry():
+    print("\n=== TEST 1: batch + dedup + retry ===")
+    stub = StubLLM(fail_statuses=[500, 429])
+    payloads = [{"text": f"place {i}"} for i in range(9)] + [{"text": "place 0"}, {"text": "place 1"}, None]
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "journal.jsonl")
+        outputs, stats = run(enrich(stub, payloads, journal, concurrency=3, batch_size=4))
+        stub.close()
+
+        assert outputs[:9] == [{"text": f"PLACE {i}"} for i in range(9)]
+        assert outputs[9] == outputs[0] and outputs[11] is None
+        assert stats.unique_pending == 9 and stats.processed == 9 and stats.failed == 0
+        # 9 item khác nhau / 4 mỗi prompt = 3 batch, cộng 2 lần retry
+        assert stats.requests == 5 and len(stub.requests) == 5, stats
+        assert max(len(json.loads(r["messages"][-1]["content"])["items"]) for r in stub.requests) == 4
+        with open(journal) as f:
+            assert len(f.readlines()) == 9
+        print(f"✓ {stats.requests} requests cho 12 item (9 unique), retry sau 500 + 429")
+
+
+def test_resume_after_budget_and_crash():
+    print("\n=== TEST 2: resume ===")
+    stub = StubLLM()
+    payloads = [{"text": f"row {i}"} for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "journal.jsonl")
+        outputs, stats = run(enrich(stub, payloads, journal, concurrency=1, batch_size=3, request_budget=2))
+        assert stats.stopped_by_budget and stats.processed == 6
+        assert sum(o is not None for o in outputs) == 6
+
+        # Crash khi đang ghi: dòng cuối bị cắt dở
+        with open(journal, "a") as f:
+            f.write('{"key": "abc", "out')
+        assert len(ResultJournal(journal)) == 6
+
+        outputs, stats = run(enrich(stub, payloads, journal, concurrency=2, batch_size=3))
+        stub.close()
+        assert stats.cached == 6 and stats.processed == 4 and stats.requests == 2, stats
+        assert outputs == [{"text": f"ROW {i}"} for i in range(10)]
+        assert len(ResultJournal(journal)) == 10, "❌ Journal hỏng sau khi append vào dòng cắt dở"
+        print("✓ Lần 2 chỉ gọi LLM cho 4 dòng còn lại")
+
+
+def test_translate_csv_with_stub():
+    print("\n=== TEST 3: translate_csv ===")
+    from app.services import translate_dtb
+
+    stub = StubLLM()
+    long_desc = "|||".join(["đoạn một " * 200, "đoạn hai " * 200])
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "in.csv")
+        output_csv = os.path.join(tmp, "out.csv")
+        with open(input_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "title", "description"])
+            writer.writeheader()
+            writer.writerow({"id": "1", "title": "Văn Miếu", "description": "di tích"})
+            writer.writerow({"id": "2", "title": "Hạ Long", "description": long_desc})
+
+        client = stub.client()
+        run(translate_dtb.translate_csv(input_csv=input_csv, output_csv=output_csv,
+                                        journal_path=os.path.join(tmp, "j.jsonl"), client=client))
+        run(client.aclose())
+        stub.close()
+
+        with open(output_csv, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["title"] == "VĂN MIẾU" and rows[0]["description"] == "DI TÍCH"
+        assert rows[1]["title"] == "HẠ LONG"
+        parts = rows[1]["description"].split("|||")
+        assert len(parts) == 2 and parts[1].startswith("ĐOẠN HAI"), "❌ Phần dài phải ghép lại đúng thứ tự"
+        print("✓ Output CSV ghi một lần, description dài được ghép lại")
+
+
+if __name__ == "__main__":
+    test_batching_dedup_and_retry()
+    test_resume_after_budget_and_crash()
+    test_translate_csv_with_stub()
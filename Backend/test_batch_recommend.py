@@ -0,0 +1,88 @@
+"""
+Test home feed tính sẵn (app/services/batch_recommend.py)
+
+Kiểm tra:
+1. get_precomputed_feed: list fresh cùng top_k được phục vụ (kể cả list ngắn hơn top_k);
+   stale, khác top_k, đã invalidate -> None (fallback online scoring)
+2. precompute_all (process pool) trên bản copy của DB: mọi active user có list,
+   list giống hệt online scoring cùng top_k
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.config import settings
+from app.database import engine as app_engine
+from app.schemas import PrecomputedRecommendation, User
+from app.services import batch_recommend
+from app.services.batch_recommend import get_active_user_ids, get_precomputed_feed, invalidate_precomputed_feed
+
+
+def test_get_precomputed_feed():
+    print("\n=== TEST 1: get_precomputed_feed ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'feed.db')}")
+        SQLModel.metadata.create_all(engine)
+        stale_at = datetime.utcnow() - timedelta(hours=settings.PRECOMPUTED_RECS_TTL_HOURS + 1)
+        with Session(engine) as session:
+            session.add_all([User(id=i, username=f"u{i}", hashed_password="x") for i in (1, 2, 3)])
+            session.add_all([
+                PrecomputedRecommendation(user_id=1, place_ids=[5, 3, 9], scores=[0.9, 0.5, 0.1], top_k=3),
+                PrecomputedRecommendation(user_id=2, place_ids=[7, 8, 9], scores=[0.9, 0.8, 0.7], top_k=3,
+                                          computed_at=stale_at),
+                PrecomputedRecommendation(user_id=3, place_ids=[4], scores=[0.4], top_k=12),
+            ])
+            session.commit()
+
+            assert get_precomputed_feed(1, session, 3) == [(5, 0.9), (3, 0.5), (9, 0.1)]
+            assert get_precomputed_feed(1, session, 2) is None, "❌ top_k khác -> re-rank khác, không cắt list"
+            assert get_precomputed_feed(1, session, 5) is None
+            print("✓ Chỉ phục vụ request cùng top_k")
+
+            assert get_precomputed_feed(2, session, 3) is None, "❌ List stale không được phục vụ"
+            assert get_precomputed_feed(3, session, 12) == [(4, 0.4)], "❌ List ngắn = kết quả online cùng top_k"
+            assert get_precomputed_feed(99, session, 3) is None
+            print("✓ Stale -> None, list ngắn hơn top_k vẫn phục vụ")
+
+            invalidate_precomputed_feed(1, session)
+            session.commit()
+            assert get_precomputed_feed(1, session, 3) is None
+            assert get_precomputed_feed(3, session, 12) is not None
+            print("✓ invalidate chỉ xóa list của user đó")
+
+
+def test_precompute_all_matches_online():
+    print("\n=== TEST 2: precompute_all == online scoring ===")
+    from app.routers.recsysmodel import initialize_recsys, recommend_two_tower
+    from app.routers.recsys_utils import get_home_feed_tags
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "copy.db")
+        shutil.copy(settings.DATABASE_PATH, db_path)
+        engine = create_engine(f"sqlite:///{db_path}")
+        old_engine = batch_recommend.engine
+        batch_recommend.engine = engine  # worker (fork) kế thừa engine đã thay
+        try:
+            stats = batch_recommend.precompute_all(top_k=5, workers=2, shard_size=2)
+        finally:
+            batch_recommend.engine = old_engine
+
+        initialize_recsys()
+        with Session(engine) as session, Session(app_engine) as app_session:
+            user_ids = get_active_user_ids(session)
+            assert stats["active_users"] == len(user_ids) and stats["saved_lists"] == len(user_ids), stats
+            for user_id in user_ids:
+                feed = get_precomputed_feed(user_id, session, 5)
+                tags = list(set(get_home_feed_tags(app_session.get(User, user_id), app_session)))
+                online = recommend_two_tower(tags, user_id=user_id, top_k=5)
+                assert [place_id for place_id, _ in feed] == [int(i) for i in online["id"]], user_id
+    print(f"✓ {stats}")
+
+
+if __name__ == "__main__":
+    test_get_precomputed_feed()
+    test_precompute_all_matches_online()
@@ -0,0 +1,136 @@
+"""
+Test cho Matrix-Factorization CF (app/routers/cf_model.py)
+
+Kiểm tra:
+1. CG solver cho ra cùng nghiệm với giải trực tiếp phương trình ALS
+2. Fold-in cho user mới khớp với user vector khi train
+3. score_items chuẩn hóa về [0, 1] và bỏ qua place không có trong model
+4. Vector fold-in được cache: không đọc lại tương tác mỗi request, tính lại sau
+   invalidate_user_vector / fit mới
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.routers import cf_model
+
+
+def teardown_function():
+    """Trả module state về trạng thái chưa khởi tạo để không ảnh hưởng các test khác"""
+    cf_model.user_factors = None
+    cf_model.item_factors = None
+
+
+def _random_confidence(n_users=60, n_items=40, density=0.15, seed=0):
+    C = sp.random(n_users, n_items, density=density, format='csr', dtype=np.float32, random_state=seed)
+    C.data *= cf_model.ALPHA
+    return C
+
+
+def test_cg_matches_direct_solve():
+    """CG với đủ bước phải hội tụ về nghiệm chính xác của từng user"""
+    print("\n=== TEST 1: CG vs direct solve ===")
+    rng = np.random.default_rng(1)
+    C = _random_confidence()
+    Y = rng.standard_normal((C.shape[1], 8)).astype(np.float32)
+    X = np.zeros((C.shape[0], 8), dtype=np.float32)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cf_model._least_squares(C, Y, X, cf_model.REGULARIZATION, pool, cg_steps=40)
+
+    gram = Y.T @ Y + cf_model.REGULARIZATION * np.eye(8)
+    for u in range(C.shape[0]):
+        row = C.getrow(u)
+        Yi = Y[row.indices]
+        A = gram + (Yi * row.data[:, None]).T @ Yi
+        b = (Yi * (1 + row.data)[:, None]).sum(axis=0)
+        assert np.allclose(np.linalg.solve(A, b), X[u], atol=1e-4), f"❌ User {u} không hội tụ"
+    print("✓ CG khớp nghiệm trực tiếp cho mọi user")
+
+
+def test_fold_in_matches_training():
+    """Fold-in một user đã có trong ma trận phải gần với nghiệm ALS của chính user đó"""
+    print("\n=== TEST 2: fold-in ===")
+    users = np.array([1, 1, 2, 2, 3, 3, 3])
+    places = np.array([10, 11, 11, 12, 10, 12, 13])
+    strengths = np.array([1.0, 0.8, 1.5, 0.6, 1.0, 1.0, 0.4], dtype=np.float32)
+
+    Cui, u_ids, i_ids = cf_model.build_confidence_matrix(users, places, strengths)
+    uf, itf = cf_model.train_als(Cui, factors=4, iterations=15, num_threads=1)
+    cf_model._set_state(uf, itf, u_ids, i_ids)
+
+    # Fold-in là đúng một bước least squares -> dùng CG nhiều bước trên user 3 để so sánh
+    X = uf.copy()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        cf_model._least_squares(Cui, itf, X, cf_model.REGULARIZATION, pool, cg_steps=20)
+    folded = cf_model.fold_in_user([10, 12, 13], [1.0, 1.0, 0.4])
+
+    assert folded is not None
+    assert np.allclose(folded, X[2], atol=1e-3), "❌ Fold-in lệch so với ALS"
+    print(f"✓ Fold-in vector: {np.round(folded, 3)}")
+
+
+def test_score_items_normalized():
+    """Score trả về theo đúng thứ tự place_ids, nằm trong [0, 1]"""
+    print("\n=== TEST 3: score_items ===")
+    users = np.array([1, 1, 2])
+    places = np.array([10, 11, 11])
+    strengths = np.array([1.0, 1.0, 1.0], dtype=np.float32)
+
+    Cui, u_ids, i_ids = cf_model.build_confidence_matrix(users, places, strengths, all_item_ids=[10, 11, 12])
+    uf, itf = cf_model.train_als(Cui, factors=4, iterations=10, num_threads=1)
+    cf_model._set_state(uf, itf, u_ids, i_ids)
+
+    scores = cf_model.score_items(1, [12, 11, 999, 10])
+    assert scores is not None
+    assert scores.shape == (4,)
+    assert scores.min() >= 0.0 and scores.max() == 1.0
+    assert scores[2] == 0.0, "❌ Place không có trong model phải có score 0"
+    print(f"✓ Scores: {np.round(scores, 3)}")
+
+
+def test_fold_in_cache():
+    print("\n=== TEST 4: cache fold-in ===")
+    users = np.array([1, 1, 2, 2])
+    places = np.array([10, 11, 11, 12])
+    strengths = np.array([1.0, 0.8, 1.5, 0.6], dtype=np.float32)
+    Cui, u_ids, i_ids = cf_model.build_confidence_matrix(users, places, strengths)
+    uf, itf = cf_model.train_als(Cui, factors=4, iterations=5, num_threads=1)
+    cf_model._set_state(uf, itf, u_ids, i_ids)
+
+    interactions = {7: ([10, 12], [1.0, 0.5]), 8: ([], [])}
+    loads = []
+
+    def fake_load(user_id):
+        loads.append(user_id)
+        return interactions[user_id]
+
+    original = cf_model._load_user_interactions
+    cf_model._load_user_interactions = fake_load
+    try:
+        first = cf_model.get_user_vector(7)
+        assert cf_model.get_user_vector(7) is first and cf_model.get_user_vector(8) is None
+        cf_model.score_items(7, [10, 11, 12])
+        cf_model.get_user_vector(8)
+        assert loads == [7, 8], f"❌ Đọc lại tương tác: {loads}"
+        print("✓ User mới (và user chưa có tương tác) chỉ fold-in một lần")
+
+        interactions[7] = ([10, 11, 12], [1.0, 1.0, 0.5])
+        cf_model.invalidate_user_vector(7)
+        second = cf_model.get_user_vector(7)
+        assert not np.allclose(first, second), "❌ Tương tác mới phải cho vector mới"
+        cf_model._set_state(uf, itf, u_ids, i_ids)
+        cf_model.get_user_vector(7)
+        assert loads == [7, 8, 7, 7]
+        print("✓ invalidate_user_vector / fit mới -> fold-in lại")
+    finally:
+        cf_model._load_user_interactions = original
+
+
+if __name__ == "__main__":
+    test_cg_matches_direct_solve()
+    test_fold_in_matches_training()
+    test_score_items_normalized()
+    test_fold_in_cache()
@@ -0,0 +1,102 @@
+"""
+Test Parquet stage cho pipeline dữ liệu (app/services/data_lake.py)
+
+Kiểm tra:
+1. CSV cũ -> Parquet: cột list ("|||" và JSON) thành list<string>, id int64; CSV xuất kèm
+   giữ nguyên nội dung; filter theo id; CSV sửa tay (mới hơn) được ưu tiên
+2. place_importer đọc thẳng Parquet (list native) cho cùng kết quả như CSV
+"""
+
+import csv
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.schemas import Place
+from app.services.data_lake import read_rows, read_stage, write_stage
+from app.services.place_importer import import_places_csv
+
+ROWS = [
+    {"id": "1", "name": "Hoan Kiem Lake", "description": "Hồ ở Hà Nội|||Tháp Rùa", "image_json": '["a.jpg"]',
+     "tags": '["Ha Noi", "Lake"]'},
+    {"id": "2", "name": "Ba Na Hills", "description": "Đồi", "image_json": "[]", "tags": "['Da Nang', 'Mountain']"},
+    {"id": "3", "name": "My Khe Beach", "description": "", "image_json": "", "tags": ""},
+]
+FIELDS = ["id", "name", "description", "image_json", "tags"]
+
+
+def write_csv(path, rows, fieldnames=FIELDS):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_csv_parquet_roundtrip():
+    print("\n=== TEST 1: CSV <-> Parquet ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.csv")
+        write_csv(source, ROWS)
+
+        df = read_stage(source)
+        assert df["description"][0] == ["Hồ ở Hà Nội", "Tháp Rùa"]
+        assert df["tags"][1] == ["Da Nang", "Mountain"], "❌ Python list string phải được parse"
+
+        stage = os.path.join(tmp, "stage")
+        parquet_path = write_stage(df, stage)
+        schema = pq.read_schema(parquet_path)
+        assert schema.field("id").type == pa.int64()
+        assert schema.field("tags").type == pa.list_(pa.string())
+
+        fieldnames, rows = read_rows(stage)
+        assert fieldnames == FIELDS and rows[0]["id"] == 1
+        assert rows[2]["description"] == [] and rows[2]["tags"] == [] and rows[2]["image_json"] == []
+
+        with open(f"{stage}.csv", newline="", encoding="utf-8") as f:
+            exported = list(csv.DictReader(f))
+        assert exported[0]["description"] == "Hồ ở Hà Nội|||Tháp Rùa"
+        assert exported[1]["tags"] == '["Da Nang", "Mountain"]'
+        assert exported[2]["tags"] == "" and exported[2]["description"] == ""
+
+        subset = read_stage(stage, columns=["id", "name"], filters=[("id", "in", [2, 3])])
+        assert list(subset.columns) == ["id", "name"] and subset["id"].tolist() == [2, 3]
+        print("✓ List native trong Parquet, CSV export giữ format cũ, filter theo id")
+
+        # Sửa tay CSV export -> CSV mới hơn Parquet nên được đọc
+        time.sleep(0.01)
+        exported[0]["name"] = "Ho Guom"
+        write_csv(f"{stage}.csv", exported)
+        assert read_stage(stage)["name"][0] == "Ho Guom"
+        print("✓ CSV sửa tay được ưu tiên hơn Parquet cũ")
+
+
+def test_importer_reads_parquet():
+    print("\n=== TEST 2: place_importer đọc Parquet ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stage cleaned / with_tags: description là JSON list (description_json)
+        source = os.path.join(tmp, "places.csv")
+        rows = [{"description_json": '["Hồ ở Hà Nội", "Tháp Rùa"]' if r["id"] == "1" else "[]",
+                 **{k: v for k, v in r.items() if k != "description"}} for r in ROWS]
+        write_csv(source, rows, ["id", "name", "description_json", "image_json", "tags"])
+        parquet_path = write_stage(read_stage(source), os.path.join(tmp, "places_stage"))
+
+        results = []
+        for path in (source, parquet_path):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, os.path.basename(path) + '.db')}")
+            SQLModel.metadata.create_all(engine)
+            report = import_places_csv(path, engine=engine)
+            assert report.inserted == 3
+            with Session(engine) as session:
+                places = session.exec(select(Place).order_by(Place.id)).all()
+                results.append([(p.id, p.name, p.description, p.image, p.tags) for p in places])
+        assert results[0] == results[1], f"❌ Parquet khác CSV:\n{results[0]}\n{results[1]}"
+        print("✓ Import từ Parquet giống hệt từ CSV")
+
+
+if __name__ == "__main__":
+    test_csv_parquet_roundtrip()
+    test_importer_reads_parquet()
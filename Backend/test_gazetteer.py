@@ -0,0 +1,81 @@
+"""
+Test gazetteer (app/services/gazetteer.py)
+
+Kiểm tra:
+1. Aho-Corasick trả đủ mọi lần khớp (kể cả mẫu lồng nhau); địa danh / tỉnh khớp không phân biệt
+   dấu, chỉ khớp nguyên từ
+2. repair_places: tag tỉnh sửa theo mô tả, địa danh lấy tọa độ gazetteer, tọa độ đúng tỉnh giữ
+   nguyên, outlier về tâm tỉnh; DB ghi bằng một executemany
+"""
+
+import os
+import tempfile
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.schemas import Place
+from app.services.gazetteer import AhoCorasick, get_gazetteer, repair_places
+
+
+def test_matching():
+    print("\n=== TEST 1: Aho-Corasick + khớp không dấu ===")
+    ac = AhoCorasick([(p, p) for p in ("he", "she", "his", "hers")])
+    found = sorted((start, value) for start, _, value in ac.find_all("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")], found
+    print("✓ Aho-Corasick tìm đủ mẫu lồng nhau")
+
+    gazetteer = get_gazetteer()
+    assert gazetteer.match_landmark("Hoàn Kiếm Lake") == gazetteer.match_landmark("hoan kiem lake")
+    assert gazetteer.match_landmark("Hoàn Kiếm Lake")[1] == "exact"
+    assert gazetteer.match_landmark("Sunset at Ba Na Hills")[1] == "partial"
+    assert gazetteer.canonical_province("Đà Nẵng") == gazetteer.canonical_province("da nang") == "Da Nang"
+    assert gazetteer.province_in_text("An old town in Hội An city") == ("Quang Nam", 8)
+    assert gazetteer.province_in_text("Located in Lam Dong province") == ("Lam Dong", 10)
+    assert gazetteer.province_in_text("Hanoian cuisine") == (None, 0), "❌ Chỉ khớp nguyên từ"
+    print("✓ Địa danh / tỉnh khớp không dấu, nguyên từ")
+
+
+def test_repair_places():
+    print("\n=== TEST 2: repair_places ===")
+    gazetteer = get_gazetteer()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'gazetteer.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(Place(id=1, name="Hoan Kiem Lake", tags=["Ha Noi", "Lake"],
+                              description=["A lake in the centre of Hanoi."]))
+            session.add(Place(id=2, name="Quiet Cafe", tags=["Da Nang"], lat=16.07, lon=108.22,
+                              description=["A cafe near the Han river in Da Nang."]))
+            session.add(Place(id=3, name="Old Pagoda", tags=["Ha Noi", "Pagoda"], lat=10.77, lon=106.70,
+                              description=["The pagoda is located in Lam Dong province, near Da Lat."]))
+            session.commit()
+
+        updates = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE"):
+                updates.append(len(parameters) if executemany else 1)
+
+        report = repair_places(engine)
+        assert report.provinces_changed == 1 and report.outlier_ids == [3], report
+        assert (report.landmark_exact, report.coords_kept, report.province_fallback) == (1, 1, 1), report
+        assert updates == [2], f"❌ Cần một executemany cho 2 place: {updates}"
+
+        with Session(engine) as session:
+            lake, cafe, pagoda = (session.get(Place, i) for i in (1, 2, 3))
+            assert (lake.lat, lake.lon) == gazetteer.match_landmark("Hoan Kiem Lake")[0]
+            assert (cafe.lat, cafe.lon) == (16.07, 108.22), "❌ Không ghi đè tọa độ đúng tỉnh"
+            assert pagoda.tags == ["Lam Dong", "Pagoda"]
+            assert (pagoda.lat, pagoda.lon) == gazetteer.centroid("Lam Dong"), "❌ Outlier phải về tâm tỉnh"
+        print("✓ Tag tỉnh + tọa độ sửa đúng, 1 UPDATE executemany")
+
+        updates.clear()
+        assert repair_places(engine).updated_rows == 0 and updates == []
+        print("✓ Chạy lại: không có gì để ghi")
+
+
+if __name__ == "__main__":
+    test_matching()
+    test_repair_places()
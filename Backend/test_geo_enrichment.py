@@ -0,0 +1,104 @@
+"""
+Test geocoding + climate runner (app/services/geo_enrichment.py), chạy offline với FixtureServer
+
+Kiểm tra:
+1. Place thiếu tọa độ được geocode (fallback tâm tỉnh khi Nominatim không ra), climate
+   gán theo tọa độ làm tròn; tọa độ trùng chỉ gọi API một lần; DB ghi bằng một executemany
+2. Chạy lại: mọi response lấy từ cache trên đĩa, không có HTTP request nào
+"""
+
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.schemas import Place
+from app.services.geo_enrichment import (FixtureServer, GeoHttpClient, HostLimit, ResponseCache,
+                                         enrich_places, request_key)
+
+FAST_LIMITS = {"nominatim": HostLimit(100.0, 2), "open_meteo": HostLimit(100.0, 4)}
+
+
+def weather(lat, lon, temp):
+    return request_key("open_meteo", {"latitude": lat, "longitude": lon, "current_weather": "true"}), \
+        {"current_weather": {"temperature": temp, "windspeed": 5.0}}
+
+
+FIXTURES = dict([
+    (request_key("nominatim", {"q": "Hoan Kiem Lake, Ha Noi, Vietnam", "format": "json", "limit": 1}),
+     [{"lat": "21.0288", "lon": "105.8525"}]),
+    (request_key("nominatim", {"q": "Unknown Spot, Lam Dong, Vietnam", "format": "json", "limit": 1}), []),
+    weather(21.0, 105.9, 30.5),   # Hoan Kiem + Temple of Literature (cùng ô làm tròn)
+    weather(11.9, 108.5, 18.0),   # Lam Dong (fallback tâm tỉnh)
+])
+
+
+def make_db(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'geo.db')}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Place(id=1, name="Hoan Kiem Lake", tags=["Ha Noi", "Lake"]))
+        session.add(Place(id=2, name="Temple of Literature", tags=["Ha Noi"], lat=21.0277, lon=105.8601))
+        session.add(Place(id=3, name="Unknown Spot", tags=["Lam Dong"]))
+        session.commit()
+    return engine
+
+
+def run_once(engine, server, cache_path):
+    async def go():
+        cache = ResponseCache(cache_path)
+        client = GeoHttpClient(cache, base_url=server.base_url, host_limits=FAST_LIMITS)
+        try:
+            return await enrich_places(engine, client)
+        finally:
+            await client.aclose()
+            cache.close()
+    return asyncio.run(go())
+
+
+def test_enrich_offline_with_cache():
+    print("\n=== TEST 1: geocode + climate qua fixture server ===")
+    server = FixtureServer(FIXTURES)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_db(tmp)
+        updates = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE"):
+                updates.append(len(parameters) if executemany else 1)
+
+        cache_path = os.path.join(tmp, "cache.sqlite")
+        report = run_once(engine, server, cache_path)
+        assert (report.geocoded, report.geocode_fallback, report.climate_updated) == (1, 1, 3), report
+        # 2 geocode + 2 climate (place 1 và 2 chung ô tọa độ -> coalesced)
+        assert len(server.requests) == 4, server.requests
+        assert report.coalesced == 1
+        assert updates == [3], f"❌ Cần một executemany cho 3 place: {updates}"
+
+        with Session(engine) as session:
+            hoan_kiem, temple, unknown = (session.get(Place, i) for i in (1, 2, 3))
+            assert (hoan_kiem.lat, hoan_kiem.lon, hoan_kiem.climate) == (21.0288, 105.8525, "hot")
+            assert (temple.lat, temple.lon) == (21.0277, 105.8601), "❌ Không ghi đè tọa độ đã có"
+            assert temple.climate == "hot"
+            assert (unknown.lat, unknown.lon, unknown.climate) == (11.9404, 108.4583, "cool")
+        print(f"✓ {report.http_requests} HTTP requests, {report.coalesced} coalesced, 1 UPDATE executemany")
+
+        print("\n=== TEST 2: chạy lại dùng cache ===")
+        server.requests.clear()
+        with Session(engine) as session:
+            session.get(Place, 3).lat = None
+            session.get(Place, 3).lon = None
+            session.commit()
+        report = run_once(engine, server, cache_path)
+        assert not server.requests, f"❌ Không được gọi HTTP: {server.requests}"
+        # 1 geocode (response rỗng cũng được cache) + 3 climate
+        assert report.cache_hits == 4 and report.geocode_fallback == 1
+        print(f"✓ 0 HTTP requests, {report.cache_hits} cache hits")
+    server.close()
+
+
+if __name__ == "__main__":
+    test_enrich_offline_with_cache()
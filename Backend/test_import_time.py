@@ -0,0 +1,61 @@
+"""
+Test thời gian import app.main (cold start của API, test collection, script)
+
+Chạy `python -X importtime -c "import app.main"` trong process mới và kiểm tra:
+1. Không load các dependency nặng lúc import (LLM SDK, sqladmin, ML stack):
+   chúng chỉ được import trong lifespan hoặc ở request đầu tiên cần đến
+2. Tổng thời gian import nằm trong budget (IMPORT_TIME_BUDGET_MS, mặc định 2000ms)
+   và không cần GEMINI_API_KEY
+"""
+
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+HEAVY_MODULES = ("google.generativeai", "groq", "sqladmin", "sklearn", "pandas", "scipy", "PIL")
+
+PROBE = (
+    "import sys, app.main; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def run_importtime():
+    """Trả về (heavy modules đã load, {module: cumulative_us})"""
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, f"❌ import app.main lỗi:\n{result.stderr[-2000:]}"
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return loaded, cumulative
+
+
+def test_import_time_budget():
+    print("\n=== TEST 1: import app.main ===")
+    loaded, cumulative = run_importtime()
+
+    top = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    for name, us in top:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    assert not loaded, f"❌ Dependency nặng bị import khi load app.main: {loaded}"
+
+    total_ms = cumulative["app.main"] / 1000
+    print(f"✓ import app.main: {total_ms:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, f"❌ import app.main mất {total_ms:.0f} ms"
+
+
+if __name__ == "__main__":
+    test_import_time_budget()
@@ -0,0 +1,56 @@
+"""
+Test cho metrics (app/metrics.py + middleware trong app/main.py)
+
+Kiểm tra:
+1. Histogram/Counter render đúng Prometheus text format (bucket tích lũy, +Inf, sum)
+2. /metrics có latency theo route template và số SQL query của request
+"""
+
+from fastapi.testclient import TestClient
+
+from app.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_render():
+    print("\n=== TEST 1: Prometheus text format ===")
+    registry = Registry()
+    latency = registry.register(Histogram("demo_seconds", "Demo latency", ("route",), buckets=(0.1, 1.0)))
+    errors = registry.register(Counter("demo_errors_total", "Demo errors", ("provider",)))
+
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5.0, route="/a")
+    errors.inc(provider='gro"q')
+
+    text = registry.render()
+    print(text)
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in text, "❌ Bucket phải tích lũy"
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{route="/a"} 5.55' in text
+    assert 'demo_errors_total{provider="gro\\"q"} 1.0' in text, "❌ Label value phải được escape"
+
+
+def test_metrics_endpoint_reports_routes_and_queries():
+    print("\n=== TEST 2: /metrics ===")
+    from app.main import app
+
+    client = TestClient(app)  # không chạy lifespan, chỉ gọi route đọc
+    assert client.get("/api/v1/comments/place/1").status_code == 200
+    text = client.get("/metrics").text
+
+    route = 'route="/api/v1/comments/place/{place_id}"'
+    lines = [line for line in text.splitlines() if route in line]
+    for line in lines:
+        if "_count" in line or "_sum" in line:
+            print(f"  {line}")
+    assert any(line.startswith("http_request_duration_seconds_count") for line in lines), \
+        "❌ Thiếu latency theo route template"
+    query_sum = [line for line in lines if line.startswith("db_queries_per_request_sum")]
+    assert query_sum and float(query_sum[0].rsplit(" ", 1)[1]) >= 1, "❌ Không đếm được SQL query của request"
+    print("✓ Route template + query count có trong /metrics")
+
+
+if __name__ == "__main__":
+    test_histogram_render()
+    test_metrics_endpoint_reports_routes_and_queries()
@@ -0,0 +1,90 @@
+"""
+Test evaluation song song (evaluation/parallel_evaluate.py)
+
+Kiểm tra:
+1. compute_metrics (vectorized) cho cùng precision/recall/F1/NDCG/MAP với
+   RecommendationMetrics trên 200 user ngẫu nhiên (list ngắn hơn K, không hit, relevant rỗng)
+2. Cache ground truth: dùng lại khi DB không đổi, tạo lại khi Rating/Like thay đổi
+"""
+
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from sqlmodel import create_engine
+
+sys.path.insert(0, str(Path(__file__).parent / "evaluation"))
+
+import parallel_evaluate  # noqa: E402
+from app.config import settings  # noqa: E402
+from evaluate_recsys import RecommendationMetrics  # noqa: E402
+
+K_VALUES = [5, 10, 20]
+
+
+def test_matches_recommendation_metrics():
+    print("\n=== TEST 1: compute_metrics == RecommendationMetrics ===")
+    rng = random.Random(29)
+    max_k = max(K_VALUES)
+    recommended_lists, relevant_lists = [], []
+    for _ in range(200):
+        recommended_lists.append(rng.sample(range(1, 80), rng.randint(0, max_k)))
+        relevant_lists.append(rng.sample(range(1, 80), rng.randint(0, 15)))
+
+    recommended = np.full((len(recommended_lists), max_k), -1, dtype=np.int64)
+    for i, ids in enumerate(recommended_lists):
+        recommended[i, :len(ids)] = ids
+    metrics = parallel_evaluate.compute_metrics(recommended, relevant_lists, K_VALUES)
+
+    m = RecommendationMetrics
+    for i, (rec, rel) in enumerate(zip(recommended_lists, relevant_lists)):
+        expected = {'map': m.average_precision(rec, rel), 'num_relevant': len(rel), 'num_recommended': len(rec)}
+        for k in K_VALUES:
+            expected[f'precision@{k}'] = m.precision_at_k(rec, rel, k)
+            expected[f'recall@{k}'] = m.recall_at_k(rec, rel, k)
+            expected[f'f1@{k}'] = m.f1_at_k(rec, rel, k)
+            expected[f'ndcg@{k}'] = m.ndcg_at_k(rec, rel, k)
+        for name, value in expected.items():
+            assert abs(metrics[name][i] - value) < 1e-9, (i, name, metrics[name][i], value)
+    print(f"✓ 200 users x {len(metrics)} metrics khớp (sai số < 1e-9)")
+
+
+def test_ground_truth_cache_fingerprint():
+    print("\n=== TEST 2: cache ground truth theo fingerprint DB ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "copy.db")
+        shutil.copy(settings.DATABASE_PATH, db_path)
+        cache_path = Path(tmp) / "ground_truth_cache.json"
+        old_engine = parallel_evaluate.engine
+        parallel_evaluate.engine = create_engine(f"sqlite:///{db_path}")
+        try:
+            ground_truth = parallel_evaluate.load_ground_truth(min_interactions=1, cache_path=cache_path)
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            cached["ground_truth"] = {"12345": [1]}  # đánh dấu để biết cache được dùng lại
+            cache_path.write_text(json.dumps(cached), encoding="utf-8")
+            assert parallel_evaluate.load_ground_truth(min_interactions=1, cache_path=cache_path) == {12345: [1]}
+            print("✓ DB không đổi -> dùng lại cache")
+
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE rating SET score = 1.0 WHERE id = (SELECT MIN(id) FROM rating)")
+            assert parallel_evaluate.load_ground_truth(min_interactions=1, cache_path=cache_path) != {12345: [1]}
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("DELETE FROM \"like\" WHERE id = (SELECT MAX(id) FROM \"like\")")
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            parallel_evaluate.load_ground_truth(min_interactions=1, cache_path=cache_path)
+            assert json.loads(cache_path.read_text(encoding="utf-8"))["params"] != cached["params"]
+        finally:
+            parallel_evaluate.engine.dispose()
+            parallel_evaluate.engine = old_engine
+    print(f"✓ Sửa score / xóa like -> split được tạo lại ({len(ground_truth)} users lúc đầu)")
+
+
+if __name__ == "__main__":
+    test_matches_recommendation_metrics()
+    test_ground_truth_cache_fingerprint()
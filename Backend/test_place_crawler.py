@@ -0,0 +1,154 @@
+"""
+Test crawler song song + checkpoint (app/services/place_crawler.py) với fixture site HTML tĩnh local
+
+Kiểm tra:
+1. Parse trang chi tiết cùng selector với data_crawling (title, description "|||", image)
+2. Trang listing -> link ?item=N được đưa vào frontier; worker pool scrape title / description /
+   image, trang rỗng + 404 được ghi "empty", 503 được retry; CSV export theo thứ tự item, id = số item
+3. Resume: lần chạy đầu dừng sau 2 trang (max_pages), journal có dòng cuối ghi dở;
+   lần chạy sau chỉ fetch các trang còn thiếu; place đã export giữ nguyên id
+"""
+
+import asyncio
+import csv
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.batch_enrichment import ResultJournal
+from app.services.place_crawler import HttpFetcher, crawl, export_csv, parse_place_page
+
+
+def detail_page(n):
+    return f"""<html><body>
+    <div class="cslt-detail"><div class="header"><h4>Địa điểm {n}</h4></div><span>Hà Nội</span></div>
+    <div class="cslt-detail"><div class="header"><h4>Liên quan</h4></div></div>
+    <div class="content-detail"><p>Giới thiệu   {n}</p></div>
+    <div class="content-detail"><p>Đoạn một</p><p>Đoạn hai &amp; ba<br>tiếp</div>
+    <div class="item text-center"><a href="/img/{n}-a.jpg"><img src="/img/{n}-a.jpg"></a></div>
+    <div class="item text-center"><a href="/img/{n}-b.jpg">b</a></div>
+    </body></html>"""
+
+
+EMPTY_PAGE = "<html><body><p>Không có dữ liệu</p></body></html>"
+LISTING = "<html><body>" + "".join(f'<a href="/dest/?item={n}">{n}</a>' for n in range(1, 6)) + \
+    '<a href="/about">about</a></body></html>'
+
+
+class FixtureSite:
+    """Server HTML tĩnh; flaky: path trả 503 cho số lần đầu tiên"""
+
+    def __init__(self, flaky=None):
+        self.pages = {"/dest/?item=1": detail_page(1), "/dest/?item=2": detail_page(2),
+                      "/dest/?item=3": EMPTY_PAGE, "/dest/?item=4": detail_page(4), "/dest/list": LISTING}
+        self.flaky = dict(flaky or {})
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(self.path)
+                if site.flaky.get(self.path, 0) > 0:
+                    site.flaky[self.path] -= 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                html = site.pages.get(self.path)
+                body = (html or "not found").encode()
+                self.send_response(200 if html else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/dest/"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_crawl(seeds, journal, **kwargs):
+    return asyncio.run(crawl(seeds, HttpFetcher(3), journal, concurrency=3, backoff_base=0.01, **kwargs))
+
+
+def test_parse_place_page():
+    print("\n=== TEST 1: parse trang chi tiết ===")
+    place, links = parse_place_page(detail_page(7))
+    assert place == {
+        "title": "Địa điểm 7",
+        "description": "Giới thiệu 7|||Đoạn một|||Đoạn hai & ba\ntiếp",
+        "image": "/img/7-a.jpg|||/img/7-b.jpg",
+    }, place
+    assert parse_place_page(EMPTY_PAGE)[0] is None
+    print("✓ title / description / image đúng, trang rỗng -> None")
+
+
+def test_crawl_frontier_retry_and_export():
+    print("\n=== TEST 2: frontier + worker pool + retry ===")
+    site = FixtureSite(flaky={"/dest/?item=2": 1})
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "crawl.jsonl")
+        stats = run_crawl([site.base_url + "list"], journal, follow=r"\?item=\d+$")
+        site.close()
+
+        assert (stats.scraped, stats.empty, stats.failed) == (3, 3, 0), stats
+        assert stats.retries == 1 and stats.discovered == 5
+        assert "/about" not in site.requests, "❌ Link không khớp follow không được crawl"
+        assert len(ResultJournal(journal)) == 6
+
+        output_csv = os.path.join(tmp, "out.csv")
+        assert export_csv(journal, output_csv) == 3
+        with open(output_csv, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [(r["id"], r["title"]) for r in rows] == [("1", "Địa điểm 1"), ("2", "Địa điểm 2"), ("4", "Địa điểm 4")]
+        assert rows[0]["image"] == "/img/1-a.jpg|||/img/1-b.jpg"
+        print(f"✓ {stats.requests} requests, {stats.scraped} scraped, {stats.empty} empty, {stats.retries} retry")
+
+
+def exported_ids(journal, tmp):
+    output_csv = os.path.join(tmp, "out.csv")
+    export_csv(journal, output_csv)
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        return {row["title"]: row["id"] for row in csv.DictReader(f)}
+
+
+def test_resume_skips_scraped_urls():
+    print("\n=== TEST 3: resume ===")
+    site = FixtureSite()
+    # item 1 lỗi ở lần đầu: lần sau lấp vào trước các place đã export
+    seeds = [f"{site.base_url}?item={n}" for n in (2, 4, 1, 3, 5)]
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "crawl.jsonl")
+        stats = run_crawl(seeds, journal, max_pages=2)
+        assert stats.stopped_by_limit and stats.scraped + stats.empty == 2
+        first_run = set(site.requests)
+        first_ids = exported_ids(journal, tmp)
+        assert first_ids == {"Địa điểm 2": "2", "Địa điểm 4": "4"}, first_ids
+
+        # Crash khi đang ghi: dòng cuối bị cắt dở
+        with open(journal, "a") as f:
+            f.write('{"key": "http://x", "out')
+
+        site.requests.clear()
+        stats = run_crawl(seeds, journal)
+        site.close()
+        assert stats.resumed == 2 and len(site.requests) == 3, stats
+        assert not first_run & set(site.requests), "❌ URL đã scrape bị fetch lại"
+        assert len(ResultJournal(journal)) == 5
+        print(f"✓ Lần 2 chỉ fetch {len(site.requests)} trang còn lại")
+
+        ids = exported_ids(journal, tmp)
+        assert ids == {**first_ids, "Địa điểm 1": "1"}, f"❌ Place đã export bị đổi id: {ids}"
+        print(f"✓ id không đổi sau resume: {ids}")
+
+
+if __name__ == "__main__":
+    test_parse_place_page()
+    test_crawl_frontier_retry_and_export()
+    test_resume_skips_scraped_urls()
@@ -0,0 +1,131 @@
+"""
+Test bulk importer cho Place (app/services/place_importer.py)
+
+Kiểm tra:
+1. Import lần đầu: insert hết; chạy lại cùng file: mọi dòng unchanged, không ghi gì
+2. Sửa một dòng + thêm dòng không có id: chỉ các dòng đó được ghi (changed_ids),
+   lat/lon của Place có sẵn được giữ nguyên
+3. Dòng không có id đứng trước dòng có id (cùng chunk hoặc chunk sau, chunk_size=1):
+   id mới không trùng id của dòng sau, không place nào bị ghi đè
+4. parse_list_field: JSON, Python list string, text phân cách dấu phẩy
+"""
+
+import csv
+import os
+import tempfile
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.schemas import Place
+from app.services.place_importer import import_places_csv, parse_list_field
+
+ROWS = [
+    {"id": "1", "name": "Hoan Kiem Lake", "description": '["Lake in Hanoi"]', "image": "[]", "tags": '["Ha Noi", "Lake"]'},
+    {"id": "2", "name": "Ba Na Hills", "description": '["Hills"]', "image": '["a.jpg"]', "tags": "['Da Nang', 'Mountain']"},
+    {"id": "3", "name": "My Khe Beach", "description": "[]", "image": "[]", "tags": "Da Nang, Beach"},
+]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "name", "description", "image", "tags"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def count_writes(engine, table="place"):
+    """Đếm số lần execute INSERT vào table (executemany tính là 1)"""
+    writes = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(f"INSERT INTO {table.upper()} "):
+            writes.append(len(parameters) if executemany else 1)
+    return writes
+
+
+def test_import_is_idempotent_and_incremental():
+    print("\n=== TEST 1: import lần đầu + chạy lại ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'places.db')}")
+        SQLModel.metadata.create_all(engine)
+        writes = count_writes(engine)
+        key_writes = count_writes(engine, "placesearchkey")
+        csv_path = os.path.join(tmp, "places.csv")
+        write_csv(csv_path, ROWS)
+
+        report = import_places_csv(csv_path, engine=engine, chunk_size=2)
+        assert (report.inserted, report.updated, report.unchanged) == (3, 0, 0), report.as_dict()
+        assert report.changed_ids == {1, 2, 3}
+        print(f"✓ Lần đầu: {report.as_dict()}, {len(writes)} câu INSERT cho 2 chunk")
+        assert len(writes) == 2
+        assert key_writes == [2, 1], f"❌ Khóa tìm kiếm ghi theo từng chunk: {key_writes}"
+
+        writes.clear()
+        report = import_places_csv(csv_path, engine=engine, chunk_size=2)
+        assert (report.inserted, report.updated, report.unchanged) == (0, 0, 3), report.as_dict()
+        assert not report.changed_ids and not writes, "❌ Chạy lại không được ghi gì"
+        print("✓ Chạy lại: 3 unchanged, không có INSERT nào")
+
+        print("\n=== TEST 2: chỉ ghi dòng đổi ===")
+        with Session(engine) as session:
+            place = session.get(Place, 2)
+            place.lat, place.lon = 16.0, 108.0
+            session.add(place)
+            session.commit()
+
+        changed_rows = [dict(row) for row in ROWS]
+        changed_rows[1]["tags"] = '["Da Nang", "Mountain", "Cable Car"]'
+        changed_rows.append({"id": "", "name": "Marble Mountains", "description": "[]", "image": "[]", "tags": '["Da Nang"]'})
+        write_csv(csv_path, changed_rows)
+
+        writes.clear()
+        report = import_places_csv(csv_path, engine=engine, chunk_size=10)
+        assert (report.inserted, report.updated, report.unchanged) == (1, 1, 2), report.as_dict()
+        assert report.changed_ids == {2, 4}, report.changed_ids
+        assert writes == [2], f"❌ Cần một executemany cho 2 dòng đổi: {writes}"
+
+        with Session(engine) as session:
+            place = session.get(Place, 2)
+            assert place.tags == ["Da Nang", "Mountain", "Cable Car"]
+            assert (place.lat, place.lon) == (16.0, 108.0), "❌ Update không được xóa lat/lon"
+            assert session.get(Place, 4).name == "Marble Mountains"
+        print(f"✓ {report.as_dict()}")
+
+
+def test_new_id_does_not_collide_with_later_row():
+    print("\n=== TEST 3: id mới vs id của dòng sau ===")
+    for chunk_size in (10, 1):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'places.db')}")
+            SQLModel.metadata.create_all(engine)
+            csv_path = os.path.join(tmp, "places.csv")
+            write_csv(csv_path, [{**ROWS[0], "id": ""}, ROWS[0] | {"name": "Hoan Kiem"}, ROWS[1],
+                                 {**ROWS[2], "id": ""}, ROWS[2] | {"id": "5"}])
+
+            report = import_places_csv(csv_path, engine=engine, chunk_size=chunk_size)
+            assert (report.inserted, report.unchanged) == (5, 0), report.as_dict()
+            with Session(engine) as session:
+                names = {place.id: place.name for place in session.exec(select(Place)).all()}
+            assert names == {1: "Hoan Kiem", 2: "Ba Na Hills", 5: "My Khe Beach",
+                             6: "Hoan Kiem Lake", 7: "My Khe Beach"}, names
+            print(f"✓ chunk_size={chunk_size}: {report.as_dict()}")
+
+
+def test_parse_list_field():
+    print("\n=== TEST 4: parse_list_field ===")
+    assert parse_list_field('["a", "b"]') == ["a", "b"]
+    assert parse_list_field("['a', 'b']") == ["a", "b"]
+    assert parse_list_field('[""a"", ""b""]') == ["a", "b"]
+    assert parse_list_field("a, b") == ["a", "b"]
+    assert parse_list_field("[a, b]") == ["a", "b"]
+    assert parse_list_field("single") == ["single"]
+    assert parse_list_field("  ") == [] and parse_list_field(None) == []
+    print("✓ Các định dạng list đều parse được")
+
+
+if __name__ == "__main__":
+    test_import_is_idempotent_and_incremental()
+    test_new_id_does_not_collide_with_later_row()
+    test_parse_list_field()
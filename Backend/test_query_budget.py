@@ -0,0 +1,68 @@
+"""
+Test giới hạn số SQL query mỗi endpoint (fixture assert_max_queries trong conftest.py)
+
+Kiểm tra:
+1. Các endpoint đọc không bị N+1 (số query không tăng theo số bản ghi)
+2. Fixture bắt được N+1 (query trong vòng lặp)
+3. List của user đăng nhập (likes / comments) load place, comment, user bằng query IN
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.schemas import Place, User
+
+QUERY_BUDGETS = [
+    ("/api/v1/comments/place/1", 2),   # comment JOIN user + thumbnail avatar (uploadedimage)
+    ("/api/v1/place/1", 1),
+]
+
+# user 1 của DB mẫu có like place, like comment và nhiều comment
+USER_QUERY_BUDGETS = [
+    ("/api/v1/likes/places", 2),       # like + place IN
+    ("/api/v1/likes/comments", 4),     # like + comment / user / place IN
+    ("/api/v1/comments/user", 2),      # comment + place IN
+]
+
+
+def test_endpoint_query_budgets(assert_max_queries):
+    print("\n=== TEST 1: query budget theo endpoint ===")
+    from app.main import app
+
+    client = TestClient(app)  # không chạy lifespan, chỉ gọi route đọc
+    for path, limit in QUERY_BUDGETS:
+        with assert_max_queries(limit) as stats:
+            assert client.get(path).status_code == 200
+        print(f"✓ {path}: {stats.count} queries, {stats.total_ms:.2f} ms (max {limit})")
+
+
+def test_fixture_catches_n_plus_one(assert_max_queries):
+    print("\n=== TEST 2: N+1 bị phát hiện ===")
+    with pytest.raises(AssertionError) as error:
+        with assert_max_queries(2):
+            with Session(engine) as session:
+                places = session.exec(select(Place).limit(5)).all()
+                for place in places:
+                    session.exec(select(Place).where(Place.id == place.id)).first()
+    print(f"✓ {str(error.value).splitlines()[0]}")
+
+
+def test_user_list_query_budgets(assert_max_queries):
+    print("\n=== TEST 3: query budget list của user ===")
+    from app.main import app
+    from app.routers.auth import get_current_user
+
+    with Session(engine) as session:
+        user = session.get(User, 1)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        for path, limit in USER_QUERY_BUDGETS:
+            with assert_max_queries(limit) as stats:
+                response = client.get(path)
+            assert response.status_code == 200 and response.json(), path
+            print(f"✓ {path}: {len(response.json())} items, {stats.count} queries (max {limit})")
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
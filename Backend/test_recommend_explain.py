@@ -0,0 +1,43 @@
+"""
+Test explain=true của content-based RecSys (recommend_content_based(explain=True))
+
+Kiểm tra:
+1. Mảng explanation song song với kết quả và khớp lại score (blend + boost + penalty)
+2. Top terms nằm trong query (giao của query vector với TF-IDF row của item)
+"""
+
+from app.routers.recsysmodel import recommend_content_based, initialize_recsys
+
+
+def test_explanation_reconstructs_scores():
+    print("\n=== TEST 1: explanation khớp score ===")
+    initialize_recsys()
+    results = recommend_content_based(["Beach", "Island"], top_k=5, explain=True)
+    explanation = results.attrs["explanation"]
+
+    assert all(len(values) == len(results) for values in explanation.values()), "❌ Mảng không song song"
+    for i, score in enumerate(results["score"]):
+        # User mới (không có user_id): 60% content + 40% popularity
+        expected = (0.60 * explanation["content_score"][i] + 0.40 * explanation["popularity_score"][i]) \
+            * explanation["location_boost"][i] * explanation["dislike_penalty"][i]
+        assert abs(expected - score) < 1e-3, f"❌ {expected} != {score}"
+    assert set(explanation["diversity_pass"]) <= {1, 2, 3}
+    print(f"✓ {len(results)} kết quả, score tái tạo được từ các thành phần")
+
+    assert "explanation" not in recommend_content_based(["Beach"], top_k=3).attrs, "❌ Không explain thì không gắn attrs"
+
+
+def test_top_terms_come_from_query():
+    print("\n=== TEST 2: top TF-IDF terms ===")
+    results = recommend_content_based(["Beach", "Island"], top_k=5, explain=True)
+    top_terms = results.attrs["explanation"]["top_terms"]
+    print(f"  {top_terms}")
+    assert any(top_terms), "❌ Không có term nào"
+    for terms in top_terms:
+        assert all(any(word in ("beach", "island") for word in term.split()) for term in terms), terms
+    print("✓ Term đóng góp đều thuộc query")
+
+
+if __name__ == "__main__":
+    test_explanation_reconstructs_scores()
+    test_top_terms_come_from_query()
@@ -0,0 +1,108 @@
+"""
+Test re-rank đa dạng (app/services/rerank.py)
+
+Kiểm tra:
+1. λ = 1 + DiversityCaps cho đúng kết quả (và pass 1/2/3) của 3 pass tham lam cũ
+2. MMR giảm similarity trong list, xQuAD phủ nhiều tỉnh hơn; rerank sai tên bị profile từ chối
+"""
+
+import random
+
+import numpy as np
+
+from app.services.rerank import DiversityCaps, mmr, rerank, xquad
+from app.services.tag_vocab import TagMatrix, TagVocab
+from app.services.weight_profiles import WeightProfile
+
+PROVINCES = ["Ha Noi", "Da Nang", "Lam Dong", "Hue"]
+CATEGORIES = ["Nature", "Temple", "Beach", "Waterfall", "Lake"]
+COMMON = ["Nature"]
+
+
+def legacy_passes(tags_lists, k, limits):
+    """3 pass cũ của recommend_content_based (candidates đã sort theo score)"""
+    province_count, category_count, selected = {}, {}, []
+    category_limit = lambda c: limits.common_category if c in COMMON else limits.per_category
+
+    def categories_of(tags):
+        return tags[1:] or ["Unknown"]
+
+    def take(i, pass_no, categories):
+        selected.append((i, pass_no))
+        province = tags_lists[i][0] if tags_lists[i] else "Unknown"
+        province_count[province] = province_count.get(province, 0) + 1
+        for c in categories:
+            category_count[c] = category_count.get(c, 0) + 1
+
+    for pass_no, scale in ((1, 1.0), (2, limits.relax_factor), (3, None)):
+        for i, tags in enumerate(tags_lists):
+            if len(selected) >= k:
+                break
+            if i in {s for s, _ in selected}:
+                continue
+            province = tags[0] if tags else "Unknown"
+            if scale is None:
+                if province_count.get(province, 0) < limits.hard_province:
+                    take(i, 3, tags[1:])
+            elif province_count.get(province, 0) < limits.per_province * scale and all(
+                    category_count.get(c, 0) < category_limit(c) * scale for c in categories_of(tags)):
+                take(i, pass_no, categories_of(tags))
+    return selected
+
+
+def random_tags(rng, n):
+    return [[rng.choice(PROVINCES)] + rng.sample(CATEGORIES, rng.randint(0, 2)) if rng.random() > 0.05 else []
+            for _ in range(n)]
+
+
+def test_lambda_one_matches_legacy_passes():
+    print("\n=== TEST 1: λ = 1 == 3 pass cũ ===")
+    rng = random.Random(3)
+    profile = WeightProfile("test")
+    for _ in range(100):
+        k = rng.choice([3, 5, 10])
+        tags_lists = random_tags(rng, k * profile.candidate_multiplier)
+        matrix = TagMatrix(tags_lists, TagVocab())
+        rows = np.arange(len(tags_lists))
+        scores = np.sort(np.array([rng.random() for _ in rows]))[::-1]
+        limits = profile.diversity_limits(k)
+        caps = DiversityCaps.from_tag_matrix(matrix, rows, limits, map(matrix.vocab.id_of, COMMON))
+        selection = mmr(scores, np.eye(len(rows)), rows, k, caps, lam=1.0)
+        got = list(zip(selection.positions.tolist(), selection.levels.tolist()))
+        assert got == legacy_passes(tags_lists, k, limits)
+    print("✓ 100 lần: cùng place, cùng thứ tự, cùng pass")
+
+
+def test_diversity_and_profile():
+    print("\n=== TEST 2: MMR / xQuAD đa dạng hơn ===")
+    # 3 nhóm place gần trùng nhau, nhóm 0 có score cao nhất
+    groups = np.repeat([0, 1, 2], 6)
+    similarity = np.where(groups[:, None] == groups[None, :], 0.9, 0.05)
+    scores = 1.0 - 0.1 * groups - 0.001 * np.arange(len(groups))
+    rows = np.arange(len(groups))
+
+    by_score = mmr(scores, similarity, rows, 3, lam=1.0).positions
+    diverse = mmr(scores, similarity, rows, 3, lam=0.5).positions
+    assert set(groups[by_score]) == {0} and set(groups[diverse]) == {0, 1, 2}
+    print("✓ MMR: 3 nhóm thay vì 3 place cùng nhóm")
+
+    tags_lists = [[PROVINCES[g], "Nature"] for g in groups]
+    matrix = TagMatrix(tags_lists, TagVocab())
+    covered = {tags_lists[i][0] for i in xquad(scores, matrix, rows, 3, lam=0.3).positions}
+    assert covered == set(PROVINCES[:3])
+    assert rerank("xquad", scores, rows, 3, similarity, matrix, lam=1.0).positions.tolist() == [0, 1, 2]
+    print("✓ xQuAD phủ 3 tỉnh")
+
+    assert WeightProfile.from_dict("x", {"rerank": "xquad", "rerank_lambda": 0.5}).rerank == "xquad"
+    for bad in ({"rerank": "random"}, {"rerank_lambda": 1.5}):
+        try:
+            WeightProfile.from_dict("x", bad)
+            assert False, bad
+        except ValueError:
+            pass
+    print("✓ profile: rerank / rerank_lambda được validate")
+
+
+if __name__ == "__main__":
+    test_lambda_one_matches_legacy_passes()
+    test_diversity_and_profile()
@@ -0,0 +1,81 @@
+"""
+Test khóa tìm kiếm chuẩn hóa (app/services/search_keys.py)
+
+Kiểm tra:
+1. normalize_text bỏ dấu / chữ thường / tách từ; TagTermIndex khớp nguyên từ trong tag
+   ("hue" -> "Thua Thien Hue", không khớp "Hueland")
+2. Bảng placesearchkey / placesearchtoken: importer ghi khóa + token cùng transaction,
+   sync_search_keys bù place thiếu khóa và xóa khóa mồ côi; lọc theo tỉnh và tìm keyword
+   (tiền tố token) dùng index
+"""
+
+import csv
+import os
+import tempfile
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.schemas import Place, PlaceSearchKey
+from app.services.place_importer import import_places_csv
+from app.services.search_keys import TagTermIndex, normalize_text, sync_search_keys, token_match_ids
+
+
+def test_normalize_and_term_index():
+    print("\n=== TEST 1: normalize_text + TagTermIndex ===")
+    assert normalize_text("Đà Nẵng") == normalize_text("da  NANG") == "da nang"
+    assert normalize_text("Hồ Hoàn Kiếm (Hà Nội)") == "ho hoan kiem ha noi"
+    print("✓ Bỏ dấu (kể cả đ), chữ thường, gộp khoảng trắng")
+
+    index = TagTermIndex([1, 2, 3, 4], [["Thua Thien Hue", "Temple"], ["Hueland"], ["Đà Nẵng"], None])
+    assert index.lookup(["Huế"]) == {1}, "❌ Chỉ khớp nguyên từ"
+    assert index.lookup(["da nang", "thua thien"]) == {1, 3}
+    assert index.lookup(["nang da"]) == frozenset()
+    print("✓ Lookup cụm từ của tag, không phân biệt dấu")
+
+
+def test_search_key_table():
+    print("\n=== TEST 2: bảng placesearchkey ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'keys.db')}")
+        SQLModel.metadata.create_all(engine)
+        source = os.path.join(tmp, "places.csv")
+        with open(source, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name", "tags"])
+            writer.writerow([1, "Hồ Hoàn Kiếm", '["Hà Nội", "Lake"]'])
+            writer.writerow([2, "My Khe Beach", '["Da Nang", "Beach"]'])
+        import_places_csv(source, engine=engine)
+
+        with Session(engine) as session:
+            keys = {k.place_id: k for k in session.exec(select(PlaceSearchKey)).all()}
+            assert (keys[1].name_key, keys[1].province_key, keys[1].tags_key) == ("ho hoan kiem", "ha noi",
+                                                                                  "|ha noi|lake|")
+            print("✓ Importer ghi khóa cùng lúc với Place")
+
+            # Place thêm ngoài importer + place bị xóa -> sync bù / dọn
+            session.add(Place(id=3, name="Đà Lạt Market", tags=["Lâm Đồng"]))
+            session.exec(text("DELETE FROM place WHERE id = 2"))
+            session.commit()
+        assert sync_search_keys(engine) == 1 and sync_search_keys(engine) == 0
+
+        with Session(engine) as session:
+            keys = {k.place_id: k.province_key for k in session.exec(select(PlaceSearchKey)).all()}
+            assert keys == {1: "ha noi", 3: "lam dong"}, keys
+            plan = session.exec(text("EXPLAIN QUERY PLAN SELECT place_id FROM placesearchkey "
+                                     "WHERE province_key IN ('lam dong')")).all()
+            assert "ix_placesearchkey_province_key" in str(plan), plan
+
+            assert session.connection().execute(token_match_ids("hoan ki", prefix=True)).scalars().all() == [1]
+            assert session.connection().execute(token_match_ids("lam dong", field="tag")).scalars().all() == [3]
+            assert not session.connection().execute(token_match_ids("market", field="tag")).all()
+            assert not session.exec(text("SELECT 1 FROM placesearchtoken WHERE place_id = 2")).all()
+            query = token_match_ids("da", prefix=True).compile(compile_kwargs={"literal_binds": True})
+            plan = session.exec(text(f"EXPLAIN QUERY PLAN {query}")).all()
+            assert "SCAN placesearchtoken" not in str(plan) and "placesearchtoken_1 (token>? AND token<?)" in str(plan), plan
+        print("✓ sync_search_keys bù / dọn khóa + token; lọc tỉnh / keyword dùng index")
+
+
+if __name__ == "__main__":
+    test_normalize_and_term_index()
+    test_search_key_table()
@@ -0,0 +1,60 @@
+"""
+Test từ điển tag + ma trận tag CSR (app/services/tag_vocab.py)
+
+Kiểm tra:
+1. Tag được intern một lần, id không đổi; CSR giữ thứ tự tag (tags[0] = tỉnh)
+2. top_tags (bincount có trọng số) cho cùng kết quả, cùng thứ tự với Counter.most_common;
+   rows_with_any khớp so sánh chuỗi
+"""
+
+import random
+from collections import Counter
+
+from app.services.tag_vocab import TagMatrix, TagVocab
+
+PLACES = [
+    ["Ha Noi", "Historical", "Temple"],
+    ["Da Nang", "Beach", "Nature"],
+    [],
+    ["Ha Noi", "Lake", "Nature"],
+    None,
+]
+
+
+def test_vocab_and_csr():
+    print("\n=== TEST 1: intern + CSR ===")
+    vocab = TagVocab()
+    matrix = TagMatrix(PLACES, vocab)
+    assert len(vocab) == 7 and vocab.id_of("Ha Noi") == 0 and vocab.id_of("Unknown") == -1
+    assert vocab.decode(matrix.row(3)) == ["Ha Noi", "Lake", "Nature"]
+    assert matrix.first.tolist() == [0, vocab.id_of("Da Nang"), -1, 0, -1]
+    # Build lại với place mới: id cũ giữ nguyên, chuỗi dùng chung object
+    TagMatrix([["Beach", "Island"]], vocab)
+    assert vocab.id_of("Beach") == 4 and vocab.id_of("Island") == 7
+    assert vocab.canonical([str("Ha ") + "Noi"])[0] is vocab.tags[0]
+    print(f"✓ {len(vocab)} tag, CSR {matrix.nbytes} bytes")
+
+
+def test_counts_match_counter():
+    print("\n=== TEST 2: top_tags / rows_with_any ===")
+    rng = random.Random(7)
+    pool = ["Nature", "Beach", "Temple", "Ha Noi", "Hue", "Cave", "Lake", "Island"]
+    places = [rng.sample(pool, rng.randint(0, 5)) for _ in range(60)]
+    matrix = TagMatrix(places, TagVocab())
+    for _ in range(100):
+        rows = [rng.randrange(len(places)) for _ in range(rng.randint(0, 15))]
+        weights = [rng.choice([1, 2]) for _ in rows]
+        pool_tags = [tag for row, w in zip(rows, weights) for tag in places[row] * w]
+        expected = [tag for tag, _ in Counter(pool_tags).most_common(5)]
+        assert matrix.top_tags(rows, weights, 5) == expected
+    print("✓ top_tags giống Counter.most_common (kể cả thứ tự khi bằng nhau)")
+
+    wanted = {"Hue", "Cave"}
+    mask = matrix.rows_with_any([matrix.vocab.id_of(tag) for tag in wanted])
+    assert mask.tolist() == [bool(wanted & set(tags)) for tags in places]
+    print("✓ rows_with_any khớp so sánh chuỗi")
+
+
+if __name__ == "__main__":
+    test_vocab_and_csr()
+    test_counts_match_counter()
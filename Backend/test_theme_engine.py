@@ -0,0 +1,78 @@
+"""
+Test theme engine (app/services/theme_engine.py)
+
+Kiểm tra:
+1. ThemeCatalogue.top_k cho cùng place, cùng điểm, cùng thứ tự với chấm score_place từng
+   place rồi sort ổn định (logic cũ của rank_places); tỉnh so không phân biệt dấu
+2. Engine "theme" của /recommend (catalogue Place, tỉnh = tags[0]) và fallback
+"""
+
+import random
+
+import pandas as pd
+
+from app.schemas import GroqExtraction
+from app.services.scoring_service import TYPE_TO_THEME, score_place
+from app.services.theme_engine import ThemeCatalogue, ThemeQuery, catalogue_from_sightseeing
+
+
+def legacy_rank(ex, places, top_k):
+    scored = [(p, score_place(ex, p)) for p in places]
+    scored = [(p["id"], s) for p, s in scored if s > 0]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+def test_matches_score_place():
+    print("\n=== TEST 1: top_k == score_place + sort ===")
+    rng = random.Random(11)
+    provinces = ["Ha Noi", "Da Nang", "Lam Dong", "Khanh Hoa", None]
+    theme_pool = ["mountain", "Peak", "beach", "sea", "island", "bay", "museum", "park", "cool weather", "temple"]
+    places = [
+        {"id": 100 + i, "name": f"Place {i}", "province": rng.choice(provinces),
+         "themes": [rng.choice(theme_pool) for _ in range(rng.randint(0, 4))]}
+        for i in range(300)
+    ]
+    catalogue = catalogue_from_sightseeing(places)
+    for _ in range(200):
+        ex = GroqExtraction(location=rng.sample(["Ha Noi", "danang", "Lam Dong", "Sa Pa"], rng.randint(0, 2)),
+                            type=rng.choice(list(TYPE_TO_THEME)), budget="unknown",
+                            weather=rng.choice(["cool", "hot", "cold"]), crowded="unknown")
+        top_k = rng.choice([1, 5, 20, 500])
+        positions, scores = catalogue.top_k(ThemeQuery.from_extraction(ex), top_k)
+        got = [(int(catalogue.ids[i]), float(s)) for i, s in zip(positions, scores)]
+        assert got == legacy_rank(ex, places, top_k)
+    print("✓ 200 query: cùng id, điểm và thứ tự")
+
+    accented = catalogue_from_sightseeing([{"id": 1, "name": "Cầu Vàng", "province": "Đà Nẵng", "themes": []}])
+    assert accented.score(ThemeQuery(locations=["Da Nang"], target_themes=[])).tolist() == [0.6]
+    print("✓ 'Da Nang' khớp 'Đà Nẵng'")
+
+
+def test_theme_engine_recommend():
+    print("\n=== TEST 2: engine theme của /recommend ===")
+    from app.routers import recsysmodel
+
+    df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "name": ["Fansipan", "My Khe", "Hoan Kiem"],
+        "tags": [["Lao Cai", "Mountain", "Hiking"], ["Da Nang", "Beach"], ["Ha Noi", "Lake"]],
+        "province": ["Lao Cai", "Da Nang", "Ha Noi"],
+    })
+    old_df = recsysmodel.items_df
+    recsysmodel.items_df = df
+    try:
+        results = recsysmodel.recommend_theme(["Đà Nẵng", "beach"], top_k=5)
+        assert results["id"].tolist() == [2] and results["score"].tolist() == [1.1]
+        results = recsysmodel.recommend_theme(["mountain"], top_k=5)
+        assert results["id"].tolist() == [1] and results["score"].tolist() == [0.6667]
+        assert recsysmodel.recommend_theme(["Sa Pa"], top_k=5) is None
+        assert isinstance(recsysmodel.get_theme_catalogue(), ThemeCatalogue)
+    finally:
+        recsysmodel.items_df = old_df
+    print("✓ tỉnh (tags[0]) + theme, không khớp -> None (fallback content-based)")
+
+
+if __name__ == "__main__":
+    test_matches_score_place()
+    test_theme_engine_recommend()
@@ -0,0 +1,108 @@
+"""
+Test cho upload service (app/services/upload_service.py)
+
+Kiểm tra:
+1. Stream + giới hạn size: file quá lớn bị từ chối, không để lại file tạm
+2. Dedup theo sha256: upload cùng nội dung 2 lần chỉ lưu 1 file
+3. Thumbnail WebP đúng kích thước; size nhỏ nhất có sẵn khi save() trả về
+4. Ảnh Pillow không đọc được -> không có thumbnail; record_upload / load_thumbnails theo URL gốc
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from sqlmodel import Session, SQLModel, create_engine
+from starlette.datastructures import Headers
+
+from app.services.upload_service import UploadService, load_thumbnails, record_upload
+
+
+def _upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="photo.png",
+                      headers=Headers({"content-type": content_type}))
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 120, 200)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_size_cap_rejects_without_leftovers():
+    print("\n=== TEST 1: size cap ===")
+    with tempfile.TemporaryDirectory() as root:
+        service = UploadService(root, [160], workers=1)
+        try:
+            asyncio.run(service.save(_upload(b"x" * 3000), "avatars", max_bytes=2048))
+            assert False, "❌ File vượt giới hạn phải bị từ chối"
+        except HTTPException as e:
+            assert e.status_code == 400
+        assert os.listdir(os.path.join(root, "avatars")) == [], "❌ Còn file tạm sau khi từ chối"
+
+        try:
+            asyncio.run(service.save(_upload(b"%PDF", "application/pdf"), "avatars", max_bytes=2048))
+            assert False, "❌ Content type không phải ảnh phải bị từ chối"
+        except HTTPException as e:
+            assert e.status_code == 400
+        print("✓ Từ chối file quá lớn / sai type")
+
+
+def test_dedup_and_thumbnails():
+    print("\n=== TEST 2: dedup + thumbnails ===")
+    with tempfile.TemporaryDirectory() as root:
+        service = UploadService(root, [64, 256], workers=1)
+        data = _png(800, 400)
+
+        async def scenario():
+            first = await service.save(_upload(data), "posts", max_bytes=10 * 1024 * 1024)
+            assert os.path.exists(os.path.join(root, first.thumbnails[64][len("/uploads/"):])), \
+                "❌ Thumbnail nhỏ nhất phải có trước khi trả về"
+            second = await service.save(_upload(data), "posts", max_bytes=10 * 1024 * 1024)
+            await service.wait_for_thumbnails()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        service.shutdown()
+
+        assert first.url == second.url and second.deduplicated and not first.deduplicated
+        originals = [name for name in os.listdir(os.path.join(root, "posts")) if name.endswith(".png")]
+        assert len(originals) == 1, f"❌ Ảnh trùng bị lưu {len(originals)} lần"
+
+        for size, url in first.thumbnails.items():
+            path = os.path.join(root, url[len("/uploads/"):])
+            with Image.open(path) as thumb:
+                assert thumb.format == "WEBP"
+                assert max(thumb.size) == size, f"❌ Thumbnail {size}: {thumb.size}"
+        print(f"✓ 1 file gốc, thumbnails: {first.thumbnails}")
+
+
+def test_broken_image_and_persisted_thumbnails():
+    print("\n=== TEST 3: ảnh lỗi + lưu thumbnail ===")
+    with tempfile.TemporaryDirectory() as root:
+        service = UploadService(root, [64, 256], workers=1)
+        broken = asyncio.run(service.save(_upload(b"not an image"), "posts", max_bytes=1024))
+        photo = asyncio.run(service.save(_upload(_png(300, 300)), "avatars", max_bytes=10 * 1024 * 1024))
+        service.shutdown()
+        assert broken.thumbnails == {}, "❌ Ảnh lỗi không được trả về URL thumbnail (sẽ 404)"
+        print("✓ Pillow lỗi -> thumbnails rỗng, client dùng ảnh gốc")
+
+        engine = create_engine(f"sqlite:///{os.path.join(root, 'uploads.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            record_upload(session, broken)
+            record_upload(session, photo)
+            record_upload(session, photo)  # upload lại cùng ảnh
+            session.commit()
+            thumbnails = load_thumbnails(session, [photo.url, broken.url, None])
+        assert thumbnails == {photo.url: {str(size): url for size, url in photo.thumbnails.items()}}
+        print(f"✓ Lưu theo URL gốc: {thumbnails}")
+
+
+if __name__ == "__main__":
+    test_size_cap_rejects_without_leftovers()
+    test_dedup_and_thumbnails()
+    test_broken_image_and_persisted_thumbnails()
@@ -0,0 +1,99 @@
+"""
+Test cho cache token -> user (app/services/user_cache.py)
+
+Kiểm tra:
+1. Hit/miss, LRU giới hạn số entry
+2. Entry hết hạn theo TTL và theo claim exp của token
+3. invalidate_user xóa mọi token của user, snapshot trả về là bản copy
+4. resolve_token_user: cache miss và hit trả về cùng loại object (bản copy detached)
+"""
+
+import asyncio
+import time
+
+from app.schemas import User
+from app.services.user_cache import UserCache
+
+
+def _user(user_id, name="alice"):
+    return User(id=user_id, username=name, hashed_password="x", display_name=name.title(),
+                preferences=["Beach", "Nature"])
+
+
+def test_hit_miss_and_lru_bound():
+    print("\n=== TEST 1: hit/miss + LRU ===")
+    cache = UserCache(max_entries=2, ttl_seconds=60)
+    cache.put("token-a", {"sub": "alice"}, _user(1, "alice"))
+    cache.put("token-b", {"sub": "bob"}, _user(2, "bob"))
+
+    assert cache.get("token-a").username == "alice"  # a thành mới dùng gần nhất
+    cache.put("token-c", {"sub": "carol"}, _user(3, "carol"))  # đẩy b ra
+
+    assert cache.get("token-b") is None, "❌ Entry ít dùng nhất phải bị loại"
+    assert cache.get("token-c").id == 3
+    assert cache.stats()["entries"] == 2
+    print(f"✓ Stats: {cache.stats()}")
+
+
+def test_expiry_by_ttl_and_token_exp():
+    print("\n=== TEST 2: expiry ===")
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.put("expired", {"sub": "alice", "exp": time.time() - 1}, _user(1))
+    assert cache.get("expired") is None, "❌ Token hết hạn không được phục vụ từ cache"
+
+    short = UserCache(max_entries=10, ttl_seconds=0)
+    short.put("token", {"sub": "alice"}, _user(1))
+    assert short.get("token") is None
+    print("✓ Entry hết hạn bị bỏ qua")
+
+
+def test_invalidate_user_and_snapshot_copy():
+    print("\n=== TEST 3: invalidate + snapshot ===")
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.put("laptop", {"sub": "alice"}, _user(1))
+    cache.put("phone", {"sub": "alice"}, _user(1))
+    cache.put("other", {"sub": "bob"}, _user(2, "bob"))
+
+    snapshot = cache.get("other").to_user()
+    snapshot.preferences.append("Mountain")
+    assert cache.get("other").to_user().preferences == ["Beach", "Nature"], "❌ Snapshot bị sửa qua user trả về"
+    assert not hasattr(cache.get("other"), "hashed_password")
+
+    cache.invalidate_user(1)
+    assert cache.get("laptop") is None and cache.get("phone") is None
+    assert cache.get("other") is not None
+    print("✓ invalidate_user chỉ xóa token của user đó")
+
+
+def test_resolve_token_user_same_kind():
+    print("\n=== TEST 4: resolve_token_user miss == hit ===")
+    from sqlmodel import select
+
+    from app.database import async_session_maker
+    from app.routers.auth import resolve_token_user
+    from app.security import create_access_token
+    from app.services.user_cache import user_cache
+
+    async def run():
+        async with async_session_maker() as session:
+            username = (await session.exec(select(User.username))).first()
+            token = create_access_token({"sub": username})
+            user_cache.invalidate_user((await session.exec(select(User.id).where(User.username == username))).one())
+
+            miss = await resolve_token_user(token, session)
+            hit = await resolve_token_user(token, session)
+            assert user_cache.get(token) is not None
+            for user in (miss, hit):
+                assert user not in session, "❌ User trả về không được gắn với session"
+                assert user.hashed_password is None
+            assert miss is not hit and miss.model_dump() == hit.model_dump()
+            return username
+
+    print(f"✓ '{asyncio.run(run())}': miss và hit đều là bản copy detached, cùng field")
+
+
+if __name__ == "__main__":
+    test_hit_miss_and_lru_bound()
+    test_expiry_by_ttl_and_token_exp()
+    test_invalidate_user_and_snapshot_copy()
+    test_resolve_token_user_same_kind()
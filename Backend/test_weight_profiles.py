@@ -0,0 +1,100 @@
+"""
+Test weight profiles của content-based RecSys (app/services/weight_profiles.py)
+
+Kiểm tra:
+1. Profile rỗng == các hằng số cũ (kể cả re-rank λ = 1); file sai bị từ chối với lỗi rõ ràng
+2. Hot reload theo mtime: file mới được áp dụng, file lỗi giữ nguyên profile cũ
+3. recommend_content_based chấm điểm theo blend của profile được chọn
+"""
+
+import json
+import os
+import tempfile
+
+from app.config import settings
+from app.services.weight_profiles import WeightProfile, WeightProfileRegistry, parse_profiles
+
+
+def test_parse_and_validate():
+    print("\n=== TEST 1: parse + validate ===")
+    default_name, profiles = parse_profiles({"profiles": {"cf_heavy": {
+        "history_blend": {"content": 0.3, "cf": 0.55, "popularity": 0.15}, "province_min": 4}}})
+    assert default_name == "default" and set(profiles) == {"default", "cf_heavy"}
+
+    default = profiles["default"]
+    assert list(default.history_weights) == [0.40, 0.40, 0.20]
+    assert list(default.new_user_weights) == [0.60, 0.0, 0.40]
+    assert default.diversity_limits(10) == (3, 4, 6, 5, 1.5), default.diversity_limits(10)
+    assert profiles["cf_heavy"].diversity_limits(10).per_province == 4
+    assert default.rerank_lambda == 1.0, "❌ λ < 1 làm đổi thứ tự so với 3 pass cũ"
+    print("✓ Profile mặc định giữ nguyên các hằng số cũ")
+
+    with open(settings.WEIGHT_PROFILES_PATH, encoding="utf-8") as f:
+        shipped_default, shipped = parse_profiles(json.load(f))
+    assert shipped[shipped_default].rerank_lambda == 1.0
+    assert (shipped["diverse"].rerank, shipped["diverse"].rerank_lambda) == ("mmr", 0.7)
+    print("✓ File profile đi kèm: default theo score, 'diverse' bật MMR")
+
+    bad_inputs = [
+        {"profiles": {"x": {"history_blend": {"content": 0.5, "cf": 0.5, "popularity": 0.5}}}},
+        {"profiles": {"x": {"location_bost": 2.0}}},
+        {"profiles": {"x": {"province_min": 1.5}}},
+        {"profiles": {"x": {"dislike_penalty": 3}}},
+        {"default_profile": "missing", "profiles": {}},
+    ]
+    for data in bad_inputs:
+        try:
+            parse_profiles(data)
+        except ValueError as e:
+            print(f"  rejected: {e}")
+        else:
+            raise AssertionError(f"❌ File sai không bị từ chối: {data}")
+    print("✓ File sai bị từ chối")
+
+
+def test_hot_reload():
+    print("\n=== TEST 2: hot reload ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.json")
+        registry = WeightProfileRegistry(path, check_interval=0)
+        assert registry.get().location_boost == 1.5, "❌ Không có file thì dùng profile mặc định"
+
+        def write(data, mtime):
+            with open(path, "w") as f:
+                json.dump(data, f)
+            os.utime(path, (mtime, mtime))
+
+        write({"default_profile": "b", "profiles": {"b": {"location_boost": 2.0}}}, 1000)
+        assert registry.get().name == "b" and registry.get().location_boost == 2.0
+        print("✓ File mới được load")
+
+        write({"profiles": {"b": {"location_boost": -1}}}, 2000)
+        assert registry.get().location_boost == 2.0, "❌ File lỗi phải giữ profile cũ"
+        assert "location_boost" in registry.last_error
+        print("✓ File lỗi bị bỏ qua, vẫn dùng profile cũ")
+
+        write({"profiles": {"b": {"location_boost": 3.0}}}, 3000)
+        assert registry.get("b").location_boost == 3.0 and registry.default_name == "default"
+        assert registry.reloads == 2
+        print("✓ Sửa file xong được áp dụng ngay, không restart")
+
+
+def test_profile_changes_scores():
+    print("\n=== TEST 3: scoring theo profile ===")
+    from app.routers.recsysmodel import recommend_content_based, initialize_recsys
+
+    initialize_recsys()
+    content_only = WeightProfile.from_dict("content_only", {"new_user_blend": {"content": 1.0, "popularity": 0.0}})
+    results = recommend_content_based(["Beach", "Island"], top_k=5, explain=True, profile=content_only)
+    explanation = results.attrs["explanation"]
+    for i, score in enumerate(results["score"]):
+        expected = explanation["content_score"][i] * explanation["location_boost"][i] \
+            * explanation["dislike_penalty"][i]
+        assert abs(expected - score) < 1e-3, f"❌ {expected} != {score}"
+    print(f"✓ {len(results)} kết quả chấm bằng 100% content")
+
+
+if __name__ == "__main__":
+    test_parse_and_validate()
+    test_hot_reload()
+    test_profile_changes_scores()
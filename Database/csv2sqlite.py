@@ -1,15 +1,20 @@
+import os
 import pandas as pd
 import sqlite3
 
 csv_path = "vietnamPlaces.csv"
+parquet_path = "vietnamPlaces.parquet"   # mergeCSVs.py ghi kèm, lat/lon đã là float
 db_path = "travel_final.db"
 table_name = "sightseeing"
 
 # Các cột cần giữ
 desired_cols = ["id", "name", "kind", "lat", "lon", "province", "climate"]
 
-# Đọc CSV
-df = pd.read_csv(csv_path, dtype=str)
+# Đọc Parquet nếu có (không cũ hơn CSV), không thì đọc CSV
+if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+    df = pd.read_parquet(parquet_path)
+else:
+    df = pd.read_csv(csv_path)
 df.columns = [c.strip() for c in df.columns]
 
 # mapping tên cột
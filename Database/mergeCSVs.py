@@ -1,5 +1,6 @@
 import pandas as pd
 import glob
+import os
 
 # ⚠️ LỌC BỎ CÁC FILE ĐẦU RA và các file không phải CSV
 # Điều này ngăn file tổng hợp cũ (có thể bị trống/hỏng) tự gộp vào chính nó.
@@ -11,6 +12,15 @@ all_files = glob.glob("*.csv")
 # Lọc bỏ các file đầu ra khỏi danh sách
 files_to_merge = [f for f in all_files if f not in EXCLUDED_FILES]
 
+
+def read_source(csv_file):
+    # Có bản Parquet mới hơn (kiểu cột cố định, không parse lại text) thì đọc Parquet
+    parquet_file = os.path.splitext(csv_file)[0] + ".parquet"
+    if os.path.exists(parquet_file) and os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file):
+        return pd.read_parquet(parquet_file)
+    return pd.read_csv(csv_file)
+
+
 # Tạo list chứa các DataFrame
 dfs = []
 
@@ -19,7 +29,7 @@ print(f"Tổng cộng {len(files_to_merge)} file nguồn sẽ được gộp:")
 for file in files_to_merge:
     try:
         # Thử đọc file
-        df = pd.read_csv(file)
+        df = read_source(file)
         dfs.append(df)
         print(f"✅ Đã nạp {file} ({len(df)} dòng)")
     except pd.errors.EmptyDataError:
@@ -31,5 +41,8 @@ for file in files_to_merge:
 merged = pd.concat(dfs, ignore_index=True)
 
 # Ghi ra file tổng hợp (Lệnh này tự động xóa nội dung cũ và ghi nội dung mới)
+# Parquet (lat/lon float64) cho csv2sqlite.py, CSV cho người đọc
+merged.to_parquet("vietnamPlaces.parquet", index=False, compression="zstd")
 merged.to_csv("vietnamPlaces.csv", index=False, encoding="utf-8")
-print(f"\n🎉 Đã tạo file vietnamPlaces.csv thành công với {len(merged)} dòng dữ liệu!")
\ No newline at end of file
+os.utime("vietnamPlaces.parquet")   # Parquet không cũ hơn CSV xuất kèm
+print(f"\n🎉 Đã tạo file vietnamPlaces.parquet + vietnamPlaces.csv thành công với {len(merged)} dòng dữ liệu!")
\ No newline at end of file